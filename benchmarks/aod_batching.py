@@ -0,0 +1,56 @@
+"""Batch count and runtime of `plan_batches` on thousands of atoms.
+
+Three workloads on a storage zone of `size x size` sites:
+
+- translate: a rectangle of atoms is moved rigidly into the gate zone,
+- compact: random atoms are packed into the first rows of the gate zone in
+  row-major order,
+- random: random atoms are moved to random sites of the gate zone.
+
+Run with `python benchmarks/aod_batching.py`.
+"""
+
+import time
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.stdlib.batching import plan_batches
+
+
+def workloads(size: int, count: int, rng: np.random.Generator):
+    block = int(np.sqrt(count))
+    x, y = np.meshgrid(np.arange(block), np.arange(block), indexing="ij")
+    sources = np.stack((x.ravel(), y.ravel()), axis=1)
+    yield "translate", sources, sources + [size - block, 0]
+
+    def random_sites():
+        sites = np.sort(rng.choice(size * size, count, replace=False))
+        return np.stack(np.unravel_index(sites, (size, size))[::-1], axis=1)
+
+    sources = random_sites()
+    packed = np.arange(count)
+    yield "compact", sources, np.stack((packed % size, packed // size), axis=1)
+
+    yield "random", random_sites(), rng.permutation(random_sites())
+
+
+def main(size: int = 60, count: int = 2000, seed: int = 0):
+    storage = grid.Grid.from_positions(np.arange(size) * 5.0, np.arange(size) * 5.0)
+    gate_zone = storage.shift(0.0, 5.0 * size + 20.0)
+    rng = np.random.default_rng(seed)
+
+    print(f"{size}x{size} zones")
+    for name, sources, destinations in workloads(size, count, rng):
+        start = time.perf_counter()
+        plan = plan_batches(storage, gate_zone, sources, destinations)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>10}: {len(sources):5d} atoms, {len(plan.batches):5d} batches, "
+            f"{len(sources) / len(plan.batches):6.2f} atoms/batch, "
+            f"{elapsed * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Runtime of `CollisionChecker` on large paths.
+
+A `size x size` AOD moves a full grid of atoms through the streets between the
+sites of a static trap zone, so there are no violations and every step of the
+path is checked against every trap site. The parallel workload plays a second,
+disjoint copy of the path at the same time.
+
+Run with `python benchmarks/collision_check.py`.
+"""
+
+import time
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen.collision import CollisionChecker
+from bloqade.shuttle.codegen.taskgen import TurnOnXYSliceAction, WayPointsAction
+from bloqade.shuttle.dialects.path import Path
+
+
+def street_path(size: int, num_way_points: int, x_offset: float, tone_offset: int):
+    # half a site spacing off the rows, then off the columns, and back
+    offsets = [(0.0, 2.5), (2.5, 2.5), (2.5, 0.0), (0.0, 0.0)]
+    x_sites = x_offset + np.arange(size) * 5.0
+    y_sites = np.arange(size) * 5.0
+    way_points = [
+        grid.Grid.from_positions(x_sites + dx, y_sites + dy)
+        for dx, dy in (offsets[i % 4] for i in range(-1, num_way_points - 1))
+    ]
+    tones = ilist.IList(list(range(tone_offset, tone_offset + size)))
+    return Path(
+        tones,
+        tones,
+        [
+            WayPointsAction([way_points[0]]),
+            TurnOnXYSliceAction(slice(None), slice(None)),
+            WayPointsAction(way_points),
+        ],
+    )
+
+
+def main(size: int = 100, num_way_points: int = 200, repeat: int = 3):
+    traps = grid.Grid.from_positions(np.arange(2 * size) * 5.0, np.arange(size) * 5.0)
+    checker = CollisionChecker(1.0, {"traps": traps})
+    lhs = street_path(size, num_way_points, 0.0, 0)
+    rhs = street_path(size, num_way_points, 5.0 * size, size)
+
+    print(f"{size}x{size} tones, {num_way_points} waypoints")
+    for name, paths in (("single", [lhs]), ("parallel", [lhs, rhs])):
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            violations = checker.check_parallel(paths)
+            elapsed.append(time.perf_counter() - start)
+        print(
+            f"{name:>10}: {len(violations)} violations, "
+            f"{min(elapsed) * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
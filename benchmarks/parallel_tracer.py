@@ -0,0 +1,58 @@
+"""Time to trace a batch of rearrangements serially and with a `ParallelTracer`
+sharing one process pool between several architecture specifications.
+
+Run with `python benchmarks/parallel_tracer.py`.
+"""
+
+import time
+
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen import ParallelTracer, TraceCache
+from bloqade.shuttle.stdlib.layouts import two_col_zone
+
+
+def rearrange_args(offset: int, num_rows: int):
+    rows = ilist.IList(list(range(offset, offset + num_rows)))
+    return (rows, ilist.IList([0]), rows, ilist.IList([1]))
+
+
+def trace_batch(tracer, kernel, jobs):
+    traces = [tracer.trace(arch_spec, kernel, args) for arch_spec, args in jobs]
+    for trace in traces:
+        len(trace)
+
+
+def main(num_traces: int = 64, num_specs: int = 2, max_workers: int = 4):
+    kernel = two_col_zone.rearrange_impl
+    specs = [two_col_zone.get_spec(80 + 8 * i, 2) for i in range(num_specs)]
+
+    def get_jobs(num_rows: int):
+        return [
+            (specs[i % num_specs], rearrange_args(i % 32, num_rows))
+            for i in range(num_traces)
+        ]
+
+    start = time.perf_counter()
+    trace_batch(TraceCache(), kernel, get_jobs(32))
+    serial = time.perf_counter() - start
+
+    with ParallelTracer(max_workers=max_workers, cache=TraceCache()) as tracer:
+        start = time.perf_counter()
+        trace_batch(tracer, kernel, get_jobs(31))
+        cold = time.perf_counter() - start
+
+        # the pool is already running and the workers know the specifications
+        start = time.perf_counter()
+        trace_batch(tracer, kernel, get_jobs(32))
+        warm = time.perf_counter() - start
+
+    print(f"{num_traces} traces over {num_specs} specs, {max_workers} workers")
+    print(f"serial:         {serial * 1e3:8.1f} ms")
+    print(f"parallel, cold: {cold * 1e3:8.1f} ms")
+    print(f"parallel, warm: {warm * 1e3:8.1f} ms")
+    print(f"warm speedup:   {serial / warm:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
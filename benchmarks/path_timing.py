@@ -0,0 +1,66 @@
+"""Runtime of `TimingModel.annotate` and `TimedPath.sample` on large paths.
+
+A `size x size` AOD visits `num_way_points` random grids, with an intensity
+ramp every ten waypoints, and the annotated path is sampled at 1 MHz as a
+waveform exporter would.
+
+Run with `python benchmarks/path_timing.py`.
+"""
+
+import time
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen.taskgen import (
+    TurnOffXYSliceAction,
+    TurnOnXYSliceAction,
+    WayPointsAction,
+)
+from bloqade.shuttle.codegen.timing import ConstantJerkProfile, TimingModel
+from bloqade.shuttle.dialects.path import Path
+
+
+def random_path(size: int, num_way_points: int, seed: int = 0) -> Path:
+    rng = np.random.default_rng(seed)
+    actions = []
+    for block in range(num_way_points // 10):
+        way_points = [
+            grid.Grid.from_positions(
+                np.sort(rng.uniform(0.0, 200.0, size)),
+                np.sort(rng.uniform(0.0, 200.0, size)),
+            )
+            for _ in range(10)
+        ]
+        event = TurnOnXYSliceAction if block % 2 == 0 else TurnOffXYSliceAction
+        actions += [event(slice(None), slice(None)), WayPointsAction(way_points)]
+
+    tones = ilist.IList(list(range(size)))
+    return Path(tones, tones, [WayPointsAction([actions[1].way_points[0]])] + actions)
+
+
+def main():
+    timing = TimingModel(ConstantJerkProfile(0.55, 0.0275), ramp_time=10.0)
+    for size, num_way_points in [(10, 100), (100, 1000), (10, 10000)]:
+        path = random_path(size, num_way_points)
+        trace = path.to_compact()
+
+        start = time.perf_counter()
+        timed = timing.annotate_trace(trace, path.x_tones, path.y_tones)
+        annotate = time.perf_counter() - start
+
+        times = np.arange(0.0, timed.duration, 1.0)
+        start = time.perf_counter()
+        timed.sample(times)
+        sample = time.perf_counter() - start
+
+        print(
+            f"{size:>3} tones x {num_way_points:>5} waypoints: "
+            f"annotate {annotate * 1e3:7.2f} ms, "
+            f"sample {len(times):>8} times {sample * 1e3:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""End-to-end latency from an occupancy bitmask to the paths of a rearrangement.
+
+Compares instantiating the precompiled rearrangement templates with tracing
+`move_batch_impl` for every batch, and reports the cost of compiling the kernel
+once more through the `tweezer` dialect group.
+
+Run with `python benchmarks/rearrange_templates.py`.
+"""
+
+import time
+import timeit
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin import types
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec, Layout
+from bloqade.shuttle.codegen import TraceInterpreterPool
+from bloqade.shuttle.dialects.filled import FilledGrid
+from bloqade.shuttle.dialects.path.types import Path
+from bloqade.shuttle.prelude import tweezer
+from bloqade.shuttle.stdlib.rearrange import (
+    move_batch_impl,
+    plan_paths,
+    plan_rearrangement,
+    rearrangement_templates,
+)
+
+
+def main(size: int = 50, target: int = 30, number: int = 20, seed: int = 0):
+    zone = grid.Grid.from_positions(np.arange(size) * 5.0, np.arange(size) * 5.0)
+    arch_spec = ArchSpec(Layout({"traps": zone}, {"traps"}, set(), set()))
+    rng = np.random.default_rng(seed)
+    masks = [rng.random((size, size)) < 0.5 for _ in range(number)]
+    start = (size - target) // 2
+    target_range = range(start, start + target)
+    pool = TraceInterpreterPool()
+
+    begin = time.perf_counter()
+    rearrangement_templates(arch_spec)
+    precompile = time.perf_counter() - begin
+
+    def plan(mask):
+        filled_grid = FilledGrid.vacate(zone, np.argwhere(~mask))
+        return plan_rearrangement(filled_grid, target_range, target_range)
+
+    def templates(mask):
+        return plan_paths(plan(mask), arch_spec)
+
+    def traced(mask):
+        result = plan(mask)
+        zone_arg, *columns = result.kernel_args()
+        with pool.acquire(arch_spec) as interp:
+            return [
+                Path(
+                    x_tones=ilist.IList(range(len(columns[0][i])), elem=types.Int),
+                    y_tones=ilist.IList(range(len(columns[1][i])), elem=types.Int),
+                    path=interp.run_trace(
+                        move_batch_impl,
+                        (zone_arg, *(column[i] for column in columns)),
+                        {},
+                    ),
+                )
+                for i in range(len(result.batches))
+            ]
+
+    def run(fn):
+        return min(timeit.repeat(lambda: [fn(mask) for mask in masks], number=1))
+
+    num_batches = np.mean([len(plan(mask).batches) for mask in masks])
+    planning = run(plan)
+    instantiate = run(templates)
+    trace = run(traced)
+    compile_kernel = min(
+        timeit.repeat(lambda: tweezer(move_batch_impl.py_func), number=1, repeat=5)
+    )
+
+    print(f"{size}x{size} array, {target}x{target} target, {num_batches:.0f} batches")
+    print(f"precompile templates:   {precompile * 1e3:8.2f} ms (once)")
+    print(f"compile kernel:         {compile_kernel * 1e3:8.2f} ms (per kernel)")
+    print(f"mask -> plan:           {planning / number * 1e3:8.2f} ms")
+    print(f"mask -> paths, traced:  {trace / number * 1e3:8.2f} ms")
+    print(f"mask -> paths, template:{instantiate / number * 1e3:8.2f} ms")
+    print(f"speedup:                {trace / instantiate:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
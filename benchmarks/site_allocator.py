@@ -0,0 +1,53 @@
+"""Allocate-nearest and release on a large zone against a full scan.
+
+Every query allocates the sites closest to a random position of a half filled
+`size x size` zone and releases them again. The scan baseline computes the
+distance of every free site and partitions them.
+
+Run with `python benchmarks/site_allocator.py`.
+"""
+
+import time
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.allocator import ZoneAllocator
+
+
+def scan(free: np.ndarray, x_positions, y_positions, count: int, x, y):
+    free_x, free_y = np.nonzero(free)
+    distances = np.hypot(x_positions[free_x] - x, y_positions[free_y] - y)
+    nearest = np.argpartition(distances, count)[:count]
+    return free_x[nearest], free_y[nearest]
+
+
+def main(size: int = 300, count: int = 16, queries: int = 2000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    zone = grid.Grid.from_positions(np.arange(size) * 3.0, np.arange(size) * 3.0)
+    x_positions, y_positions = np.asarray(zone.x_positions), np.asarray(
+        zone.y_positions
+    )
+    positions = rng.uniform(0.0, 3.0 * size, size=(queries, 2))
+
+    start = time.perf_counter()
+    allocator = ZoneAllocator(zone, rng.random(zone.shape) < 0.5)
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x, y in positions:
+        allocator.release(allocator.allocate_nearest(count, x, y))
+    indexed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x, y in positions:
+        scan(allocator.free, x_positions, y_positions, count, x, y)
+    scanned = time.perf_counter() - start
+
+    print(f"{size}x{size} zone, {count} sites per query, setup {setup * 1e3:.1f} ms")
+    print(f"   indexed: {indexed / queries * 1e6:8.1f} us/query")
+    print(f"      scan: {scanned / queries * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Per-Gen overhead of tracing a short move function with and without the
+`TraceInterpreterPool`.
+
+Run with `python benchmarks/trace_pool.py`.
+"""
+
+import timeit
+
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import TraceInterpreter, TraceInterpreterPool
+from bloqade.shuttle.dialects import action
+from bloqade.shuttle.prelude import tweezer
+
+
+@tweezer
+def move_fn(x: float, y: float):
+    start = grid.from_positions([x], [y])
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(grid.shift(start, 1.0, 1.0))
+    action.turn_off(action.ALL, action.ALL)
+
+
+def main(number: int = 2000):
+    arch_spec = ArchSpec()
+    pool = TraceInterpreterPool()
+
+    def fresh():
+        return TraceInterpreter(arch_spec).run_trace(move_fn, (1.0, 2.0), {})
+
+    def pooled():
+        with pool.acquire(arch_spec) as interp:
+            return interp.run_trace(move_fn, (1.0, 2.0), {})
+
+    construct = min(timeit.repeat(lambda: TraceInterpreter(arch_spec), number=number))
+    before = min(timeit.repeat(fresh, number=number))
+    after = min(timeit.repeat(pooled, number=number))
+
+    print(f"construction:         {construct / number * 1e6:8.1f} us")
+    print(f"trace per Gen, fresh: {before / number * 1e6:8.1f} us")
+    print(f"trace per Gen, pool:  {after / number * 1e6:8.1f} us")
+    print(f"speedup:              {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
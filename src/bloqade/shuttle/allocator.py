@@ -0,0 +1,415 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+from bloqade.geometry.dialects.grid import Grid
+
+from bloqade.shuttle.arch import Layout
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+from bloqade.shuttle.spatial import Site, SiteRegistry
+
+
+class ZoneAllocator:
+    """Free sites of a single zone.
+
+    The free x indices of every row (the sites with the same y index) are kept
+    in a sorted list, so allocating and releasing a site costs a binary search
+    and nearest site queries only visit the rows and sites closer than the
+    sites they return. A boolean array of the free sites answers membership
+    queries and block searches.
+
+    """
+
+    def __init__(self, zone: Grid, occupied: Optional[np.ndarray] = None):
+        """
+        Args:
+            zone (Grid): The grid of sites.
+            occupied (np.ndarray | None): Boolean array of shape `zone.shape`
+                of the sites that are not free. Defaults to none.
+
+        """
+        self.zone = zone
+        self.x_positions = [float(x) for x in zone.x_positions]
+        self.y_positions = [float(y) for y in zone.y_positions]
+        self.free = np.ones(zone.shape, dtype=bool)
+        if occupied is not None:
+            occupied = np.asarray(occupied, dtype=bool)
+            if occupied.shape != zone.shape:
+                raise ValueError(
+                    f"Occupancy of shape {occupied.shape} does not match the "
+                    f"grid shape {zone.shape}"
+                )
+            self.free &= ~occupied
+
+        self.rows = [np.flatnonzero(column).tolist() for column in self.free.T]
+        """Sorted free x indices of every row."""
+        self.num_free = int(self.free.sum())
+
+    @classmethod
+    def from_filled(cls, filled_grid: FilledGrid) -> "ZoneAllocator":
+        """Allocator of the vacant sites of a filled grid."""
+        return cls(filled_grid.parent, filled_grid.filled_mask)
+
+    def is_free(self, x_index: int, y_index: int) -> bool:
+        return bool(self.free[x_index, y_index])
+
+    def _check(self, sites: list[tuple[int, int]], free: bool):
+        if len(set(sites)) != len(sites):
+            raise ValueError("Sites must be unique")
+        for x_index, y_index in sites:
+            if self.free[x_index, y_index] != free:
+                state = "not free" if free else "already free"
+                raise ValueError(f"Site {(x_index, y_index)} is {state}")
+
+    def occupy(self, sites: Iterable[tuple[int, int]]):
+        """Mark sites as not free.
+
+        Raises:
+            ValueError: If a site is not free, nothing is marked in that case.
+
+        """
+        sites = list(sites)
+        self._check(sites, free=True)
+        for x_index, y_index in sites:
+            row = self.rows[y_index]
+            del row[bisect_left(row, x_index)]
+            self.free[x_index, y_index] = False
+        self.num_free -= len(sites)
+
+    def release(self, sites: Iterable[tuple[int, int]]):
+        """Mark sites as free.
+
+        Raises:
+            ValueError: If a site is already free, nothing is marked in that
+                case.
+
+        """
+        sites = list(sites)
+        self._check(sites, free=False)
+        for x_index, y_index in sites:
+            insort(self.rows[y_index], x_index)
+            self.free[x_index, y_index] = True
+        self.num_free += len(sites)
+
+    def first_free(
+        self, count: int, available: Optional[np.ndarray] = None
+    ) -> list[tuple[int, int]]:
+        """The first `count` free sites in `(x, y)` order.
+
+        The free lists of the rows are merged with a heap of their smallest x
+        index, so only the rows and the free sites up to the last returned one
+        are visited.
+
+        Args:
+            count (int): Number of sites.
+            available (np.ndarray | None): Boolean array of shape `zone.shape`
+                of the sites that may be returned. Defaults to all sites.
+
+        Raises:
+            ValueError: If there are fewer free sites.
+
+        """
+        heap = [(row[0], y_index, 0) for y_index, row in enumerate(self.rows) if row]
+        heapq.heapify(heap)
+
+        sites = []
+        while heap and len(sites) < count:
+            x_index, y_index, position = heapq.heappop(heap)
+            if available is None or available[x_index, y_index]:
+                sites.append((x_index, y_index))
+            row = self.rows[y_index]
+            if position + 1 < len(row):
+                heapq.heappush(heap, (row[position + 1], y_index, position + 1))
+
+        if len(sites) < count:
+            raise ValueError(
+                f"Cannot allocate {count} sites, only {len(sites)} are free"
+            )
+        return sites
+
+    def nearest_free(self, count: int, x: float, y: float) -> list[tuple[int, int]]:
+        """The `count` free sites closest to the position `(x, y)`.
+
+        Rows are opened in order of their distance to `y` and, inside every
+        open row, the free sites are visited outwards from `x`, so the sites are
+        found in order of their distance. Ties are broken by y and then x index.
+
+        Raises:
+            ValueError: If there are fewer free sites.
+
+        """
+        if count > self.num_free:
+            raise ValueError(
+                f"Cannot allocate {count} sites, only {self.num_free} are free"
+            )
+
+        x_positions, y_positions = self.x_positions, self.y_positions
+        heap: list[tuple[float, int, int, int, int]] = []
+
+        def push(y_index: int, position: int, step: int):
+            # push the free site at `position` of the row, visited in direction `step`
+            row = self.rows[y_index]
+            if 0 <= position < len(row):
+                x_index = row[position]
+                distance = math.hypot(
+                    x_positions[x_index] - x, y_positions[y_index] - y
+                )
+                heapq.heappush(heap, (distance, y_index, x_index, position, step))
+
+        def open_row(y_index: int):
+            position = bisect_left(self.rows[y_index], x, key=x_positions.__getitem__)
+            push(y_index, position - 1, -1)
+            push(y_index, position, 1)
+
+        # rows below and above `y` are opened outwards
+        above = bisect_left(y_positions, y)
+        below = above - 1
+
+        sites = []
+        while len(sites) < count:
+            # open every row that may contain a site closer than the best one
+            while True:
+                dy_below = y - y_positions[below] if below >= 0 else math.inf
+                dy_above = (
+                    y_positions[above] - y if above < len(y_positions) else math.inf
+                )
+                if min(dy_below, dy_above) == math.inf or (
+                    heap and heap[0][0] <= min(dy_below, dy_above)
+                ):
+                    break
+                if dy_below <= dy_above:
+                    open_row(below)
+                    below -= 1
+                else:
+                    open_row(above)
+                    above += 1
+
+            _, y_index, x_index, position, step = heapq.heappop(heap)
+            sites.append((x_index, y_index))
+            push(y_index, position + step, step)
+
+        return sites
+
+    def allocate_nearest(self, count: int, x: float, y: float) -> list[tuple[int, int]]:
+        """Allocate the `count` free sites closest to `(x, y)`, see `nearest_free`."""
+        sites = self.nearest_free(count, x, y)
+        self.occupy(sites)
+        return sites
+
+    def free_block(
+        self,
+        width: int,
+        height: int,
+        x: Optional[float] = None,
+        y: Optional[float] = None,
+    ) -> tuple[range, range]:
+        """Find a `width x height` sub-grid of free sites with consecutive
+        indices.
+
+        Args:
+            width (int): Number of x indices of the block.
+            height (int): Number of y indices of the block.
+            x (float | None): If given together with `y`, the block whose center
+                is closest to `(x, y)` is returned, otherwise the block with the
+                smallest x and then y index.
+            y (float | None): See `x`.
+
+        Returns:
+            tuple[range, range]: The x indices and the y indices of the block.
+
+        Raises:
+            ValueError: If there is no free block of that size.
+
+        """
+        num_x, num_y = self.free.shape
+        if width < 1 or height < 1 or width > num_x or height > num_y:
+            raise ValueError(
+                f"Cannot allocate a {width}x{height} block in a {num_x}x{num_y} zone"
+            )
+
+        # number of free sites of every block from its summed-area table
+        table = np.zeros((num_x + 1, num_y + 1), dtype=np.intp)
+        table[1:, 1:] = self.free.cumsum(axis=0).cumsum(axis=1)
+        counts = (
+            table[width:, height:]
+            - table[:-width, height:]
+            - table[width:, :-height]
+            + table[:-width, :-height]
+        )
+        x_starts, y_starts = np.nonzero(counts == width * height)
+        if len(x_starts) == 0:
+            raise ValueError(f"No free {width}x{height} block")
+
+        best = 0
+        if x is not None and y is not None:
+            x_positions = np.asarray(self.x_positions)
+            y_positions = np.asarray(self.y_positions)
+            x_centers = (x_positions[x_starts] + x_positions[x_starts + width - 1]) / 2
+            y_centers = (y_positions[y_starts] + y_positions[y_starts + height - 1]) / 2
+            best = int(np.argmin(np.hypot(x_centers - x, y_centers - y)))
+
+        x_indices = range(int(x_starts[best]), int(x_starts[best]) + width)
+        y_indices = range(int(y_starts[best]), int(y_starts[best]) + height)
+        return x_indices, y_indices
+
+    def allocate_block(
+        self,
+        width: int,
+        height: int,
+        x: Optional[float] = None,
+        y: Optional[float] = None,
+    ) -> tuple[range, range]:
+        """Allocate a block of free sites, see `free_block`."""
+        x_indices, y_indices = self.free_block(width, height, x, y)
+        self.occupy((ix, iy) for ix in x_indices for iy in y_indices)
+        return x_indices, y_indices
+
+
+@dataclass
+class SiteAllocator:
+    """Free sites of the static traps of a layout, keyed by zone name.
+
+    Zones may overlap or alias each other, e.g. a zone and its left sites, so
+    the sites of all zones are mapped to shared physical sites with a
+    `SiteRegistry`. Occupying or releasing a site also occupies or releases the
+    sites of the other zones at the same position, so two zones never hand out
+    the same trap.
+
+    Example:
+        ```python
+        allocator = SiteAllocator.from_layout(spec.layout, {"traps": loaded})
+        sites = allocator.allocate_nearest("gate", 4, x=10.0, y=20.0)
+        allocator.release(sites)
+        ```
+
+    """
+
+    zones: dict[str, ZoneAllocator] = field(default_factory=dict)
+    registry: SiteRegistry = field(init=False, default_factory=SiteRegistry)
+    """Physical sites of the zones, in the order of `zones`."""
+
+    def __post_init__(self):
+        for zone in self.zones.values():
+            self.registry.add_zone(zone.zone)
+        self._zone_ids = list(self.zones)
+        self._zone_indices = {zone_id: i for i, zone_id in enumerate(self.zones)}
+
+        # a site occupied in one zone is occupied in every zone sharing it
+        occupied = np.zeros(self.registry.num_sites, dtype=bool)
+        for zone, site_ids in zip(self.zones.values(), self.registry.site_ids):
+            occupied[site_ids[~zone.free]] = True
+        for zone, site_ids in zip(self.zones.values(), self.registry.site_ids):
+            x_indices, y_indices = np.nonzero(occupied[site_ids] & zone.free)
+            zone.occupy(zip(x_indices.tolist(), y_indices.tolist()))
+
+    @classmethod
+    def from_layout(
+        cls, layout: Layout, filled: Optional[Mapping[str, FilledGrid]] = None
+    ) -> "SiteAllocator":
+        """Create an allocator of the static traps of a layout.
+
+        Args:
+            layout (Layout): The layout.
+            filled (Mapping[str, FilledGrid] | None): Initial occupancy of some
+                of the zones, the filled sites are not free in any zone. Other
+                sites start empty.
+
+        Raises:
+            ValueError: If a filled grid refers to an unknown zone or does not
+                have the shape of its zone.
+
+        """
+        filled = filled or {}
+        unknown = set(filled) - set(layout.static_traps)
+        if unknown:
+            raise ValueError(f"Unknown zones {sorted(unknown)}")
+
+        zones = {}
+        for zone_id, zone in layout.static_traps.items():
+            occupied = filled[zone_id].filled_mask if zone_id in filled else None
+            zones[zone_id] = ZoneAllocator(zone, occupied)
+        return cls(zones)
+
+    def __getitem__(self, zone_id: str) -> ZoneAllocator:
+        return self.zones[zone_id]
+
+    def num_free(self, zone_id: str) -> int:
+        return self.zones[zone_id].num_free
+
+    def allocate_nearest(
+        self, zone_id: str, count: int, x: float, y: float
+    ) -> list[Site]:
+        """Allocate the `count` free sites of a zone closest to `(x, y)`."""
+        sites = [
+            Site(zone_id, x_index, y_index)
+            for x_index, y_index in self.zones[zone_id].nearest_free(count, x, y)
+        ]
+        self.occupy(sites)
+        return sites
+
+    def allocate_block(
+        self,
+        zone_id: str,
+        width: int,
+        height: int,
+        x: Optional[float] = None,
+        y: Optional[float] = None,
+    ) -> tuple[range, range]:
+        """Allocate a block of free sites of a zone, see `ZoneAllocator.free_block`."""
+        x_indices, y_indices = self.zones[zone_id].free_block(width, height, x, y)
+        self.occupy(Site(zone_id, ix, iy) for ix in x_indices for iy in y_indices)
+        return x_indices, y_indices
+
+    def _sharing(self, sites: Iterable[Site]) -> dict[str, list[tuple[int, int]]]:
+        # the sites of every zone at the positions of `sites`
+        by_zone: dict[str, list[tuple[int, int]]] = {}
+        for zone_id, x_index, y_index in sites:
+            by_zone.setdefault(zone_id, []).append((x_index, y_index))
+
+        site_ids = []
+        sharing: dict[str, list[tuple[int, int]]] = {}
+        for zone_id, zone_sites in by_zone.items():
+            zone_index = self._zone_indices[zone_id]
+            x_indices, y_indices = np.array(zone_sites, dtype=np.intp).T
+            site_ids.append(self.registry.site_ids[zone_index][x_indices, y_indices])
+            shared = self.registry.sharing(zone_index, x_indices, y_indices)
+            for other, (other_x, other_y) in shared.items():
+                sharing.setdefault(self._zone_ids[other], []).extend(
+                    zip(other_x.tolist(), other_y.tolist())
+                )
+
+        if site_ids and len(np.unique(np.concatenate(site_ids))) != sum(
+            map(len, site_ids)
+        ):
+            raise ValueError("Sites must be unique")
+        return sharing
+
+    def occupy(self, sites: Iterable[Site]):
+        """Mark sites as not free in every zone, see `ZoneAllocator.occupy`.
+
+        Raises:
+            ValueError: If a site is not free, nothing is marked in that case.
+
+        """
+        sharing = self._sharing(sites)
+        for zone_id, zone_sites in sharing.items():
+            self.zones[zone_id]._check(zone_sites, free=True)
+        for zone_id, zone_sites in sharing.items():
+            self.zones[zone_id].occupy(zone_sites)
+
+    def release(self, sites: Iterable[Site]):
+        """Mark sites as free in every zone, see `ZoneAllocator.release`.
+
+        Raises:
+            ValueError: If a site is already free, nothing is marked in that
+                case.
+
+        """
+        sharing = self._sharing(sites)
+        for zone_id, zone_sites in sharing.items():
+            self.zones[zone_id]._check(zone_sites, free=False)
+        for zone_id, zone_sites in sharing.items():
+            self.zones[zone_id].release(zone_sites)
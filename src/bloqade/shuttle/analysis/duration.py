@@ -0,0 +1,333 @@
+import math
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Mapping, Optional, Sequence
+
+from kirin import interp, ir
+from kirin.analysis import ForwardExtra, ForwardFrame, const
+from kirin.dialects import func, scf
+from kirin.lattice import EmptyLattice
+
+from bloqade.shuttle.codegen.timing import TimingModel
+from bloqade.shuttle.dialects import path
+from bloqade.shuttle.rewrite.auto_scheduler import (
+    CostModel,
+    UnitCost,
+    list_schedule,
+    summarize,
+)
+
+
+def _scale(value: float, factor: float) -> float:
+    # nothing repeated forever still takes no time
+    return 0.0 if value == 0.0 or factor == 0.0 else value * factor
+
+
+@dataclass(frozen=True)
+class Duration:
+    """Bounds and expectation of the wall-clock time of a piece of a program."""
+
+    minimum: float = 0.0
+    """Shortest possible duration."""
+    maximum: float = 0.0
+    """Longest possible duration, `math.inf` if unbounded."""
+    expected: float = 0.0
+    """Expected duration."""
+    critical_path: tuple[ir.Statement, ...] = field(default=(), compare=False)
+    """The timed statements executed along the longest path, loop bodies once."""
+
+    @classmethod
+    def exact(
+        cls, value: float, critical_path: tuple[ir.Statement, ...] = ()
+    ) -> "Duration":
+        return cls(value, value, value, critical_path)
+
+    def then(self, other: "Duration") -> "Duration":
+        """This duration followed by `other`."""
+        return Duration(
+            self.minimum + other.minimum,
+            self.maximum + other.maximum,
+            self.expected + other.expected,
+            self.critical_path + other.critical_path,
+        )
+
+    def either(self, other: "Duration", probability: float = 0.5) -> "Duration":
+        """Either this duration, with `probability`, or `other`."""
+        longest = self if self.maximum >= other.maximum else other
+        return Duration(
+            min(self.minimum, other.minimum),
+            longest.maximum,
+            _scale(self.expected, probability)
+            + _scale(other.expected, 1.0 - probability),
+            longest.critical_path,
+        )
+
+    def repeat(
+        self, minimum: float, maximum: float, expected: Optional[float] = None
+    ) -> "Duration":
+        """This duration repeated between `minimum` and `maximum` times."""
+        return Duration(
+            _scale(self.minimum, minimum),
+            _scale(self.maximum, maximum),
+            _scale(self.expected, maximum if expected is None else expected),
+            self.critical_path,
+        )
+
+    @classmethod
+    def sequence(cls, durations: Iterable["Duration"]) -> "Duration":
+        """Durations played one after the other."""
+        result = cls()
+        for duration in durations:
+            result = result.then(duration)
+        return result
+
+    @classmethod
+    def parallel(cls, durations: Sequence["Duration"]) -> "Duration":
+        """Durations played at the same time."""
+        if not durations:
+            return cls()
+        longest = max(durations, key=lambda duration: duration.maximum)
+        return Duration(
+            max(duration.minimum for duration in durations),
+            longest.maximum,
+            max(duration.expected for duration in durations),
+            longest.critical_path,
+        )
+
+
+UNKNOWN = Duration(0.0, math.inf, math.inf)
+"""Duration of something that cannot be timed statically."""
+
+
+@dataclass
+class DurationFrame(ForwardFrame[EmptyLattice]):
+    """Frame for the duration analysis."""
+
+    duration: Duration = field(default_factory=Duration)
+    """Duration of the statements evaluated so far in the frame."""
+
+
+@dataclass
+class DurationAnalysis(ForwardExtra[DurationFrame, EmptyLattice]):
+    """Forward analysis predicting the wall-clock time of a move kernel.
+
+    Played paths are timed with `timing`: paths known at compile time or traced
+    from constant inputs are timed exactly, `path.Parallel` nodes take as long as
+    their longest path and `path.Auto` nodes take between their longest path and
+    the sum of their paths, expecting the layers `list_schedule` finds with
+    `cost_model` and `margin`, which should match the `AutoSchedule` pass. Any
+    other statement takes the time given by `costs` for its type or one of its
+    base classes, zero if there is none.
+
+    Loops over constant iterables are repeated their number of iterations and
+    other loops any number of times, expecting `expected_trip_count`
+    iterations, branches on constant conditions are resolved, and invoked
+    kernels are summarized once. The analysis reads the
+    constant hints, so the kernel should be folded first, which `move` does by
+    default.
+
+    Example:
+        ```python
+        analysis = DurationAnalysis(
+            move,
+            timing=TimingModel.from_arch_spec(arch_spec),
+            costs={gate.TopHatCZ: 0.25, measure.Measure: 500.0},
+        )
+        duration = analysis.estimate(main)
+        ```
+
+    """
+
+    keys = ["duration"]
+    lattice = EmptyLattice
+    timing: Optional[TimingModel] = None
+    """Timing of the paths, every path is unknown if None."""
+    costs: Mapping[type[ir.Statement], "float | Duration"] = field(default_factory=dict)
+    """Duration of the statements of every type."""
+    unknown: Duration = UNKNOWN
+    """Duration of paths and calls that cannot be timed."""
+    branch_probability: float = 0.5
+    """Probability of taking the `then` branch of a conditional."""
+    expected_trip_count: float = 1.0
+    """Expected number of iterations of loops over iterables unknown at compile
+    time."""
+    cost_model: CostModel = field(default_factory=UnitCost)
+    """Cost of the paths when scheduling the layers of `path.Auto` nodes."""
+    margin: float = 0.0
+    """Bounding boxes closer than `margin` overlap when scheduling `path.Auto`
+    nodes."""
+    summaries: dict[ir.Method, Duration] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    """Duration of the kernels invoked so far."""
+
+    def eval_stmt_fallback(self, frame: DurationFrame, stmt: ir.Statement):
+        if (cost := self.statement_duration(stmt)) is not None:
+            frame.duration = frame.duration.then(cost)
+        return tuple(self.lattice.top() for _ in stmt.results)
+
+    def initialize_frame(
+        self, code: ir.Statement, *, has_parent_access: bool = False
+    ) -> DurationFrame:
+        return DurationFrame(code, has_parent_access=has_parent_access)
+
+    def run_method(self, method: ir.Method, args: tuple[EmptyLattice, ...]):
+        return self.run_callable(method.code, (self.lattice.bottom(),) + args)
+
+    def estimate(self, method: ir.Method) -> Duration:
+        """Duration of a call of `method`."""
+        frame, _ = self.run_analysis(method, no_raise=False)
+        return frame.duration
+
+    def statement_duration(self, stmt: ir.Statement) -> Optional[Duration]:
+        """Duration of a statement from `costs`, None if it has no cost."""
+        for stmt_type in type(stmt).__mro__:
+            if (cost := self.costs.get(stmt_type)) is None:
+                continue
+            if not isinstance(cost, Duration):
+                cost = Duration.exact(cost)
+            return replace(cost, critical_path=(stmt,))
+        return None
+
+    def path_duration(self, value: ir.SSAValue) -> Duration:
+        """Duration of playing the path `value`."""
+        owner = value.owner
+        if isinstance(owner, path.Parallel):
+            return Duration.parallel([self.path_duration(item) for item in owner.paths])
+        if isinstance(owner, path.Auto):
+            durations = [self.path_duration(item) for item in owner.paths]
+            layers = list_schedule(
+                [summarize(item) for item in owner.paths], self.cost_model, self.margin
+            )
+            return Duration(
+                max((duration.minimum for duration in durations), default=0.0),
+                sum(duration.maximum for duration in durations),
+                sum(max(durations[i].expected for i in layer) for layer in layers),
+                Duration.sequence(durations).critical_path,
+            )
+
+        if self.timing is None:
+            return self.unknown
+        hint = value.hints.get("const")
+        if isinstance(hint, const.Value) and isinstance(hint.data, path.Path):
+            return Duration.exact(self.timing.duration(hint.data.path))
+        if (actions := summarize(value).actions) is not None:
+            return Duration.exact(self.timing.duration(actions))
+        return self.unknown
+
+    def invoke_duration(
+        self, method: ir.Method, args: tuple[EmptyLattice, ...]
+    ) -> Duration:
+        """Duration of a call of `method`, summarized on the first call."""
+        if (summary := self.summaries.get(method)) is None:
+            # recursive calls cannot be bounded
+            self.summaries[method] = self.unknown
+            callee_frame, _ = self.run_method(method, args)
+            summary = self.summaries[method] = callee_frame.duration
+        return summary
+
+
+def _trip_count(iterable: ir.SSAValue) -> Optional[int]:
+    hint = iterable.hints.get("const")
+    if isinstance(hint, const.Value):
+        try:
+            return len(hint.data)
+        except TypeError:
+            pass
+    return None
+
+
+@path.dialect.register(key="duration")
+class Path(interp.MethodTable):
+
+    @interp.impl(path.Play)
+    def play(self, _interp: DurationAnalysis, frame: DurationFrame, stmt: path.Play):
+        duration = _interp.path_duration(stmt.path)
+        frame.duration = frame.duration.then(replace(duration, critical_path=(stmt,)))
+        return ()
+
+
+@scf.dialect.register(key="duration")
+class Scf(interp.MethodTable):
+
+    @interp.impl(scf.IfElse)
+    def ifelse(self, _interp: DurationAnalysis, frame: DurationFrame, stmt: scf.IfElse):
+        cond = stmt.cond.hints.get("const")
+        results = []
+        durations = []
+        for body, taken in ((stmt.then_body, True), (stmt.else_body, False)):
+            if isinstance(cond, const.Value) and bool(cond.data) is not taken:
+                continue
+            with _interp.new_frame(stmt, has_parent_access=True) as body_frame:
+                results.append(
+                    _interp.run_ssacfg_region(
+                        body_frame, body, (_interp.lattice.top(),)
+                    )
+                )
+            durations.append(body_frame.duration)
+
+        if len(durations) == 2:
+            then_duration, else_duration = durations
+            duration = then_duration.either(else_duration, _interp.branch_probability)
+        else:
+            (duration,) = durations
+        frame.duration = frame.duration.then(duration)
+
+        if len(results) == 1 and isinstance(results[0], tuple):
+            return results[0]
+        return tuple(_interp.lattice.top() for _ in stmt.results)
+
+    @interp.impl(scf.For)
+    def for_loop(self, _interp: DurationAnalysis, frame: DurationFrame, stmt: scf.For):
+        args = (_interp.lattice.top(),) * (len(stmt.initializers) + 1)
+        with _interp.new_frame(stmt, has_parent_access=True) as body_frame:
+            _interp.run_ssacfg_region(body_frame, stmt.body, args)
+
+        body = body_frame.duration
+        if (count := _trip_count(stmt.iterable)) is not None:
+            duration = body.repeat(count, count)
+        else:
+            duration = body.repeat(0, math.inf, _interp.expected_trip_count)
+        frame.duration = frame.duration.then(duration)
+        return args[1:]
+
+    @interp.impl(scf.Yield)
+    def yield_stmt(
+        self, _interp: DurationAnalysis, frame: DurationFrame, stmt: scf.Yield
+    ):
+        return interp.YieldValue(frame.get_values(stmt.args))
+
+
+@func.dialect.register(key="duration")
+class Func(interp.MethodTable):
+
+    @interp.impl(func.Invoke)
+    def invoke(
+        self, _interp: DurationAnalysis, frame: DurationFrame, stmt: func.Invoke
+    ):
+        args = (_interp.lattice.top(),) * len(stmt.inputs)
+        frame.duration = frame.duration.then(_interp.invoke_duration(stmt.callee, args))
+        return (_interp.lattice.top(),)
+
+    @interp.impl(func.Call)
+    def call(self, _interp: DurationAnalysis, frame: DurationFrame, stmt: func.Call):
+        callee = stmt.callee.hints.get("const")
+        args = (_interp.lattice.top(),) * len(stmt.inputs)
+        if (
+            isinstance(callee, const.PartialLambda)
+            and (trait := callee.code.get_trait(ir.CallableStmtInterface)) is not None
+        ):
+            body = trait.get_callable_region(callee.code)
+            with _interp.new_frame(stmt) as callee_frame:
+                _interp.run_ssacfg_region(callee_frame, body, args)
+            duration = callee_frame.duration
+        else:
+            duration = _interp.unknown
+
+        frame.duration = frame.duration.then(duration)
+        return (_interp.lattice.top(),)
+
+    @interp.impl(func.Return)
+    def return_stmt(
+        self, _interp: DurationAnalysis, frame: DurationFrame, stmt: func.Return
+    ):
+        return interp.ReturnValue(frame.get_values(stmt.results))
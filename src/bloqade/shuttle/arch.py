@@ -1,11 +1,14 @@
-from dataclasses import dataclass, field
+from dataclasses import FrozenInstanceError, dataclass, field
 from itertools import chain
-from typing import cast
+from types import MappingProxyType
+from typing import Iterable, Optional, cast
 
 import numpy as np
 from bloqade.geometry.dialects.grid import Grid
 from kirin.interp import Interpreter
 
+from bloqade.shuttle.spatial import LayoutIndex, Site
+
 
 @dataclass
 class Layout:
@@ -24,14 +27,25 @@ class Layout:
     special_grid: dict[str, Grid] = field(default_factory=dict, kw_only=True)
     """Set of special grid values that are not static traps, but can be used for specific purposes."""
 
+    aliases: set[str] = field(default_factory=set, kw_only=True)
+    """The set of static trap names that are alternative names of another zone."""
+
     _zone_to_id: dict[Grid, str] = field(
         default_factory=dict, init=False, compare=False, repr=False
     )
+    _index: Optional[LayoutIndex] = field(
+        default=None, init=False, compare=False, repr=False
+    )
+    _index_zones: tuple[tuple[str, Grid], ...] = field(
+        default=(), init=False, compare=False, repr=False
+    )
 
     def __post_init__(self):
         for zone_id, zone in chain(
             self.static_traps.items(), self.special_grid.items()
         ):
+            if zone_id in self.aliases and zone_id in self.static_traps:
+                continue
             if zone in self._zone_to_id:
                 raise ValueError(
                     f"Duplicate static trap zone detected: {zone_id}, {zone}, please ensure all names point to a unique set of locations"
@@ -39,11 +53,57 @@ class Layout:
 
             self._zone_to_id[zone] = zone_id
 
+        for zone_id in self.aliases:
+            if zone_id not in self.static_traps:
+                raise ValueError(f"Alias {zone_id!r} is not a static trap")
+            self._zone_to_id.setdefault(self.static_traps[zone_id], zone_id)
+
     def get_zone_id(self, zone: Grid) -> str | None:
         """Get the zone ID for a given grid, if it exists in static_traps or special_grid."""
         return self._zone_to_id.get(zone, None)
 
+    @property
+    def index(self) -> LayoutIndex:
+        """Spatial index of the sites of `static_traps` and `special_grid`.
+
+        The index is built on first use and rebuilt after `static_traps` or
+        `special_grid` are mutated or reassigned. Static traps come first, so
+        lookups of positions shared with a special grid return the static trap,
+        even if the special grid has the same name.
+
+        """
+        zones = tuple(chain(self.static_traps.items(), self.special_grid.items()))
+        if (
+            self._index is None
+            or len(zones) != len(self._index_zones)
+            or any(
+                name != cached_name or zone is not cached_zone
+                for (name, zone), (cached_name, cached_zone) in zip(
+                    zones, self._index_zones
+                )
+            )
+        ):
+            self._index = LayoutIndex.from_zones(zones)
+            self._index_zones = zones
+
+        return self._index
+
+    def site_at(self, x: float, y: float, atol: float = 1e-6) -> Site | None:
+        """Get the zone and (ix, iy) site located at a position, if any."""
+        return self.index.site_at(x, y, atol)
+
+    def nearest_site(self, x: float, y: float) -> tuple[Site, float]:
+        """Get the site closest to a position and its distance."""
+        return self.index.nearest_site(x, y)
+
+    def sites_within(self, x: float, y: float, radius: float) -> list[Site]:
+        """Get all sites within `radius` of a position."""
+        return self.index.sites_within(x, y, radius)
+
     def __hash__(self):
+        return self._compute_hash()
+
+    def _compute_hash(self) -> int:
         return hash(
             (
                 frozenset(self.static_traps.items()),
@@ -51,14 +111,33 @@ class Layout:
                 frozenset(self.has_cz),
                 frozenset(self.has_local),
                 frozenset(self.special_grid.items()),
+                frozenset(self.aliases),
             )
         )
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Layout):
             return NotImplemented
         return (
-            self.static_traps == other.static_traps and self.fillable == other.fillable
+            self.static_traps == other.static_traps
+            and self.fillable == other.fillable
+            and self.has_cz == other.has_cz
+            and self.has_local == other.has_local
+            and self.special_grid == other.special_grid
+            and self.aliases == other.aliases
+        )
+
+    def freeze(self) -> "FrozenLayout":
+        """Get an immutable copy of the layout with a precomputed hash."""
+        return FrozenLayout(
+            dict(self.static_traps),
+            set(self.fillable),
+            set(self.has_cz),
+            set(self.has_local),
+            special_grid=dict(self.special_grid),
+            aliases=set(self.aliases),
         )
 
     def bounding_box(self) -> tuple[float, float, float, float]:
@@ -137,6 +216,75 @@ class Layout:
         plt.show()
 
 
+class FrozenLayout(Layout):
+    """Immutable `Layout` with a hash computed once at construction.
+
+    The zones are stored in read-only mappings and the sets of zone names are
+    frozensets, so a frozen layout can be shared and used as a cache key. It
+    compares equal to a `Layout` with the same zones, and two frozen layouts
+    compare their hashes first. Use `LayoutBuilder` to construct a layout
+    incrementally.
+
+    """
+
+    def __post_init__(self):
+        self.static_traps = MappingProxyType(dict(self.static_traps))  # type: ignore
+        self.special_grid = MappingProxyType(dict(self.special_grid))  # type: ignore
+        self.fillable = frozenset(self.fillable)  # type: ignore
+        self.has_cz = frozenset(self.has_cz)  # type: ignore
+        self.has_local = frozenset(self.has_local)  # type: ignore
+        self.aliases = frozenset(self.aliases)  # type: ignore
+        super().__post_init__()
+        self._zone_to_id = MappingProxyType(self._zone_to_id)  # type: ignore
+        self._hash = self._compute_hash()
+
+    def __setattr__(self, name, value):
+        # the spatial index is still built lazily
+        if "_hash" in self.__dict__ and name not in ("_index", "_index_zones"):
+            raise FrozenInstanceError(f"cannot assign to field {name!r}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __reduce__(self):
+        return (
+            Layout.freeze,
+            (
+                Layout(
+                    dict(self.static_traps),
+                    set(self.fillable),
+                    set(self.has_cz),
+                    set(self.has_local),
+                    special_grid=dict(self.special_grid),
+                    aliases=set(self.aliases),
+                ),
+            ),
+        )
+
+    @property
+    def index(self) -> LayoutIndex:
+        """Spatial index of the sites of `static_traps` and `special_grid`."""
+        if self._index is None:
+            self._index = LayoutIndex.from_zones(
+                chain(self.static_traps.items(), self.special_grid.items())
+            )
+        return self._index
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, FrozenLayout) and self._hash != other._hash:
+            return False
+        return super().__eq__(other)
+
+    def freeze(self) -> "FrozenLayout":
+        return self
+
+
 def _default_layout():
     zone = Grid.from_positions(
         range(16),
@@ -158,6 +306,9 @@ class ArchSpec:
     int_constants: dict[str, int] = field(default_factory=dict)
 
     def __hash__(self):
+        return self._compute_hash()
+
+    def _compute_hash(self) -> int:
         return hash(
             (
                 self.layout,
@@ -166,6 +317,241 @@ class ArchSpec:
             )
         )
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, ArchSpec):
+            return NotImplemented
+        return (
+            self.layout == other.layout
+            and self.float_constants == other.float_constants
+            and self.int_constants == other.int_constants
+        )
+
+    def freeze(self) -> "FrozenArchSpec":
+        """Get an immutable copy of the specification with a precomputed hash."""
+        return FrozenArchSpec(self.layout, self.float_constants, self.int_constants)
+
+
+@dataclass(frozen=True, eq=False)
+class FrozenArchSpec(ArchSpec):
+    """Immutable `ArchSpec` with a hash computed once at construction.
+
+    The layout is frozen and the constants are stored in read-only mappings.
+    Use `ArchSpecBuilder` to construct a specification incrementally.
+
+    """
+
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "layout", self.layout.freeze())
+        object.__setattr__(
+            self, "float_constants", MappingProxyType(dict(self.float_constants))
+        )
+        object.__setattr__(
+            self, "int_constants", MappingProxyType(dict(self.int_constants))
+        )
+        object.__setattr__(self, "_hash", self._compute_hash())
+
+    def __reduce__(self):
+        return (
+            FrozenArchSpec,
+            (self.layout, dict(self.float_constants), dict(self.int_constants)),
+        )
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, FrozenArchSpec) and self._hash != other._hash:
+            return False
+        return super().__eq__(other)
+
+    def freeze(self) -> "FrozenArchSpec":
+        return self
+
+
+@dataclass
+class LayoutBuilder:
+    """Incrementally construct a `FrozenLayout`.
+
+    Example:
+        ```python
+        builder = LayoutBuilder.from_layout(base_layout)
+        builder.add_static_trap("left_traps", gate_zone[::2, :], fillable=True)
+        builder.mark_cz("gate_zone")
+        layout = builder.build()
+        ```
+
+    """
+
+    static_traps: dict[str, Grid] = field(default_factory=dict)
+    fillable: set[str] = field(default_factory=set)
+    has_cz: set[str] = field(default_factory=set)
+    has_local: set[str] = field(default_factory=set)
+    special_grid: dict[str, Grid] = field(default_factory=dict)
+    aliases: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_layout(cls, layout: Layout) -> "LayoutBuilder":
+        """Start from a copy of the zones of `layout`."""
+        return cls(
+            dict(layout.static_traps),
+            set(layout.fillable),
+            set(layout.has_cz),
+            set(layout.has_local),
+            dict(layout.special_grid),
+            set(layout.aliases),
+        )
+
+    def add_static_trap(
+        self,
+        zone_id: str,
+        zone: Grid,
+        *,
+        fillable: bool = False,
+        has_cz: bool = False,
+        has_local: bool = False,
+    ) -> "LayoutBuilder":
+        """Add a static trap zone.
+
+        Args:
+            zone_id (str): Name of the zone.
+            zone (Grid): Positions of the traps.
+            fillable (bool): Whether the zone is fillable by the sorter.
+            has_cz (bool): Whether CZ gates can be applied in the zone.
+            has_local (bool): Whether local single qubit gates can be applied
+                in the zone.
+
+        Returns:
+            LayoutBuilder: The builder itself.
+
+        Raises:
+            ValueError: If `zone_id` is already a static trap.
+
+        """
+        if zone_id in self.static_traps:
+            raise ValueError(f"Static trap {zone_id!r} already exists")
+
+        self.static_traps[zone_id] = zone
+        for flag, target in (
+            (fillable, self.fillable),
+            (has_cz, self.has_cz),
+            (has_local, self.has_local),
+        ):
+            if flag:
+                target.add(zone_id)
+        return self
+
+    def add_special_grid(self, grid_id: str, zone: Grid) -> "LayoutBuilder":
+        """Add a special grid, raises a ValueError if `grid_id` already exists."""
+        if grid_id in self.special_grid:
+            raise ValueError(f"Special grid {grid_id!r} already exists")
+
+        self.special_grid[grid_id] = zone
+        return self
+
+    def add_alias(self, alias: str, zone_id: str) -> "LayoutBuilder":
+        """Add `alias` as an alternative name of the static trap `zone_id`.
+
+        The alias is a static trap of its own, but `Layout.get_zone_id` keeps
+        returning `zone_id` for its positions.
+
+        Raises:
+            ValueError: If `alias` already exists or `zone_id` does not.
+
+        """
+        if zone_id not in self.static_traps:
+            raise ValueError(f"Unknown static trap {zone_id!r}")
+        if alias in self.static_traps:
+            raise ValueError(f"Static trap {alias!r} already exists")
+
+        self.static_traps[alias] = self.static_traps[zone_id]
+        self.aliases.add(alias)
+        return self
+
+    def _mark(self, target: set[str], zone_ids: Iterable[str]) -> "LayoutBuilder":
+        for zone_id in zone_ids:
+            if zone_id not in self.static_traps:
+                raise ValueError(f"Unknown static trap {zone_id!r}")
+            target.add(zone_id)
+        return self
+
+    def mark_fillable(self, *zone_ids: str) -> "LayoutBuilder":
+        """Mark static traps as fillable by the sorter."""
+        return self._mark(self.fillable, zone_ids)
+
+    def mark_cz(self, *zone_ids: str) -> "LayoutBuilder":
+        """Mark static traps as supporting CZ gates."""
+        return self._mark(self.has_cz, zone_ids)
+
+    def mark_local(self, *zone_ids: str) -> "LayoutBuilder":
+        """Mark static traps as supporting local single qubit gates."""
+        return self._mark(self.has_local, zone_ids)
+
+    def build(self) -> FrozenLayout:
+        """Build the layout, the builder can still be modified afterwards.
+
+        Raises:
+            ValueError: If two zones have the same positions.
+
+        """
+        return FrozenLayout(
+            self.static_traps,
+            self.fillable,
+            self.has_cz,
+            self.has_local,
+            special_grid=self.special_grid,
+            aliases=self.aliases,
+        )
+
+
+@dataclass
+class ArchSpecBuilder:
+    """Incrementally construct a `FrozenArchSpec`.
+
+    Example:
+        ```python
+        builder = ArchSpecBuilder.from_spec(get_base_spec())
+        builder.layout.add_static_trap("block", zone, has_local=True)
+        builder.set_int_constant("code_size", 7)
+        arch_spec = builder.build()
+        ```
+
+    """
+
+    layout: LayoutBuilder = field(default_factory=LayoutBuilder)
+    float_constants: dict[str, float] = field(default_factory=dict)
+    int_constants: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_spec(cls, arch_spec: ArchSpec) -> "ArchSpecBuilder":
+        """Start from a copy of `arch_spec`."""
+        return cls(
+            LayoutBuilder.from_layout(arch_spec.layout),
+            dict(arch_spec.float_constants),
+            dict(arch_spec.int_constants),
+        )
+
+    def set_float_constant(self, constant_id: str, value: float) -> "ArchSpecBuilder":
+        """Set a float constant, returns the builder itself."""
+        self.float_constants[constant_id] = value
+        return self
+
+    def set_int_constant(self, constant_id: str, value: int) -> "ArchSpecBuilder":
+        """Set an int constant, returns the builder itself."""
+        self.int_constants[constant_id] = value
+        return self
+
+    def build(self) -> FrozenArchSpec:
+        """Build the specification, see `LayoutBuilder.build`."""
+        return FrozenArchSpec(
+            self.layout.build(), self.float_constants, self.int_constants
+        )
+
 
 @dataclass
 class ArchSpecMixin:
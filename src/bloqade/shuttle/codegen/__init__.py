@@ -1 +1,48 @@
-from .taskgen import TraceInterpreter as TraceInterpreter, reverse_path as reverse_path
+from .cache import (
+    DEFAULT_TRACE_CACHE as DEFAULT_TRACE_CACHE,
+    TraceCache as TraceCache,
+    TraceCacheInfo as TraceCacheInfo,
+)
+from .collision import (
+    CollisionChecker as CollisionChecker,
+    Violation as Violation,
+)
+from .compact import CompactTrace as CompactTrace
+from .compress import (
+    CompressedTrace as CompressedTrace,
+    compress_trace as compress_trace,
+)
+from .parallel import (
+    ParallelTracer as ParallelTracer,
+    active_parallel_tracer as active_parallel_tracer,
+)
+from .pathfile import (
+    PathFile as PathFile,
+    PathRecord as PathRecord,
+    write_paths as write_paths,
+)
+from .pool import (
+    DEFAULT_TRACER_POOL as DEFAULT_TRACER_POOL,
+    TraceInterpreterPool as TraceInterpreterPool,
+)
+from .taskgen import (
+    FrozenWayPointsAction as FrozenWayPointsAction,
+    ReversedPath as ReversedPath,
+    TraceInterpreter as TraceInterpreter,
+    reverse_path as reverse_path,
+)
+from .templates import (
+    MoveTemplate as MoveTemplate,
+    TemplateLibrary as TemplateLibrary,
+)
+from .timing import (
+    ConstantJerkProfile as ConstantJerkProfile,
+    MinimumJerkProfile as MinimumJerkProfile,
+    MotionProfile as MotionProfile,
+    TimedPath as TimedPath,
+    TimingModel as TimingModel,
+)
+from .tone_order import (
+    ToneOrderChecker as ToneOrderChecker,
+    ToneViolation as ToneViolation,
+)
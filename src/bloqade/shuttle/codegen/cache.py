@@ -0,0 +1,244 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, NamedTuple, Sequence
+
+from kirin.dialects import ilist
+from kirin.ir.method import Method
+
+from bloqade.shuttle.arch import ArchSpec, FrozenArchSpec
+from bloqade.shuttle.codegen.pool import DEFAULT_TRACER_POOL, TraceInterpreterPool
+from bloqade.shuttle.codegen.taskgen import (
+    AbstractAction,
+    ReversedPath,
+    WayPointsAction,
+)
+
+
+class TraceCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _normalize(value: Any) -> Hashable:
+    # IList hashes by identity, slices are unhashable before python 3.12 and
+    # `1 == 1.0 == True`, so values are tagged with their type to get a key
+    # that compares by value without conflating different argument types.
+    if isinstance(value, ilist.IList):
+        return (ilist.IList, tuple(map(_normalize, value.data)))
+    elif isinstance(value, (list, tuple)):
+        return (type(value), tuple(map(_normalize, value)))
+    elif isinstance(value, slice):
+        return (slice, value.start, value.stop, value.step)
+
+    try:
+        hash(value)
+    except TypeError as e:
+        raise _Unhashable() from e
+
+    return (type(value), value)
+
+
+class _IdentityKey:
+    # compares by identity and keeps the object alive so that its id is not reused
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _IdentityKey) and other.obj is self.obj
+
+
+def _spec_key(arch_spec: ArchSpec) -> Hashable:
+    # frozen specs hash once, hashing a mutable spec walks its whole layout
+    if isinstance(arch_spec, FrozenArchSpec):
+        return arch_spec
+    return _IdentityKey(arch_spec)
+
+
+def _freeze_trace(trace: Sequence[AbstractAction]) -> tuple[AbstractAction, ...]:
+    # the other actions are frozen dataclasses already
+    return tuple(
+        action.freeze() if isinstance(action, WayPointsAction) else action
+        for action in trace
+    )
+
+
+@dataclass
+class TraceCache:
+    """Bounded LRU cache of traces produced by `TraceInterpreter`.
+
+    Traces are keyed on the move function, the (normalized) arguments and the
+    architecture specification. Reversed traces are served as `ReversedPath`
+    views of the cached forward trace instead of re-running the tracer. Calls
+    with arguments that cannot be hashed bypass the cache.
+
+    Cached traces are stored with their waypoint blocks frozen, so the actions
+    handed out can be shared between callers without copying the waypoints.
+
+    The cache can be shared between threads, the entries and the statistics
+    are guarded by a lock. Tracing happens outside of the lock, so two threads
+    missing on the same key may both trace it.
+
+    Note:
+        Move functions and `ArchSpec` objects are keyed by identity, while a
+        `FrozenArchSpec` is keyed by value. Rewriting the IR of a move function
+        or mutating a specification in place after it has been used requires a
+        `cache_clear`.
+
+    """
+
+    maxsize: int = 1024
+    """Maximum number of traces kept in the cache."""
+    pool: TraceInterpreterPool = field(default_factory=lambda: DEFAULT_TRACER_POOL)
+    """Pool of the interpreters used to trace on a cache miss."""
+
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    _entries: OrderedDict[Hashable, tuple[AbstractAction, ...]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+
+    @staticmethod
+    def key(arch_spec: ArchSpec, mt: Method, args: tuple[Any, ...]) -> Hashable | None:
+        """Get the key of the trace of `mt` called with `args`.
+
+        Returns:
+            Hashable | None: None if the arguments cannot be hashed, in which
+                case the trace bypasses the cache.
+
+        """
+        try:
+            return (mt, _normalize(args), _spec_key(arch_spec))
+        except _Unhashable:
+            return None
+
+    def _run_trace(
+        self, arch_spec: ArchSpec, mt: Method, args: tuple[Any, ...]
+    ) -> list[AbstractAction]:
+        with self.pool.acquire(arch_spec) as interp:
+            return interp.run_trace(mt, args, {})
+
+    def _get(self, key: Hashable) -> tuple[AbstractAction, ...] | None:
+        with self._lock:
+            if (trace := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return trace
+
+    def _put(self, key: Hashable, trace: Sequence[AbstractAction]):
+        if self.maxsize == 0:
+            return
+
+        trace = _freeze_trace(trace)
+        with self._lock:
+            self._entries[key] = trace
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def trace(
+        self,
+        arch_spec: ArchSpec,
+        mt: Method,
+        args: tuple[Any, ...],
+        *,
+        reverse: bool = False,
+    ) -> Sequence[AbstractAction]:
+        """Return the trace of `mt` called with `args`, tracing it on a cache miss.
+
+        Args:
+            arch_spec (ArchSpec): The architecture specification to trace with.
+            mt (Method): The move function to trace.
+            args (tuple[Any, ...]): The positional arguments of the move function.
+            reverse (bool): Whether to return the reversed trace. Defaults to False.
+
+        Returns:
+            Sequence[AbstractAction]: A new list containing the read-only actions
+                of the trace, or a `ReversedPath` view of the cached forward trace
+                if `reverse`.
+
+        """
+        if (key := self.key(arch_spec, mt, args)) is None:
+            with self._lock:
+                self.misses += 1
+            trace = self._run_trace(arch_spec, mt, args)
+            return ReversedPath(trace) if reverse else trace
+
+        if (trace := self._get(key)) is None:
+            trace = _freeze_trace(self._run_trace(arch_spec, mt, args))
+            self._put(key, trace)
+
+        return ReversedPath(trace) if reverse else list(trace)
+
+    def contains(self, arch_spec: ArchSpec, mt: Method, args: tuple[Any, ...]) -> bool:
+        """Check if the trace of `mt` called with `args` is cached."""
+        return self.contains_key(self.key(arch_spec, mt, args))
+
+    def contains_key(self, key: Hashable | None) -> bool:
+        """Check if a trace is cached under a key returned by `key`."""
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._entries
+
+    def insert(
+        self,
+        arch_spec: ArchSpec,
+        mt: Method,
+        args: tuple[Any, ...],
+        trace: list[AbstractAction],
+    ) -> bool:
+        """Insert a trace computed elsewhere, e.g. in another process.
+
+        The insertion is counted as a miss since the trace was not served from
+        the cache.
+
+        Returns:
+            bool: False if the arguments cannot be used as a cache key.
+
+        """
+        if (key := self.key(arch_spec, mt, args)) is None:
+            return False
+
+        with self._lock:
+            self.misses += 1
+        self._put(key, trace)
+        return True
+
+    def cache_info(self) -> TraceCacheInfo:
+        """Return the hit/miss statistics of the cache."""
+        with self._lock:
+            return TraceCacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries)
+            )
+
+    def cache_clear(self) -> None:
+        """Remove all traces from the cache and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+DEFAULT_TRACE_CACHE = TraceCache()
+"""Trace cache shared by the `path.Gen` interpreters."""
@@ -0,0 +1,447 @@
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.arch import Layout
+from bloqade.shuttle.codegen.compact import CompactTrace
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+from bloqade.shuttle.spatial import Site
+
+if TYPE_CHECKING:
+    from bloqade.shuttle.dialects.path.types import Path
+
+
+class Violation(NamedTuple):
+    """Two objects closer than the minimum distance during a step of a path."""
+
+    kind: str
+    """"tones" for two tones of a path, "trap" for a tweezer and a static trap
+    site and "paths" for tweezers of two paths played in parallel."""
+    distance: float
+    """Smallest distance reached during the step."""
+    path: int
+    """Index of the path in the checked paths."""
+    segment: int
+    """Waypoint index of the step, the step moves from this waypoint to the next."""
+    x_tones: tuple[int, ...]
+    """The x tones involved, two for x tones coming too close."""
+    y_tones: tuple[int, ...]
+    """The y tones involved, two for y tones coming too close."""
+    other: Union[Site, tuple[int, int, int], None] = None
+    """The trap site, or the path, x tone and y tone of the other tweezer."""
+
+
+class _Step(NamedTuple):
+    segment: int
+    x_start: np.ndarray
+    x_end: np.ndarray
+    y_start: np.ndarray
+    y_end: np.ndarray
+    x_on: np.ndarray
+    """Indices of the x tones that are on."""
+    y_on: np.ndarray
+    """Indices of the y tones that are on."""
+
+
+def _steps(trace: CompactTrace) -> Iterator[_Step]:
+    # the moves between consecutive waypoints of a block, and the position at
+    # which tones are turned on, with the tones that are on
+    num_x, num_y = trace.shape
+    x_on = np.zeros(num_x, dtype=bool)
+    y_on = np.zeros(num_y, dtype=bool)
+    event_offsets = trace.event_offsets.tolist()
+    event_is_on = trace.event_is_on.tolist()
+    event = 0
+
+    def apply_events(until: int) -> Iterator[_Step]:
+        nonlocal event
+        while event < len(event_offsets) and event_offsets[event] <= until:
+            x_mask = trace.x_masks[event].astype(bool)
+            y_mask = trace.y_masks[event].astype(bool)
+            if event_is_on[event]:
+                x_on[x_mask] = True
+                y_on[y_mask] = True
+                index = event_offsets[event] - 1
+                if index >= 0 and x_on.any() and y_on.any():
+                    yield step(index, index)
+            else:
+                x_on[x_mask] = False
+                y_on[y_mask] = False
+            event += 1
+
+    def step(start: int, end: int) -> _Step:
+        return _Step(
+            start,
+            trace.x_positions[start],
+            trace.x_positions[end],
+            trace.y_positions[start],
+            trace.y_positions[end],
+            np.flatnonzero(x_on),
+            np.flatnonzero(y_on),
+        )
+
+    offsets = trace.block_offsets.tolist()
+    for block_start, block_end in zip(offsets, offsets[1:]):
+        yield from apply_events(block_start)
+        for index in range(block_start, block_end - 1):
+            if x_on.any() and y_on.any():
+                yield step(index, index + 1)
+    yield from apply_events(trace.num_waypoints)
+
+
+def _idle(trace: CompactTrace) -> _Step:
+    # the final position of a trace with all tones off
+    last = trace.num_waypoints - 1
+    empty = np.zeros(0, dtype=np.intp)
+    return _Step(
+        last,
+        trace.x_positions[last],
+        trace.x_positions[last],
+        trace.y_positions[last],
+        trace.y_positions[last],
+        empty,
+        empty,
+    )
+
+
+def _close_times(
+    offset: np.ndarray, velocity: np.ndarray, distance: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Times `t` in `[0, 1]` at which `|offset + velocity * t| < distance`.
+
+    Returns:
+        The start and end of every interval and a mask of the non-empty ones.
+
+    """
+    moving = velocity != 0
+    speed = np.where(moving, velocity, 1.0)
+    first = (-distance - offset) / speed
+    second = (distance - offset) / speed
+    start = np.where(moving, np.minimum(first, second), 0.0).clip(0.0, 1.0)
+    end = np.where(moving, np.maximum(first, second), 1.0).clip(0.0, 1.0)
+    keep = np.where(moving, start < end, np.abs(offset) < distance)
+    return start, end, keep
+
+
+def _closest(
+    offset_x: np.ndarray,
+    velocity_x: np.ndarray,
+    offset_y: np.ndarray,
+    velocity_y: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+) -> np.ndarray:
+    # smallest distance of `offset + velocity * t` for `t` in `[start, end]`
+    speed = velocity_x**2 + velocity_y**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = -(offset_x * velocity_x + offset_y * velocity_y) / speed
+    t = np.where(speed > 0, t, start).clip(start, end)
+    return np.hypot(offset_x + velocity_x * t, offset_y + velocity_y * t)
+
+
+def _site_index(positions: np.ndarray, sites: np.ndarray, atol: float) -> np.ndarray:
+    # index of the site at every position, -1 if there is none
+    right = np.searchsorted(sites, positions).clip(0, len(sites) - 1)
+    left = (right - 1).clip(0)
+    index = np.where(
+        np.abs(sites[left] - positions) < np.abs(sites[right] - positions), left, right
+    )
+    return np.where(np.abs(sites[index] - positions) <= atol, index, -1)
+
+
+def _site_times(
+    start: np.ndarray,
+    end: np.ndarray,
+    sites: np.ndarray,
+    distance: float,
+    atol: float,
+):
+    # every tone and site closer than `distance` at some time, with the times
+    # and whether the tone starts or ends at that site
+    low = np.minimum(start, end) - distance
+    high = np.maximum(start, end) + distance
+    first = np.searchsorted(sites, low, side="right")
+    counts = np.searchsorted(sites, high, side="left") - first
+    tones = np.repeat(np.arange(len(start)), counts)
+    site_ids = (
+        np.arange(counts.sum())
+        - np.repeat(np.cumsum(counts) - counts, counts)
+        + np.repeat(first, counts)
+    )
+
+    offset = start[tones] - sites[site_ids]
+    velocity = end[tones] - start[tones]
+    t_start, t_end, keep = _close_times(offset, velocity, distance)
+    starts_at = site_ids == _site_index(start, sites, atol)[tones]
+    ends_at = site_ids == _site_index(end, sites, atol)[tones]
+
+    return tuple(
+        array[keep]
+        for array in (
+            tones,
+            site_ids,
+            offset,
+            velocity,
+            t_start,
+            t_end,
+            starts_at,
+            ends_at,
+        )
+    )
+
+
+@dataclass
+class CollisionChecker:
+    """Check that tweezers keep a minimum distance while paths are played.
+
+    Every move between two consecutive waypoints is checked analytically: tones
+    move linearly, so the times at which two tones or a tone and a row or column
+    of trap sites are closer than `min_distance` along one axis form an
+    interval, and the closest approach of a tweezer is found in the overlap of
+    its x and y intervals. Tweezers are the crossings of the x and y tones that
+    are on. The position at which tones are turned on is checked as well.
+
+    Three kinds of violations are reported:
+
+    - "tones": two tones of a path closer than `min_distance`, which brings
+      every tweezer of one tone close to a tweezer of the other,
+    - "trap": a tweezer closer than `min_distance` to a trap site, except the
+      sites the tweezer starts or ends the move at,
+    - "paths": tweezers of two paths of a `path.Parallel` node, which are
+      assumed to be played in lockstep, one step at a time.
+
+    Example:
+        ```python
+        checker = CollisionChecker.from_layout(arch_spec.layout, 2.0)
+        violations = checker.check_parallel(paths)
+        ```
+
+    """
+
+    min_distance: float
+    """Smallest allowed distance."""
+    traps: Mapping[str, grid.Grid] = field(default_factory=dict)
+    """Trap sites to keep away from, only the filled sites of filled grids."""
+    atol: float = 1e-6
+    """Tweezers closer than this to a site at the start or end of a move sit on it."""
+
+    @classmethod
+    def from_layout(
+        cls,
+        layout: Layout,
+        min_distance: float,
+        filled: Optional[Mapping[str, FilledGrid]] = None,
+        atol: float = 1e-6,
+    ) -> "CollisionChecker":
+        """Check against the static traps of a layout.
+
+        Args:
+            layout (Layout): The layout.
+            min_distance (float): Smallest allowed distance.
+            filled (Mapping[str, FilledGrid] | None): Occupancy of some of the
+                zones, only the filled sites of these zones are checked.
+            atol (float): See `CollisionChecker.atol`.
+
+        """
+        traps = dict(layout.static_traps)
+        traps.update(filled or {})
+        return cls(min_distance, traps, atol)
+
+    def check_path(self, path: "Path") -> list[Violation]:
+        """Check a single `Path`."""
+        return self.check_parallel([path])
+
+    def check_parallel(self, paths: Sequence["Path"]) -> list[Violation]:
+        """Check the `Path`s played by a `path.Parallel` node.
+
+        Returns:
+            list[Violation]: The violations in order of the steps.
+
+        """
+        traces = [path.to_compact() for path in paths]
+        tones = [
+            (
+                _tone_ids(path.x_tones, trace.shape[0]),
+                _tone_ids(path.y_tones, trace.shape[1]),
+            )
+            for path, trace in zip(paths, traces)
+        ]
+        steps = [list(_steps(trace)) for trace in traces]
+
+        violations: list[Violation] = []
+        for index in range(max((len(s) for s in steps), default=0)):
+            current = [
+                path_steps[index] if index < len(path_steps) else _idle(trace)
+                for path_steps, trace in zip(steps, traces)
+            ]
+            for path, step in enumerate(current):
+                if index >= len(steps[path]):
+                    continue
+                x_ids, y_ids = tones[path]
+                violations.extend(self._check_tones(path, step, x_ids, y_ids))
+                for zone_id, zone in self.traps.items():
+                    violations.extend(
+                        self._check_trap(path, step, x_ids, y_ids, zone_id, zone)
+                    )
+            for path, step in enumerate(current):
+                for other in range(path + 1, len(current)):
+                    violations.extend(
+                        self._check_paths(
+                            (path, step, *tones[path]),
+                            (other, current[other], *tones[other]),
+                        )
+                    )
+
+        return violations
+
+    def _check_tones(self, path: int, step: _Step, x_ids, y_ids):
+        for axis, on, start, end, ids in (
+            ("x", step.x_on, step.x_start, step.x_end, x_ids),
+            ("y", step.y_on, step.y_start, step.y_end, y_ids),
+        ):
+            if len(on) < 2 or len(step.x_on) == 0 or len(step.y_on) == 0:
+                continue
+            # neighbouring tones in the order at the start of the step, tones
+            # changing their order cross
+            order = on[np.argsort(start[on], kind="stable")]
+            start_gap = np.diff(start[order])
+            end_gap = np.diff(end[order])
+            gap = np.where(end_gap < 0, 0.0, np.minimum(start_gap, end_gap))
+            for i in np.flatnonzero(gap < self.min_distance).tolist():
+                pair = (int(ids[order[i]]), int(ids[order[i + 1]]))
+                yield Violation(
+                    "tones",
+                    float(gap[i]),
+                    path,
+                    step.segment,
+                    pair if axis == "x" else (),
+                    pair if axis == "y" else (),
+                )
+
+    def _check_trap(
+        self, path: int, step: _Step, x_ids, y_ids, zone_id: str, zone: grid.Grid
+    ):
+        if len(step.x_on) == 0 or len(step.y_on) == 0:
+            return
+        parent = zone.parent if isinstance(zone, FilledGrid) else zone
+        x_sites = np.asarray(parent.x_positions, dtype=np.float64)
+        y_sites = np.asarray(parent.y_positions, dtype=np.float64)
+        if len(x_sites) == 0 or len(y_sites) == 0:
+            return
+
+        distance = self.min_distance
+        xt, xs, x_offset, x_velocity, x_lo, x_hi, x_first, x_last = _site_times(
+            step.x_start[step.x_on], step.x_end[step.x_on], x_sites, distance, self.atol
+        )
+        yt, ys, y_offset, y_velocity, y_lo, y_hi, y_first, y_last = _site_times(
+            step.y_start[step.y_on], step.y_end[step.y_on], y_sites, distance, self.atol
+        )
+        if len(xt) == 0 or len(yt) == 0:
+            return
+
+        # the sites a tweezer starts and ends at are exempt, only the groups of
+        # x and y intervals that can combine into other sites are paired up
+        for x_starts_at, x_ends_at, xi in _groups(x_first, x_last):
+            for y_starts_at, y_ends_at, yi in _groups(y_first, y_last):
+                if (x_starts_at and y_starts_at) or (x_ends_at and y_ends_at):
+                    continue
+                lo = np.maximum(x_lo[xi][:, None], y_lo[yi][None, :])
+                hi = np.minimum(x_hi[xi][:, None], y_hi[yi][None, :])
+                i, j = np.nonzero(lo < hi)
+                lo, hi = lo[i, j], hi[i, j]
+                a, b = xi[i], yi[j]
+                closest = _closest(
+                    x_offset[a], x_velocity[a], y_offset[b], y_velocity[b], lo, hi
+                )
+                close = closest < distance
+                if isinstance(zone, FilledGrid):
+                    close &= zone.filled_mask[xs[a], ys[b]]
+                for i in np.flatnonzero(close).tolist():
+                    yield Violation(
+                        "trap",
+                        float(closest[i]),
+                        path,
+                        step.segment,
+                        (int(x_ids[step.x_on[xt[a[i]]]]),),
+                        (int(y_ids[step.y_on[yt[b[i]]]]),),
+                        Site(zone_id, int(xs[a[i]]), int(ys[b[i]])),
+                    )
+
+    def _check_paths(self, lhs, rhs):
+        path, step, x_ids, y_ids = lhs
+        other, other_step, other_x_ids, other_y_ids = rhs
+        if not all(len(on) for on in (step.x_on, step.y_on)) or not all(
+            len(on) for on in (other_step.x_on, other_step.y_on)
+        ):
+            return
+
+        def pairs(on, start, end, other_on, other_start, other_end):
+            offset = start[on][:, None] - other_start[other_on][None, :]
+            velocity = (end[on] - start[on])[:, None] - (
+                other_end[other_on] - other_start[other_on]
+            )[None, :]
+            lo, hi, keep = _close_times(offset, velocity, self.min_distance)
+            i, j = np.nonzero(keep)
+            return i, j, offset[i, j], velocity[i, j], lo[i, j], hi[i, j]
+
+        xi, xk, x_offset, x_velocity, x_lo, x_hi = pairs(
+            step.x_on,
+            step.x_start,
+            step.x_end,
+            other_step.x_on,
+            other_step.x_start,
+            other_step.x_end,
+        )
+        yj, yl, y_offset, y_velocity, y_lo, y_hi = pairs(
+            step.y_on,
+            step.y_start,
+            step.y_end,
+            other_step.y_on,
+            other_step.y_start,
+            other_step.y_end,
+        )
+        lo = np.maximum(x_lo[:, None], y_lo[None, :])
+        hi = np.minimum(x_hi[:, None], y_hi[None, :])
+        a, b = np.nonzero(lo < hi)
+        closest = _closest(
+            x_offset[a], x_velocity[a], y_offset[b], y_velocity[b], lo[a, b], hi[a, b]
+        )
+        for i in np.flatnonzero(closest < self.min_distance).tolist():
+            yield Violation(
+                "paths",
+                float(closest[i]),
+                path,
+                step.segment,
+                (int(x_ids[step.x_on[xi[a[i]]]]),),
+                (int(y_ids[step.y_on[yj[b[i]]]]),),
+                (
+                    other,
+                    int(other_x_ids[other_step.x_on[xk[a[i]]]]),
+                    int(other_y_ids[other_step.y_on[yl[b[i]]]]),
+                ),
+            )
+
+
+def _groups(first: np.ndarray, last: np.ndarray):
+    for starts_at in (False, True):
+        for ends_at in (False, True):
+            (indices,) = np.nonzero((first == starts_at) & (last == ends_at))
+            if len(indices):
+                yield starts_at, ends_at, indices
+
+
+def _tone_ids(tones, num_tones: int) -> np.ndarray:
+    # global tone of every local tone index, the local index if unknown
+    if tones is not None and len(tones) == num_tones:
+        return np.asarray(list(tones), dtype=np.intp)
+    return np.arange(num_tones)
@@ -0,0 +1,275 @@
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen.taskgen import (
+    AbstractAction,
+    TurnOffXSliceAction,
+    TurnOffXYAction,
+    TurnOffXYSliceAction,
+    TurnOffYSliceAction,
+    TurnOnAction,
+    TurnOnXSliceAction,
+    TurnOnXYAction,
+    TurnOnXYSliceAction,
+    TurnOnYSliceAction,
+    WayPointsAction,
+)
+
+WAYPOINTS = 0
+"""Action kind of a `WayPointsAction` block, intensity actions use `1 + EVENT_ACTIONS.index(type)`."""
+
+EVENT_ACTIONS: tuple[type[AbstractAction], ...] = (
+    TurnOnXYAction,
+    TurnOffXYAction,
+    TurnOnXSliceAction,
+    TurnOffXSliceAction,
+    TurnOnYSliceAction,
+    TurnOffYSliceAction,
+    TurnOnXYSliceAction,
+    TurnOffXYSliceAction,
+)
+_EVENT_KINDS = {action_type: i + 1 for i, action_type in enumerate(EVENT_ACTIONS)}
+_SLICED_TONES = {
+    TurnOnXYAction: (False, False),
+    TurnOffXYAction: (False, False),
+    TurnOnXSliceAction: (True, False),
+    TurnOffXSliceAction: (True, False),
+    TurnOnYSliceAction: (False, True),
+    TurnOffYSliceAction: (False, True),
+    TurnOnXYSliceAction: (True, True),
+    TurnOffXYSliceAction: (True, True),
+}
+_TURN_ON_KINDS = np.array(
+    [
+        kind
+        for action_type, kind in _EVENT_KINDS.items()
+        if issubclass(action_type, TurnOnAction)
+    ],
+    dtype=np.int8,
+)
+
+SLICE_NONE = np.iinfo(np.int64).min
+"""Sentinel used for `None` entries of stored slices."""
+
+
+def _tone_mask(indices: Any, num_tones: int) -> np.ndarray:
+    mask = np.zeros(num_tones, dtype=np.uint8)
+    mask[indices if isinstance(indices, slice) else list(indices)] = 1
+    return mask
+
+
+def _slice_params(indices: Any) -> tuple[int, int, int]:
+    if not isinstance(indices, slice):
+        return (SLICE_NONE, SLICE_NONE, SLICE_NONE)
+
+    return tuple(  # type: ignore
+        SLICE_NONE if ele is None else ele
+        for ele in (indices.start, indices.stop, indices.step)
+    )
+
+
+def _tone_indices(mask: np.ndarray, params: np.ndarray, is_slice: bool):
+    if is_slice:
+        return slice(*(None if ele == SLICE_NONE else int(ele) for ele in params))
+
+    return ilist.IList(np.flatnonzero(mask).tolist())
+
+
+@dataclass(frozen=True, eq=False)
+class CompactTrace:
+    """Array-backed representation of a traced list of actions.
+
+    All waypoints of the trace are stored in contiguous position blocks, the
+    `WayPointsAction` boundaries are stored as offsets into these blocks and the
+    intensity actions are stored as tone masks. All waypoints must have the same
+    shape.
+
+    Note:
+        The round trip through `to_actions` is lossless for the waypoints, the
+        order and kinds of the actions, and slices of tones. Grid spacings are
+        stored next to the positions so that the grids are restored
+        bit-exactly. Tone index lists are stored as masks, so they are restored
+        as the same set of tones but normalized: in ascending order, without
+        duplicates and with negative indices counted from the last tone, e.g.
+        `[2, -3, 2]` over 3 tones is restored as `[0, 2]`. Traces with sorted,
+        non-negative and unique index lists, such as every list built with
+        `ilist.range`, are restored exactly.
+
+    """
+
+    x_positions: np.ndarray
+    """(n_waypoints, n_x) x positions of every waypoint."""
+    y_positions: np.ndarray
+    """(n_waypoints, n_y) y positions of every waypoint."""
+    x_spacing: np.ndarray
+    """(n_waypoints, n_x - 1) x spacing of every waypoint."""
+    y_spacing: np.ndarray
+    """(n_waypoints, n_y - 1) y spacing of every waypoint."""
+    block_offsets: np.ndarray
+    """(n_blocks + 1,) waypoint offsets delimiting the `WayPointsAction` blocks."""
+    action_kinds: np.ndarray
+    """(n_actions,) kind of every action, see `WAYPOINTS` and `EVENT_ACTIONS`."""
+    event_offsets: np.ndarray
+    """(n_events,) number of waypoints preceding each intensity event."""
+    x_masks: np.ndarray
+    """(n_events, n_x) 1 for every x tone addressed by the intensity event."""
+    y_masks: np.ndarray
+    """(n_events, n_y) 1 for every y tone addressed by the intensity event."""
+    x_slices: np.ndarray
+    """(n_events, 3) slice parameters of the x tones, `SLICE_NONE` if unset."""
+    y_slices: np.ndarray
+    """(n_events, 3) slice parameters of the y tones, `SLICE_NONE` if unset."""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape (n_x, n_y) of the waypoints."""
+        return (self.x_positions.shape[1], self.y_positions.shape[1])
+
+    @property
+    def num_waypoints(self) -> int:
+        return self.x_positions.shape[0]
+
+    @property
+    def num_events(self) -> int:
+        return self.event_offsets.shape[0]
+
+    @property
+    def event_is_on(self) -> np.ndarray:
+        """(n_events,) boolean array, True for turn on events."""
+        kinds = self.action_kinds[self.action_kinds != WAYPOINTS]
+        return np.isin(kinds, _TURN_ON_KINDS)
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes used by the arrays."""
+        return sum(
+            getattr(self, name).nbytes
+            for name in self.__dataclass_fields__  # type: ignore
+        )
+
+    @classmethod
+    def from_actions(cls, actions: Iterable[AbstractAction]) -> "CompactTrace":
+        """Create a compact trace from a list of actions.
+
+        The actions are consumed in a single pass, so this can be fed directly
+        from `TraceInterpreter.iter_trace`.
+
+        Args:
+            actions (Iterable[AbstractAction]): The actions of the trace.
+
+        Raises:
+            ValueError: If the waypoints have different shapes or an action is
+                not supported.
+
+        """
+        way_points: list[grid.Grid] = []
+        block_offsets = [0]
+        action_kinds = []
+        events: list[Any] = []
+        event_offsets = []
+
+        for action in actions:
+            if isinstance(action, WayPointsAction):
+                action_kinds.append(WAYPOINTS)
+                way_points.extend(action.way_points)
+                block_offsets.append(len(way_points))
+            elif (kind := _EVENT_KINDS.get(type(action))) is not None:
+                action_kinds.append(kind)
+                events.append(action)
+                event_offsets.append(len(way_points))
+            else:
+                raise ValueError(f"Unsupported action {action!r}")
+
+        shapes = set(pos.shape for pos in way_points)
+        if len(shapes) > 1:
+            raise ValueError(f"Waypoints have different shapes: {shapes}")
+
+        num_x, num_y = shapes.pop() if shapes else (0, 0)
+        num_waypoints = len(way_points)
+
+        def block(values, width: int):
+            return np.array(values, dtype=np.float64).reshape(num_waypoints, width)
+
+        return cls(
+            x_positions=block([pos.x_positions for pos in way_points], num_x),
+            y_positions=block([pos.y_positions for pos in way_points], num_y),
+            x_spacing=block(
+                [pos.x_spacing for pos in way_points] if num_x else [],
+                max(num_x - 1, 0),
+            ),
+            y_spacing=block(
+                [pos.y_spacing for pos in way_points] if num_y else [],
+                max(num_y - 1, 0),
+            ),
+            block_offsets=np.array(block_offsets, dtype=np.int64),
+            action_kinds=np.array(action_kinds, dtype=np.int8),
+            event_offsets=np.array(event_offsets, dtype=np.int64),
+            x_masks=np.array(
+                [_tone_mask(event.x_tone_indices, num_x) for event in events],
+                dtype=np.uint8,
+            ).reshape(len(events), num_x),
+            y_masks=np.array(
+                [_tone_mask(event.y_tone_indices, num_y) for event in events],
+                dtype=np.uint8,
+            ).reshape(len(events), num_y),
+            x_slices=np.array(
+                [_slice_params(event.x_tone_indices) for event in events],
+                dtype=np.int64,
+            ).reshape(len(events), 3),
+            y_slices=np.array(
+                [_slice_params(event.y_tone_indices) for event in events],
+                dtype=np.int64,
+            ).reshape(len(events), 3),
+        )
+
+    def get_grid(self, index: int) -> grid.Grid:
+        """Get the waypoint at `index` as a grid."""
+        num_x, num_y = self.shape
+        return grid.Grid(
+            tuple(self.x_spacing[index].tolist()),
+            tuple(self.y_spacing[index].tolist()),
+            float(self.x_positions[index, 0]) if num_x else None,
+            float(self.y_positions[index, 0]) if num_y else None,
+        )
+
+    def to_actions(self) -> list[AbstractAction]:
+        """Convert the compact trace back into a list of actions.
+
+        Tone index lists come back normalized, see the note of the class.
+
+        """
+        actions: list[AbstractAction] = []
+        block_index = 0
+        event_index = 0
+        for kind in self.action_kinds.tolist():
+            if kind == WAYPOINTS:
+                start, end = self.block_offsets[block_index : block_index + 2]
+                actions.append(
+                    WayPointsAction([self.get_grid(i) for i in range(start, end)])
+                )
+                block_index += 1
+                continue
+
+            action_type = EVENT_ACTIONS[kind - 1]
+            x_is_slice, y_is_slice = _SLICED_TONES[action_type]
+            actions.append(
+                action_type(
+                    _tone_indices(
+                        self.x_masks[event_index],
+                        self.x_slices[event_index],
+                        x_is_slice,
+                    ),
+                    _tone_indices(
+                        self.y_masks[event_index],
+                        self.y_slices[event_index],
+                        y_is_slice,
+                    ),
+                )
+            )
+            event_index += 1
+
+        return actions
@@ -0,0 +1,165 @@
+from typing import Any, Iterable, NamedTuple, Optional
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.codegen.taskgen import (
+    AbstractAction,
+    TurnOffAction,
+    TurnOnAction,
+    WayPointsAction,
+)
+
+_UNKNOWN = -1
+
+
+class CompressedTrace(NamedTuple):
+    actions: list[AbstractAction]
+    """The compressed actions."""
+    removed_waypoints: int
+    """Number of waypoints removed from the trace."""
+    removed_events: int
+    """Number of intensity actions removed from the trace."""
+
+
+def _coordinates(pos: grid.Grid) -> np.ndarray:
+    return np.array(pos.x_positions + pos.y_positions, dtype=np.float64)
+
+
+def _is_between(start: grid.Grid, mid: grid.Grid, end: grid.Grid, atol: float):
+    # `mid` is redundant if every tone is at the same fraction `t` of its
+    # straight line move from `start` to `end`, i.e. removing it leaves the
+    # trajectory of all tones unchanged under linear interpolation.
+    a, b, c = map(_coordinates, (start, mid, end))
+    total = c - a
+    axis = int(np.argmax(np.abs(total)))
+    if total[axis] == 0:
+        return False
+
+    t = (b - a)[axis] / total[axis]
+    return 0.0 < t < 1.0 and bool(np.allclose(a + t * total, b, rtol=0, atol=atol))
+
+
+def _append_waypoint(way_points: list[grid.Grid], pos: grid.Grid, atol: float):
+    if way_points and pos == way_points[-1]:
+        return
+
+    if len(way_points) > 1 and _is_between(way_points[-2], way_points[-1], pos, atol):
+        way_points[-1] = pos
+    else:
+        way_points.append(pos)
+
+
+class _ToneState:
+    """Intensity state of the x and y tones, `_UNKNOWN` until set by the trace."""
+
+    def __init__(self, shape: tuple[int, int]):
+        self.x = np.full(shape[0], _UNKNOWN, dtype=np.int8)
+        self.y = np.full(shape[1], _UNKNOWN, dtype=np.int8)
+
+    @staticmethod
+    def _index(indices: Any):
+        return indices if isinstance(indices, slice) else list(indices)
+
+    def apply(self, event: AbstractAction) -> bool:
+        """Apply `event` to the state, returns False if it does not change it."""
+        value = 1 if isinstance(event, TurnOnAction) else 0
+        x_index = self._index(event.x_tone_indices)  # type: ignore
+        y_index = self._index(event.y_tone_indices)  # type: ignore
+        if np.all(self.x[x_index] == value) and np.all(self.y[y_index] == value):
+            return False
+
+        self.x[x_index] = value
+        self.y[y_index] = value
+        return True
+
+
+def compress_trace(
+    actions: Iterable[AbstractAction], *, atol: float = 1e-9
+) -> CompressedTrace:
+    """Remove redundant waypoints and intensity actions from a trace.
+
+    The following rewrites are applied, the ordering of the remaining intensity
+    actions relative to the waypoints is preserved:
+
+    * Intensity actions that do not change the state of any tone, e.g. turning
+      on tones that are already on, are removed. Tones are in an unknown state
+      until the trace sets them, so only actions that are redundant within the
+      trace are removed.
+    * Adjacent `WayPointsAction` blocks that continue from the same position are
+      merged, zero-length moves are removed.
+    * Interior waypoints lying on the straight line move between their
+      neighbours are removed, fusing collinear constant-velocity segments.
+    * `WayPointsAction` blocks between two intensity actions that only repeat
+      the current position are removed. The first and last block are kept so
+      that the trace (and its reverse) starts and ends at a known position.
+
+    Args:
+        actions (Iterable[AbstractAction]): The actions of the trace.
+        atol (float): Absolute tolerance used to detect collinear waypoints.
+            Defaults to 1e-9.
+
+    Returns:
+        CompressedTrace: The compressed actions and the number of removed
+            waypoints and intensity actions.
+
+    """
+    compressed: list[AbstractAction] = []
+    state: Optional[_ToneState] = None
+    last_pos: Optional[grid.Grid] = None
+    num_waypoints = 0
+    removed_events = 0
+
+    for action in actions:
+        if not isinstance(action, WayPointsAction):
+            if isinstance(action, (TurnOnAction, TurnOffAction)) and state is not None:
+                if not state.apply(action):
+                    removed_events += 1
+                    continue
+            compressed.append(action)
+            continue
+
+        way_points = list(action.way_points)
+        num_waypoints += len(way_points)
+        if not way_points:
+            continue
+
+        if state is None:
+            state = _ToneState(way_points[0].shape)
+
+        if (
+            last_pos is not None
+            and way_points[0] == last_pos
+            and isinstance(block := compressed[-1], WayPointsAction)
+        ):
+            merged = block.way_points
+        else:
+            merged = []
+            compressed.append(WayPointsAction(merged))
+
+        for pos in way_points:
+            _append_waypoint(merged, pos, atol)
+        last_pos = merged[-1]
+
+    block_indices = [
+        i for i, action in enumerate(compressed) if isinstance(action, WayPointsAction)
+    ]
+    redundant = set(
+        curr
+        for prev, curr in zip(block_indices[:-2], block_indices[1:-1])
+        if len(compressed[curr].way_points) == 1  # type: ignore
+        and compressed[curr].way_points[0]  # type: ignore
+        == compressed[prev].way_points[-1]  # type: ignore
+    )
+    compressed = [action for i, action in enumerate(compressed) if i not in redundant]
+
+    return CompressedTrace(
+        compressed,
+        num_waypoints
+        - sum(
+            len(action.way_points)
+            for action in compressed
+            if isinstance(action, WayPointsAction)
+        ),
+        removed_events,
+    )
@@ -0,0 +1,266 @@
+import importlib
+import itertools
+import logging
+import pickle
+from concurrent.futures import (
+    BrokenExecutor,
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+)
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any, Iterator, Optional, Sequence
+
+from kirin.ir.method import Method
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen.cache import DEFAULT_TRACE_CACHE, TraceCache
+from bloqade.shuttle.codegen.taskgen import AbstractAction, ReversedPath
+
+logger = logging.getLogger(__name__)
+
+KernelRef = tuple[str, str]
+"""Module name and qualified name of a move function defined at module level."""
+
+# errors raised by `pickle.dumps` for objects that cannot be pickled, e.g.
+# lambdas and local classes raise AttributeError and locks raise TypeError
+_PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+
+
+def _pickled(obj: Any) -> bytes | None:
+    try:
+        return pickle.dumps(obj)
+    except _PICKLE_ERRORS:
+        return None
+
+
+def kernel_ref(mt: Method) -> KernelRef | None:
+    """Get a reference that another process can use to import `mt`.
+
+    Returns:
+        KernelRef | None: None if `mt` is not a module level attribute.
+
+    """
+    if mt.py_func is None or "<locals>" in (qualname := mt.py_func.__qualname__):
+        return None
+
+    module_name = mt.py_func.__module__
+    try:
+        resolved = _resolve_kernel((module_name, qualname))
+    except (ImportError, AttributeError):
+        return None
+
+    return (module_name, qualname) if resolved is mt else None
+
+
+@cache
+def _resolve_kernel(ref: KernelRef) -> Method:
+    module_name, qualname = ref
+    obj: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+_WORKER_ARCH_SPECS: dict[int, ArchSpec] = {}
+
+
+def _trace_in_worker(
+    spec_id: int, spec_data: bytes, ref: KernelRef, args_data: bytes
+) -> list[AbstractAction]:
+    # a worker unpickles every specification once and reuses it for later tasks
+    if (arch_spec := _WORKER_ARCH_SPECS.get(spec_id)) is None:
+        arch_spec = _WORKER_ARCH_SPECS[spec_id] = pickle.loads(spec_data)
+    args = pickle.loads(args_data)
+    return list(DEFAULT_TRACE_CACHE.trace(arch_spec, _resolve_kernel(ref), args))
+
+
+class PendingTrace(Sequence[AbstractAction]):
+    """Trace that is being computed by a `ParallelTracer`.
+
+    Accessing the actions blocks until the trace is available. Errors raised
+    while tracing in the worker process are raised where the trace is consumed.
+    If the worker process itself failed, e.g. because the pool was shut down or
+    a worker died, the move function is traced again in the current process.
+
+    """
+
+    def __init__(
+        self,
+        tracer: "ParallelTracer",
+        arch_spec: ArchSpec,
+        mt: Method,
+        args: tuple[Any, ...],
+        reverse: bool,
+        future: Future,
+    ):
+        self.tracer = tracer
+        self.arch_spec = arch_spec
+        self.mt = mt
+        self.args = args
+        self.reverse = reverse
+        self.future = future
+        self._trace: Optional[Sequence[AbstractAction]] = None
+
+    def resolve(self) -> Sequence[AbstractAction]:
+        """Wait for the trace and return it."""
+        if self._trace is not None:
+            return self._trace
+
+        try:
+            trace = self.future.result()
+        except (BrokenExecutor, CancelledError, pickle.PicklingError) as e:
+            logger.warning(
+                "Tracing %s in a worker process failed (%r), tracing it locally",
+                self.mt.sym_name,
+                e,
+            )
+            self._trace = self.tracer.cache.trace(
+                self.arch_spec, self.mt, self.args, reverse=self.reverse
+            )
+        else:
+            self.tracer.cache.insert(self.arch_spec, self.mt, self.args, trace)
+            self._trace = ReversedPath(trace) if self.reverse else trace
+
+        return self._trace
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __getitem__(self, index):
+        return self.resolve()[index]
+
+    def __iter__(self) -> Iterator[AbstractAction]:
+        return iter(self.resolve())
+
+    def __reversed__(self) -> Iterator[AbstractAction]:
+        return reversed(self.resolve())
+
+    def __eq__(self, other: object) -> bool:
+        return self.resolve() == other
+
+    def __repr__(self) -> str:
+        if self._trace is None:
+            return f"PendingTrace({self.mt.sym_name})"
+        return repr(self._trace)
+
+
+_ACTIVE_TRACER: ContextVar[Optional["ParallelTracer"]] = ContextVar(
+    "active_parallel_tracer", default=None
+)
+
+
+def active_parallel_tracer() -> Optional["ParallelTracer"]:
+    """Return the `ParallelTracer` of the enclosing `with` block, if any."""
+    return _ACTIVE_TRACER.get()
+
+
+@dataclass
+class ParallelTracer:
+    """Trace the `path.Gen` statements feeding a `path.Parallel` or `path.Auto`
+    node concurrently on a process pool.
+
+    Inside a `with ParallelTracer(...)` block the `path.Gen` interpreters submit
+    these traces to the pool and return a `PendingTrace`, which only blocks once
+    the trace is consumed. All architecture specifications share one pool: every
+    specification is pickled once, and every worker unpickles it once. Workers
+    import the move functions by reference, so only move functions defined at
+    module level are traced in workers, other move functions are traced in the
+    current process, and so are traces whose specification or arguments cannot
+    be pickled. Finished traces are inserted into `cache`.
+
+    Example:
+        ```python
+        with ParallelTracer(max_workers=4):
+            PathVisualizer(move.dialects, arch_spec=arch_spec).run(main, ())
+        ```
+
+    """
+
+    max_workers: Optional[int] = None
+    """Number of worker processes, defaults to the number of CPUs."""
+    cache: TraceCache = field(default_factory=lambda: DEFAULT_TRACE_CACHE)
+    """Trace cache shared with the `path.Gen` interpreters."""
+
+    _pool: Optional[ProcessPoolExecutor] = field(default=None, init=False, repr=False)
+    _specs: dict[int, tuple[ArchSpec, int, bytes | None]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _spec_ids: Iterator[int] = field(
+        default_factory=itertools.count, init=False, repr=False
+    )
+    _tokens: list[Token] = field(default_factory=list, init=False, repr=False)
+
+    def _submit(
+        self, arch_spec: ArchSpec, ref: KernelRef, args: tuple[Any, ...]
+    ) -> Future | None:
+        # specifications are keyed by identity and kept alive with their payload,
+        # the payload is None if the specification cannot be pickled
+        spec = self._specs.get(id(arch_spec))
+        if spec is None or spec[0] is not arch_spec:
+            spec = self._specs[id(arch_spec)] = (
+                arch_spec,
+                next(self._spec_ids),
+                _pickled(arch_spec),
+            )
+        _, spec_id, spec_data = spec
+        # pickling the arguments here surfaces errors before the task is queued
+        if spec_data is None or (args_data := _pickled(args)) is None:
+            return None
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool.submit(_trace_in_worker, spec_id, spec_data, ref, args_data)
+
+    def trace(
+        self,
+        arch_spec: ArchSpec,
+        mt: Method,
+        args: tuple[Any, ...],
+        *,
+        reverse: bool = False,
+    ) -> Sequence[AbstractAction]:
+        """Start tracing `mt` called with `args` in a worker process.
+
+        Traces that are already cached, cannot be cached, cannot be pickled or
+        whose move function cannot be imported by reference are traced in the
+        current process.
+
+        Returns:
+            Sequence[AbstractAction]: The trace, possibly as a `PendingTrace`.
+
+        """
+        key = self.cache.key(arch_spec, mt, args)
+        if (
+            key is None
+            or self.cache.contains_key(key)
+            or (ref := kernel_ref(mt)) is None
+        ):
+            return self.cache.trace(arch_spec, mt, args, reverse=reverse)
+
+        if (future := self._submit(arch_spec, ref, args)) is None:
+            logger.debug(
+                "Cannot pickle the specification or the arguments of %s, tracing "
+                "it locally",
+                mt.sym_name,
+            )
+            return self.cache.trace(arch_spec, mt, args, reverse=reverse)
+        return PendingTrace(self, arch_spec, mt, args, reverse, future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._pool = None
+        self._specs.clear()
+
+    def __enter__(self) -> "ParallelTracer":
+        self._tokens.append(_ACTIVE_TRACER.set(self))
+        return self
+
+    def __exit__(self, *_) -> None:
+        _ACTIVE_TRACER.reset(self._tokens.pop())
+        if not self._tokens:
+            self.shutdown()
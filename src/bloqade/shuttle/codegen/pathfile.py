@@ -0,0 +1,298 @@
+import os
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, Union
+
+import numpy as np
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen.compact import CompactTrace
+
+if TYPE_CHECKING:
+    from bloqade.shuttle.dialects.path.types import Path
+
+MAGIC = b"BQSHPATH"
+"""Magic bytes at the start and at the end of a path file."""
+VERSION = 1
+"""Version of the path file format written by `write_paths`."""
+
+ALIGNMENT = 8
+"""All arrays start at a multiple of `ALIGNMENT` bytes."""
+
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("flags", "<u4")])
+"""File header, followed by the path records."""
+FOOTER_DTYPE = np.dtype(
+    [("index_offset", "<i8"), ("num_paths", "<i8"), ("magic", "S8")]
+)
+"""File footer, the last bytes of the file, pointing to the index."""
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", "<i8"),
+        ("num_x_tones", "<i8"),
+        ("num_y_tones", "<i8"),
+        ("num_x", "<i8"),
+        ("num_y", "<i8"),
+        ("num_waypoints", "<i8"),
+        ("num_blocks", "<i8"),
+        ("num_actions", "<i8"),
+        ("num_events", "<i8"),
+    ]
+)
+"""Index entry of a path record, stored in a contiguous table before the footer."""
+
+_DTYPES = {
+    "x_tones": "<i8",
+    "y_tones": "<i8",
+    "x_positions": "<f8",
+    "y_positions": "<f8",
+    "x_spacing": "<f8",
+    "y_spacing": "<f8",
+    "block_offsets": "<i8",
+    "action_kinds": "<i1",
+    "event_offsets": "<i8",
+    "x_masks": "<u1",
+    "y_masks": "<u1",
+    "x_slices": "<i8",
+    "y_slices": "<i8",
+}
+_COMPACT_FIELDS = tuple(f.name for f in fields(CompactTrace))
+assert set(_COMPACT_FIELDS) | {"x_tones", "y_tones"} == set(_DTYPES)
+
+
+def _shapes(entry) -> dict[str, tuple[int, ...]]:
+    num_x, num_y = int(entry["num_x"]), int(entry["num_y"])
+    num_waypoints, num_events = int(entry["num_waypoints"]), int(entry["num_events"])
+    return {
+        "x_tones": (int(entry["num_x_tones"]),),
+        "y_tones": (int(entry["num_y_tones"]),),
+        "x_positions": (num_waypoints, num_x),
+        "y_positions": (num_waypoints, num_y),
+        "x_spacing": (num_waypoints, max(num_x - 1, 0)),
+        "y_spacing": (num_waypoints, max(num_y - 1, 0)),
+        "block_offsets": (int(entry["num_blocks"]) + 1,),
+        "action_kinds": (int(entry["num_actions"]),),
+        "event_offsets": (num_events,),
+        "x_masks": (num_events, num_x),
+        "y_masks": (num_events, num_y),
+        "x_slices": (num_events, 3),
+        "y_slices": (num_events, 3),
+    }
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def _layout(entry) -> Iterator[tuple[str, int, np.dtype, tuple[int, ...]]]:
+    # arrays of a record are stored in the order of `_DTYPES`, each aligned
+    offset = int(entry["offset"])
+    for name, shape in _shapes(entry).items():
+        dtype = np.dtype(_DTYPES[name])
+        yield name, offset, dtype, shape
+        offset += int(np.prod(shape)) * dtype.itemsize
+        offset += _padding(offset)
+
+
+@dataclass(frozen=True)
+class PathRecord:
+    """Arrays of a single path stored in a path file."""
+
+    x_tones: np.ndarray
+    y_tones: np.ndarray
+    trace: CompactTrace
+
+    def to_path(self) -> "Path":
+        """Convert the record into a `Path`, copying the data out of the file."""
+        from bloqade.shuttle.dialects.path.types import Path
+
+        return Path.from_compact(
+            ilist.IList(self.x_tones.tolist()),
+            ilist.IList(self.y_tones.tolist()),
+            self.trace,
+        )
+
+
+def _encode_record(pth: "Path") -> dict[str, np.ndarray]:
+    trace = pth.to_compact()
+    return {
+        "x_tones": np.asarray(list(pth.x_tones), dtype=np.int64),
+        "y_tones": np.asarray(list(pth.y_tones), dtype=np.int64),
+        **{name: getattr(trace, name) for name in _COMPACT_FIELDS},
+    }
+
+
+def _write_record(
+    stream: BinaryIO, offset: int, arrays: dict[str, np.ndarray]
+) -> np.void:
+    entry = np.zeros((), dtype=INDEX_DTYPE)
+    entry["offset"] = offset
+    entry["num_x_tones"] = arrays["x_tones"].shape[0]
+    entry["num_y_tones"] = arrays["y_tones"].shape[0]
+    entry["num_x"] = arrays["x_positions"].shape[1]
+    entry["num_y"] = arrays["y_positions"].shape[1]
+    entry["num_waypoints"] = arrays["x_positions"].shape[0]
+    entry["num_blocks"] = arrays["block_offsets"].shape[0] - 1
+    entry["num_actions"] = arrays["action_kinds"].shape[0]
+    entry["num_events"] = arrays["event_offsets"].shape[0]
+
+    chunks = []
+    for name, _, dtype, _ in _layout(entry):
+        data = np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+        chunks.append(data + bytes(_padding(len(data))))
+    stream.write(b"".join(chunks))
+
+    return entry[()]
+
+
+def _read_footer(stream: BinaryIO) -> np.ndarray:
+    stream.seek(-FOOTER_DTYPE.itemsize, os.SEEK_END)
+    footer = np.frombuffer(stream.read(FOOTER_DTYPE.itemsize), dtype=FOOTER_DTYPE)[0]
+    if footer["magic"] != MAGIC:
+        raise ValueError("Not a path file or the file is truncated")
+    return footer
+
+
+def _write_body(
+    stream: BinaryIO,
+    offset: int,
+    entries: list,
+    records: Iterable[dict[str, np.ndarray]],
+) -> int:
+    for arrays in records:
+        entry = _write_record(stream, offset, arrays)
+        entries.append(entry)
+        offset = stream.tell()
+
+    footer = np.zeros((), dtype=FOOTER_DTYPE)
+    footer["index_offset"] = offset
+    footer["num_paths"] = len(entries)
+    footer["magic"] = MAGIC
+    stream.write(np.array(entries, dtype=INDEX_DTYPE).tobytes())
+    stream.write(footer.tobytes())
+    return len(entries)
+
+
+def write_paths(
+    filename: Union[str, os.PathLike],
+    paths: Iterable["Path"],
+    *,
+    append: bool = False,
+) -> int:
+    """Write paths into a binary path file.
+
+    The file starts with a header containing `MAGIC` and `VERSION`, followed by
+    one record per path containing the tones and the arrays of its
+    `CompactTrace`, each aligned to `ALIGNMENT` bytes. The index, a table of
+    `INDEX_DTYPE` entries, and the footer pointing to it are stored at the end
+    of the file. All values are little-endian.
+
+    Args:
+        filename (str | os.PathLike): The file to write.
+        paths (Iterable[Path]): The paths to write.
+        append (bool): If True, append the paths to an existing path file
+            instead of overwriting it. The existing index is replaced by an
+            index covering all paths. All paths are converted before the file
+            is modified, so the file is left untouched if a path cannot be
+            written. Defaults to False.
+
+    Returns:
+        int: The number of paths in the file.
+
+    Raises:
+        ValueError: If `append` is set and the file is not a path file with
+            the same version, or if a path contains an unsupported action.
+
+    """
+    if append and os.path.exists(filename):
+        with open(filename, "r+b") as stream:
+            footer = _read_footer(stream)
+            stream.seek(0)
+            header = np.frombuffer(stream.read(HEADER_DTYPE.itemsize), HEADER_DTYPE)[0]
+            if header["version"] != VERSION:
+                raise ValueError(
+                    f"Cannot append to path file version {header['version']}"
+                )
+            index_offset = int(footer["index_offset"])
+            stream.seek(index_offset)
+            entries = list(
+                np.frombuffer(
+                    stream.read(int(footer["num_paths"]) * INDEX_DTYPE.itemsize),
+                    dtype=INDEX_DTYPE,
+                )
+            )
+            # convert first, a failing path must not clobber the old index
+            records = [_encode_record(pth) for pth in paths]
+            stream.seek(index_offset)
+            stream.truncate()
+            return _write_body(stream, index_offset, entries, records)
+
+    with open(filename, "wb") as stream:
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        stream.write(header.tobytes())
+        return _write_body(
+            stream, HEADER_DTYPE.itemsize, [], map(_encode_record, paths)
+        )
+
+
+class PathFile:
+    """Read-only, memory-mapped view of a binary path file.
+
+    The arrays of the records are views into the memory map, so opening the
+    file and seeking to a path does not copy any data.
+
+    Example:
+        ```python
+        write_paths("program.paths", paths)
+
+        paths = PathFile("program.paths")
+        record = paths[3]
+        record.trace.x_positions  # zero-copy view of the file
+        record.to_path()
+        ```
+
+    """
+
+    def __init__(self, filename: Union[str, os.PathLike]):
+        self.filename = filename
+        self.buffer = np.memmap(filename, dtype=np.uint8, mode="r")
+
+        if self.buffer.shape[0] < HEADER_DTYPE.itemsize + FOOTER_DTYPE.itemsize:
+            raise ValueError("Not a path file or the file is truncated")
+
+        header = self.buffer[: HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        footer = self.buffer[-FOOTER_DTYPE.itemsize :].view(FOOTER_DTYPE)[0]
+        if header["magic"] != MAGIC or footer["magic"] != MAGIC:
+            raise ValueError("Not a path file or the file is truncated")
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported path file version {header['version']}")
+
+        self.version = int(header["version"])
+        index_offset = int(footer["index_offset"])
+        index_end = index_offset + int(footer["num_paths"]) * INDEX_DTYPE.itemsize
+        self.index = self.buffer[index_offset:index_end].view(INDEX_DTYPE)
+        """Index table with one `INDEX_DTYPE` entry per path."""
+
+    def __len__(self) -> int:
+        return self.index.shape[0]
+
+    def __getitem__(self, index: int) -> PathRecord:
+        if not -len(self) <= index < len(self):
+            raise IndexError("path index out of range")
+
+        arrays = {
+            name: self.buffer[offset : offset + int(np.prod(shape)) * dtype.itemsize]
+            .view(dtype)
+            .reshape(shape)
+            for name, offset, dtype, shape in _layout(self.index[index])
+        }
+        x_tones = arrays.pop("x_tones")
+        y_tones = arrays.pop("y_tones")
+        return PathRecord(x_tones, y_tones, CompactTrace(**arrays))
+
+    def __iter__(self) -> Iterator[PathRecord]:
+        return (self[i] for i in range(len(self)))
+
+    def to_paths(self) -> list["Path"]:
+        """Convert all records into `Path` objects."""
+        return [record.to_path() for record in self]
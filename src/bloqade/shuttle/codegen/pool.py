@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen.taskgen import TraceInterpreter
+
+
+@dataclass
+class TraceInterpreterPool:
+    """Thread-local pool of initialized `TraceInterpreter` objects per `ArchSpec`.
+
+    Constructing a `TraceInterpreter` builds the method table registry of its
+    dialects, which is a significant fraction of the time spent on short traces.
+    The pool keeps one idle interpreter per architecture specification and
+    thread, interpreters are reset by `TraceInterpreter.initialize` when they are
+    run again.
+
+    An interpreter is removed from the pool while it is acquired, so nested or
+    concurrent acquisitions always get distinct interpreters.
+
+    """
+
+    maxsize: int = 16
+    """Maximum number of idle interpreters kept per thread."""
+
+    _local: threading.local = field(
+        default_factory=threading.local, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+
+    def _idle(self) -> OrderedDict[ArchSpec, TraceInterpreter]:
+        if (idle := getattr(self._local, "idle", None)) is None:
+            idle = self._local.idle = OrderedDict()
+        return idle
+
+    @contextmanager
+    def acquire(self, arch_spec: ArchSpec) -> Iterator[TraceInterpreter]:
+        """Borrow a `TraceInterpreter` for `arch_spec` from the pool.
+
+        Example:
+            ```python
+            with DEFAULT_TRACER_POOL.acquire(arch_spec) as interp:
+                trace = interp.run_trace(mt, args, {})
+            ```
+
+        """
+        idle = self._idle()
+        interp = idle.pop(arch_spec, None)
+        if interp is None:
+            interp = TraceInterpreter(arch_spec)
+
+        try:
+            yield interp
+        finally:
+            interp.sink = None
+            interp.chunk_size = None
+            if self.maxsize > 0 and arch_spec not in idle:
+                idle[arch_spec] = interp
+                while len(idle) > self.maxsize:
+                    idle.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the idle interpreters of the current thread."""
+        self._idle().clear()
+
+
+DEFAULT_TRACER_POOL = TraceInterpreterPool()
+"""Tracer pool shared by the trace cache."""
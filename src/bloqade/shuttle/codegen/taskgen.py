@@ -1,7 +1,21 @@
 import abc
-from dataclasses import dataclass, field
+import queue
+import threading
+from dataclasses import FrozenInstanceError, dataclass, field
 from functools import cache
-from typing import Any, ClassVar, Dict, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Generic,
+    Iterator,
+    Optional,
+    Sequence,
+    TypeVar,
+    overload,
+)
 
 from bloqade.geometry.dialects import grid
 from kirin import ir
@@ -13,6 +27,9 @@ from typing_extensions import Self
 from bloqade.shuttle.arch import ArchSpecInterpreter
 from bloqade.shuttle.dialects import action
 
+if TYPE_CHECKING:
+    from bloqade.shuttle.codegen.compact import CompactTrace
+
 
 class AbstractAction(abc.ABC):
     @abc.abstractmethod
@@ -21,16 +38,108 @@ class AbstractAction(abc.ABC):
 
 @dataclass
 class WayPointsAction(AbstractAction):
-    way_points: list[grid.Grid] = field(default_factory=list)
+    way_points: Sequence[grid.Grid] = field(default_factory=list)
 
     def add_waypoint(self, pos: grid.Grid):
+        if not isinstance(self.way_points, list):
+            raise TypeError("Cannot add waypoints to read-only waypoints")
         self.way_points.append(pos)
 
     def inv(self):
         return WayPointsAction(list(reversed(self.way_points)))
 
+    def freeze(self) -> "FrozenWayPointsAction":
+        """Get a read-only copy of the action."""
+        return FrozenWayPointsAction(tuple(self.way_points))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WayPointsAction):
+            return NotImplemented
+        return len(self.way_points) == len(other.way_points) and all(
+            lhs == rhs for lhs, rhs in zip(self.way_points, other.way_points)
+        )
+
     def __repr__(self):
-        return f"WayPointsAction({self.way_points!r})"
+        return f"WayPointsAction({list(self.way_points)!r})"
+
+
+T = TypeVar("T")
+
+
+class ReversedSequence(Sequence[T], Generic[T]):
+    """Read-only view of a sequence in reverse order."""
+
+    __slots__ = ("base",)
+
+    def __init__(self, base: Sequence[Any]):
+        self.base = base
+
+    def _item(self, value: Any) -> T:
+        # hook applied to every item of `base` on access
+        return value
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+
+        size = len(self.base)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("index out of range")
+        return self._item(self.base[size - 1 - index])
+
+    def __iter__(self) -> Iterator[T]:
+        return map(self._item, reversed(self.base))
+
+    def __reversed__(self) -> Iterator[T]:
+        return map(self._item, self.base)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            lhs == rhs for lhs, rhs in zip(self, other)
+        )
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+@dataclass(eq=False, repr=False)
+class FrozenWayPointsAction(WayPointsAction):
+    """Read-only `WayPointsAction` that can be shared between traces.
+
+    The waypoints are stored in a tuple, or in a `ReversedSequence` view for the
+    inverse of another action, and cannot be added to or reassigned.
+
+    """
+
+    def __post_init__(self):
+        if not isinstance(self.way_points, (tuple, ReversedSequence)):
+            object.__setattr__(self, "way_points", tuple(self.way_points))
+
+    def __setattr__(self, name, value):
+        if "way_points" in self.__dict__:
+            raise FrozenInstanceError(f"cannot assign to field {name!r}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def inv(self):
+        """The inverse action, viewing the same waypoints in reverse order."""
+        return FrozenWayPointsAction(ReversedSequence(self.way_points))
+
+    def freeze(self) -> "FrozenWayPointsAction":
+        return self
 
 
 @dataclass(frozen=True)
@@ -117,10 +226,44 @@ class TurnOffXYSliceAction(TurnOffAction):
         return TurnOnXYSliceAction(self.x_tone_indices, self.y_tone_indices)
 
 
-def reverse_path(path: list[AbstractAction]) -> list[AbstractAction]:
+def reverse_path(path: Sequence[AbstractAction]) -> list[AbstractAction]:
     return [action.inv() for action in reversed(path)]
 
 
+def _lazy_inv(action: AbstractAction) -> AbstractAction:
+    if isinstance(action, WayPointsAction):
+        return FrozenWayPointsAction(ReversedSequence(action.way_points))
+
+    return action.inv()
+
+
+class ReversedPath(ReversedSequence[AbstractAction]):
+    """Read-only view of a trace played backwards.
+
+    The actions of the original trace are visited in reverse order and inverted
+    on access, waypoint blocks are inverted as `FrozenWayPointsAction` views
+    sharing the waypoints of the original trace. Use `materialize` to get an
+    independent list of actions.
+
+    """
+
+    __slots__ = ()
+
+    def _item(self, value: AbstractAction) -> AbstractAction:
+        return _lazy_inv(value)
+
+    def __repr__(self) -> str:
+        return f"ReversedPath({self.base!r})"
+
+    def inv(self) -> tuple[AbstractAction, ...]:
+        """Return a copy of the original trace."""
+        return tuple(self.base)
+
+    def materialize(self) -> list[AbstractAction]:
+        """Return the reversed trace as a new list of independent actions."""
+        return reverse_path(self.base)
+
+
 @cache
 def _default_dialect():
     from bloqade.shuttle.prelude import (
@@ -130,6 +273,18 @@ def _default_dialect():
     return tweezer
 
 
+class _TraceCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _TraceFailure:
+    error: BaseException
+
+
+_TRACE_DONE = object()
+
+
 @dataclass
 class TraceInterpreter(ArchSpecInterpreter):
     keys: ClassVar[list[str]] = ["action.tracer", "spec.interp", "main"]
@@ -137,12 +292,49 @@ class TraceInterpreter(ArchSpecInterpreter):
     trace: list[AbstractAction] = field(init=False, default_factory=list)
     curr_pos: Optional[grid.Grid] = field(init=False, default=None)
     dialects: ir.DialectGroup = field(init=False, default_factory=_default_dialect)
+    sink: Optional[Callable[[AbstractAction], None]] = field(
+        init=False, default=None, repr=False
+    )
+    """If set, completed actions are handed to the sink instead of being kept in `trace`."""
+    chunk_size: Optional[int] = field(init=False, default=None, repr=False)
+    """If set together with `sink`, waypoint blocks are split every `chunk_size` waypoints."""
 
     def initialize(self) -> Self:
         self.curr_pos = None
         self.trace = []
         return super().initialize()
 
+    def push_action(self, act: AbstractAction) -> None:
+        """Append an action to the trace."""
+        self.trace.append(act)
+        self._stream()
+
+    def push_waypoint(self, pos: grid.Grid) -> None:
+        """Append a waypoint to the last `WayPointsAction` of the trace."""
+        last_action = self.trace[-1]
+        assert isinstance(last_action, WayPointsAction)
+
+        if (
+            self.sink is not None
+            and self.chunk_size is not None
+            and len(last_action.way_points) >= self.chunk_size
+        ):
+            # the next chunk starts where the previous one ended, it is only
+            # started once there is a waypoint to move to
+            last_action = WayPointsAction([last_action.way_points[-1]])
+            self.trace.append(last_action)
+
+        last_action.add_waypoint(pos)
+        self._stream()
+
+    def _stream(self) -> None:
+        # only the last action can still be extended by the tracer
+        if self.sink is None:
+            return
+
+        while len(self.trace) > 1:
+            self.sink(self.trace.pop(0))
+
     def run_trace(
         self, mt: Method, args: tuple[Any, ...], kwargs: Dict[str, Any]
     ) -> list[AbstractAction]:
@@ -152,6 +344,103 @@ class TraceInterpreter(ArchSpecInterpreter):
         self.run(mt, args=args, kwargs=kwargs)
         return self.trace.copy()
 
+    def run_trace_compact(
+        self, mt: Method, args: tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> "CompactTrace":
+        """Trace `mt` and return the trace in the array-backed `CompactTrace` format."""
+        from bloqade.shuttle.codegen.compact import CompactTrace
+
+        return CompactTrace.from_actions(self.run_trace(mt, args, kwargs))
+
+    def iter_trace(
+        self,
+        mt: Method,
+        args: tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        *,
+        chunk_size: Optional[int] = None,
+        buffer_size: int = 64,
+    ) -> Iterator[AbstractAction]:
+        """Trace `mt` and yield the actions while the method is being interpreted.
+
+        The method is interpreted in a background thread that hands every
+        completed action over through a bounded buffer, so at most `buffer_size`
+        actions are held in memory at once. Closing the iterator early stops the
+        interpretation.
+
+        Args:
+            mt (Method): The move function to trace.
+            args (tuple[Any, ...]): The positional arguments of the move function.
+            kwargs (Dict[str, Any]): The keyword arguments of the move function.
+            chunk_size (int | None): If set, waypoint blocks are yielded in chunks
+                of at most `chunk_size` waypoints, each chunk starting at the last
+                waypoint of the previous one. Defaults to None.
+            buffer_size (int): Maximum number of actions buffered ahead of the
+                consumer. Defaults to 64.
+
+        Yields:
+            AbstractAction: The actions of the trace, in order.
+
+        """
+        if not isinstance(mt.code, (action.TweezerFunction, func.Lambda)):
+            raise ValueError("Method code must be a MoveFunction or Lambda")
+
+        if chunk_size is not None and chunk_size < 2:
+            raise ValueError("chunk_size must be at least 2")
+
+        return self._iter_trace(mt, args, kwargs, chunk_size, buffer_size)
+
+    def _iter_trace(
+        self,
+        mt: Method,
+        args: tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        chunk_size: Optional[int],
+        buffer_size: int,
+    ) -> Iterator[AbstractAction]:
+        buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+        cancelled = threading.Event()
+
+        def put(item: Any):
+            if cancelled.is_set():
+                raise _TraceCancelled()
+            buffer.put(item)
+
+        def worker():
+            try:
+                self.run(mt, args=args, kwargs=kwargs)
+                while self.trace:
+                    put(self.trace.pop(0))
+                put(_TRACE_DONE)
+            except _TraceCancelled:
+                pass
+            except BaseException as e:
+                try:
+                    put(_TraceFailure(e))
+                except _TraceCancelled:
+                    pass
+
+        self.sink = put
+        self.chunk_size = chunk_size
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while (item := buffer.get()) is not _TRACE_DONE:
+                if isinstance(item, _TraceFailure):
+                    raise item.error
+                yield item
+        finally:
+            cancelled.set()
+            # drain the buffer so that a blocked worker can observe the cancellation
+            while thread.is_alive():
+                try:
+                    buffer.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+            thread.join()
+            self.sink = None
+            self.chunk_size = None
+
 
 @action.dialect.register(key="action.tracer")
 class ActionTracer(MethodTable):
@@ -189,13 +478,13 @@ class ActionTracer(MethodTable):
         x_tone_indices = frame.get(stmt.x_tones)
         y_tone_indices = frame.get(stmt.y_tones)
 
-        interp.trace.append(
+        interp.push_action(
             self.intensity_actions[type(stmt)](
                 x_tone_indices if isinstance(x_tone_indices, slice) else x_tone_indices,
                 y_tone_indices if isinstance(y_tone_indices, slice) else y_tone_indices,
             )
         )
-        interp.trace.append(WayPointsAction(way_points=[interp.curr_pos]))
+        interp.push_action(WayPointsAction(way_points=[interp.curr_pos]))
         return ()
 
     @impl(action.Move)
@@ -203,9 +492,7 @@ class ActionTracer(MethodTable):
         if interp.curr_pos is None:
             raise InterpreterError("Position of AOD not set before moving tones")
 
-        assert isinstance(interp.trace[-1], WayPointsAction)
-
-        interp.trace[-1].add_waypoint(pos := frame.get_typed(stmt.grid, grid.Grid))
+        interp.push_waypoint(pos := frame.get_typed(stmt.grid, grid.Grid))
         if interp.curr_pos.shape != pos.shape:
             raise InterpreterError(
                 f"Position of AOD {interp.curr_pos} and target position {pos} have different shapes"
@@ -217,7 +504,7 @@ class ActionTracer(MethodTable):
     @impl(action.Set)
     def set(self, interp: TraceInterpreter, frame: Frame, stmt: action.Set):
         pos = frame.get_typed(stmt.grid, grid.Grid)
-        interp.trace.append(WayPointsAction([pos]))
+        interp.push_action(WayPointsAction([pos]))
 
         interp.curr_pos = pos
 
@@ -0,0 +1,269 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional, Sequence
+
+from bloqade.geometry.dialects import grid
+from kirin import ir
+from kirin.analysis import const
+from kirin.dialects import func, ilist, py
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen.pool import DEFAULT_TRACER_POOL, TraceInterpreterPool
+from bloqade.shuttle.codegen.taskgen import (
+    AbstractAction,
+    ActionTracer,
+    WayPointsAction,
+)
+from bloqade.shuttle.dialects import action
+
+if TYPE_CHECKING:
+    from bloqade.shuttle.dialects.path.types import Path
+
+
+@lru_cache(maxsize=65536)
+def _sub_grid(
+    zone: grid.Grid, x_indices: tuple[int, ...], y_indices: tuple[int, ...]
+) -> grid.Grid:
+    # a grid equal to `zone.get_view(x_indices, y_indices)`, computed the same
+    # way but without the IList bookkeeping of `SubGrid`
+    def spacing(spacings, indices):
+        return tuple(
+            sum(spacings[start:end]) for start, end in zip(indices[:-1], indices[1:])
+        )
+
+    def init(value, spacings, indices):
+        return None if value is None else value + sum(spacings[: indices[0]])
+
+    return grid.Grid(
+        spacing(zone.x_spacing, x_indices),
+        spacing(zone.y_spacing, y_indices),
+        init(zone.x_init, zone.x_spacing, x_indices),
+        init(zone.y_init, zone.y_spacing, y_indices),
+    )
+
+
+@lru_cache(maxsize=65536)
+def _shift(zone: grid.Grid, x_shift: float, y_shift: float) -> grid.Grid:
+    return zone.shift(x_shift, y_shift)
+
+
+def _get_sub_grid(zone: grid.Grid, x_indices, y_indices) -> grid.Grid:
+    return _sub_grid(zone, tuple(x_indices), tuple(y_indices))
+
+
+_OPERATIONS: dict[type[ir.Statement], Callable[..., Any]] = {
+    grid.GetSubGrid: _get_sub_grid,
+    grid.Shift: _shift,
+}
+"""Functions evaluating the pure statements a template can contain, the grids
+are cached since the same rows and columns are moved again and again."""
+
+
+@dataclass
+class _TemplateTrace:
+    actions: list[AbstractAction] = field(default_factory=list)
+    curr_pos: Optional[grid.Grid] = None
+
+
+def _set(trace: _TemplateTrace, pos: grid.Grid):
+    trace.actions.append(WayPointsAction([pos]))
+    trace.curr_pos = pos
+
+
+def _move(trace: _TemplateTrace, pos: grid.Grid):
+    if trace.curr_pos is None:
+        raise ValueError("Position of AOD not set before moving tones")
+    if trace.curr_pos.shape != pos.shape:
+        raise ValueError(
+            f"Position of AOD {trace.curr_pos} and target position {pos} have "
+            "different shapes"
+        )
+    last_action = trace.actions[-1]
+    assert isinstance(last_action, WayPointsAction)
+    last_action.add_waypoint(pos)
+    trace.curr_pos = pos
+
+
+def _intensity(action_type: type[AbstractAction]):
+    def emit(trace: _TemplateTrace, x_tones, y_tones):
+        if trace.curr_pos is None:
+            raise ValueError("Position of AOD not set before turning on/off tones")
+        trace.actions.append(action_type(x_tones, y_tones))
+        trace.actions.append(WayPointsAction([trace.curr_pos]))
+
+    return emit
+
+
+@dataclass(frozen=True)
+class _CompiledTrace:
+    # the statements of a straight-line kernel as (function, argument slots,
+    # result slot) steps over a list of values, the result slot of an action
+    # is None and its function takes the trace first
+    name: str
+    num_args: int
+    values: tuple[Any, ...]
+    steps: tuple[tuple[Callable[..., Any], tuple[int, ...], Optional[int]], ...]
+
+    def __call__(self, *args) -> list[AbstractAction]:
+        if len(args) != self.num_args:
+            raise ValueError(
+                f"{self.name} takes {self.num_args} arguments, got {len(args)}"
+            )
+        values = list(self.values)
+        values[1 : 1 + len(args)] = args
+        trace = _TemplateTrace()
+        for function, arg_slots, result_slot in self.steps:
+            if result_slot is None:
+                function(trace, *(values[slot] for slot in arg_slots))
+            else:
+                values[result_slot] = function(*(values[slot] for slot in arg_slots))
+        return trace.actions
+
+
+def _compile_trace(kernel: ir.Method) -> _CompiledTrace:
+    region = kernel.callable_region
+    if len(region.blocks) != 1 or any(stmt.regions for stmt in region.walk()):
+        raise ValueError(
+            f"Cannot build a template of {kernel.sym_name}, it has control flow"
+        )
+
+    (block,) = region.blocks
+    slots: dict[ir.SSAValue, int] = {arg: i for i, arg in enumerate(block.args)}
+    values: list[Any] = [None] * len(slots)
+    steps = []
+
+    def slot(value: ir.SSAValue, data: Any = None) -> int:
+        slots[value] = len(values)
+        values.append(data)
+        return slots[value]
+
+    for stmt in block.stmts:
+        arg_slots = tuple(slots[arg] for arg in stmt.args)
+        hint = stmt.results[0].hints.get("const") if stmt.results else None
+        if isinstance(stmt, func.Return):
+            break
+        elif isinstance(stmt, py.Constant):
+            slot(stmt.result, stmt.value.unwrap())
+        elif isinstance(stmt, func.ConstantNone):
+            slot(stmt.result)
+        elif isinstance(hint, const.Value) and stmt.has_trait(ir.Pure):
+            slot(stmt.results[0], hint.data)
+        elif (operation := _OPERATIONS.get(type(stmt))) is not None:
+            steps.append((operation, arg_slots, slot(stmt.results[0])))
+        elif isinstance(stmt, action.Set):
+            steps.append((_set, arg_slots, None))
+        elif isinstance(stmt, action.Move):
+            steps.append((_move, arg_slots, None))
+        elif (intensity := ActionTracer.intensity_actions.get(type(stmt))) is not None:
+            steps.append((_intensity(intensity), arg_slots, None))
+        else:
+            raise ValueError(
+                f"Cannot build a template of {kernel.sym_name}, {stmt.name} is not "
+                "supported"
+            )
+
+    return _CompiledTrace(
+        kernel.sym_name, len(block.args) - 1, tuple(values), tuple(steps)
+    )
+
+
+@dataclass(frozen=True)
+class MoveTemplate:
+    """Precompiled trace of a parameterized tweezer kernel.
+
+    `instantiate` builds the actions the kernel traces to directly from the
+    arguments of the kernel, typically by substituting index arrays into
+    precomputed grids, so no IR is interpreted or rewritten at runtime.
+
+    """
+
+    kernel: ir.Method
+    """The tweezer kernel the template stands for."""
+    instantiate: Callable[..., list[AbstractAction]]
+    """Build the trace of `kernel` for the given positional arguments."""
+
+    @classmethod
+    def from_kernel(cls, kernel: ir.Method) -> "MoveTemplate":
+        """Build the template of a straight-line kernel from its IR.
+
+        The statements of the kernel are compiled once into a list of steps
+        over the argument values: sub-grids and shifts are evaluated with a
+        cache, constants are taken from the IR and the actions are emitted as
+        `TraceInterpreter` does. Instantiating the template replays the steps.
+
+        Raises:
+            ValueError: If the kernel has control flow or a statement other than
+                constants, `grid.get_sub_grid`, `grid.shift_grid` and the
+                actions of the `action` dialect.
+
+        """
+        return cls(kernel, _compile_trace(kernel))
+
+
+@dataclass
+class TemplateLibrary:
+    """Move templates checked against the trace of their kernel for an `ArchSpec`.
+
+    Example:
+        ```python
+        library = TemplateLibrary(arch_spec)
+        library.register("shift", MoveTemplate(shift_impl, shift_actions), probes)
+
+        path = library.path("shift", x_tones, y_tones, zone, indices, 2)
+        ```
+
+    """
+
+    arch_spec: ArchSpec
+    templates: dict[str, MoveTemplate] = field(default_factory=dict)
+    pool: TraceInterpreterPool = field(
+        default_factory=lambda: DEFAULT_TRACER_POOL, repr=False
+    )
+
+    def register(
+        self, name: str, template: MoveTemplate, probes: Iterable[Sequence[Any]]
+    ) -> None:
+        """Add a template after comparing it with the trace of its kernel.
+
+        Args:
+            name (str): Name of the template.
+            template (MoveTemplate): The template.
+            probes (Iterable[Sequence[Any]]): Arguments of the kernel the
+                template is checked with, they should cover every branch of the
+                kernel.
+
+        Raises:
+            ValueError: If the template does not reproduce the trace of the
+                kernel for one of the probes.
+
+        """
+        with self.pool.acquire(self.arch_spec) as interp:
+            for args in probes:
+                expected = interp.run_trace(template.kernel, tuple(args), {})
+                actual = template.instantiate(*args)
+                if list(actual) != expected:
+                    raise ValueError(
+                        f"Template {name!r} does not match the trace of "
+                        f"{template.kernel.sym_name} for arguments {args!r}"
+                    )
+
+        self.templates[name] = template
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def trace(self, name: str, *args) -> list[AbstractAction]:
+        """Instantiate the template `name` with the arguments of its kernel."""
+        return self.templates[name].instantiate(*args)
+
+    def path(
+        self,
+        name: str,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+        *args,
+    ) -> "Path":
+        """Instantiate the template `name` as a `Path` played on the given tones."""
+        from bloqade.shuttle.dialects.path.types import Path
+
+        return Path(x_tones=x_tones, y_tones=y_tones, path=self.trace(name, *args))
@@ -0,0 +1,329 @@
+import abc
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+import numpy as np
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen.compact import CompactTrace
+from bloqade.shuttle.codegen.taskgen import AbstractAction
+
+if TYPE_CHECKING:
+    from bloqade.shuttle.dialects.path import Path
+
+MAX_VELOCITY = "aod_max_velocity"
+"""Key of the maximum velocity of the AOD in `ArchSpec.float_constants`."""
+MAX_ACCELERATION = "aod_max_acceleration"
+"""Key of the maximum acceleration of the AOD in `ArchSpec.float_constants`."""
+RAMP_TIME = "aod_ramp_time"
+"""Key of the duration of an intensity ramp in `ArchSpec.float_constants`."""
+
+
+class MotionProfile(abc.ABC):
+    """Motion of the AOD between two waypoints, from rest to rest.
+
+    All tones move along the same profile, scaled to their displacement, so a
+    segment is described by its largest displacement. The methods are
+    vectorized over segments.
+
+    """
+
+    @abc.abstractmethod
+    def duration(self, distance: np.ndarray) -> np.ndarray:
+        """Duration of moves over `distance`."""
+        ...
+
+    @abc.abstractmethod
+    def travelled(self, elapsed: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """Distance travelled `elapsed` after the start of moves over `distance`."""
+        ...
+
+
+@dataclass(frozen=True)
+class MinimumJerkProfile(MotionProfile):
+    """Quintic minimum-jerk profile `s(t) = 10 t^3 - 15 t^4 + 6 t^5`.
+
+    The duration is the shortest one keeping the peak velocity `1.875 d / T` and
+    the peak acceleration `10 / sqrt(3) d / T^2` within the limits.
+
+    """
+
+    max_velocity: float
+    max_acceleration: float
+
+    def duration(self, distance: np.ndarray) -> np.ndarray:
+        distance = np.asarray(distance, dtype=np.float64)
+        return np.maximum(
+            1.875 * distance / self.max_velocity,
+            np.sqrt(10.0 / math.sqrt(3.0) * distance / self.max_acceleration),
+        )
+
+    def travelled(self, elapsed: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        distance = np.asarray(distance, dtype=np.float64)
+        duration = self.duration(distance)
+        t = np.clip(
+            np.divide(
+                elapsed, duration, out=np.ones_like(duration), where=duration > 0
+            ),
+            0.0,
+            1.0,
+        )
+        return distance * t**3 * (10.0 - 15.0 * t + 6.0 * t**2)
+
+
+@dataclass(frozen=True)
+class ConstantJerkProfile(MotionProfile):
+    """S-curve profile made of constant jerk phases.
+
+    The acceleration ramps linearly up to `max_acceleration` and back down to
+    zero, the AOD then cruises at `max_velocity` and decelerates symmetrically.
+    Moves too short to reach `max_velocity` skip the cruise and peak at the
+    velocity `sqrt(d a / 2)`.
+
+    """
+
+    max_velocity: float
+    max_acceleration: float
+
+    def _phases(self, distance: np.ndarray):
+        # peak velocity, duration of the acceleration and total duration
+        peak = np.minimum(
+            self.max_velocity, np.sqrt(distance * self.max_acceleration / 2.0)
+        )
+        accel_time = 2.0 * peak / self.max_acceleration
+        cruise_time = np.divide(
+            distance, peak, out=np.zeros_like(distance), where=peak > 0
+        )
+        return peak, accel_time, accel_time + cruise_time
+
+    def duration(self, distance: np.ndarray) -> np.ndarray:
+        return self._phases(np.asarray(distance, dtype=np.float64))[2]
+
+    def travelled(self, elapsed: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        distance = np.asarray(distance, dtype=np.float64)
+        peak, accel_time, duration = self._phases(distance)
+        elapsed = np.clip(elapsed, 0.0, duration)
+        jerk = 2.0 * self.max_acceleration / np.where(accel_time > 0, accel_time, 1.0)
+
+        def accelerating(t):
+            rest = accel_time - t
+            return np.where(
+                t <= accel_time / 2.0,
+                jerk * t**3 / 6.0,
+                peak * (t - accel_time / 2.0) + jerk * rest**3 / 6.0,
+            )
+
+        return np.where(
+            elapsed <= accel_time,
+            accelerating(np.minimum(elapsed, accel_time)),
+            np.where(
+                elapsed <= duration - accel_time,
+                peak * (elapsed - accel_time / 2.0),
+                distance - accelerating(np.maximum(duration - elapsed, 0.0)),
+            ),
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class TimedPath:
+    """A traced path annotated with the time of every segment and ramp.
+
+    Segments are the moves between consecutive waypoints of a `WayPointsAction`
+    block and are indexed by their first waypoint. Moves and ramps are played
+    one after the other in the order of the trace. A new block jumps to its
+    first waypoint instantly, as `action.set_loc` does.
+
+    """
+
+    x_tones: ilist.IList[int, Any]
+    """The x tones of the path."""
+    y_tones: ilist.IList[int, Any]
+    """The y tones of the path."""
+    trace: CompactTrace
+    """The waypoints and intensity events of the path."""
+    profile: MotionProfile
+    """Profile of the moves, used to sample the positions between waypoints."""
+    waypoint_times: np.ndarray
+    """(n_waypoints,) time at which every waypoint is reached."""
+    segment_durations: np.ndarray
+    """(n_waypoints,) duration of the move from every waypoint to the next one,
+    zero for the last waypoint of a block."""
+    segment_distances: np.ndarray
+    """(n_waypoints,) largest displacement of a tweezer during the move from
+    every waypoint to the next one."""
+    event_times: np.ndarray
+    """(n_events,) start time of every intensity ramp."""
+    event_durations: np.ndarray
+    """(n_events,) duration of every intensity ramp."""
+    duration: float
+    """Total duration of the path."""
+
+    def sample(self, times: Iterable[float]) -> tuple[np.ndarray, np.ndarray]:
+        """Positions of the tones at the given times.
+
+        Args:
+            times (Iterable[float]): The times to sample, clipped to the
+                duration of the path.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The (n_times, n_x) x positions and the
+                (n_times, n_y) y positions.
+
+        Raises:
+            ValueError: If the path has no waypoints.
+
+        """
+        times = np.asarray(times, dtype=np.float64)
+        x_positions, y_positions = self.trace.x_positions, self.trace.y_positions
+        if self.trace.num_waypoints == 0:
+            raise ValueError("Cannot sample a path without waypoints")
+
+        index = np.searchsorted(self.waypoint_times, times, side="right") - 1
+        index = np.clip(index, 0, self.trace.num_waypoints - 1)
+        elapsed = times - self.waypoint_times[index]
+        distance = self.segment_distances[index]
+        moving = (self.segment_durations[index] > 0) & (
+            elapsed < self.segment_durations[index]
+        )
+        fraction = np.divide(
+            self.profile.travelled(elapsed, distance),
+            distance,
+            out=np.zeros_like(distance),
+            where=moving,
+        )[:, None]
+        end = np.minimum(index + moving, self.trace.num_waypoints - 1)
+
+        def interpolate(positions: np.ndarray):
+            start = positions[index]
+            return start + fraction * (positions[end] - start)
+
+        return interpolate(x_positions), interpolate(y_positions)
+
+    def to_path(self) -> "Path":
+        """The path without timing information."""
+        from bloqade.shuttle.dialects.path import Path
+
+        return Path.from_compact(self.x_tones, self.y_tones, self.trace)
+
+
+@dataclass(frozen=True)
+class TimingModel:
+    """Timing of the moves and intensity ramps of the AOD.
+
+    Example:
+        ```python
+        timing = TimingModel.from_arch_spec(arch_spec)
+        timed = timing.annotate(path)
+        x, y = timed.sample(np.linspace(0.0, timed.duration, 1000))
+        ```
+
+    """
+
+    profile: MotionProfile
+    """Profile of the moves between waypoints."""
+    ramp_time: float = 0.0
+    """Duration of every intensity ramp."""
+
+    @classmethod
+    def from_arch_spec(
+        cls,
+        arch_spec: ArchSpec,
+        profile_type: Callable[[float, float], MotionProfile] = MinimumJerkProfile,
+    ) -> "TimingModel":
+        """Read the limits of the AOD from `arch_spec.float_constants`.
+
+        The velocity and acceleration are read from `MAX_VELOCITY` and
+        `MAX_ACCELERATION`, the ramp time from `RAMP_TIME`, which defaults to
+        zero.
+
+        Args:
+            arch_spec (ArchSpec): The architecture specification.
+            profile_type (Callable[[float, float], MotionProfile]): Builds the
+                motion profile from the velocity and the acceleration.
+
+        Raises:
+            ValueError: If the velocity or acceleration is missing.
+
+        """
+        constants = arch_spec.float_constants
+        missing = [
+            key for key in (MAX_VELOCITY, MAX_ACCELERATION) if key not in constants
+        ]
+        if missing:
+            raise ValueError(f"Missing float constants {missing} in the arch spec")
+
+        return cls(
+            profile_type(constants[MAX_VELOCITY], constants[MAX_ACCELERATION]),
+            constants.get(RAMP_TIME, 0.0),
+        )
+
+    def segment_distances(self, trace: CompactTrace) -> np.ndarray:
+        """Largest displacement of a tweezer from every waypoint to the next one.
+
+        A tweezer sits at the crossing of an x and a y tone, so the largest
+        displacement is `hypot(max |dx|, max |dy|)`. The last waypoint of every
+        block has no next waypoint and a zero distance.
+
+        """
+        if trace.num_waypoints == 0:
+            return np.zeros(0)
+
+        def largest_step(positions: np.ndarray):
+            steps = np.abs(np.diff(positions, axis=0))
+            return np.max(steps, axis=1, initial=0.0)
+
+        distances = np.append(
+            np.hypot(largest_step(trace.x_positions), largest_step(trace.y_positions)),
+            0.0,
+        )
+        distances[trace.block_offsets[1:] - 1] = 0.0
+        return distances
+
+    def annotate_trace(
+        self,
+        trace: CompactTrace,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+    ) -> TimedPath:
+        """Annotate a trace with the timing of its segments and ramps."""
+        distances = self.segment_distances(trace)
+        durations = self.profile.duration(distances)
+        durations[trace.block_offsets[1:] - 1] = 0.0
+        event_durations = np.full(trace.num_events, self.ramp_time)
+
+        # a segment is played once its first waypoint is reached, and a ramp
+        # before the waypoints that follow it
+        waypoints = np.arange(trace.num_waypoints)
+        keys = np.concatenate([waypoints + 0.5, trace.event_offsets - 0.5])
+        order = np.argsort(keys, kind="stable")
+        ends = np.cumsum(np.concatenate([durations, event_durations])[order])
+        starts = ends - np.concatenate([durations, event_durations])[order]
+        item_starts = np.empty_like(starts)
+        item_starts[order] = starts
+
+        return TimedPath(
+            x_tones=x_tones,
+            y_tones=y_tones,
+            trace=trace,
+            profile=self.profile,
+            waypoint_times=item_starts[: trace.num_waypoints],
+            segment_durations=durations,
+            segment_distances=distances,
+            event_times=item_starts[trace.num_waypoints :],
+            event_durations=event_durations,
+            duration=float(ends[-1]) if len(ends) else 0.0,
+        )
+
+    def annotate(self, path: "Path") -> TimedPath:
+        """Annotate a path with the timing of its segments and ramps."""
+        return self.annotate_trace(path.to_compact(), path.x_tones, path.y_tones)
+
+    def duration(self, actions: Iterable[AbstractAction]) -> float:
+        """Total duration of a list of traced actions."""
+        trace = CompactTrace.from_actions(actions)
+        return float(
+            self.profile.duration(self.segment_distances(trace)).sum()
+            + self.ramp_time * trace.num_events
+        )
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from bloqade.shuttle.codegen.compact import CompactTrace
+from bloqade.shuttle.codegen.taskgen import AbstractAction
+
+if TYPE_CHECKING:
+    from bloqade.shuttle.dialects.path import Path
+
+
+class ToneViolation(NamedTuple):
+    """Two adjacent AOD tones out of order or closer than the minimum spacing."""
+
+    axis: str
+    """Axis of the tones, "x" or "y"."""
+    waypoint: int
+    """Index of the offending waypoint in the trace."""
+    tones: tuple[int, int]
+    """The adjacent tones, as tone ids if known, otherwise as position indices."""
+    spacing: float
+    """Spacing between the tones, zero or negative if they are merged or crossed."""
+
+
+@dataclass
+class ToneOrderChecker:
+    """Check that AOD tones stay strictly ordered and keep a minimum spacing.
+
+    The tones of every axis must be strictly increasing with a spacing of at
+    least `min_spacing` at every waypoint. Tones move linearly between two
+    consecutive waypoints, so the spacing of two tones along a segment is an
+    interpolation of the spacings at its ends: checking the waypoints also
+    rules out crossings and close approaches in between.
+
+    Unlike `CollisionChecker`, every tone is checked whether it is on or off,
+    since the frequencies of the AOD are constrained either way.
+
+    """
+
+    min_spacing: float = 0.0
+    """Minimum spacing between adjacent tones of the same axis."""
+
+    def check_trace(
+        self,
+        trace: CompactTrace,
+        x_tones: Optional[Sequence[int]] = None,
+        y_tones: Optional[Sequence[int]] = None,
+    ) -> list[ToneViolation]:
+        """Check every waypoint of a trace.
+
+        Args:
+            trace (CompactTrace): The trace to check.
+            x_tones (Sequence[int] | None): Ids of the x tones, used in the reported
+                violations.
+            y_tones (Sequence[int] | None): Ids of the y tones, used in the reported
+                violations.
+
+        Returns:
+            list[ToneViolation]: The violations, ordered by waypoint then by axis.
+
+        """
+        violations = [
+            *self._check_axis("x", trace.x_positions, x_tones),
+            *self._check_axis("y", trace.y_positions, y_tones),
+        ]
+        violations.sort(key=lambda violation: violation.waypoint)
+        return violations
+
+    def check_actions(
+        self,
+        actions: Iterable[AbstractAction],
+        x_tones: Optional[Sequence[int]] = None,
+        y_tones: Optional[Sequence[int]] = None,
+    ) -> list[ToneViolation]:
+        """Check the waypoints of a list of traced actions, see `check_trace`."""
+        return self.check_trace(CompactTrace.from_actions(actions), x_tones, y_tones)
+
+    def check_path(self, path: "Path") -> list[ToneViolation]:
+        """Check the waypoints of a path, see `check_trace`.
+
+        Raises:
+            ValueError: If the shape of the waypoints does not match the number of
+                tones of the path.
+
+        """
+        trace = CompactTrace.from_actions(path.path)
+        num_tones = (len(path.x_tones), len(path.y_tones))
+        if trace.num_waypoints > 0 and trace.shape != num_tones:
+            raise ValueError(
+                f"Waypoints of shape {trace.shape} do not match the {num_tones[0]} x "
+                f"tones and {num_tones[1]} y tones of the path"
+            )
+        return self.check_trace(trace, path.x_tones, path.y_tones)
+
+    def check_positions(self, positions: Sequence[float]) -> np.ndarray:
+        """Indices `i` of the adjacent positions `i, i + 1` violating the constraints."""
+        return np.flatnonzero(self._invalid(np.diff(np.asarray(positions, float))))
+
+    def _invalid(self, gaps: np.ndarray) -> np.ndarray:
+        return (gaps <= 0.0) | (gaps < self.min_spacing)
+
+    def _check_axis(
+        self, axis: str, positions: np.ndarray, tones: Optional[Sequence[int]]
+    ):
+        gaps = np.diff(positions, axis=1)
+        waypoints, indices = np.nonzero(self._invalid(gaps))
+        ids = list(tones) if tones is not None else range(positions.shape[1])
+        return [
+            ToneViolation(
+                axis, int(waypoint), (ids[i], ids[i + 1]), float(gaps[waypoint, i])
+            )
+            for waypoint, i in zip(waypoints.tolist(), indices.tolist())
+        ]
@@ -0,0 +1,455 @@
+"""Opt-in persistent cache of the IR produced by the `kernel`, `tweezer` and
+`move` dialect groups.
+
+The cache is enabled by setting the `BLOQADE_SHUTTLE_CACHE_DIR` environment
+variable before `bloqade.shuttle` is imported, or by calling
+`enable_compilation_cache`. When enabled, the IR of a kernel after its passes
+have run is stored on disk and loaded by later processes instead of re-running
+the passes.
+
+Cache keys are computed from:
+
+* the source of the kernel and the values of the globals and closure
+  variables it references,
+* the fingerprints of all kernels it references, so changing a callee
+  invalidates its callers,
+* the dialect group and the pass options, including the `ArchSpec`,
+* the sources of `bloqade.shuttle` (excluding `stdlib`), the python version and
+  the installed versions of kirin and bloqade-shuttle.
+
+Kernels referencing other kernels that cannot be imported by reference, e.g.
+kernels defined inside functions, and kernels defined outside of a source file
+bypass the cache.
+
+Warning:
+    Entries are pickles and loading an entry can execute arbitrary code. The
+    cache directory is created readable and writable by its owner only, and it
+    must not be shared with or writable by users that are not trusted, e.g.
+    it should not be a world writable temporary directory. The cache does not
+    authenticate its entries.
+
+"""
+
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import sys
+import tempfile
+import types
+import weakref
+from dataclasses import dataclass, field, fields, is_dataclass
+from functools import cache, wraps
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Mapping, NamedTuple, Optional, Union
+
+from kirin import ir
+from kirin.ir.method import Method
+
+from bloqade.shuttle.codegen.parallel import _resolve_kernel, kernel_ref
+
+ENV_CACHE_DIR = "BLOQADE_SHUTTLE_CACHE_DIR"
+"""Environment variable enabling the cache in the given directory."""
+ENV_CACHE_SIZE = "BLOQADE_SHUTTLE_CACHE_SIZE"
+"""Environment variable overriding the size cap of the cache in bytes."""
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+"""Default size cap of the cache, 256 MiB."""
+
+_FORMAT_VERSION = 1
+_SUFFIX = ".kirin"
+
+
+class CompilationCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_bytes: int
+    currbytes: int
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+class _IRPickler(pickle.Pickler):
+    # kernels are stored by reference, the method being compiled is not
+    # importable yet, so it is stored as a self reference
+    def __init__(self, file: io.BytesIO, mt: Method):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.mt = mt
+
+    def persistent_id(self, obj: Any):
+        if isinstance(obj, Method):
+            if obj is self.mt:
+                return ("self",)
+            if (ref := kernel_ref(obj)) is None:
+                raise _Uncacheable(f"{obj} cannot be imported by reference")
+            return ("method", *ref)
+        elif isinstance(obj, types.ModuleType):
+            raise _Uncacheable(f"IR references module {obj.__name__}")
+        return None
+
+
+class _IRUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, mt: Method):
+        super().__init__(file)
+        self.mt = mt
+
+    def persistent_load(self, pid: Any):
+        if pid[0] == "self":
+            return self.mt
+        _, module_name, qualname = pid
+        return _resolve_kernel((module_name, qualname))
+
+
+def _dump_ir(mt: Method) -> bytes:
+    buffer = io.BytesIO()
+    try:
+        _IRPickler(buffer, mt).dump((mt.code, mt.inferred))
+    except (TypeError, AttributeError) as e:
+        # raised by pickle for objects without pickle support, e.g. local classes
+        raise pickle.PicklingError(f"IR of {mt} cannot be pickled: {e}") from e
+    return buffer.getvalue()
+
+
+def _callees(mt: Method) -> list[Method]:
+    # kernels are referenced through statement attributes, e.g. `func.Invoke`
+    # or constants holding a kernel
+    callees = []
+    for stmt in mt.code.walk():
+        for attr in stmt.attributes.values():
+            if (
+                isinstance(data := getattr(attr, "data", attr), Method)
+                and data is not mt
+            ):
+                callees.append(data)
+    return callees
+
+
+def _stable_repr(value: Any) -> str:
+    # `hash` and the iteration order of sets of strings change between
+    # processes, so keys are computed from a canonical representation.
+    if isinstance(value, Method):
+        return f"Method({_fingerprint(value)})"
+    elif is_dataclass(value) and not isinstance(value, type):
+        items = ",".join(
+            f"{f.name}={_stable_repr(getattr(value, f.name))}"
+            for f in fields(value)
+            if f.compare
+        )
+        return f"{type(value).__qualname__}({items})"
+    elif isinstance(value, Mapping):
+        items = sorted(f"{_stable_repr(k)}:{_stable_repr(v)}" for k, v in value.items())
+        return "{" + ",".join(items) + "}"
+    elif isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(map(_stable_repr, value))) + "}"
+    elif isinstance(value, (list, tuple)):
+        return f"{type(value).__qualname__}({','.join(map(_stable_repr, value))})"
+
+    return repr(value)
+
+
+def _digest(*parts: str) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode())
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def _code_names(code: types.CodeType) -> set[str]:
+    # names of the globals used by a function and the functions nested in it
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _reference_repr(value: Any) -> str:
+    if isinstance(value, types.ModuleType):
+        return f"module {value.__name__}"
+    elif isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)):
+        return f"{value.__module__}.{value.__qualname__}"
+    elif isinstance(value, ir.DialectGroup):
+        # the passes of a group are covered by the compiler digest
+        return f"DialectGroup({sorted(dialect.name for dialect in value.data)})"
+    return _stable_repr(value)
+
+
+def _source_digest(mt: Method) -> str:
+    """Digest of the source of a kernel and of the values it references.
+
+    The globals and closure variables are part of the digest since the kernel
+    is lowered with their values, e.g. a module level constant.
+
+    """
+    py_func = mt.py_func
+    try:
+        source = inspect.getsource(py_func)  # type: ignore
+    except (OSError, TypeError) as e:
+        raise _Uncacheable(f"{mt} is not defined in a source file") from e
+
+    assert py_func is not None
+    namespace = py_func.__globals__
+    references = [
+        f"{name}={_reference_repr(namespace[name])}"
+        for name in sorted(_code_names(py_func.__code__))
+        if name in namespace
+    ]
+    for name, cell in zip(py_func.__code__.co_freevars, py_func.__closure__ or ()):
+        try:
+            references.append(f"{name}={_reference_repr(cell.cell_contents)}")
+        except ValueError:
+            # the cell is still empty
+            references.append(f"{name}=<empty>")
+
+    return _digest(source, *references)
+
+
+@cache
+def _compiler_digest() -> str:
+    package_dir = Path(__file__).parent
+    sources = sorted(
+        (
+            str(path.relative_to(package_dir)),
+            path.stat().st_mtime_ns,
+            path.stat().st_size,
+        )
+        for path in package_dir.rglob("*.py")
+        if "stdlib" not in path.relative_to(package_dir).parts
+    )
+
+    versions = []
+    for dist in ("kirin-toolchain", "bloqade-geometry", "bloqade-shuttle"):
+        try:
+            versions.append(f"{dist}={metadata.version(dist)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{dist}=unknown")
+
+    return _digest(str(_FORMAT_VERSION), sys.version, repr(sources), *versions)
+
+
+_FINGERPRINTS: "weakref.WeakKeyDictionary[Method, str]" = weakref.WeakKeyDictionary()
+
+
+def _fingerprint(mt: Method, _visiting: Optional[set[int]] = None) -> str:
+    """Fingerprint of a compiled kernel and, transitively, its callees."""
+    if (fingerprint := _FINGERPRINTS.get(mt)) is not None:
+        return fingerprint
+
+    visiting = _visiting if _visiting is not None else set()
+    if id(mt) in visiting:
+        # mutual recursion, the cycle is covered by the source digests
+        return f"cycle:{mt.sym_name}"
+    visiting.add(id(mt))
+
+    fingerprint = _digest(
+        _source_digest(mt),
+        getattr(mt.py_func, "__qualname__", mt.sym_name),
+        *sorted(set(_fingerprint(callee, visiting) for callee in _callees(mt))),
+    )
+    _FINGERPRINTS[mt] = fingerprint
+    return fingerprint
+
+
+@dataclass
+class CompilationCache:
+    """Persistent, size capped LRU cache of compiled kernel IR.
+
+    Entries are stored as one file per kernel in `directory`, the least
+    recently used entries are removed once the total size of the entries
+    exceeds `max_bytes`. Entries that cannot be loaded, e.g. because they were
+    written by an incompatible version, are treated as misses and replaced.
+
+    """
+
+    directory: Path
+    """Directory the entries are stored in."""
+    max_bytes: int = DEFAULT_MAX_BYTES
+    """Maximum total size of the entries in bytes."""
+
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+
+        self.directory = Path(self.directory)
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def key(
+        self, group: str, mt: Method, args: tuple[Any, ...], options: dict[str, Any]
+    ) -> str:
+        """Compute the cache key of `mt` before its passes are run."""
+        return _digest(
+            _compiler_digest(),
+            group,
+            _source_digest(mt),
+            getattr(mt.py_func, "__qualname__", mt.sym_name),
+            *sorted(set(_fingerprint(callee) for callee in _callees(mt))),
+            _stable_repr(args),
+            _stable_repr(options),
+        )
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def load(self, key: str, mt: Method) -> bool:
+        """Replace the IR of `mt` by the cached IR, returns False on a miss."""
+        entry = self._entry(key)
+        try:
+            data = entry.read_bytes()
+            code, inferred = _IRUnpickler(io.BytesIO(data), mt).load()
+        except FileNotFoundError:
+            return False
+        except Exception:
+            # stale or corrupted entry
+            entry.unlink(missing_ok=True)
+            return False
+
+        mt.code = code
+        mt.inferred = inferred
+        os.utime(entry)
+        return True
+
+    def store(self, key: str, mt: Method) -> bool:
+        """Store the IR of `mt`, returns False if it cannot be cached."""
+        try:
+            data = _dump_ir(mt)
+        except (_Uncacheable, pickle.PicklingError):
+            return False
+
+        if len(data) > self.max_bytes:
+            return False
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, self._entry(key))
+
+        self._evict()
+        return True
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        stats = []
+        for entry in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                stats.append((entry, entry.stat()))
+            except FileNotFoundError:
+                pass
+        return stats
+
+    def _evict(self) -> None:
+        stats = sorted(self._entries(), key=lambda item: item[1].st_mtime_ns)
+        total = sum(stat.st_size for _, stat in stats)
+        for entry, stat in stats:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def compile(
+        self,
+        group: ir.DialectGroup,
+        name: str,
+        run_pass: Callable[..., None],
+        mt: Method,
+        args: tuple[Any, ...],
+        options: dict[str, Any],
+    ) -> None:
+        """Run `run_pass` on `mt` or load its result from the cache."""
+        try:
+            key = self.key(name, mt, args, options)
+        except _Uncacheable:
+            run_pass(mt, *args, **options)
+            return
+
+        if self.load(key, mt):
+            self.hits += 1
+            if (arch_spec := options.get("arch_spec")) is not None:
+                # injecting the spec also rewrites the callees in place
+                from bloqade.shuttle.passes.inject_spec import InjectSpecsPass
+
+                InjectSpecsPass(group, arch_spec=arch_spec, fold=False)(mt)
+        else:
+            self.misses += 1
+            run_pass(mt, *args, **options)
+            self.store(key, mt)
+
+        _FINGERPRINTS[mt] = key
+
+    def cache_info(self) -> CompilationCacheInfo:
+        """Return the hit/miss statistics and the size of the cache."""
+        return CompilationCacheInfo(
+            self.hits,
+            self.misses,
+            self.max_bytes,
+            sum(stat.st_size for _, stat in self._entries()),
+        )
+
+    def cache_clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        for entry, _ in self._entries():
+            entry.unlink(missing_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+
+def _from_environ() -> Optional[CompilationCache]:
+    if not (directory := os.environ.get(ENV_CACHE_DIR)):
+        return None
+
+    max_bytes = int(os.environ.get(ENV_CACHE_SIZE, DEFAULT_MAX_BYTES))
+    return CompilationCache(Path(directory), max_bytes)
+
+
+_ACTIVE_CACHE: Optional[CompilationCache] = _from_environ()
+
+
+def enable_compilation_cache(
+    directory: Union[str, os.PathLike], max_bytes: int = DEFAULT_MAX_BYTES
+) -> CompilationCache:
+    """Enable the persistent compilation cache for kernels compiled from now on.
+
+    Args:
+        directory (str | os.PathLike): Directory to store the cache in.
+        max_bytes (int): Maximum total size of the cache in bytes. Defaults to
+            `DEFAULT_MAX_BYTES`.
+
+    Returns:
+        CompilationCache: The enabled cache.
+
+    """
+    global _ACTIVE_CACHE
+    _ACTIVE_CACHE = CompilationCache(Path(directory), max_bytes)
+    return _ACTIVE_CACHE
+
+
+def disable_compilation_cache() -> None:
+    """Disable the persistent compilation cache."""
+    global _ACTIVE_CACHE
+    _ACTIVE_CACHE = None
+
+
+def get_compilation_cache() -> Optional[CompilationCache]:
+    """Return the enabled compilation cache, if any."""
+    return _ACTIVE_CACHE
+
+
+def cached_run_pass(
+    group: ir.DialectGroup, name: str, run_pass: Callable[..., None]
+) -> Callable[..., None]:
+    """Wrap the `run_pass` function of a dialect group with the compilation cache."""
+
+    @wraps(run_pass)
+    def wrapper(mt: Method, *args: Any, **options: Any) -> None:
+        if (compilation_cache := _ACTIVE_CACHE) is None:
+            return run_pass(mt, *args, **options)
+
+        compilation_cache.compile(group, name, run_pass, mt, args, options)
+
+    return wrapper
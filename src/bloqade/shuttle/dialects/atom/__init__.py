@@ -6,6 +6,7 @@ from ._interface import (
     new as new,
     reset_position as reset_position,
 )
+from .state import AtomStateError as AtomStateError, AtomTable as AtomTable
 from .stmts import (
     Measure as Measure,
     Move as Move,
@@ -13,4 +14,5 @@ from .stmts import (
     New as New,
     ResetPosition as ResetPosition,
 )
+from .tracker import AtomInterpreter as AtomInterpreter, TrackedQubit as TrackedQubit
 from .types import Atom as Atom, AtomType as AtomType
@@ -0,0 +1,288 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.interp import InterpreterError
+
+from bloqade.shuttle.allocator import ZoneAllocator
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+from bloqade.shuttle.spatial import SiteRegistry
+
+from .types import Atom
+
+EMPTY = -1
+"""Occupancy value of a site without an atom."""
+IN_TRANSIT = -1
+"""Zone index of an atom that was picked up and not placed yet."""
+LOST = -2
+"""Zone index of an atom that was measured destructively."""
+
+
+class AtomStateError(InterpreterError):
+    """Raised when an atom operation is inconsistent with the tracked state."""
+
+
+def _zone_key(zone: grid.Grid) -> grid.Grid:
+    # sites of a filled grid are the sites of its parent
+    while isinstance(zone, FilledGrid):
+        zone = zone.parent
+    return zone
+
+
+@dataclass
+class AtomTable:
+    """Array-backed site assignment of every atom.
+
+    Atom `i` sits at site `(x[i], y[i])` of zone `zone[i]`, zones are numbered in
+    order of first use and `zones[k]` is the grid of zone `k`. Zones may overlap
+    or alias each other, so every site is mapped to a physical site shared by
+    all zones at its position with a `SiteRegistry`, and `site_atoms` holds the
+    atom at every physical site, `EMPTY` for free sites. Checking a site is a
+    single array lookup and an atom placed through one zone occupies the site
+    in every zone. The arrays grow geometrically as atoms are created.
+
+    Every zone also has a `ZoneAllocator` kept in sync with the shared
+    occupancy, which answers the free site queries without scanning the zone
+    and can be used to place atoms with its nearest site and block queries.
+
+    """
+
+    zones: list[grid.Grid] = field(default_factory=list)
+    """The grids of the zones, in order of first use."""
+    registry: SiteRegistry = field(default_factory=SiteRegistry)
+    """Physical sites of the zones, zone `k` is zone `k` of the registry."""
+    site_atoms: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    """Atom at every physical site, `EMPTY` for free sites."""
+    allocators: list[ZoneAllocator] = field(default_factory=list)
+    """Free sites of every zone."""
+    zone: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    """Zone index of every atom, `IN_TRANSIT` or `LOST` if it has no site."""
+    x: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    """x index of the site of every atom."""
+    y: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    """y index of the site of every atom."""
+    home: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.intp))
+    """`(zone, x, y)` of the site every atom was created at."""
+    size: int = 0
+    """Number of atoms created so far."""
+
+    _zone_ids: dict[grid.Grid, int] = field(default_factory=dict, repr=False)
+    _scratch: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.intp), repr=False
+    )
+
+    def zone_index(self, zone: grid.Grid) -> int:
+        """Index of a zone, registering it on first use."""
+        key = _zone_key(zone)
+        if (index := self._zone_ids.get(key)) is None:
+            index = self._zone_ids[key] = len(self.zones)
+            self.zones.append(key)
+            self.registry.add_zone(key)
+            new_sites = self.registry.num_sites - len(self.site_atoms)
+            self.site_atoms = np.concatenate(
+                (self.site_atoms, np.full(new_sites, EMPTY, dtype=np.intp))
+            )
+            # sites shared with other zones may already be occupied
+            self.allocators.append(ZoneAllocator(key, self.occupancy(index) != EMPTY))
+        return index
+
+    def occupancy(self, zone_index: int) -> np.ndarray:
+        """Atom at every site of a zone, `EMPTY` for free sites."""
+        return self.site_atoms[self.registry.site_ids[zone_index]]
+
+    def _sync_allocators(
+        self, zone_index: int, xs: np.ndarray, ys: np.ndarray, occupied: bool
+    ):
+        for other, (other_x, other_y) in self.registry.sharing(
+            zone_index, xs, ys
+        ).items():
+            sites = zip(other_x.tolist(), other_y.tolist())
+            if occupied:
+                self.allocators[other].occupy(sites)
+            else:
+                self.allocators[other].release(sites)
+
+    def _reserve(self, count: int):
+        capacity = len(self.zone)
+        if self.size + count <= capacity:
+            return
+
+        capacity = max(self.size + count, 2 * capacity, 16)
+        for name in ("zone", "x", "y", "home", "_scratch"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=np.intp)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+    def ids(self, atoms: Iterable[Atom]) -> np.ndarray:
+        """Array of the ids of `atoms`.
+
+        Raises:
+            AtomStateError: If an atom is unknown or appears more than once.
+
+        """
+        ids = np.fromiter((atom.id for atom in atoms), dtype=np.intp)
+        if len(ids) > 0 and (ids.min() < 0 or ids.max() >= self.size):
+            raise AtomStateError("Unknown atom")
+        # write the position of every id into a scratch array, an id appearing
+        # twice overwrites its first position
+        positions = np.arange(len(ids))
+        self._scratch[ids] = positions
+        if np.any(self._scratch[ids] != positions):
+            raise AtomStateError("The same atom appears more than once")
+        return ids
+
+    def create(self, zone_index: int, xs: np.ndarray, ys: np.ndarray) -> list[Atom]:
+        """Create atoms at the given sites of a zone."""
+        self._reserve(len(xs))
+        ids = np.arange(self.size, self.size + len(xs))
+        self.size += len(xs)
+        self.zone[ids] = IN_TRANSIT
+        self.place(ids, zone_index, xs, ys)
+        self.home[ids] = np.stack(
+            (np.full(len(ids), zone_index), self.x[ids], self.y[ids]), axis=1
+        )
+        return [Atom(int(i)) for i in ids]
+
+    def pick_up(self, ids: np.ndarray):
+        """Remove atoms from their sites.
+
+        Raises:
+            AtomStateError: If an atom has no site.
+
+        """
+        zones = self.zone[ids]
+        if np.any(zones < 0):
+            raise AtomStateError(
+                "Cannot move an atom that was measured or is not placed"
+            )
+        for zone_index in np.unique(zones).tolist():
+            selected = ids[zones == zone_index]
+            xs, ys = self.x[selected], self.y[selected]
+            self.site_atoms[self.registry.site_ids[zone_index][xs, ys]] = EMPTY
+            self._sync_allocators(zone_index, xs, ys, occupied=False)
+        self.zone[ids] = IN_TRANSIT
+
+    @contextmanager
+    def relocating(self, ids: np.ndarray):
+        """Pick up atoms and put them back at their sites if the block raises.
+
+        The block is expected to place the atoms, if it raises an
+        `AtomStateError` the atoms it already placed are removed and every atom
+        returns to the site it had before, so a failed operation leaves the
+        table unchanged.
+
+        Raises:
+            AtomStateError: If an atom has no site.
+
+        """
+        zones, xs, ys = self.zone[ids].copy(), self.x[ids].copy(), self.y[ids].copy()
+        self.pick_up(ids)
+        try:
+            yield
+        except AtomStateError:
+            if np.any(placed := self.zone[ids] >= 0):
+                self.pick_up(ids[placed])
+            for zone_index in np.unique(zones).tolist():
+                selected = zones == zone_index
+                self.place(ids[selected], zone_index, xs[selected], ys[selected])
+            raise
+
+    def place(self, ids: np.ndarray, zone_index: int, xs: np.ndarray, ys: np.ndarray):
+        """Put atoms without a site at the given sites of a zone.
+
+        Raises:
+            AtomStateError: If a site is already occupied or receives two atoms.
+
+        """
+        sites = self.registry.site_ids[zone_index][xs, ys]
+        if np.any(self.site_atoms[sites] != EMPTY):
+            raise AtomStateError(
+                f"Double occupancy of a site of zone {zone_index}, a site is "
+                "already occupied"
+            )
+        self.site_atoms[sites] = ids
+        # two atoms placed at the same site overwrite each other
+        if np.any(self.site_atoms[sites] != ids):
+            self.site_atoms[sites] = EMPTY
+            raise AtomStateError(
+                f"Double occupancy of a site of zone {zone_index}, two atoms "
+                "are placed at the same site"
+            )
+        self._sync_allocators(zone_index, xs, ys, occupied=True)
+        self.zone[ids] = zone_index
+        self.x[ids] = xs
+        self.y[ids] = ys
+
+    def lose(self, ids: np.ndarray):
+        """Remove atoms from their sites for good."""
+        self.pick_up(ids)
+        self.zone[ids] = LOST
+
+    def free_sites(
+        self, zone_index: int, count: int, available: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The first `count` free sites of a zone in `(x, y)` order.
+
+        Args:
+            zone_index (int): The zone.
+            count (int): Number of sites.
+            available (np.ndarray | None): Boolean array of the sites that may
+                be used. Defaults to all sites.
+
+        Raises:
+            AtomStateError: If there are fewer free sites.
+
+        """
+        try:
+            sites = self.allocators[zone_index].first_free(count, available)
+        except ValueError as e:
+            raise AtomStateError(f"Zone {zone_index}: {e}") from e
+        xs, ys = np.array(sites, dtype=np.intp).reshape(-1, 2).T
+        return xs, ys
+
+    def free_pairs(
+        self, zone_index: int, count: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The first `count` free pairs of sites `(2k, y), (2k + 1, y)` of a zone.
+
+        Returns:
+            The x indices of the left and right sites and the y indices.
+
+        Raises:
+            AtomStateError: If there are fewer free pairs.
+
+        """
+        occupancy = self.occupancy(zone_index)
+        pairs = occupancy.shape[0] // 2
+        free = (occupancy[0 : 2 * pairs : 2] == EMPTY) & (
+            occupancy[1 : 2 * pairs : 2] == EMPTY
+        )
+        sites = np.flatnonzero(free)[:count]
+        if len(sites) < count:
+            raise AtomStateError(
+                f"Zone {zone_index} has {len(sites)} free pairs of sites, "
+                f"{count} are needed"
+            )
+        pair, ys = np.unravel_index(sites, free.shape)
+        return 2 * pair, 2 * pair + 1, ys
+
+    def site_of(self, atom: Atom) -> Optional[tuple[grid.Grid, int, int]]:
+        """The zone and the site indices of an atom, None if it has no site."""
+        zone_index = int(self.zone[atom.id])
+        if zone_index < 0:
+            return None
+        return self.zones[zone_index], int(self.x[atom.id]), int(self.y[atom.id])
+
+    def position_of(self, atom: Atom) -> Optional[tuple[float, float]]:
+        """The position of an atom, None if it has no site."""
+        if (site := self.site_of(atom)) is None:
+            return None
+        zone, x, y = site
+        return zone.x_positions[x], zone.y_positions[y]
+
+    def occupied(self, zone: grid.Grid) -> np.ndarray:
+        """Boolean array of the occupied sites of a zone, registering it."""
+        return self.occupancy(self.zone_index(zone)) != EMPTY
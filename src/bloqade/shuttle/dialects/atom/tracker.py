@@ -0,0 +1,193 @@
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any, ClassVar
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from bloqade.squin import op, qubit
+from bloqade.types import Qubit
+from kirin import ir
+from kirin.dialects import ilist
+from kirin.interp import Frame, MethodTable, impl
+from typing_extensions import Self
+
+from bloqade.shuttle.arch import ArchSpecInterpreter
+from bloqade.shuttle.dialects import gate
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+
+from . import stmts
+from ._dialect import dialect
+from .state import AtomStateError, AtomTable
+from .types import Atom
+
+
+@dataclass(frozen=True)
+class TrackedQubit(Qubit):
+    """Qubit created while dry-running a kernel with `AtomInterpreter`."""
+
+    id: int
+
+
+@cache
+def _default_dialect():
+    from bloqade.shuttle.prelude import (
+        kernel,  # needs to be here to avoid circular import issues
+    )
+
+    return kernel
+
+
+@dataclass
+class AtomInterpreter(ArchSpecInterpreter):
+    """Dry-run a kernel while tracking the site of every atom.
+
+    The sites of the atoms are kept in `atoms`, an `AtomTable`. New atoms and
+    atoms moved by `atom.move` take the first free sites of the zone, in the
+    order of the x index first, atoms already in the zone keep their site.
+    `atom.move_next_to` places every control and its target at the first free
+    pair of sites `(2k, y), (2k + 1, y)` of the zone. `atom.reset_position`
+    returns the atoms to the sites they were created at. An operation that
+    fails with an `AtomStateError` leaves every atom at its site.
+
+    Quantum operations are not simulated: gates and squin operators are
+    ignored, and measurements return 0 for every atom. Note that `atom.move`
+    and `atom.move_next_to` are pure, moves whose result is unused are removed
+    when the kernel is compiled.
+
+    Example:
+        ```python
+        interp = AtomInterpreter(arch_spec)
+        interp.run(main, ())
+        interp.atoms.occupied(gate_zone)
+        ```
+
+    """
+
+    keys: ClassVar[list[str]] = ["atom.tracker", "spec.interp", "main"]
+
+    atoms: AtomTable = field(init=False, default_factory=AtomTable)
+    dialects: ir.DialectGroup = field(init=False, default_factory=_default_dialect)
+    num_qubits: int = field(init=False, default=0)
+
+    def initialize(self) -> Self:
+        self.atoms = AtomTable()
+        self.num_qubits = 0
+        return super().initialize()
+
+    def eval_stmt_fallback(self, frame: Frame, stmt: ir.Statement):
+        if stmt.dialect in (op.dialect, qubit.dialect):
+            return tuple(None for _ in stmt.results)
+        return super().eval_stmt_fallback(frame, stmt)
+
+
+def _check_lengths(atoms: ilist.IList, qubits: ilist.IList):
+    if len(atoms) != len(qubits):
+        raise AtomStateError(
+            f"Got {len(atoms)} atoms and {len(qubits)} qubits, expected the same "
+            "number"
+        )
+
+
+@dialect.register(key="atom.tracker")
+class AtomTracker(MethodTable):
+
+    @impl(stmts.New)
+    def new(self, interp: AtomInterpreter, frame: Frame, stmt: stmts.New):
+        zone = frame.get_casted(stmt.zone, grid.Grid)
+        qubits = frame.get_casted(stmt.qubits, ilist.IList[Qubit, Any])
+
+        table = interp.atoms
+        zone_index = table.zone_index(zone)
+        # atoms are only loaded into the filled sites of a filled grid
+        available = zone.filled_mask if isinstance(zone, FilledGrid) else None
+        xs, ys = table.free_sites(zone_index, len(qubits), available)
+        return (ilist.IList(table.create(zone_index, xs, ys)),)
+
+    @impl(stmts.Move)
+    def move(self, interp: AtomInterpreter, frame: Frame, stmt: stmts.Move):
+        zone = frame.get_casted(stmt.zone, grid.Grid)
+        atoms = frame.get_casted(stmt.atoms, ilist.IList[Atom, Any])
+
+        table = interp.atoms
+        zone_index = table.zone_index(zone)
+        ids = table.ids(atoms)
+        # atoms already in the zone keep their site
+        ids = ids[table.zone[ids] != zone_index]
+        with table.relocating(ids):
+            xs, ys = table.free_sites(zone_index, len(ids))
+            table.place(ids, zone_index, xs, ys)
+        return (atoms,)
+
+    @impl(stmts.MoveNextTo)
+    def move_next_to(
+        self, interp: AtomInterpreter, frame: Frame, stmt: stmts.MoveNextTo
+    ):
+        zone = frame.get_casted(stmt.zone, grid.Grid)
+        ctrls = frame.get_casted(stmt.ctrls, ilist.IList[Atom, Any])
+        qargs = frame.get_casted(stmt.qargs, ilist.IList[Atom, Any])
+        if len(ctrls) != len(qargs):
+            raise AtomStateError(
+                f"Got {len(ctrls)} controls and {len(qargs)} targets, expected "
+                "the same number"
+            )
+
+        # control i and target i are placed at the free pair of neighbouring
+        # sites (2k, y), (2k + 1, y) of the zone
+        table = interp.atoms
+        zone_index = table.zone_index(zone)
+        ids = table.ids([*ctrls, *qargs])
+        with table.relocating(ids):
+            left, right, ys = table.free_pairs(zone_index, len(ctrls))
+            table.place(
+                ids, zone_index, np.concatenate((left, right)), np.concatenate((ys, ys))
+            )
+        return (ctrls, qargs)
+
+    @impl(stmts.ResetPosition)
+    def reset_position(
+        self, interp: AtomInterpreter, frame: Frame, stmt: stmts.ResetPosition
+    ):
+        atoms = frame.get_casted(stmt.atoms, ilist.IList[Atom, Any])
+        qubits = frame.get_casted(stmt.qubits, ilist.IList[Qubit, Any])
+        _check_lengths(atoms, qubits)
+
+        table = interp.atoms
+        ids = table.ids(atoms)
+        zones, xs, ys = table.home[ids].T
+        with table.relocating(ids):
+            for zone_index in np.unique(zones).tolist():
+                selected = zones == zone_index
+                table.place(ids[selected], zone_index, xs[selected], ys[selected])
+        return ()
+
+    @impl(stmts.Measure)
+    def measure(self, interp: AtomInterpreter, frame: Frame, stmt: stmts.Measure):
+        atoms = frame.get_casted(stmt.atoms, ilist.IList[Atom, Any])
+        qubits = frame.get_casted(stmt.qubits, ilist.IList[Qubit, Any])
+        _check_lengths(atoms, qubits)
+
+        interp.atoms.lose(interp.atoms.ids(atoms))
+        return (ilist.IList([0] * len(atoms)),)
+
+
+@qubit.dialect.register(key="atom.tracker")
+class QubitTracker(MethodTable):
+
+    @impl(qubit.New)
+    def new(self, interp: AtomInterpreter, frame: Frame, stmt: qubit.New):
+        n_qubits = frame.get_casted(stmt.n_qubits, int)
+        start = interp.num_qubits
+        interp.num_qubits += n_qubits
+        return (ilist.IList([TrackedQubit(i) for i in range(start, start + n_qubits)]),)
+
+
+@gate.dialect.register(key="atom.tracker")
+class GateTracker(MethodTable):
+
+    @impl(gate.TopHatCZ)
+    @impl(gate.LocalRz)
+    @impl(gate.LocalR)
+    @impl(gate.GlobalR)
+    @impl(gate.GlobalRz)
+    def gate(self, interp: AtomInterpreter, frame: Frame, stmt: ir.Statement):
+        return ()
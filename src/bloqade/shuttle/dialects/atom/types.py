@@ -1,8 +1,13 @@
+from dataclasses import dataclass
+
 from kirin import types
 
 
+@dataclass(frozen=True)
 class Atom:
-    pass
+    """Handle of an atom, its site is tracked by an `AtomTable`."""
+
+    id: int
 
 
 AtomType = types.PyClass(Atom)
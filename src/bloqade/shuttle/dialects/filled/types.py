@@ -1,8 +1,8 @@
 from dataclasses import dataclass, field
 from functools import cached_property
-from itertools import product
 from typing import Any, Iterable, Sequence, TypeVar
 
+import numpy as np
 from bloqade.geometry.dialects import grid
 from kirin import types
 from kirin.dialects import ilist
@@ -11,21 +11,81 @@ NumX = TypeVar("NumX")
 NumY = TypeVar("NumY")
 
 
-@dataclass(eq=False)
+def _index_arrays(
+    shape: tuple[int, int], indices: Iterable[tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray]:
+    if not isinstance(indices, np.ndarray):
+        indices = list(indices)
+
+    # indices outside of the grid do not address any site and are ignored
+    index_array = np.asarray(indices, dtype=np.intp).reshape(-1, 2)
+    in_range = np.all((index_array >= 0) & (index_array < shape), axis=1)
+    index_array = index_array[in_range]
+
+    return index_array[:, 0], index_array[:, 1]
+
+
+def _pack(mask: np.ndarray) -> bytes:
+    return np.packbits(mask, axis=None).tobytes()
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _first_true(mask: np.ndarray, axis: int) -> np.ndarray:
+    # index of the first True along `axis`, -1 if there is none
+    return _readonly(np.where(mask.any(axis=axis), mask.argmax(axis=axis), -1))
+
+
+def _last_true(mask: np.ndarray, axis: int) -> np.ndarray:
+    # index of the last True along `axis`, -1 if there is none
+    last = mask.shape[axis] - 1 - np.flip(mask, axis=axis).argmax(axis=axis)
+    return _readonly(np.where(mask.any(axis=axis), last, -1))
+
+
+@dataclass(eq=False, init=False, repr=False)
 class FilledGrid(grid.Grid[NumX, NumY]):
+    """Grid of sites with a set of vacant sites.
+
+    The vacant sites are stored as a packed bit array of shape `(num_x, num_y)`
+    in row-major order, `vacancies` and `vacancy_mask` are computed from it on
+    demand. Site indices outside of the grid given to the constructor, `fill`
+    or `vacate` address no site and are ignored, they are not part of
+    `vacancies`.
+
+    The array accessors are cached and read-only. A row is the set of sites with
+    the same y index and a column the set of sites with the same x index, so
+    per-row arrays have length `num_y` and per-column arrays length `num_x`.
+
+    """
+
     x_spacing: tuple[float, ...] = field(init=False)
     y_spacing: tuple[float, ...] = field(init=False)
     x_init: float | None = field(init=False)
     y_init: float | None = field(init=False)
 
     parent: grid.Grid[NumX, NumY]
-    vacancies: frozenset[tuple[int, int]]
+    vacancy_bits: bytes
+    """Packed bits of `vacancy_mask`, see `numpy.packbits`."""
+
+    def __init__(
+        self,
+        parent: grid.Grid[NumX, NumY],
+        vacancies: Iterable[tuple[int, int]] = (),
+    ):
+        mask = np.zeros(parent.shape, dtype=bool)
+        mask[_index_arrays(parent.shape, vacancies)] = True
+        self._init(parent, _pack(mask))
 
-    def __post_init__(self):
-        self.x_spacing = self.parent.x_spacing
-        self.y_spacing = self.parent.y_spacing
-        self.x_init = self.parent.x_init
-        self.y_init = self.parent.y_init
+    def _init(self, parent: grid.Grid[NumX, NumY], vacancy_bits: bytes):
+        self.parent = parent
+        self.vacancy_bits = vacancy_bits
+        self.x_spacing = parent.x_spacing
+        self.y_spacing = parent.y_spacing
+        self.x_init = parent.x_init
+        self.y_init = parent.y_init
 
         self.type = types.Generic(
             FilledGrid,
@@ -33,94 +93,180 @@ class FilledGrid(grid.Grid[NumX, NumY]):
             types.Literal(len(self.y_spacing) + 1),
         )
 
+    @classmethod
+    def _from_bits(
+        cls, parent: grid.Grid[NumX, NumY], vacancy_bits: bytes
+    ) -> "FilledGrid[NumX, NumY]":
+        obj = cls.__new__(cls)
+        obj._init(parent, vacancy_bits)
+        return obj
+
+    @classmethod
+    def from_mask(
+        cls, parent: grid.Grid[NumX, NumY], vacancy_mask: np.ndarray
+    ) -> "FilledGrid[NumX, NumY]":
+        """Create a filled grid from a boolean array of the vacant sites.
+
+        Args:
+            parent (Grid): The grid of sites.
+            vacancy_mask (np.ndarray): Boolean array of shape `parent.shape`,
+                True for vacant sites.
+
+        Returns:
+            FilledGrid: The filled grid.
+
+        """
+        vacancy_mask = np.asarray(vacancy_mask, dtype=bool)
+        if vacancy_mask.shape != parent.shape:
+            raise ValueError(
+                f"Vacancy mask of shape {vacancy_mask.shape} does not match the "
+                f"grid shape {parent.shape}"
+            )
+        return cls._from_bits(parent, _pack(vacancy_mask))
+
+    @cached_property
+    def vacancy_mask(self) -> np.ndarray:
+        """Read-only boolean array of shape `(num_x, num_y)`, True for vacant sites."""
+        num_x, num_y = self.shape
+        mask = np.unpackbits(
+            np.frombuffer(self.vacancy_bits, dtype=np.uint8), count=num_x * num_y
+        ).view(bool)
+        return _readonly(mask.reshape(num_x, num_y))
+
+    @cached_property
+    def vacancies(self) -> frozenset[tuple[int, int]]:
+        """The `(x_index, y_index)` pairs of the vacant sites."""
+        x_indices, y_indices = np.nonzero(self.vacancy_mask)
+        return frozenset(zip(x_indices.tolist(), y_indices.tolist()))
+
+    def __repr__(self):
+        return f"FilledGrid(parent={self.parent!r}, vacancies={self.vacancies!r})"
+
     def __hash__(self):
-        return hash((self.parent, self.vacancies))
+        return hash((self.parent, self.vacancy_bits))
 
     def __eq__(self, other: Any) -> bool:
         return (
             isinstance(other, FilledGrid)
+            and self.vacancy_bits == other.vacancy_bits
             and self.parent == other.parent
-            and self.vacancies == other.vacancies
         )
 
     def is_equal(self, other: Any) -> bool:
         return self == other
 
     @cached_property
-    def positions(self) -> ilist.IList[tuple[float, float], Any]:
-        positions = tuple(
-            (x, y)
-            for (ix, x), (iy, y) in product(
-                enumerate(self.x_positions), enumerate(self.y_positions)
-            )
-            if (ix, iy) not in self.vacancies
+    def filled_mask(self) -> np.ndarray:
+        """Read-only boolean array of shape `(num_x, num_y)`, True for filled sites."""
+        return _readonly(~self.vacancy_mask)
+
+    @cached_property
+    def filled_indices(self) -> np.ndarray:
+        """Array of shape `(num_filled, 2)` with the `(x_index, y_index)` of the
+        filled sites, ordered by x index first."""
+        return _readonly(np.argwhere(self.filled_mask))
+
+    @cached_property
+    def filled_positions(self) -> np.ndarray:
+        """Array of shape `(num_filled, 2)` with the `(x, y)` positions of the
+        filled sites, in the order of `filled_indices`."""
+        x_positions = np.asarray(self.x_positions, dtype=np.float64)
+        y_positions = np.asarray(self.y_positions, dtype=np.float64)
+        x_indices, y_indices = self.filled_indices.T
+        return _readonly(
+            np.stack((x_positions[x_indices], y_positions[y_indices]), axis=-1)
         )
 
-        return ilist.IList(positions)
+    @property
+    def num_filled(self) -> int:
+        """Number of filled sites."""
+        return self.filled_indices.shape[0]
+
+    @cached_property
+    def row_counts(self) -> np.ndarray:
+        """Number of filled sites in every row."""
+        return _readonly(self.filled_mask.sum(axis=0))
+
+    @cached_property
+    def column_counts(self) -> np.ndarray:
+        """Number of filled sites in every column."""
+        return _readonly(self.filled_mask.sum(axis=1))
+
+    @cached_property
+    def first_vacant_in_rows(self) -> np.ndarray:
+        """x index of the first vacant site of every row, -1 for full rows."""
+        return _first_true(self.vacancy_mask, axis=0)
+
+    @cached_property
+    def last_filled_in_rows(self) -> np.ndarray:
+        """x index of the last filled site of every row, -1 for empty rows."""
+        return _last_true(self.filled_mask, axis=0)
+
+    @cached_property
+    def first_vacant_in_columns(self) -> np.ndarray:
+        """y index of the first vacant site of every column, -1 for full columns."""
+        return _first_true(self.vacancy_mask, axis=1)
+
+    @cached_property
+    def last_filled_in_columns(self) -> np.ndarray:
+        """y index of the last filled site of every column, -1 for empty columns."""
+        return _last_true(self.filled_mask, axis=1)
+
+    @cached_property
+    def positions(self) -> ilist.IList[tuple[float, float], Any]:
+        return ilist.IList(tuple(map(tuple, self.filled_positions.tolist())))
 
     @classmethod
     def fill(
         cls, grid_obj: grid.Grid[NumX, NumY], filled: Sequence[tuple[int, int]]
     ) -> "FilledGrid[NumX, NumY]":
-        num_x, num_y = grid_obj.shape
-
         if isinstance(grid_obj, FilledGrid):
-            vacancies = grid_obj.vacancies
+            mask = grid_obj.vacancy_mask.copy()
         else:
-            vacancies = frozenset(product(range(num_x), range(num_y)))
+            mask = np.ones(grid_obj.shape, dtype=bool)
 
-        vacancies = vacancies - frozenset(filled)
+        mask[_index_arrays(grid_obj.shape, filled)] = False
 
-        return cls(parent=grid_obj, vacancies=vacancies)
+        return cls._from_bits(grid_obj, _pack(mask))
 
     @classmethod
     def vacate(
         cls, grid_obj: grid.Grid[NumX, NumY], vacancies: Iterable[tuple[int, int]]
     ) -> "FilledGrid[NumX, NumY]":
-
         if isinstance(grid_obj, FilledGrid):
-            input_vacancies = grid_obj.vacancies
+            mask = grid_obj.vacancy_mask.copy()
         else:
-            input_vacancies = frozenset()
+            mask = np.zeros(grid_obj.shape, dtype=bool)
 
-        input_vacancies = input_vacancies.union(vacancies)
+        mask[_index_arrays(grid_obj.shape, vacancies)] = True
 
-        return cls(parent=grid_obj, vacancies=input_vacancies)
+        return cls._from_bits(grid_obj, _pack(mask))
 
     def get_view(  # type: ignore
         self, x_indices: ilist.IList[int, Any], y_indices: ilist.IList[int, Any]
     ):
-        remapping_x = {ix: i for i, ix in enumerate(x_indices)}
-        remapping_y = {iy: i for i, iy in enumerate(y_indices)}
-        return FilledGrid(
-            parent=self.parent.get_view(x_indices, y_indices),
-            vacancies=frozenset(
-                (remapping_x[x], remapping_y[y])
-                for x, y in self.vacancies
-                if x in remapping_x and y in remapping_y
-            ),
+        x_array = np.asarray(list(x_indices), dtype=np.intp)
+        y_array = np.asarray(list(y_indices), dtype=np.intp)
+        return FilledGrid._from_bits(
+            self.parent.get_view(x_indices, y_indices),
+            _pack(self.vacancy_mask[np.ix_(x_array, y_array)]),
         )
 
     def shift(self, x_shift: float, y_shift: float):
-        return FilledGrid(
-            parent=self.parent.shift(x_shift, y_shift),
-            vacancies=self.vacancies,
+        return FilledGrid._from_bits(
+            self.parent.shift(x_shift, y_shift), self.vacancy_bits
         )
 
     def scale(self, x_scale: float, y_scale: float):
-        return FilledGrid(
-            parent=self.parent.scale(x_scale, y_scale),
-            vacancies=self.vacancies,
+        return FilledGrid._from_bits(
+            self.parent.scale(x_scale, y_scale), self.vacancy_bits
         )
 
     def repeat(self, x_times: int, y_times: int, x_gap: float, y_gap: float):
         new_parent = self.parent.repeat(x_times, y_times, x_gap, y_gap)
-        x_dim, y_dim = self.shape
-        vacancies = frozenset(
-            (x + x_dim * i, y + y_dim * j)
-            for i, j, (x, y) in product(range(x_times), range(y_times), self.vacancies)
+        return FilledGrid._from_bits(
+            new_parent, _pack(np.tile(self.vacancy_mask, (x_times, y_times)))
         )
-        return FilledGrid.vacate(new_parent, vacancies)
 
 
 FilledGridType = types.Generic(FilledGrid, types.TypeVar("NumX"), types.TypeVar("NumY"))
@@ -0,0 +1,31 @@
+from typing import Any, Sequence
+
+from kirin.ir.method import Method
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import DEFAULT_TRACE_CACHE
+from bloqade.shuttle.codegen.parallel import active_parallel_tracer
+from bloqade.shuttle.codegen.taskgen import AbstractAction
+from bloqade.shuttle.dialects.path import stmts
+
+
+def trace_gen(
+    stmt: stmts.Gen,
+    arch_spec: ArchSpec,
+    mt: Method,
+    args: tuple[Any, ...],
+    reverse: bool,
+) -> Sequence[AbstractAction]:
+    """Trace the move function of a `path.Gen` statement.
+
+    Inside a `ParallelTracer` block, the paths feeding a `path.Parallel` or
+    `path.Auto` statement are traced concurrently by the tracer.
+
+    """
+    tracer = active_parallel_tracer()
+    if tracer is not None and any(
+        isinstance(use.stmt, (stmts.Parallel, stmts.Auto)) for use in stmt.result.uses
+    ):
+        return tracer.trace(arch_spec, mt, args, reverse=reverse)
+
+    return DEFAULT_TRACE_CACHE.trace(arch_spec, mt, args, reverse=reverse)
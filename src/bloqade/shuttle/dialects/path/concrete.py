@@ -6,9 +6,9 @@ from kirin.interp import (
     impl,
 )
 
-from bloqade.shuttle.codegen import TraceInterpreter, reverse_path
 from bloqade.shuttle.dialects import schedule
 from bloqade.shuttle.dialects.path import dialect, stmts, types
+from bloqade.shuttle.dialects.path._trace import trace_gen
 
 
 @dialect.register
@@ -31,10 +31,7 @@ class PathInterpreter(MethodTable):
         inputs = frame.get_values(stmt.inputs)
         kwargs = stmt.kwargs
         args = interp.permute_values(device_task.move_fn.arg_names, inputs, kwargs)
-        path = TraceInterpreter(stmt.arch_spec).run_trace(device_task.move_fn, args, {})
-
-        if reverse:
-            path = reverse_path(path)
+        path = trace_gen(stmt, stmt.arch_spec, device_task.move_fn, args, reverse)
 
         return (
             types.Path(
@@ -3,7 +3,7 @@ from typing import cast
 from kirin.analysis import const, forward
 from kirin.interp import MethodTable, impl
 
-from bloqade.shuttle.codegen import TraceInterpreter, reverse_path
+from bloqade.shuttle.codegen import DEFAULT_TRACE_CACHE
 from bloqade.shuttle.dialects import schedule
 from bloqade.shuttle.dialects.path import dialect, stmts, types
 
@@ -43,18 +43,16 @@ class ConstProp(MethodTable):
             device_task.move_fn.arg_names, inputs_results, kwargs
         )
 
-        path = TraceInterpreter(stmt.arch_spec).run_trace(
+        path = DEFAULT_TRACE_CACHE.trace(
+            stmt.arch_spec,
             device_task.move_fn,
             tuple(
                 cast(const.Value, arg).data if isinstance(arg, const.Value) else arg
                 for arg in args
             ),
-            {},
+            reverse=reverse,
         )
 
-        if reverse:
-            path = reverse_path(path)
-
         return (
             const.Value(
                 types.Path(
@@ -6,9 +6,9 @@ from kirin.interp import (
 )
 
 from bloqade.shuttle.arch import ArchSpecInterpreter
-from bloqade.shuttle.codegen import TraceInterpreter, reverse_path
 from bloqade.shuttle.dialects import schedule
 from bloqade.shuttle.dialects.path import dialect, stmts, types
+from bloqade.shuttle.dialects.path._trace import trace_gen
 
 
 @dialect.register(key="spec.interp")
@@ -29,12 +29,7 @@ class SpecPathInterpreter(MethodTable):
         inputs = frame.get_values(stmt.inputs)
         kwargs = stmt.kwargs
         args = interp.permute_values(device_task.move_fn.arg_names, inputs, kwargs)
-        path = TraceInterpreter(interp.arch_spec).run_trace(
-            device_task.move_fn, args, {}
-        )
-
-        if reverse:
-            path = reverse_path(path)
+        path = trace_gen(stmt, interp.arch_spec, device_task.move_fn, args, reverse)
 
         return (
             types.Path(
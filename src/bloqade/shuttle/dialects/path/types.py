@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Sequence
 
 from kirin import types
 from kirin.dialects import ilist
 
+from bloqade.shuttle.codegen.compact import CompactTrace
 from bloqade.shuttle.codegen.taskgen import AbstractAction
 
 
@@ -11,7 +12,7 @@ from bloqade.shuttle.codegen.taskgen import AbstractAction
 class Path:
     x_tones: ilist.IList[int, Any]
     y_tones: ilist.IList[int, Any]
-    path: list[AbstractAction] = field(default_factory=list, repr=False)
+    path: Sequence[AbstractAction] = field(default_factory=list, repr=False)
 
     def __repr__(self) -> str:
         return f"Path({self.x_tones!r}, {self.y_tones!r}, {self.path!r})"
@@ -19,5 +20,19 @@ class Path:
     def __hash__(self):
         return id(self)
 
+    def to_compact(self) -> CompactTrace:
+        """Convert the actions of the path into the array-backed `CompactTrace` format."""
+        return CompactTrace.from_actions(self.path)
+
+    @classmethod
+    def from_compact(
+        cls,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+        trace: CompactTrace,
+    ) -> "Path":
+        """Create a path from tones and a trace in the `CompactTrace` format."""
+        return cls(x_tones=x_tones, y_tones=y_tones, path=trace.to_actions())
+
 
 PathType = types.PyClass(Path)
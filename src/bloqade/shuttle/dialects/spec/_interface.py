@@ -3,7 +3,14 @@ from typing import Any
 from bloqade.geometry.dialects import grid
 from kirin.lowering import wraps as _wraps
 
-from bloqade.shuttle.arch import ArchSpec as ArchSpec, Layout as Layout
+from bloqade.shuttle.arch import (
+    ArchSpec as ArchSpec,
+    ArchSpecBuilder as ArchSpecBuilder,
+    FrozenArchSpec as FrozenArchSpec,
+    FrozenLayout as FrozenLayout,
+    Layout as Layout,
+    LayoutBuilder as LayoutBuilder,
+)
 
 from .stmts import GetFloatConstant, GetIntConstant, GetSpecialGrid, GetStaticTrap
 
@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+
+from kirin import ir
+from kirin.passes import HintConst, Pass
+from kirin.rewrite import Walk
+from kirin.rewrite.abc import RewriteResult
+
+from bloqade.shuttle.passes.instrument import instrument_pass, instrument_rule
+from bloqade.shuttle.rewrite.auto_scheduler import CostModel, ScheduleAuto, UnitCost
+
+
+@dataclass
+class AutoSchedule(Pass):
+    """Schedule the paths of played `path.Auto` nodes into parallel layers.
+
+    Run after `ScheduleToPath` and after the architecture specification is
+    injected, so the paths can be traced, see `ScheduleAuto`.
+
+    The pass is not part of the `move` pipeline: kernels are usually compiled
+    without an architecture specification, and paths that cannot be traced
+    conflict with every other path, so scheduling at that point would play
+    every path on its own.
+
+    Example:
+        ```python
+        main = move(main_fn)  # compiled with `arch_spec=arch_spec`
+        AutoSchedule(move, cost_model=TravelDistanceCost())(main)
+        ```
+
+    """
+
+    cost_model: CostModel = field(default_factory=UnitCost)
+    margin: float = 0.0
+    hint_const: HintConst = field(init=False)
+
+    def __post_init__(self):
+        self.hint_const = HintConst(self.dialects, no_raise=self.no_raise)
+
+    def unsafe_run(self, mt: ir.Method) -> RewriteResult:
+        result = instrument_pass(self.hint_const).unsafe_run(mt)
+        rule = ScheduleAuto(cost_model=self.cost_model, margin=self.margin)
+        return instrument_rule(Walk(rule)).rewrite(mt.code).join(result)
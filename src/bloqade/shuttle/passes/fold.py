@@ -20,6 +20,8 @@ from kirin.rewrite import (
 from kirin.rewrite.abc import RewriteResult
 from kirin.rewrite.cse import CommonSubexpressionElimination
 
+from bloqade.shuttle.passes.instrument import instrument_pass, instrument_rule
+
 
 @dataclass
 class Fold(Pass):
@@ -30,7 +32,7 @@ class Fold(Pass):
 
     def unsafe_run(self, mt: Method) -> RewriteResult:
         result = RewriteResult()
-        result = self.hint_const.unsafe_run(mt).join(result)
+        result = instrument_pass(self.hint_const).unsafe_run(mt).join(result)
         rule = Chain(
             ConstantFold(),
             Call2Invoke(),
@@ -39,7 +41,7 @@ class Fold(Pass):
             ilist.rewrite.InlineGetItem(),
             ilist.rewrite.HintLen(),
         )
-        result = Fixpoint(Walk(rule)).rewrite(mt.code).join(result)
+        result = instrument_rule(Fixpoint(Walk(rule))).rewrite(mt.code).join(result)
 
         return result
 
@@ -59,22 +61,32 @@ class AggressiveUnroll(Pass):
 
     def unsafe_run(self, mt: Method) -> RewriteResult:
         result = RewriteResult()
-        result = self.scf_unroll.unsafe_run(mt).join(result)
+        result = instrument_pass(self.scf_unroll).unsafe_run(mt).join(result)
+        result = (
+            instrument_rule(
+                Walk(Chain(ilist.rewrite.ConstList2IList(), ilist.rewrite.Unroll()))
+            )
+            .rewrite(mt.code)
+            .join(result)
+        )
+        result = instrument_pass(self.typeinfer).unsafe_run(mt).join(result)
+        result = instrument_pass(self.fold).unsafe_run(mt).join(result)
+        result = (
+            instrument_rule(Walk(Inline(self.inline_heuristic)))
+            .rewrite(mt.code)
+            .join(result)
+        )
         result = (
-            Walk(Chain(ilist.rewrite.ConstList2IList(), ilist.rewrite.Unroll()))
+            instrument_rule(Walk(Fixpoint(CFGCompactify())))
             .rewrite(mt.code)
             .join(result)
         )
-        result = self.typeinfer.unsafe_run(mt).join(result)
-        result = self.fold.unsafe_run(mt).join(result)
-        result = Walk(Inline(self.inline_heuristic)).rewrite(mt.code).join(result)
-        result = Walk(Fixpoint(CFGCompactify())).rewrite(mt.code).join(result)
 
         rule = Chain(
             CommonSubexpressionElimination(),
             DeadCodeElimination(),
         )
-        result = Fixpoint(Walk(rule)).rewrite(mt.code).join(result)
+        result = instrument_rule(Fixpoint(Walk(rule))).rewrite(mt.code).join(result)
 
         return result
 
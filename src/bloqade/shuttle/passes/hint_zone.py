@@ -7,6 +7,7 @@ from kirin.rewrite.abc import RewriteResult, RewriteRule
 
 from bloqade.shuttle import spec
 from bloqade.shuttle.analysis.zone import Zone, ZoneAnalysis
+from bloqade.shuttle.passes.instrument import instrument_rule
 
 
 @dataclass
@@ -34,4 +35,6 @@ class HintZone(Pass):
         analysis_frame, _ = ZoneAnalysis(
             mt.dialects, arch_spec=self.arch_spec
         ).run_analysis(mt)
-        return Walk(ZoneHintRewrite(analysis_frame.entries)).rewrite(mt.code)
+        return instrument_rule(Walk(ZoneHintRewrite(analysis_frame.entries))).rewrite(
+            mt.code
+        )
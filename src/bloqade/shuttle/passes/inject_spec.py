@@ -9,6 +9,7 @@ from kirin.rewrite.abc import RewriteResult, RewriteRule
 
 from bloqade.shuttle.arch import ArchSpec
 from bloqade.shuttle.dialects import path, spec
+from bloqade.shuttle.passes.instrument import instrument_pass, instrument_rule
 
 
 @dataclass
@@ -54,11 +55,11 @@ class InjectSpecsPass(Pass):
     def unsafe_run(self, mt: ir.Method) -> RewriteResult:
         # since we're rewriting `mt` inplace we should make sure it is on the visited list
         # so that recursive calls are handed correctly
-        rule = rewrite.Walk(InjectSpecRule(self.arch_spec))
+        rule = instrument_rule(rewrite.Walk(InjectSpecRule(self.arch_spec)))
         result = CallGraphPass(self.dialects, rule, no_raise=self.no_raise).unsafe_run(
             mt
         )
         if self.fold:
-            result = self.fold_pass(mt).join(result)
+            result = instrument_pass(self.fold_pass)(mt).join(result)
 
         return result
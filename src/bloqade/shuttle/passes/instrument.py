@@ -0,0 +1,394 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Any, Optional, TypeVar, Union
+
+from kirin import ir
+from kirin.passes import Pass
+from kirin.rewrite import Chain, Fixpoint, Walk
+from kirin.rewrite.abc import RewriteResult, RewriteRule
+
+_ACTIVE_PROFILER: ContextVar[Optional["PassProfiler"]] = ContextVar(
+    "active_pass_profiler", default=None
+)
+
+PassT = TypeVar("PassT", bound=Pass)
+
+
+def _rule_name(rule: RewriteRule) -> str:
+    if isinstance(rule, ProfiledRule):
+        return _rule_name(rule.wrapped)
+    elif isinstance(rule, (Walk, Fixpoint)):
+        return f"{type(rule).__name__}({_rule_name(rule.rule)})"
+    elif isinstance(rule, Chain):
+        return f"Chain({', '.join(map(_rule_name, rule.rules))})"
+    return type(rule).__name__
+
+
+def _num_statements(mt: ir.Method) -> int:
+    return sum(1 for _ in mt.code.walk())
+
+
+@dataclass
+class PassEvent:
+    """A single invocation of a pass or of a `Walk`/`Fixpoint` rewrite."""
+
+    name: str
+    """Name of the pass or rewrite rule."""
+    category: str
+    """One of `pass`, `fixpoint` (`Pass.fixpoint`), `walk` or `rule-fixpoint`."""
+    method: Optional[str]
+    """Name of the method the pass is applied to, if known."""
+    start: float
+    """Start time in seconds relative to the start of the profiler."""
+    duration: float = 0.0
+    """Wall time in seconds."""
+    depth: int = 0
+    """Nesting depth of the event."""
+    rewrites: int = 0
+    """Number of successful rewrites by leaf rewrite rules during the event."""
+    iterations: int = 0
+    """Number of fixpoint iterations, 0 for events that are not fixpoints."""
+    statements_before: Optional[int] = None
+    """Number of statements of the method before a pass."""
+    statements_after: Optional[int] = None
+    """Number of statements of the method after a pass."""
+    has_done_something: bool = False
+
+    _owner: Any = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class RuleStats:
+    """Aggregated statistics of a leaf rewrite rule."""
+
+    calls: int = 0
+    """Number of nodes the rule was applied to."""
+    rewrites: int = 0
+    """Number of applications that rewrote the IR."""
+    time: float = 0.0
+    """Total wall time in seconds."""
+
+
+@dataclass
+class PassProfiler:
+    """Record wall time, rewrite counts, statement counts and fixpoint
+    iterations of the passes and rewrite rules run inside the block.
+
+    Passes and rules are recorded when they are run through `instrument_pass`
+    and `instrument_rule`, which the prelude dialect groups and the passes of
+    this package do for every pass and rule they run. Passes run internally by
+    kirin passes, e.g. the passes of `Default`, are recorded as part of their
+    parent. Only one profiler can be active per thread, and only passes run on
+    the thread that entered the block are recorded, so threads compiling
+    concurrently can each use their own profiler.
+
+    Example:
+        ```python
+        with PassProfiler() as profiler:
+            @move
+            def main():
+                ...
+
+        profiler.save_chrome_trace("compile.trace.json")
+        ```
+
+    """
+
+    count_statements: bool = True
+    """Count the statements of the method before and after each pass."""
+
+    events: list[PassEvent] = field(default_factory=list, init=False)
+    rules: dict[str, RuleStats] = field(default_factory=dict, init=False)
+
+    _stack: list[PassEvent] = field(default_factory=list, init=False, repr=False)
+    _start: int = field(default=0, init=False, repr=False)
+    _rewrites: int = field(default=0, init=False, repr=False)
+    _leaf_depth: int = field(default=0, init=False, repr=False)
+    _thread: Optional[int] = field(default=None, init=False, repr=False)
+    _token: Optional[Token] = field(default=None, init=False, repr=False)
+
+    def _now(self) -> float:
+        return (time.perf_counter_ns() - self._start) * 1e-9
+
+    def _recording(self) -> bool:
+        return threading.get_ident() == self._thread
+
+    def _count_iteration(self, owner: Any) -> None:
+        if self._stack and self._stack[-1]._owner is owner:
+            self._stack[-1].iterations += 1
+
+    def _open(self, event: PassEvent) -> PassEvent:
+        event.depth = len(self._stack)
+        event.rewrites = -self._rewrites
+        self._stack.append(event)
+        return event
+
+    def _close(self, event: PassEvent, result: Any) -> None:
+        self._stack.pop()
+        event.duration = self._now() - event.start
+        event.rewrites += self._rewrites
+        if isinstance(result, RewriteResult):
+            event.has_done_something = result.has_done_something
+        self.events.append(event)
+
+    @contextmanager
+    def _record(self, event: PassEvent, mt: Optional[ir.Method] = None):
+        self._open(event)
+        if mt is not None and self.count_statements:
+            event.statements_before = _num_statements(mt)
+
+        outcome = _Outcome()
+        try:
+            yield outcome
+        finally:
+            if mt is not None and self.count_statements:
+                event.statements_after = _num_statements(mt)
+            self._close(event, outcome.result)
+
+    def _record_leaf(self, rule: RewriteRule, node: ir.IRNode) -> RewriteResult:
+        # nested calls, e.g. a rule calling another rule, are only counted once
+        stats = self.rules.setdefault(type(rule).__name__, RuleStats())
+        outermost = self._leaf_depth == 0
+        self._leaf_depth += 1
+        start = time.perf_counter_ns()
+        try:
+            result = rule.rewrite(node)
+        finally:
+            self._leaf_depth -= 1
+
+        if outermost:
+            stats.calls += 1
+            stats.time += (time.perf_counter_ns() - start) * 1e-9
+            if result.has_done_something:
+                stats.rewrites += 1
+                self._rewrites += 1
+        return result
+
+    def __enter__(self) -> "PassProfiler":
+        if _ACTIVE_PROFILER.get() is not None or self._token is not None:
+            raise RuntimeError("Another PassProfiler is already active")
+
+        self._thread = threading.get_ident()
+        self._start = time.perf_counter_ns()
+        self._token = _ACTIVE_PROFILER.set(self)
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self._token is not None:
+            _ACTIVE_PROFILER.reset(self._token)
+        self._token = None
+        self._stack.clear()
+        self._thread = None
+
+    def summary(self) -> dict[str, dict[str, Union[int, float]]]:
+        """Aggregate the pass events by pass name.
+
+        Returns:
+            dict[str, dict[str, int | float]]: For every pass, the number of
+                calls, the total wall time, the number of rewrites and fixpoint
+                iterations.
+
+        """
+        summary: dict[str, dict[str, Union[int, float]]] = {}
+        for event in self.events:
+            if event.category != "pass":
+                continue
+            entry = summary.setdefault(
+                event.name, {"calls": 0, "time": 0.0, "rewrites": 0, "iterations": 0}
+            )
+            entry["calls"] += 1
+            entry["time"] += event.duration
+            entry["rewrites"] += event.rewrites
+        for event in self.events:
+            if event.category == "fixpoint" and event.name in summary:
+                summary[event.name]["iterations"] += event.iterations
+        return summary
+
+    def report(self) -> dict[str, Any]:
+        """Return the recorded events and rule statistics as a JSON compatible dict."""
+        return {
+            "events": [
+                {
+                    f.name: getattr(event, f.name)
+                    for f in fields(event)
+                    if not f.name.startswith("_")
+                }
+                for event in sorted(self.events, key=lambda event: event.start)
+            ],
+            "passes": self.summary(),
+            "rules": {name: asdict(stats) for name, stats in self.rules.items()},
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """Serialize `report` as JSON, `kwargs` are forwarded to `json.dumps`."""
+        return json.dumps(self.report(), **kwargs)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Return the events in the Chrome trace-event format.
+
+        The result can be loaded by `chrome://tracing` or Perfetto.
+
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": event.start * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {
+                        "method": event.method,
+                        "rewrites": event.rewrites,
+                        "iterations": event.iterations,
+                        "statements_before": event.statements_before,
+                        "statements_after": event.statements_after,
+                    },
+                }
+                for event in sorted(self.events, key=lambda event: event.start)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_chrome_trace(self, filename: Union[str, os.PathLike]) -> None:
+        """Write `chrome_trace` to `filename`."""
+        with open(filename, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+@dataclass
+class _Outcome:
+    result: Any = None
+
+
+@dataclass
+class ProfiledPass:
+    """A pass recording its runs in a `PassProfiler`, see `instrument_pass`."""
+
+    wrapped: Pass
+    """The instrumented pass."""
+    profiler: PassProfiler
+    """The profiler recording the runs."""
+
+    def _event(self, mt: ir.Method, category: str) -> PassEvent:
+        return PassEvent(
+            type(self.wrapped).__name__,
+            category,
+            getattr(mt, "sym_name", None),
+            self.profiler._now(),
+            _owner=self,
+        )
+
+    def unsafe_run(self, mt: ir.Method) -> RewriteResult:
+        if not self.profiler._recording():
+            return self.wrapped.unsafe_run(mt)
+
+        self.profiler._count_iteration(self)
+        with self.profiler._record(self._event(mt, "pass"), mt) as outcome:
+            outcome.result = self.wrapped.unsafe_run(mt)
+        return outcome.result
+
+    def __call__(self, mt: ir.Method) -> RewriteResult:
+        result = self.unsafe_run(mt)
+        mt.code.verify()
+        return result
+
+    def fixpoint(self, mt: ir.Method, max_iter: int = 32) -> RewriteResult:
+        if not self.profiler._recording():
+            return self.wrapped.fixpoint(mt, max_iter)
+
+        # same loop as `Pass.fixpoint`, so that every iteration is recorded
+        with self.profiler._record(self._event(mt, "fixpoint"), mt) as outcome:
+            result = RewriteResult()
+            for _ in range(max_iter):
+                result_ = self.unsafe_run(mt)
+                result = result_.join(result)
+                if not result_.has_done_something:
+                    break
+            mt.verify()
+            outcome.result = result
+        return result
+
+
+@dataclass
+class ProfiledRule(RewriteRule):
+    """A rewrite rule recording its runs in a `PassProfiler`, see `instrument_rule`."""
+
+    wrapped: RewriteRule
+    """The instrumented rule, with its nested rules instrumented as well."""
+    profiler: PassProfiler
+    """The profiler recording the runs."""
+
+    def rewrite(self, node: ir.IRNode) -> RewriteResult:
+        profiler = self.profiler
+        if not profiler._recording():
+            return self.wrapped.rewrite(node)
+
+        profiler._count_iteration(self)
+        rule = self.wrapped
+        if isinstance(rule, Chain):
+            return rule.rewrite(node)
+        elif not isinstance(rule, (Walk, Fixpoint)):
+            return profiler._record_leaf(rule, node)
+
+        event = PassEvent(
+            _rule_name(rule),
+            "walk" if isinstance(rule, Walk) else "rule-fixpoint",
+            None,
+            profiler._now(),
+            _owner=rule.rule if isinstance(rule, Fixpoint) else self,
+        )
+        with profiler._record(event) as outcome:
+            outcome.result = rule.rewrite(node)
+        return outcome.result
+
+
+def active_profiler() -> Optional[PassProfiler]:
+    """Return the `PassProfiler` of the enclosing `with` block, if any."""
+    return _ACTIVE_PROFILER.get()
+
+
+def instrument_pass(pass_: PassT) -> Union[PassT, ProfiledPass]:
+    """Wrap a pass so that its runs are recorded by the active `PassProfiler`.
+
+    Returns:
+        PassT | ProfiledPass: The pass itself if no profiler is active.
+
+    """
+    if (profiler := _ACTIVE_PROFILER.get()) is None:
+        return pass_
+    return ProfiledPass(pass_, profiler)
+
+
+def instrument_rule(rule: RewriteRule) -> RewriteRule:
+    """Wrap a rewrite rule so that its runs are recorded by the active
+    `PassProfiler`.
+
+    The rules nested in `Walk`, `Fixpoint` and `Chain` are wrapped as well, in
+    copies of the combinators.
+
+    Returns:
+        RewriteRule: The rule itself if no profiler is active.
+
+    """
+    if (profiler := _ACTIVE_PROFILER.get()) is None:
+        return rule
+    return _instrument_rule(rule, profiler)
+
+
+def _instrument_rule(rule: RewriteRule, profiler: PassProfiler) -> RewriteRule:
+    if isinstance(rule, ProfiledRule):
+        return rule
+    if isinstance(rule, (Walk, Fixpoint)):
+        rule = replace(rule, rule=_instrument_rule(rule.rule, profiler))
+    elif isinstance(rule, Chain):
+        rule = Chain([_instrument_rule(item, profiler) for item in rule.rules])
+    return ProfiledRule(rule, profiler)
@@ -8,6 +8,7 @@ from kirin.rewrite import (
     Walk,
 )
 
+from bloqade.shuttle.passes.instrument import instrument_rule
 from bloqade.shuttle.rewrite.schedule2path import (
     Canonicalize,
     RewriteAutoInvoke,
@@ -20,16 +21,20 @@ class ScheduleToPath(Pass):
     """Pass to convert schedule dialect to path dialect."""
 
     def unsafe_run(self, mt: ir.Method):
-        result = Fixpoint(Walk(Canonicalize())).rewrite(mt.code)
+        result = instrument_rule(Fixpoint(Walk(Canonicalize()))).rewrite(mt.code)
         result = (
-            Walk(Chain(RewriteAutoInvoke(), RewriteDeviceCall()))
+            instrument_rule(Walk(Chain(RewriteAutoInvoke(), RewriteDeviceCall())))
             .rewrite(mt.code)
             .join(result)
         )
-        result = Walk(RewriteScheduleRegion()).rewrite(mt.code).join(result)
         result = (
-            Fixpoint(
-                Walk(Chain(CommonSubexpressionElimination(), DeadCodeElimination()))
+            instrument_rule(Walk(RewriteScheduleRegion())).rewrite(mt.code).join(result)
+        )
+        result = (
+            instrument_rule(
+                Fixpoint(
+                    Walk(Chain(CommonSubexpressionElimination(), DeadCodeElimination()))
+                )
             )
             .rewrite(mt.code)
             .join(result)
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from bloqade.geometry.dialects import grid
+from kirin import ir, types
+from kirin.ir.exception import ValidationError
+from kirin.passes import Pass
+from kirin.rewrite.abc import RewriteResult
+
+from bloqade.shuttle.codegen.tone_order import ToneOrderChecker
+from bloqade.shuttle.dialects import action, path, schedule
+from bloqade.shuttle.rewrite.auto_scheduler import summarize
+
+
+def _const(value: ir.SSAValue):
+    return getattr(value.hints.get("const"), "data", None)
+
+
+def _grid_shape(value: ir.SSAValue) -> Optional[tuple[int, int]]:
+    if isinstance(data := _const(value), grid.Grid):
+        return data.shape
+
+    value_type = value.type
+    if not isinstance(value_type, types.Generic) or len(value_type.vars) != 2:
+        return None
+    shape = tuple(getattr(var, "data", None) for var in value_type.vars)
+    if all(isinstance(num, int) for num in shape):
+        return shape  # type: ignore
+    return None
+
+
+@dataclass
+class VerifyToneOrder(Pass):
+    """Verify the AOD tone constraints of the waypoints known at compile time.
+
+    In tweezer kernels, the grids of `action.set_loc` and `action.move` must all
+    have the same shape, and constant grids must have strictly ordered tones
+    spaced by at least `min_spacing`. In move kernels, the move function of every
+    constant device function must use as many tones as the device function, and
+    the paths that can be traced at compile time are checked with
+    `ToneOrderChecker`.
+
+    The pass reads the constant hints, so it should run after `Fold` or
+    `HintConst`, and raises a `ValidationError` on the first violation. The
+    `tweezer` dialect group runs it on kernels decorated with
+    `@tweezer(verify_tones=True)`.
+
+    """
+
+    min_spacing: float = 0.0
+    """Minimum spacing between adjacent tones of the same axis."""
+
+    def unsafe_run(self, mt: ir.Method) -> RewriteResult:
+        checker = ToneOrderChecker(self.min_spacing)
+        self._verify_tweezer(mt, checker)
+
+        verified: set[int] = set()
+        for stmt in mt.callable_region.walk():
+            for result in stmt.results:
+                data = _const(result)
+                if isinstance(data, schedule.ReverseDeviceFunction):
+                    data = data.device_task
+                if isinstance(data, schedule.DeviceFunction):
+                    if id(data.move_fn) not in verified:
+                        verified.add(id(data.move_fn))
+                        self._verify_tweezer(
+                            data.move_fn,
+                            checker,
+                            (len(data.x_tones), len(data.y_tones)),
+                            stmt,
+                        )
+                elif isinstance(data, path.Path) or isinstance(stmt, path.Gen):
+                    self._verify_path(stmt, result, checker)
+
+        return RewriteResult()
+
+    def _verify_tweezer(
+        self,
+        mt: ir.Method,
+        checker: ToneOrderChecker,
+        num_tones: Optional[tuple[int, int]] = None,
+        caller: Optional[ir.Statement] = None,
+    ):
+        for stmt in mt.callable_region.walk():
+            if not isinstance(stmt, (action.Set, action.Move)):
+                continue
+
+            if (shape := _grid_shape(stmt.grid)) is None:
+                continue
+            if num_tones is None:
+                num_tones = shape
+            elif shape != num_tones:
+                raise ValidationError(
+                    caller or stmt,
+                    f"Waypoint of shape {shape} in `{mt.sym_name}` does not match "
+                    f"the {num_tones[0]} x tones and {num_tones[1]} y tones",
+                )
+
+            if isinstance(way_point := _const(stmt.grid), grid.Grid):
+                for axis, positions in (
+                    ("x", way_point.x_positions),
+                    ("y", way_point.y_positions),
+                ):
+                    if len(invalid := checker.check_positions(positions)):
+                        raise ValidationError(
+                            stmt,
+                            f"{axis} tones {invalid[0]} and {invalid[0] + 1} are not "
+                            f"ordered with a spacing of at least {self.min_spacing}",
+                        )
+
+    def _verify_path(
+        self, stmt: ir.Statement, value: ir.SSAValue, checker: ToneOrderChecker
+    ):
+        try:
+            if isinstance(data := _const(value), path.Path):
+                violations = checker.check_path(data)
+            elif (actions := summarize(value).actions) is not None:
+                violations = checker.check_actions(actions)
+            else:
+                return
+        except ValueError as e:
+            raise ValidationError(stmt, str(e)) from e
+        if violations:
+            violation = violations[0]
+            raise ValidationError(
+                stmt,
+                f"{violation.axis} tones {violation.tones} are {violation.spacing} "
+                f"apart at waypoint {violation.waypoint}, at least "
+                f"{self.min_spacing} is required",
+            )
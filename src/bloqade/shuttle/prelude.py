@@ -8,6 +8,7 @@ from kirin.rewrite import Walk
 from kirin.rewrite.chain import Chain
 
 from bloqade.shuttle import spec as spec_module
+from bloqade.shuttle.compile_cache import cached_run_pass
 from bloqade.shuttle.dialects import (
     action,
     atom,
@@ -20,7 +21,9 @@ from bloqade.shuttle.dialects import (
     spec,
 )
 from bloqade.shuttle.passes.inject_spec import InjectSpecsPass
+from bloqade.shuttle.passes.instrument import instrument_pass, instrument_rule
 from bloqade.shuttle.passes.schedule2path import ScheduleToPath
+from bloqade.shuttle.passes.verify_tones import VerifyToneOrder
 from bloqade.shuttle.rewrite.desugar import DesugarTurnOffRewrite, DesugarTurnOnRewrite
 
 
@@ -36,18 +39,20 @@ def kernel(self):
         arch_spec: spec_module.ArchSpec | None = None,
     ) -> None:
         if arch_spec is not None:
-            InjectSpecsPass(self, arch_spec=arch_spec, fold=False)(mt)
-
-        Default(
-            self,
-            verify=verify,
-            fold=fold,
-            aggressive=aggressive,
-            typeinfer=typeinfer,
-            no_raise=False,
+            instrument_pass(InjectSpecsPass(self, arch_spec=arch_spec, fold=False))(mt)
+
+        instrument_pass(
+            Default(
+                self,
+                verify=verify,
+                fold=fold,
+                aggressive=aggressive,
+                typeinfer=typeinfer,
+                no_raise=False,
+            )
         )(mt)
 
-    return run_pass
+    return cached_run_pass(self, "kernel", run_pass)
 
 
 # We dont allow [cf, aod, schedule] appear in move function
@@ -55,8 +60,7 @@ def kernel(self):
 def tweezer(self):
     fold_pass = Fold(self)
     typeinfer_pass = TypeInfer(self)
-    # TODO: add validation pass after type inference to check
-    #       that the number of xtones and ytones match the decorator
+    verify_tones_pass = VerifyToneOrder(self)
     ilist_desugar = ilist.IListDesugar(self)
     action_desugar_pass = Walk(Chain(DesugarTurnOnRewrite(), DesugarTurnOffRewrite()))
 
@@ -64,10 +68,11 @@ def tweezer(self):
         mt: ir.Method,
         *,
         fold: bool = True,
+        verify_tones: bool = False,
         arch_spec: spec_module.ArchSpec | None = None,
     ) -> None:
         if arch_spec is not None:
-            InjectSpecsPass(self, arch_spec=arch_spec, fold=False)(mt)
+            instrument_pass(InjectSpecsPass(self, arch_spec=arch_spec, fold=False))(mt)
 
         if isinstance(mt.code, func.Function):
             new_code = action.TweezerFunction(
@@ -79,15 +84,19 @@ def tweezer(self):
         else:
             raise ValueError("Method code must be a Function, cannot be lambda/closure")
 
-        ilist_desugar.fixpoint(mt)
+        instrument_pass(ilist_desugar).fixpoint(mt)
 
-        typeinfer_pass(mt)
-        action_desugar_pass.rewrite(mt.code)
+        instrument_pass(typeinfer_pass)(mt)
+        instrument_rule(action_desugar_pass).rewrite(mt.code)
 
         if fold:
-            fold_pass(mt)
+            instrument_pass(fold_pass)(mt)
+
+        # opt-in: collapsed or coincident constant grids used to compile
+        if verify_tones:
+            instrument_pass(verify_tones_pass)(mt)
 
-    return run_pass
+    return cached_run_pass(self, "tweezer", run_pass)
 
 
 # no action allow. can have cf, with addtional spec
@@ -108,18 +117,20 @@ def move(self):
         typeinfer: bool = True,
         arch_spec: spec_module.ArchSpec | None = None,
     ) -> None:
-        schedule_to_path(mt)
+        instrument_pass(schedule_to_path)(mt)
 
         if arch_spec is not None:
-            InjectSpecsPass(self, arch_spec=arch_spec, fold=False)(mt)
-
-        Default(
-            self,
-            verify=verify,
-            fold=fold,
-            aggressive=aggressive,
-            typeinfer=typeinfer,
-            no_raise=False,
+            instrument_pass(InjectSpecsPass(self, arch_spec=arch_spec, fold=False))(mt)
+
+        instrument_pass(
+            Default(
+                self,
+                verify=verify,
+                fold=fold,
+                aggressive=aggressive,
+                typeinfer=typeinfer,
+                no_raise=False,
+            )
         )(mt)
 
-    return run_pass
+    return cached_run_pass(self, "move", run_pass)
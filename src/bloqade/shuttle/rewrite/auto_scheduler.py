@@ -0,0 +1,342 @@
+import abc
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+from kirin import ir
+from kirin.analysis import const
+from kirin.interp import BaseInterpreter
+from kirin.rewrite import abc as rewrite_abc
+
+from bloqade.shuttle.codegen import DEFAULT_TRACE_CACHE
+from bloqade.shuttle.codegen.taskgen import AbstractAction, WayPointsAction
+from bloqade.shuttle.codegen.timing import TimingModel
+from bloqade.shuttle.dialects import path, schedule
+
+Bounds = tuple[float, float, float, float]
+"""`(x_min, x_max, y_min, y_max)` of the positions visited by a path."""
+
+
+def _join_bounds(bounds: Iterable[Bounds]) -> Optional[Bounds]:
+    bounds = list(bounds)
+    if not bounds:
+        return None
+    x_mins, x_maxs, y_mins, y_maxs = zip(*bounds)
+    return min(x_mins), max(x_maxs), min(y_mins), max(y_maxs)
+
+
+@dataclass(frozen=True)
+class PathSummary:
+    """What is known at compile time about a path of a `path.Auto` node.
+
+    Unknown fields are None and are treated conservatively by the scheduler: a
+    path with unknown bounds may overlap every other path and a path with
+    unknown tones may share a tone with every other path.
+
+    """
+
+    x_tones: Optional[frozenset[int]] = None
+    """The x tones of the path, None if they are not known."""
+    y_tones: Optional[frozenset[int]] = None
+    """The y tones of the path, None if they are not known."""
+    bounds: Optional[Bounds] = None
+    """Bounding box of the positions visited by the path, None if unknown."""
+    actions: Optional[tuple[AbstractAction, ...]] = field(default=None, repr=False)
+    """The actions of the path, None if it could not be traced."""
+
+    @classmethod
+    def from_actions(
+        cls,
+        actions: Sequence[AbstractAction],
+        x_tones: Optional[Iterable[int]] = None,
+        y_tones: Optional[Iterable[int]] = None,
+    ) -> "PathSummary":
+        grids = [
+            way_point
+            for action in actions
+            if isinstance(action, WayPointsAction)
+            for way_point in action.way_points
+            if way_point.x_init is not None and way_point.y_init is not None
+        ]
+        return cls(
+            x_tones=None if x_tones is None else frozenset(x_tones),
+            y_tones=None if y_tones is None else frozenset(y_tones),
+            bounds=_join_bounds(
+                (*sorted(g.x_bounds()), *sorted(g.y_bounds())) for g in grids
+            ),
+            actions=tuple(actions),
+        )
+
+    @classmethod
+    def from_path(cls, value: path.Path) -> "PathSummary":
+        return cls.from_actions(value.path, value.x_tones, value.y_tones)
+
+    @classmethod
+    def join(cls, summaries: Sequence["PathSummary"]) -> "PathSummary":
+        """Summary of paths that are played in parallel."""
+
+        def union(sets):
+            return None if None in sets else frozenset().union(*sets)
+
+        bounds = [summary.bounds for summary in summaries]
+        actions = [summary.actions for summary in summaries]
+        return cls(
+            x_tones=union([summary.x_tones for summary in summaries]),
+            y_tones=union([summary.y_tones for summary in summaries]),
+            bounds=None if None in bounds else _join_bounds(bounds),  # type: ignore
+            actions=(
+                None
+                if None in actions
+                else tuple(action for group in actions for action in group)  # type: ignore
+            ),
+        )
+
+    def shares_tones(self, other: "PathSummary") -> bool:
+        """Whether the paths may use the same x or y tone."""
+        return any(
+            mine is None or theirs is None or not mine.isdisjoint(theirs)
+            for mine, theirs in (
+                (self.x_tones, other.x_tones),
+                (self.y_tones, other.y_tones),
+            )
+        )
+
+    def overlaps(self, other: "PathSummary", margin: float = 0.0) -> bool:
+        """Whether the bounding boxes of the paths may be closer than `margin`."""
+        if self.bounds is None or other.bounds is None:
+            return True
+        x_min, x_max, y_min, y_max = self.bounds
+        other_x_min, other_x_max, other_y_min, other_y_max = other.bounds
+        return (
+            x_min - margin <= other_x_max
+            and other_x_min - margin <= x_max
+            and y_min - margin <= other_y_max
+            and other_y_min - margin <= y_max
+        )
+
+
+class CostModel(abc.ABC):
+    """Estimated duration of a path, used to prioritize paths while scheduling."""
+
+    @abc.abstractmethod
+    def cost(self, summary: PathSummary) -> float: ...
+
+
+class UnitCost(CostModel):
+    """Every path takes the same time."""
+
+    def cost(self, summary: PathSummary) -> float:
+        return 1.0
+
+
+def _max_step(start: Sequence[float], end: Sequence[float]) -> float:
+    return max((abs(b - a) for a, b in zip(start, end)), default=0.0)
+
+
+@dataclass
+class TravelDistanceCost(CostModel):
+    """Duration proportional to the distance travelled by the path.
+
+    Every step between two way points takes the largest displacement of any
+    site, which for grids of the same shape is `hypot(max |dx|, max |dy|)`.
+
+    """
+
+    unknown: float = math.inf
+    """Cost of paths that could not be traced."""
+
+    def cost(self, summary: PathSummary) -> float:
+        if summary.actions is None:
+            return self.unknown
+
+        distance = 0.0
+        for action in summary.actions:
+            if not isinstance(action, WayPointsAction):
+                continue
+            way_points = list(action.way_points)
+            for start, end in zip(way_points, way_points[1:]):
+                distance += math.hypot(
+                    _max_step(start.x_positions, end.x_positions),
+                    _max_step(start.y_positions, end.y_positions),
+                )
+        return distance
+
+
+@dataclass
+class MotionTimeCost(CostModel):
+    """Duration of the path under a `TimingModel`, see `TimingModel.duration`."""
+
+    timing: TimingModel
+    unknown: float = math.inf
+    """Cost of paths that could not be traced."""
+
+    def cost(self, summary: PathSummary) -> float:
+        if summary.actions is None:
+            return self.unknown
+        return self.timing.duration(summary.actions)
+
+
+def list_schedule(
+    summaries: Sequence[PathSummary],
+    cost_model: Optional[CostModel] = None,
+    margin: float = 0.0,
+) -> list[list[int]]:
+    """Pack paths into the fewest sequential layers of parallel paths.
+
+    Two paths conflict if they may share a tone or if their bounding boxes may
+    overlap, unknown tones and bounds conflict with every other path.
+    Paths sharing a tone may be played in either order, while the order of
+    overlapping paths is kept, so every path is played after all overlapping
+    paths that come before it. Layers are filled by list scheduling: ready
+    paths are taken in order of the cost of the longest chain of overlapping
+    paths they start, skipping paths sharing a tone with the layer.
+
+    Args:
+        summaries (Sequence[PathSummary]): The paths in program order.
+        cost_model (CostModel | None): Cost of every path, defaults to `UnitCost`.
+        margin (float): Bounding boxes closer than `margin` overlap.
+
+    Returns:
+        list[list[int]]: The indices of the paths of every layer, in program
+            order.
+
+    """
+    cost_model = cost_model or UnitCost()
+    num_paths = len(summaries)
+    predecessors: list[set[int]] = [set() for _ in range(num_paths)]
+    successors: list[list[int]] = [[] for _ in range(num_paths)]
+    exclusive: list[set[int]] = [set() for _ in range(num_paths)]
+    for j in range(num_paths):
+        for i in range(j):
+            if summaries[i].overlaps(summaries[j], margin):
+                predecessors[j].add(i)
+                successors[i].append(j)
+            elif summaries[i].shares_tones(summaries[j]):
+                exclusive[i].add(j)
+                exclusive[j].add(i)
+
+    # cost of the longest chain of ordered paths starting at every path
+    priority = [0.0] * num_paths
+    for i in reversed(range(num_paths)):
+        priority[i] = cost_model.cost(summaries[i]) + max(
+            (priority[j] for j in successors[i]), default=0.0
+        )
+
+    layers = []
+    waiting = [len(preds) for preds in predecessors]
+    ready = [i for i in range(num_paths) if waiting[i] == 0]
+    while ready:
+        ready.sort(key=lambda i: (-priority[i], i))
+        layer: list[int] = []
+        postponed = []
+        for i in ready:
+            if exclusive[i].isdisjoint(layer):
+                layer.append(i)
+            else:
+                postponed.append(i)
+
+        ready = postponed
+        for i in layer:
+            for j in successors[i]:
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    ready.append(j)
+        layers.append(sorted(layer))
+
+    return layers
+
+
+def _const(value: ir.SSAValue):
+    if isinstance(hint := value.hints.get("const"), const.Value):
+        return hint.data
+    return None
+
+
+def summarize(value: ir.SSAValue) -> PathSummary:
+    """Summary of the path `value` from its constant hint or its statement.
+
+    Paths generated by `path.Gen` are traced if the move function, the inputs and
+    the architecture specification are known. The summary of a `path.Parallel`
+    or `path.Auto` node joins the summaries of its paths.
+
+    """
+    if isinstance(data := _const(value), path.Path):
+        return PathSummary.from_path(data)
+
+    owner = value.owner
+    if isinstance(owner, (path.Parallel, path.Auto)):
+        return PathSummary.join([summarize(item) for item in owner.paths])
+    if not isinstance(owner, path.Gen):
+        return PathSummary()
+
+    x_tones = y_tones = None
+    reverse = False
+    device_task = _const(owner.device_task)
+    if isinstance(device_task, schedule.ReverseDeviceFunction):
+        device_task = device_task.device_task
+        reverse = True
+
+    if isinstance(device_task, schedule.DeviceFunction):
+        move_fn = device_task.move_fn
+        x_tones, y_tones = device_task.x_tones, device_task.y_tones
+    elif isinstance(task_stmt := owner.device_task.owner, schedule.NewTweezerTask):
+        # the tones of tweezer tasks are assigned after scheduling
+        move_fn = _const(task_stmt.move_fn)
+    else:
+        move_fn = None
+
+    inputs = [value.hints.get("const") for value in owner.inputs]
+    if (
+        not isinstance(move_fn, ir.Method)
+        or owner.arch_spec is None
+        or not all(isinstance(input_, const.Value) for input_ in inputs)
+    ):
+        return PathSummary(
+            x_tones=None if x_tones is None else frozenset(x_tones),
+            y_tones=None if y_tones is None else frozenset(y_tones),
+        )
+
+    args = BaseInterpreter.permute_values(
+        move_fn.arg_names, tuple(input_.data for input_ in inputs), owner.kwargs
+    )
+    actions = DEFAULT_TRACE_CACHE.trace(owner.arch_spec, move_fn, args, reverse=reverse)
+    return PathSummary.from_actions(actions, x_tones, y_tones)
+
+
+@dataclass
+class ScheduleAuto(rewrite_abc.RewriteRule):
+    """Replace a played `path.Auto` node by a sequence of played layers.
+
+    The paths of the node are packed into layers by `list_schedule`, every layer
+    is played as a `path.Parallel` node, or as the path itself if the layer has
+    a single path. `path.Auto` nodes nested in other nodes are left as they are.
+    Running `HintConst` first lets the scheduler trace the paths.
+
+    """
+
+    cost_model: CostModel = field(default_factory=UnitCost)
+    margin: float = 0.0
+    """Bounding boxes of paths closer than `margin` are considered overlapping."""
+
+    def rewrite_Statement(self, node: ir.Statement) -> rewrite_abc.RewriteResult:
+        if not isinstance(node, path.Auto) or len(node.result.uses) != 1:
+            return rewrite_abc.RewriteResult()
+
+        (use,) = node.result.uses
+        if not isinstance(play := use.stmt, path.Play):
+            return rewrite_abc.RewriteResult()
+
+        summaries = [summarize(value) for value in node.paths]
+        for layer in list_schedule(summaries, self.cost_model, self.margin):
+            if len(layer) == 1:
+                layer_path = node.paths[layer[0]]
+            else:
+                (
+                    parallel := path.Parallel(tuple(node.paths[i] for i in layer))
+                ).insert_before(play)
+                layer_path = parallel.result
+            path.Play(layer_path).insert_before(play)
+
+        play.delete()
+        node.delete()
+        return rewrite_abc.RewriteResult(has_done_something=True)
@@ -32,7 +32,10 @@ class RewriteAutoInvoke(abc.RewriteRule):
         if isinstance(node, func.Invoke):
             (callee_stmt := py.Constant(node.callee)).insert_before(node)
             callee_ssa = callee_stmt.result
-        elif isinstance(node, func.Call):
+        elif isinstance(node, func.Call) and not node.callee.type.is_subseteq(
+            schedule.DeviceFunctionType
+        ):
+            # calls of device functions are rewritten by `RewriteDeviceCall`
             callee_ssa = node.callee
         else:
             return abc.RewriteResult()
@@ -0,0 +1,306 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, NamedTuple, Optional, Union
+
+import numpy as np
+from bloqade.geometry.dialects.grid import Grid
+
+NO_ZONE = -1
+"""Zone index returned by batched queries for positions without a site."""
+
+
+class Site(NamedTuple):
+    zone_id: str
+    """Name of the zone in the layout."""
+    x_index: int
+    """Index of the site along the x axis of the zone."""
+    y_index: int
+    """Index of the site along the y axis of the zone."""
+
+
+def _nearest_on_axis(axis: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # index of the closest element of the sorted `axis` for every value
+    if len(axis) == 1:
+        return np.zeros(values.shape, dtype=np.intp)
+
+    right = np.clip(np.searchsorted(axis, values), 1, len(axis) - 1)
+    left = right - 1
+    closer_left = np.abs(values - axis[left]) <= np.abs(axis[right] - values)
+    return np.where(closer_left, left, right)
+
+
+@dataclass(frozen=True)
+class _ZoneAxes:
+    zone_id: str
+    x_positions: np.ndarray
+    """Sorted x positions of the zone."""
+    x_order: np.ndarray
+    """x index in the grid of every element of `x_positions`."""
+    y_positions: np.ndarray
+    y_order: np.ndarray
+
+    @classmethod
+    def from_grid(cls, zone_id: str, zone: Grid) -> "_ZoneAxes":
+        xs = np.asarray(zone.x_positions, dtype=np.float64)
+        ys = np.asarray(zone.y_positions, dtype=np.float64)
+        x_order = np.argsort(xs, kind="stable")
+        y_order = np.argsort(ys, kind="stable")
+        return cls(zone_id, xs[x_order], x_order, ys[y_order], y_order)
+
+
+@dataclass(frozen=True)
+class LayoutIndex:
+    """Spatial index of the sites of a set of zones.
+
+    Every zone is a rectilinear grid, so the index keeps the sorted x and y
+    positions of every zone and answers queries with binary searches along both
+    axes. Nearest site queries are exact since the distance to the sites of a
+    grid is minimized independently along both axes.
+
+    Queries taking arrays are vectorized over the positions. If zones overlap,
+    batched point lookups return the site of the first zone.
+
+    """
+
+    zones: tuple[_ZoneAxes, ...]
+
+    @classmethod
+    def from_zones(
+        cls, zones: Union[Mapping[str, Grid], Iterable[tuple[str, Grid]]]
+    ) -> "LayoutIndex":
+        """Build the index of `zones`, zones without positions are skipped.
+
+        Args:
+            zones (Mapping[str, Grid] | Iterable[tuple[str, Grid]]): The zones
+                by name, or `(name, zone)` pairs in the order of the index.
+                Pairs may repeat a name, every zone is kept.
+
+        """
+        items = zones.items() if isinstance(zones, Mapping) else zones
+        return cls(
+            tuple(
+                _ZoneAxes.from_grid(zone_id, zone)
+                for zone_id, zone in items
+                if zone.shape[0] > 0 and zone.shape[1] > 0
+            )
+        )
+
+    @property
+    def zone_ids(self) -> tuple[str, ...]:
+        """Zone ids in the order used by the zone indices of batched queries."""
+        return tuple(zone.zone_id for zone in self.zones)
+
+    def _site(self, zone: int, x_index, y_index) -> Site:
+        return Site(self.zones[zone].zone_id, int(x_index), int(y_index))
+
+    def lookup(
+        self, x: np.ndarray, y: np.ndarray, atol: float = 1e-6
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the sites located at the positions `(x, y)`.
+
+        Args:
+            x (np.ndarray): x positions.
+            y (np.ndarray): y positions, broadcast against `x`.
+            atol (float): Maximum distance along each axis between a position
+                and a site. Defaults to 1e-6.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Zone index (into
+                `zone_ids`), x index and y index of the site at every position.
+                The zone index is `NO_ZONE` and the indices are -1 if there is
+                no site.
+
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, np.float64), np.asarray(y, np.float64))
+        zone_index = np.full(x.shape, NO_ZONE, dtype=np.intp)
+        x_index = np.full(x.shape, -1, dtype=np.intp)
+        y_index = np.full(x.shape, -1, dtype=np.intp)
+
+        for i, zone in enumerate(self.zones):
+            ix = _nearest_on_axis(zone.x_positions, x)
+            iy = _nearest_on_axis(zone.y_positions, y)
+            found = (
+                (zone_index == NO_ZONE)
+                & (np.abs(zone.x_positions[ix] - x) <= atol)
+                & (np.abs(zone.y_positions[iy] - y) <= atol)
+            )
+            zone_index[found] = i
+            x_index[found] = zone.x_order[ix[found]]
+            y_index[found] = zone.y_order[iy[found]]
+
+        return zone_index, x_index, y_index
+
+    def nearest(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Find the closest site to the positions `(x, y)`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Zone index,
+                x index, y index and distance of the closest site of every
+                position.
+
+        Raises:
+            ValueError: If the index does not contain any sites.
+
+        """
+        if not self.zones:
+            raise ValueError("Layout index does not contain any sites")
+
+        x, y = np.broadcast_arrays(np.asarray(x, np.float64), np.asarray(y, np.float64))
+        distance = np.full(x.shape, np.inf)
+        zone_index = np.full(x.shape, NO_ZONE, dtype=np.intp)
+        x_index = np.full(x.shape, -1, dtype=np.intp)
+        y_index = np.full(x.shape, -1, dtype=np.intp)
+
+        for i, zone in enumerate(self.zones):
+            ix = _nearest_on_axis(zone.x_positions, x)
+            iy = _nearest_on_axis(zone.y_positions, y)
+            zone_distance = np.hypot(zone.x_positions[ix] - x, zone.y_positions[iy] - y)
+            closer = zone_distance < distance
+            distance[closer] = zone_distance[closer]
+            zone_index[closer] = i
+            x_index[closer] = zone.x_order[ix[closer]]
+            y_index[closer] = zone.y_order[iy[closer]]
+
+        return zone_index, x_index, y_index, distance
+
+    def site_at(self, x: float, y: float, atol: float = 1e-6) -> Optional[Site]:
+        """Return the site at `(x, y)`, if any, see `lookup`."""
+        zone_index, x_index, y_index = self.lookup(np.array(x), np.array(y), atol)
+        if zone_index == NO_ZONE:
+            return None
+        return self._site(int(zone_index), x_index, y_index)
+
+    def sites_at(self, x: float, y: float, atol: float = 1e-6) -> list[Site]:
+        """Return the sites of all zones located at `(x, y)`."""
+        return self.sites_within_box(x - atol, x + atol, y - atol, y + atol)
+
+    def nearest_site(self, x: float, y: float) -> tuple[Site, float]:
+        """Return the closest site to `(x, y)` and its distance."""
+        zone_index, x_index, y_index, distance = self.nearest(np.array(x), np.array(y))
+        return self._site(int(zone_index), x_index, y_index), float(distance)
+
+    def sites_within_box(
+        self, xmin: float, xmax: float, ymin: float, ymax: float
+    ) -> list[Site]:
+        """Return all sites inside the closed box `[xmin, xmax] x [ymin, ymax]`."""
+        sites = []
+        for zone in self.zones:
+            x_start = np.searchsorted(zone.x_positions, xmin, "left")
+            x_stop = np.searchsorted(zone.x_positions, xmax, "right")
+            y_start = np.searchsorted(zone.y_positions, ymin, "left")
+            y_stop = np.searchsorted(zone.y_positions, ymax, "right")
+            sites.extend(
+                Site(zone.zone_id, int(ix), int(iy))
+                for ix in zone.x_order[x_start:x_stop]
+                for iy in zone.y_order[y_start:y_stop]
+            )
+        return sites
+
+    def sites_within(self, x: float, y: float, radius: float) -> list[Site]:
+        """Return all sites at a distance of at most `radius` from `(x, y)`."""
+        sites = []
+        for zone in self.zones:
+            x_start = np.searchsorted(zone.x_positions, x - radius, "left")
+            x_stop = np.searchsorted(zone.x_positions, x + radius, "right")
+            y_start = np.searchsorted(zone.y_positions, y - radius, "left")
+            y_stop = np.searchsorted(zone.y_positions, y + radius, "right")
+
+            dx = zone.x_positions[x_start:x_stop, None] - x
+            dy = zone.y_positions[None, y_start:y_stop] - y
+            inside_x, inside_y = np.nonzero(dx**2 + dy**2 <= radius**2)
+            sites.extend(
+                Site(zone.zone_id, int(ix), int(iy))
+                for ix, iy in zip(
+                    zone.x_order[x_start + inside_x], zone.y_order[y_start + inside_y]
+                )
+            )
+        return sites
+
+
+@dataclass
+class SiteRegistry:
+    """Ids of the physical sites of a set of zones.
+
+    Zones may overlap or alias each other, so the same trap can be a site of
+    several zones. Every position, rounded to a multiple of `atol`, gets a
+    single id, which is the same for the sites of all zones at that position.
+    Occupancy kept per id is therefore shared by all the zones.
+
+    Example:
+        ```python
+        registry = SiteRegistry()
+        gate = registry.add_zone(gate_zone)
+        left = registry.add_zone(gate_zone[::2, :])
+        registry.site_ids[gate][0, 0] == registry.site_ids[left][0, 0]
+        ```
+
+    """
+
+    atol: float = 1e-6
+    """Positions closer than `atol` along both axes are the same site."""
+    site_ids: list[np.ndarray] = field(default_factory=list)
+    """(num_x, num_y) id of every site of every zone, in order of registration."""
+    num_sites: int = 0
+    """Number of distinct physical sites."""
+
+    _ids: dict[tuple[int, int], int] = field(default_factory=dict, repr=False)
+    _owners: list[tuple[int, int, int]] = field(default_factory=list, repr=False)
+    _shared: dict[int, list[tuple[int, int, int]]] = field(
+        default_factory=dict, repr=False
+    )
+
+    def add_zone(self, zone: Grid) -> int:
+        """Register the sites of a zone and return the index of the zone."""
+        zone_index = len(self.site_ids)
+        x_keys = np.round(np.asarray(zone.x_positions, np.float64) / self.atol)
+        y_keys = np.round(np.asarray(zone.y_positions, np.float64) / self.atol)
+
+        site_ids = np.empty(zone.shape, dtype=np.intp)
+        for ix, x_key in enumerate(x_keys.astype(np.int64).tolist()):
+            for iy, y_key in enumerate(y_keys.astype(np.int64).tolist()):
+                site = (zone_index, ix, iy)
+                site_id = self._ids.setdefault((x_key, y_key), self.num_sites)
+                if site_id == self.num_sites:
+                    self.num_sites += 1
+                    self._owners.append(site)
+                else:
+                    # the position is already a site of another zone
+                    self._shared.setdefault(site_id, [self._owners[site_id]])
+                    self._shared[site_id].append(site)
+                site_ids[ix, iy] = site_id
+
+        self.site_ids.append(site_ids)
+        return zone_index
+
+    def sharing(
+        self, zone_index: int, x_indices: np.ndarray, y_indices: np.ndarray
+    ) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+        """The sites of all zones at the same positions as the given sites.
+
+        Args:
+            zone_index (int): The zone of the sites.
+            x_indices (np.ndarray): x indices of the sites.
+            y_indices (np.ndarray): y indices of the sites.
+
+        Returns:
+            dict[int, tuple[np.ndarray, np.ndarray]]: The x and y indices of the
+                sites of every zone, including the given sites.
+
+        """
+        x_indices = np.asarray(x_indices, dtype=np.intp)
+        y_indices = np.asarray(y_indices, dtype=np.intp)
+        if not self._shared:
+            return {zone_index: (x_indices, y_indices)}
+
+        others: dict[int, list[tuple[int, int]]] = {}
+        for site_id in self.site_ids[zone_index][x_indices, y_indices].tolist():
+            for other, ix, iy in self._shared.get(site_id, ()):
+                if other != zone_index:
+                    others.setdefault(other, []).append((ix, iy))
+
+        result = {zone_index: (x_indices, y_indices)}
+        for other, sites in others.items():
+            other_x, other_y = np.array(sites, dtype=np.intp).T
+            result[other] = (other_x, other_y)
+        return result
@@ -0,0 +1,492 @@
+from dataclasses import dataclass
+from typing import Any, NamedTuple, Optional, Sequence, TypeVar
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle import action, schedule
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+from bloqade.shuttle.prelude import move, tweezer
+
+NumX = TypeVar("NumX")
+NumY = TypeVar("NumY")
+NumBatches = TypeVar("NumBatches")
+
+# maximum number of alternating column/row refinements of a batch
+_MAX_REFINEMENTS = 8
+_LARGE = np.iinfo(np.intp).max
+
+
+class AODBatch(NamedTuple):
+    """Atoms moved by a single rectangular set of AOD tones.
+
+    The atoms at the sites `src_x x src_y` of the source zone are moved to the
+    sites `dst_x x dst_y` of the destination zone, the i-th column goes to
+    `dst_x[i]` and the j-th row to `dst_y[j]`. All four index tuples are
+    strictly increasing, so the rows and the columns move rigidly and never
+    cross. Sites of the rectangle without an atom are allowed.
+
+    """
+
+    src_x: tuple[int, ...]
+    src_y: tuple[int, ...]
+    dst_x: tuple[int, ...]
+    dst_y: tuple[int, ...]
+    moves: tuple[int, ...]
+    """Indices of the requested moves executed by the batch."""
+
+
+@dataclass(frozen=True)
+class BatchPlan:
+    """Requested atom displacements partitioned into AOD-compatible batches.
+
+    Example:
+        ```python
+        plan = plan_batches(storage, gate_zone, sources, destinations)
+
+        @move
+        def main():
+            execute_batches(*plan.kernel_args())
+        ```
+
+    """
+
+    src_zone: grid.Grid
+    """Grid the source indices of the batches refer to."""
+    dst_zone: grid.Grid
+    """Grid the destination indices of the batches refer to."""
+    batches: tuple[AODBatch, ...]
+    """Batches in execution order."""
+    parking_offset: float
+    """Offset along x and y of the parking positions the atoms are moved along."""
+
+    def kernel_args(self) -> tuple:
+        """Arguments of the `execute_batches` kernel executing the plan."""
+        columns = tuple(zip(*self.batches)) if self.batches else ((),) * 4
+        return (
+            self.src_zone,
+            self.dst_zone,
+            *(
+                ilist.IList([ilist.IList(list(indices)) for indices in column])
+                for column in columns[:4]
+            ),
+            self.parking_offset,
+        )
+
+
+def _site_array(sites: Sequence[tuple[int, int]], shape, name: str) -> np.ndarray:
+    array = np.asarray(sites, dtype=np.intp).reshape(-1, 2)
+    if np.any(array < 0) or np.any(array >= shape):
+        raise ValueError(f"{name} out of range for a grid of shape {shape}")
+    if len(np.unique(array, axis=0)) != len(array):
+        raise ValueError(f"{name} must be unique")
+    return array
+
+
+def _increasing_subsequence(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    # positions of the strictly increasing subsequence of `values` with the
+    # largest total weight, in O(n log n) with a Fenwick tree holding the best
+    # chain ending at every value rank
+    if np.all(np.diff(values) > 0):
+        return np.arange(len(values))
+
+    _, ranks = np.unique(values, return_inverse=True)
+    num_ranks = int(ranks.max()) + 1
+    tree_best = [0] * (num_ranks + 1)
+    tree_end = [-1] * (num_ranks + 1)
+    best = [0] * len(values)
+    previous = [-1] * len(values)
+    for i, (rank, weight) in enumerate(zip(ranks.tolist(), weights.tolist())):
+        # heaviest chain ending at a smaller value
+        chain, end = 0, -1
+        k = rank
+        while k > 0:
+            if tree_best[k] > chain:
+                chain, end = tree_best[k], tree_end[k]
+            k -= k & -k
+
+        best[i] = chain + weight
+        previous[i] = end
+        k = rank + 1
+        while k <= num_ranks:
+            if best[i] > tree_best[k]:
+                tree_best[k], tree_end[k] = best[i], i
+            k += k & -k
+
+    result = []
+    i = int(np.argmax(best))
+    while i >= 0:
+        result.append(i)
+        i = previous[i]
+    return np.array(result[::-1], dtype=np.intp)
+
+
+def _line_profile(
+    occupied: np.ndarray,
+    along: np.ndarray,
+    across: np.ndarray,
+    lines: np.ndarray,
+    targets: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # for every line of axis 0: whether it fits into a rectangle spanning
+    # `lines` of axis 1, its destination line (-1 if it has no atom in `lines`)
+    # and its number of atoms in `lines`
+    sites = occupied[:, lines]
+    destinations = along[:, lines]
+    valid = ~sites | (
+        (destinations >= 0) & (across[:, lines] == targets[np.newaxis, :])
+    )
+    low = np.where(sites, destinations, _LARGE).min(axis=1)
+    high = np.where(sites, destinations, -1).max(axis=1)
+    count = sites.sum(axis=1)
+    fits = valid.all(axis=1) & ((count == 0) | (low == high))
+    return fits, high, count
+
+
+def _select_lines(
+    occupied: np.ndarray,
+    along: np.ndarray,
+    across: np.ndarray,
+    lines: np.ndarray,
+    targets: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    # the heaviest non-crossing set of lines of axis 0 with atoms in `lines`
+    # that fit into a rectangle spanning `lines` of axis 1
+    fits, destinations, count = _line_profile(occupied, along, across, lines, targets)
+    (candidates,) = np.nonzero(fits & (count > 0))
+    chosen = candidates[
+        _increasing_subsequence(destinations[candidates], count[candidates])
+    ]
+    return chosen, destinations[chosen], int(count[chosen].sum())
+
+
+def _grow(
+    occupied: np.ndarray, along: np.ndarray, across: np.ndarray, seed: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+    # grow a batch from the pending moves of line `seed` of axis 0 that share
+    # its most common destination line, alternately adding lines of both axes
+    (lines,) = np.nonzero(along[seed] >= 0)
+    values, counts = np.unique(along[seed, lines], return_counts=True)
+    lines = lines[along[seed, lines] == values[counts.argmax()]]
+    lines = lines[
+        _increasing_subsequence(across[seed, lines], np.ones(len(lines), np.intp))
+    ]
+    targets = across[seed, lines]
+
+    best = None
+    for _ in range(_MAX_REFINEMENTS):
+        chosen, destinations, count = _select_lines(
+            occupied, along, across, lines, targets
+        )
+        if best is not None and count <= best[-1]:
+            break
+        best = (chosen, destinations, lines, targets, count)
+        lines, targets, count = _select_lines(
+            occupied.T, across.T, along.T, chosen, destinations
+        )
+        if count <= best[-1]:
+            break
+        best = (chosen, destinations, lines, targets, count)
+
+    assert best is not None
+    return best
+
+
+def _order_fits(
+    lines: np.ndarray, targets: np.ndarray, line: np.ndarray, target: np.ndarray
+) -> np.ndarray:
+    # whether inserting `line -> target` keeps the lines and targets in order
+    bounds = np.concatenate(([-1], targets, [_LARGE]))
+    position = np.searchsorted(lines, line)
+    return (bounds[position] < target) & (target < bounds[position + 1])
+
+
+def _extend(
+    occupied: np.ndarray,
+    dst_x: np.ndarray,
+    dst_y: np.ndarray,
+    xs: np.ndarray,
+    x_targets: np.ndarray,
+    ys: np.ndarray,
+    y_targets: np.ndarray,
+):
+    # add the pending site outside the rows and columns of the rectangle whose
+    # row and column add the most atoms, None if there is no such site
+    column_fits, column_dst, column_count = _line_profile(
+        occupied, dst_x, dst_y, ys, y_targets
+    )
+    row_fits, row_dst, row_count = _line_profile(
+        occupied.T, dst_y.T, dst_x.T, xs, x_targets
+    )
+    column_fits[xs] = False
+    row_fits[ys] = False
+
+    px, py = np.nonzero((dst_x >= 0) & column_fits[:, None] & row_fits[None, :])
+    d, e = dst_x[px, py], dst_y[px, py]
+    valid = (
+        ((column_dst[px] < 0) | (column_dst[px] == d))
+        & ((row_dst[py] < 0) | (row_dst[py] == e))
+        & _order_fits(xs, x_targets, px, d)
+        & _order_fits(ys, y_targets, py, e)
+    )
+    if not valid.any():
+        return None
+
+    gain = np.where(valid, column_count[px] + row_count[py], -1)
+    best = int(gain.argmax())
+    x, y = px[best], py[best]
+    xi, yi = np.searchsorted(xs, x), np.searchsorted(ys, y)
+    return (
+        np.insert(xs, xi, x),
+        np.insert(x_targets, xi, d[best]),
+        np.insert(ys, yi, y),
+        np.insert(y_targets, yi, e[best]),
+    )
+
+
+def _next_batch(occupied: np.ndarray, dst_x: np.ndarray, dst_y: np.ndarray):
+    # the largest batch grown from the busiest column or the busiest row
+    pending = dst_x >= 0
+    column = int(pending.sum(axis=1).argmax())
+    row = int(pending.sum(axis=0).argmax())
+
+    xs, x_targets, ys, y_targets, count = _grow(occupied, dst_x, dst_y, column)
+    ys_t, y_targets_t, xs_t, x_targets_t, count_t = _grow(
+        occupied.T, dst_y.T, dst_x.T, row
+    )
+    if count_t > count:
+        batch = xs_t, x_targets_t, ys_t, y_targets_t
+    else:
+        batch = xs, x_targets, ys, y_targets
+
+    while (extended := _extend(occupied, dst_x, dst_y, *batch)) is not None:
+        batch = extended
+    return batch
+
+
+def _occupancy(
+    zone: grid.Grid, occupied: Optional[np.ndarray], name: str
+) -> Optional[np.ndarray]:
+    if occupied is None and isinstance(zone, FilledGrid):
+        occupied = zone.filled_mask
+    if occupied is None:
+        return None
+
+    occupied = np.array(occupied, dtype=bool)
+    if occupied.shape != zone.shape:
+        raise ValueError(
+            f"{name} of shape {occupied.shape} does not match the grid shape "
+            f"{zone.shape}"
+        )
+    return occupied
+
+
+def _default_parking_offset(*zones: grid.Grid) -> float:
+    spacings = [
+        s for zone in zones for s in (*zone.x_spacing, *zone.y_spacing) if s > 0
+    ]
+    return min(spacings) / 2 if spacings else 1.0
+
+
+def plan_batches(
+    src_zone: grid.Grid,
+    dst_zone: grid.Grid,
+    sources: Sequence[tuple[int, int]],
+    destinations: Sequence[tuple[int, int]],
+    occupied: Optional[np.ndarray] = None,
+    dst_occupied: Optional[np.ndarray] = None,
+    parking_offset: Optional[float] = None,
+) -> BatchPlan:
+    """Partition atom displacements into AOD-compatible batches.
+
+    Every batch picks up the atoms of a rectangle of sites of `src_zone` with one
+    AOD tone per column and per row and drops them in `dst_zone`. The columns
+    and the rows move rigidly and keep their order. A rectangle must not contain
+    an atom that is not moved by the batch, so atoms that stay behind and atoms
+    dropped by earlier batches into `src_zone` are taken into account.
+
+    Finding the minimal number of batches is hard in general. Batches are
+    formed greedily: a batch is seeded with the moves of the busiest column (or
+    row) that share a destination and is grown by alternately adding every
+    compatible column and row, keeping the heaviest non-crossing subset. The
+    larger of the two seeds is then extended by single atoms outside its rows
+    and columns, together with the atoms their new row and column pick up.
+    The batch is executed and the process repeats. Rigid translations of a
+    rectangle of atoms result in a single batch.
+
+    Atoms are moved from their site to a parking position offset along x and y,
+    along x, along y, and back into the destination site, so they travel between
+    the rows and the columns of traps and never pass through an occupied trap
+    of zones with a uniform spacing.
+
+    Args:
+        src_zone (Grid): Grid of the source sites. If it is a `FilledGrid` and
+            `occupied` is not given, the filled sites are the occupied sites.
+        dst_zone (Grid): Grid of the destination sites, may be `src_zone`.
+        sources (Sequence[tuple[int, int]]): `(x_index, y_index)` of the atoms
+            to move in `src_zone`.
+        destinations (Sequence[tuple[int, int]]): `(x_index, y_index)` of the
+            destination of every atom in `dst_zone`.
+        occupied (np.ndarray | None): Boolean array of shape `src_zone.shape`
+            with the sites holding an atom. Defaults to the sources.
+        dst_occupied (np.ndarray | None): Boolean array of shape
+            `dst_zone.shape` with the sites holding an atom, ignored if the
+            zones are the same. Defaults to the filled sites if `dst_zone` is
+            a `FilledGrid`, otherwise to no site.
+        parking_offset (float | None): Distance along x and y between the sites
+            and the parking positions. Defaults to half the smallest trap
+            spacing of the zones.
+
+    Returns:
+        BatchPlan: The batches, executing them in order performs every move.
+
+    Raises:
+        ValueError: If the sites are out of range or not unique, if a source
+            is not occupied, or if a destination holds an atom that is not
+            moved away first, in particular if the zones are the same and a
+            destination is the source of another move.
+
+    """
+    src = _site_array(sources, src_zone.shape, "Sources")
+    dst = _site_array(destinations, dst_zone.shape, "Destinations")
+    if len(src) != len(dst):
+        raise ValueError(
+            f"Got {len(src)} sources but {len(dst)} destinations, expected one "
+            "destination per source"
+        )
+
+    occupied = _occupancy(src_zone, occupied, "Occupancy")
+    if occupied is None:
+        occupied = np.zeros(src_zone.shape, dtype=bool)
+        occupied[src[:, 0], src[:, 1]] = True
+    elif not occupied[src[:, 0], src[:, 1]].all():
+        raise ValueError("Every source must be occupied")
+
+    same_zone = src_zone == dst_zone
+    moving = np.arange(len(src))
+    if same_zone:
+        moving = moving[np.any(src != dst, axis=1)]
+        mask = np.zeros(src_zone.shape, dtype=bool)
+        mask[src[moving, 0], src[moving, 1]] = True
+        if mask[dst[moving, 0], dst[moving, 1]].any():
+            raise ValueError(
+                "A destination is the source of another move, split the moves "
+                "into separate plans"
+            )
+        if occupied[dst[moving, 0], dst[moving, 1]].any():
+            raise ValueError("A destination is occupied by an atom that stays")
+    else:
+        dst_occupied = _occupancy(dst_zone, dst_occupied, "Destination occupancy")
+        if dst_occupied is not None and dst_occupied[dst[:, 0], dst[:, 1]].any():
+            raise ValueError("A destination is occupied")
+
+    # destination and index of the pending move of every source site, -1 if none
+    dst_x = np.full(src_zone.shape, -1, dtype=np.intp)
+    dst_y = np.full(src_zone.shape, -1, dtype=np.intp)
+    move_ids = np.full(src_zone.shape, -1, dtype=np.intp)
+    dst_x[src[moving, 0], src[moving, 1]] = dst[moving, 0]
+    dst_y[src[moving, 0], src[moving, 1]] = dst[moving, 1]
+    move_ids[src[moving, 0], src[moving, 1]] = moving
+
+    batches = []
+    remaining = len(moving)
+    while remaining > 0:
+        xs, x_targets, ys, y_targets = _next_batch(occupied, dst_x, dst_y)
+        rectangle = np.ix_(xs, ys)
+        moved = occupied[rectangle]
+        batches.append(
+            AODBatch(
+                tuple(xs.tolist()),
+                tuple(ys.tolist()),
+                tuple(x_targets.tolist()),
+                tuple(y_targets.tolist()),
+                tuple(sorted(move_ids[rectangle][moved].tolist())),
+            )
+        )
+
+        occupied[rectangle] = False
+        dst_x[rectangle] = -1
+        dst_y[rectangle] = -1
+        if same_zone:
+            # destinations are checked to be free, so no atom is overwritten
+            occupied[np.ix_(x_targets, y_targets)] |= moved
+        remaining -= int(moved.sum())
+
+    if parking_offset is None:
+        parking_offset = _default_parking_offset(src_zone, dst_zone)
+
+    return BatchPlan(src_zone, dst_zone, tuple(batches), parking_offset)
+
+
+@tweezer
+def batch_move_impl(
+    src_zone: grid.Grid[Any, Any],
+    dst_zone: grid.Grid[Any, Any],
+    src_x: ilist.IList[int, NumX],
+    src_y: ilist.IList[int, NumY],
+    dst_x: ilist.IList[int, NumX],
+    dst_y: ilist.IList[int, NumY],
+    parking_offset: float,
+):
+    start = grid.sub_grid(src_zone, src_x, src_y)
+    end = grid.sub_grid(dst_zone, dst_x, dst_y)
+    parked_start = grid.shift(start, parking_offset, parking_offset)
+    parked_end = grid.shift(end, parking_offset, parking_offset)
+    corner = grid.from_positions(grid.get_xpos(parked_end), grid.get_ypos(parked_start))
+
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(parked_start)
+    action.move(corner)
+    action.move(parked_end)
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+@move
+def execute_batches(
+    src_zone: grid.Grid[Any, Any],
+    dst_zone: grid.Grid[Any, Any],
+    src_x: ilist.IList[ilist.IList[int, Any], NumBatches],
+    src_y: ilist.IList[ilist.IList[int, Any], NumBatches],
+    dst_x: ilist.IList[ilist.IList[int, Any], NumBatches],
+    dst_y: ilist.IList[ilist.IList[int, Any], NumBatches],
+    parking_offset: float,
+):
+    """Execute the batches of a `BatchPlan`, one parallel region per batch.
+
+    Args:
+        src_zone (grid.Grid[Any, Any]): The grid of the source sites.
+        dst_zone (grid.Grid[Any, Any]): The grid of the destination sites.
+        src_x (ilist.IList[ilist.IList[int, Any], NumBatches]): The x indices of
+            the columns of every batch.
+        src_y (ilist.IList[ilist.IList[int, Any], NumBatches]): The y indices of
+            the rows of every batch.
+        dst_x (ilist.IList[ilist.IList[int, Any], NumBatches]): The destination
+            x indices of every batch.
+        dst_y (ilist.IList[ilist.IList[int, Any], NumBatches]): The destination
+            y indices of every batch.
+        parking_offset (float): The x and y offset of the parking positions.
+
+    """
+    for i in range(len(src_x)):
+        batch_src_x = src_x[i]
+        batch_src_y = src_y[i]
+        batch_dst_x = dst_x[i]
+        batch_dst_y = dst_y[i]
+        device_fn = schedule.device_fn(
+            batch_move_impl,
+            ilist.range(len(batch_src_x)),
+            ilist.range(len(batch_src_y)),
+        )
+        with schedule.parallel():
+            device_fn(
+                src_zone,
+                dst_zone,
+                batch_src_x,
+                batch_src_y,
+                batch_dst_x,
+                batch_dst_y,
+                parking_offset,
+            )
@@ -0,0 +1,41 @@
+import inspect
+from functools import lru_cache, wraps
+from typing import Callable, ParamSpec
+
+from bloqade.shuttle.arch import ArchSpec, FrozenArchSpec
+
+Param = ParamSpec("Param")
+
+
+def spec_factory(
+    func: Callable[Param, ArchSpec],
+) -> Callable[Param, FrozenArchSpec]:
+    """Memoize an architecture specification factory.
+
+    Calls with the same arguments, after applying the defaults of `func`, return
+    the same `FrozenArchSpec`, so the grids, the derived zones and the zone
+    lookup tables of a configuration are only built once. The specifications
+    are shared and cannot be modified; derive a modified copy with
+    `dataclasses.replace` to change the constants, or with
+    `ArchSpecBuilder.from_spec` to change the layout. Both reuse the grids of
+    the cached specification.
+
+    The returned function exposes `cache_info` and `cache_clear` like
+    `functools.lru_cache`.
+
+    """
+    signature = inspect.signature(func)
+
+    @lru_cache(maxsize=128)
+    def build(*args, **kwargs) -> FrozenArchSpec:
+        return func(*args, **kwargs).freeze()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> FrozenArchSpec:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return build(*bound.args, **bound.kwargs)
+
+    wrapper.cache_info = build.cache_info  # type: ignore
+    wrapper.cache_clear = build.cache_clear  # type: ignore
+    return wrapper
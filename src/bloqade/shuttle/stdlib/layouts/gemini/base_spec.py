@@ -2,7 +2,10 @@ from bloqade.geometry.dialects import grid
 
 from bloqade.shuttle.arch import ArchSpec, Layout
 
+from ..factory import spec_factory
 
+
+@spec_factory
 def get_base_spec():
     ROW_SEPARATION = 10.0
     COL_SEPARATION = 8.0
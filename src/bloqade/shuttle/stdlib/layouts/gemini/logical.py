@@ -7,9 +7,11 @@ from bloqade.shuttle import action, schedule, spec, tweezer
 from bloqade.shuttle.prelude import move
 
 from ..asserts import assert_sorted
+from ..factory import spec_factory
 from .base_spec import get_base_spec
 
 
+@spec_factory
 def get_spec():
     """Get the architecture specification for the Gemini logical qubit layout.
 
@@ -17,12 +19,13 @@ def get_spec():
         ArchSpec: The architecture specification with Gemini logical qubit layout.
 
     """
-    arch_spec = get_base_spec()
+    builder = spec.ArchSpecBuilder.from_spec(get_base_spec())
+    layout = builder.layout
 
-    gate_zone = arch_spec.layout.static_traps["gate_zone"]
-    aom_sites = arch_spec.layout.special_grid["aom_sites"]
-    top_reservoir = arch_spec.layout.static_traps["top_reservoir"]
-    bottom_reservoir = arch_spec.layout.static_traps["bottom_reservoir"]
+    gate_zone = layout.static_traps["gate_zone"]
+    aom_sites = layout.special_grid["aom_sites"]
+    top_reservoir = layout.static_traps["top_reservoir"]
+    bottom_reservoir = layout.static_traps["bottom_reservoir"]
 
     left_traps = gate_zone[::2, :]
     right_traps = gate_zone[1::2, :]
@@ -60,8 +63,6 @@ def get_spec():
     additional_static_traps = {
         "left_gate_zone_sites": left_traps,
         "right_gate_zone_sites": right_traps,
-        "top_reservoir_sites": top_reservoir,
-        "bottom_reservoir_sites": bottom_reservoir,
         "GL_blocks": GL_blocks,
         "GR_blocks": GR_blocks,
         "GL0_block": GL0_block,
@@ -82,13 +83,15 @@ def get_spec():
         "AOM1_block": AOM1_block,
     }
 
-    arch_spec.layout.static_traps.update(additional_static_traps)
-    arch_spec.layout.special_grid.update(additional_special_grids)
-    arch_spec.layout.has_cz.add("gate_zone")
-    arch_spec.layout.fillable.update(("GL0_block", "GL1_block"))
-    arch_spec.layout.has_local.update(
-        ("GL0_block", "GL1_block", "GR0_block", "GR1_block")
-    )
+    for zone_id, zone in additional_static_traps.items():
+        layout.add_static_trap(zone_id, zone)
+    for grid_id, zone in additional_special_grids.items():
+        layout.add_special_grid(grid_id, zone)
+    layout.add_alias("top_reservoir_sites", "top_reservoir")
+    layout.add_alias("bottom_reservoir_sites", "bottom_reservoir")
+    layout.mark_cz("gate_zone")
+    layout.mark_fillable("GL0_block", "GL1_block")
+    layout.mark_local("GL0_block", "GL1_block", "GR0_block", "GR1_block")
 
     _, logical_rows = GL0_block.shape
     logical_cols = 2
@@ -100,9 +103,10 @@ def get_spec():
         "code_size": code_size,
     }
 
-    arch_spec.int_constants.update(int_constants)
+    for constant_id, value in int_constants.items():
+        builder.set_int_constant(constant_id, value)
 
-    return arch_spec
+    return builder.build()
 
 
 @tweezer
@@ -8,8 +8,10 @@ from bloqade.shuttle import action, gate, schedule, spec
 from bloqade.shuttle.prelude import move, tweezer
 
 from .asserts import assert_sorted
+from .factory import spec_factory
 
 
+@spec_factory
 def get_spec(num_x: int, num_y: int, spacing: float = 10.0) -> spec.ArchSpec:
     """Create a static trap spec with a single zone. compatible with the stdlib
 
@@ -8,12 +8,14 @@ from bloqade.shuttle import action, schedule, spec
 from bloqade.shuttle.prelude import move, tweezer
 
 from .asserts import assert_sorted
+from .factory import spec_factory
 
 # Define type variables for generic programming
 NumX = TypeVar("NumX", bound=int)
 NumY = TypeVar("NumY", bound=int)
 
 
+@spec_factory
 def get_spec(
     num_x: int, num_y: int, spacing: float = 10.0, gate_spacing: float = 2.0
 ) -> spec.ArchSpec:
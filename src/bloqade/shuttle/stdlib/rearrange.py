@@ -0,0 +1,368 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Sequence, TypeVar
+
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin import types
+from kirin.dialects import ilist
+
+from bloqade.shuttle import action, schedule
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen.templates import MoveTemplate, TemplateLibrary
+from bloqade.shuttle.dialects.filled.types import FilledGrid
+from bloqade.shuttle.dialects.path.types import Path
+from bloqade.shuttle.prelude import move, tweezer
+
+NumX = TypeVar("NumX")
+NumY = TypeVar("NumY")
+NumBatches = TypeVar("NumBatches")
+
+
+class MoveBatch(NamedTuple):
+    """Atoms moved in parallel by a single AOD pick-move-drop sequence.
+
+    The atoms at the sites `src_x x src_y` are moved to the sites
+    `dst_x x dst_y`. The indices are sorted, so the tones never cross.
+
+    """
+
+    src_x: tuple[int, ...]
+    src_y: tuple[int, ...]
+    dst_x: tuple[int, ...]
+    dst_y: tuple[int, ...]
+    x_offset: float
+    """Offset of the parking positions the atoms are moved along."""
+    y_offset: float
+
+
+@dataclass(frozen=True)
+class RearrangementPlan:
+    """Moves that compact the atoms of a `FilledGrid` into a target sub-grid.
+
+    Example:
+        ```python
+        plan = plan_rearrangement(loaded, range(2, 12), range(2, 12))
+        zone, src_x, src_y, dst_x, dst_y, x_offset, y_offset = plan.kernel_args()
+
+        @move
+        def main():
+            rearrange(zone, src_x, src_y, dst_x, dst_y, x_offset, y_offset)
+        ```
+
+    """
+
+    zone: grid.Grid
+    """Grid of the sites, the indices of the batches refer to this grid."""
+    batches: tuple[MoveBatch, ...]
+    """Batches in execution order."""
+    result: FilledGrid
+    """Occupancy of the sites after executing the batches."""
+
+    def kernel_args(self) -> tuple:
+        """Arguments of the `rearrange` kernel executing the plan."""
+        columns = tuple(zip(*self.batches)) if self.batches else ((),) * 6
+        return (
+            self.zone,
+            *(
+                ilist.IList([ilist.IList(list(indices)) for indices in column])
+                for column in columns[:4]
+            ),
+            *(ilist.IList(list(column)) for column in columns[4:]),
+        )
+
+
+def _target_range(indices: Sequence[int], size: int, name: str) -> tuple[int, int]:
+    indices = list(indices)
+    if len(indices) == 0:
+        raise ValueError(f"Target {name} indices must not be empty")
+    start, stop = indices[0], indices[-1] + 1
+    if indices != list(range(start, stop)):
+        raise ValueError(f"Target {name} indices must be consecutive")
+    if start < 0 or stop > size:
+        raise ValueError(f"Target {name} indices out of range")
+    return start, stop
+
+
+def _select_window(positions: np.ndarray, start: int, stop: int) -> int:
+    # start of the run of `stop - start` consecutive atoms that contains every
+    # atom in [start, stop) and minimizes the total displacement
+    width = stop - start
+    lo, hi = np.searchsorted(positions, (start, stop))
+    first = max(0, hi - width)
+    last = min(lo, len(positions) - width)
+    if first == last:
+        return first
+
+    windows = first + np.arange(last - first + 1)[:, None] + np.arange(width)
+    cost = np.abs(positions[windows] - np.arange(start, stop)).sum(axis=1)
+    return first + int(cost.argmin())
+
+
+def _row_moves(
+    mask: np.ndarray, line_start: int, line_stop: int, start: int, stop: int
+) -> dict[tuple[tuple[int, ...], tuple[int, ...]], list[int]]:
+    # compress the atoms of rows `line_start:line_stop` of `mask` into the
+    # columns `start:stop`, rows with the same move are grouped
+    moves: dict[tuple[tuple[int, ...], tuple[int, ...]], list[int]] = {}
+    dst = tuple(range(start, stop))
+    for line in range(line_start, line_stop):
+        (positions,) = np.nonzero(mask[line])
+        window = _select_window(positions, start, stop)
+        src = tuple(positions[window : window + stop - start].tolist())
+        if src != dst:
+            moves.setdefault((src, dst), []).append(line)
+    return moves
+
+
+def _balance_moves(
+    mask: np.ndarray, start: int, stop: int
+) -> dict[tuple[tuple[int, ...], tuple[int, ...]], list[int]]:
+    # move the atoms of every row of `mask` into the columns `start:stop` such
+    # that the number of atoms of the columns differs by at most one: rows with
+    # fewer atoms than the target fill the columns round-robin
+    height = stop - start
+    counts = mask.sum(axis=1)
+    offsets = np.concatenate(([0], np.cumsum(np.minimum(counts, height))[:-1]))
+
+    moves: dict[tuple[tuple[int, ...], tuple[int, ...]], list[int]] = {}
+    for line in np.nonzero(counts)[0].tolist():
+        (positions,) = np.nonzero(mask[line])
+        count = len(positions)
+        if count >= height:
+            window = _select_window(positions, start, stop)
+            src = positions[window : window + height]
+            dst = np.arange(start, stop)
+        else:
+            # the cyclic interval of `count` columns starting at `first`, sorted
+            first = int(offsets[line]) % height
+            wrap = max(0, first + count - height)
+            ranks = np.arange(count)
+            src = positions
+            dst = start + np.where(ranks < wrap, ranks, first + ranks - wrap)
+
+        if not np.array_equal(src, dst):
+            moves.setdefault((tuple(src.tolist()), tuple(dst.tolist())), []).append(
+                line
+            )
+    return moves
+
+
+def _apply(mask: np.ndarray, moves, transpose: bool) -> np.ndarray:
+    mask = mask.copy()
+    view = mask.T if transpose else mask
+    for (src, dst), lines in moves.items():
+        lines = np.asarray(lines)[:, None]
+        view[lines, np.asarray(src)] = False
+        view[lines, np.asarray(dst)] = True
+    return mask
+
+
+def _default_parking_offset(zone: grid.Grid) -> float:
+    spacings = [s for s in (*zone.x_spacing, *zone.y_spacing) if s > 0]
+    return min(spacings) / 2 if spacings else 1.0
+
+
+def plan_rearrangement(
+    filled_grid: FilledGrid,
+    x_indices: Sequence[int],
+    y_indices: Sequence[int],
+    parking_offset: Optional[float] = None,
+) -> RearrangementPlan:
+    """Plan the moves that fill every site of a target sub-grid.
+
+    The plan has two stages. First, the atoms of every column are moved
+    vertically such that every target row receives the same number of atoms up
+    to one: columns with at least as many atoms as target rows fill all target
+    rows, the atoms of the other columns are distributed round-robin. Then the
+    atoms of every target row are compressed horizontally into the target
+    columns. In both stages the run of consecutive atoms that covers all atoms
+    already in the target and minimizes the displacement is selected, atoms
+    outside the run are not moved.
+
+    Every batch moves a single column or row, or several columns or rows with
+    identical moves. Atoms are moved from their site to a parking position
+    offset perpendicular to the move, along the line, and back into the
+    destination site, so they never pass through an occupied trap.
+
+    Args:
+        filled_grid (FilledGrid): The occupancy of the sites.
+        x_indices (Sequence[int]): Consecutive x indices of the target sub-grid.
+        y_indices (Sequence[int]): Consecutive y indices of the target sub-grid.
+        parking_offset (float | None): Distance between the sites and the
+            parking positions. Defaults to half the smallest trap spacing.
+
+    Returns:
+        RearrangementPlan: The move batches and the resulting occupancy.
+
+    Raises:
+        ValueError: If the target is not a consecutive sub-grid of the grid or
+            if there are not enough atoms to fill it.
+
+    """
+    num_x, num_y = filled_grid.shape
+    x_start, x_stop = _target_range(x_indices, num_x, "x")
+    y_start, y_stop = _target_range(y_indices, num_y, "y")
+    width, height = x_stop - x_start, y_stop - y_start
+
+    mask = filled_grid.filled_mask
+    available = int(np.minimum(mask.sum(axis=1), height).sum())
+    if available < width * height:
+        raise ValueError(
+            f"Cannot fill a {width}x{height} target with {filled_grid.num_filled} "
+            f"atoms, at most {available} atoms can be moved into the target rows"
+        )
+
+    zone = grid.Grid(
+        filled_grid.x_spacing,
+        filled_grid.y_spacing,
+        filled_grid.x_init,
+        filled_grid.y_init,
+    )
+    if parking_offset is None:
+        parking_offset = _default_parking_offset(zone)
+
+    batches = []
+
+    column_moves = _balance_moves(mask, y_start, y_stop)
+    mask = _apply(mask, column_moves, transpose=False)
+    for (src, dst), columns in column_moves.items():
+        columns = tuple(columns)
+        batches.append(MoveBatch(columns, src, columns, dst, parking_offset, 0.0))
+
+    row_moves = _row_moves(mask.T, y_start, y_stop, x_start, x_stop)
+    mask = _apply(mask, row_moves, transpose=True)
+    for (src, dst), rows in row_moves.items():
+        rows = tuple(rows)
+        batches.append(MoveBatch(src, rows, dst, rows, 0.0, parking_offset))
+
+    return RearrangementPlan(
+        zone, tuple(batches), FilledGrid.from_mask(filled_grid.parent, ~mask)
+    )
+
+
+@tweezer
+def move_batch_impl(
+    zone: grid.Grid[Any, Any],
+    src_x: ilist.IList[int, NumX],
+    src_y: ilist.IList[int, NumY],
+    dst_x: ilist.IList[int, NumX],
+    dst_y: ilist.IList[int, NumY],
+    x_offset: float,
+    y_offset: float,
+):
+    start = grid.sub_grid(zone, src_x, src_y)
+    end = grid.sub_grid(zone, dst_x, dst_y)
+
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(grid.shift(start, x_offset, y_offset))
+    action.move(grid.shift(end, x_offset, y_offset))
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+@move
+def move_batch(
+    zone: grid.Grid[Any, Any],
+    src_x: ilist.IList[int, NumX],
+    src_y: ilist.IList[int, NumY],
+    dst_x: ilist.IList[int, NumX],
+    dst_y: ilist.IList[int, NumY],
+    x_offset: float,
+    y_offset: float,
+):
+    """Move the atoms at `src_x x src_y` to `dst_x x dst_y`, see `MoveBatch`."""
+    if len(src_x) < 1 or len(src_y) < 1:
+        return
+
+    x_tones = ilist.range(len(src_x))
+    y_tones = ilist.range(len(src_y))
+
+    device_fn = schedule.device_fn(move_batch_impl, x_tones, y_tones)
+    device_fn(zone, src_x, src_y, dst_x, dst_y, x_offset, y_offset)
+
+
+@move
+def rearrange(
+    zone: grid.Grid[Any, Any],
+    src_x: ilist.IList[ilist.IList[int, Any], NumBatches],
+    src_y: ilist.IList[ilist.IList[int, Any], NumBatches],
+    dst_x: ilist.IList[ilist.IList[int, Any], NumBatches],
+    dst_y: ilist.IList[ilist.IList[int, Any], NumBatches],
+    x_offset: ilist.IList[float, NumBatches],
+    y_offset: ilist.IList[float, NumBatches],
+):
+    """Execute the batches of a `RearrangementPlan`.
+
+    Args:
+        zone (grid.Grid[Any, Any]): The grid of the sites.
+        src_x (ilist.IList[ilist.IList[int, Any], NumBatches]): The x indices of
+            the atoms of every batch.
+        src_y (ilist.IList[ilist.IList[int, Any], NumBatches]): The y indices of
+            the atoms of every batch.
+        dst_x (ilist.IList[ilist.IList[int, Any], NumBatches]): The destination
+            x indices of every batch.
+        dst_y (ilist.IList[ilist.IList[int, Any], NumBatches]): The destination
+            y indices of every batch.
+        x_offset (ilist.IList[float, NumBatches]): The x offset of the parking
+            positions of every batch.
+        y_offset (ilist.IList[float, NumBatches]): The y offset of the parking
+            positions of every batch.
+
+    """
+    for i in range(len(src_x)):
+        move_batch(
+            zone, src_x[i], src_y[i], dst_x[i], dst_y[i], x_offset[i], y_offset[i]
+        )
+
+
+@lru_cache(maxsize=128)
+def rearrangement_templates(arch_spec: ArchSpec) -> TemplateLibrary:
+    """Precompile the templates of the rearrangement kernels for `arch_spec`.
+
+    The library contains the `move_batch` template, built from the IR of
+    `move_batch_impl` and instantiated with its arguments. Row and column
+    batches only differ in their indices and parking offsets, so a single
+    template covers both. The libraries of the last 128 architecture
+    specifications are kept.
+
+    """
+    probe_zone = grid.Grid.from_positions([0.0, 2.0, 5.0], [0.0, 3.0, 4.0])
+    probes = [
+        (probe_zone, (0, 2), (1,), (0, 1), (1,), 0.0, 0.5),
+        (probe_zone, (1,), (0, 1), (1,), (1, 2), 0.5, 0.0),
+        (probe_zone, (1, 2), (0, 2), (0, 1), (0, 1), -0.5, 0.5),
+    ]
+
+    library = TemplateLibrary(arch_spec)
+    library.register("move_batch", MoveTemplate.from_kernel(move_batch_impl), probes)
+    return library
+
+
+def plan_paths(plan: RearrangementPlan, arch_spec: ArchSpec) -> list[Path]:
+    """Get the paths of the batches of a plan without interpreting any kernel.
+
+    The paths are equal to the paths generated by `move_batch` for every batch,
+    but are instantiated from the precompiled `rearrangement_templates`.
+
+    Args:
+        plan (RearrangementPlan): The plan.
+        arch_spec (ArchSpec): The architecture specification the plan is
+            executed on.
+
+    Returns:
+        list[Path]: One path per batch of the plan.
+
+    """
+    library = rearrangement_templates(arch_spec)
+    return [
+        library.path(
+            "move_batch",
+            ilist.IList(range(len(batch.src_x)), elem=types.Int),
+            ilist.IList(range(len(batch.src_y)), elem=types.Int),
+            plan.zone,
+            *batch,
+        )
+        for batch in plan.batches
+    ]
@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
+from typing import Any, Iterable
 
 from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
 
+from bloqade.shuttle.codegen.taskgen import AbstractAction
 from bloqade.shuttle.dialects import path
 
 
@@ -79,6 +82,26 @@ class RendererInterface(ABC):
         """
         ...
 
+    def render_actions(
+        self,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+        actions: Iterable[AbstractAction],
+    ) -> None:
+        """Render a stream of actions, e.g. from `TraceInterpreter.iter_trace`.
+
+        Note:
+            The default implementation collects the actions and calls `render_path`,
+            renderers that can draw incrementally should override this method.
+
+        Args:
+            x_tones (ilist.IList[int, Any]): The x tones of the path.
+            y_tones (ilist.IList[int, Any]): The y tones of the path.
+            actions (Iterable[AbstractAction]): The actions to render.
+
+        """
+        self.render_path(path.Path(x_tones, y_tones, list(actions)))
+
     @abstractmethod
     def show(self) -> None:
         """Show all rendered entities."""
@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
 from itertools import product
+from typing import Any, Iterable
 
 import numpy as np
 from bloqade.geometry.dialects.grid.types import Grid
+from kirin.dialects import ilist
 from matplotlib import pyplot as plt
 from matplotlib.artist import Artist
 from matplotlib.axes import Axes
@@ -48,6 +50,7 @@ class MatplotlibRenderer(RendererInterface):
     ymin: float = field(init=False)
     ymax: float = field(init=False)
     sleep_time: float = field(default=0.1, kw_only=True)
+    stream_color_period: int = field(default=16, kw_only=True)
     sleeping: bool = field(default=True, init=False)
 
     def __post_init__(self) -> None:
@@ -198,24 +201,46 @@ class MatplotlibRenderer(RendererInterface):
         if num_unique_waypoints < 2:
             return
 
-        num_arrows = num_unique_waypoints - 1
-        first_waypoint = all_waypoints[0]
-        curr_x = first_waypoint.x_positions
-        curr_y = first_waypoint.y_positions
+        self.clear_paths()
+        self.show()
+        self._render_actions(
+            pth.x_tones, pth.y_tones, pth.path, num_unique_waypoints - 1
+        )
 
+    def render_actions(
+        self,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+        actions: Iterable[taskgen.AbstractAction],
+    ) -> None:
+        self.clear_paths()
+        self.show()
+        self._render_actions(x_tones, y_tones, actions, None)
+
+    def _color_fraction(self, step: int, num_arrows: int | None) -> float:
+        if num_arrows is None:
+            # the total number of arrows of a stream is unknown, cycle the colors
+            return (step % self.stream_color_period) / max(
+                self.stream_color_period - 1, 1
+            )
+
+        return step / (num_arrows - 1) if num_arrows > 1 else 0.0
+
+    def _render_actions(
+        self,
+        x_tones: ilist.IList[int, Any],
+        y_tones: ilist.IList[int, Any],
+        actions: Iterable[taskgen.AbstractAction],
+        num_arrows: int | None,
+    ) -> None:
         color_map = plt.get_cmap("viridis")
 
         step = 0
 
-        x_tones = np.array(pth.x_tones)
-        y_tones = np.array(pth.y_tones)
-
-        x = all_waypoints[0].x_positions
-        y = all_waypoints[0].y_positions
-        self.clear_paths()
-        self.show()
+        x_tone_array = np.array(x_tones)
+        y_tone_array = np.array(y_tones)
 
-        for action in pth.path:
+        for action in actions:
             if isinstance(action, taskgen.WayPointsAction):
                 for start, end in zip(action.way_points[:-1], action.way_points[1:]):
                     x = end.x_positions
@@ -224,7 +249,7 @@ class MatplotlibRenderer(RendererInterface):
                     curr_y = start.y_positions
 
                     for (x_tone, x_start, x_end), (y_tone, y_start, y_end) in product(
-                        zip(pth.x_tones, curr_x, x), zip(pth.y_tones, curr_y, y)
+                        zip(x_tones, curr_x, x), zip(y_tones, curr_y, y)
                     ):
                         self.update_x_bounds(x_start)
                         self.update_x_bounds(x_end)
@@ -240,7 +265,7 @@ class MatplotlibRenderer(RendererInterface):
                             x_tone in self.active_x_tones
                             and y_tone in self.active_y_tones
                         )
-                        p = step / (num_arrows - 1) if num_arrows > 1 else 0.0
+                        p = self._color_fraction(step, num_arrows)
                         line = self.ax.arrow(
                             x_start,
                             y_start,
@@ -262,12 +287,16 @@ class MatplotlibRenderer(RendererInterface):
                         self.show()
 
             elif isinstance(action, taskgen.TurnOnAction):
-                self.active_x_tones.update(x_tones[action.x_tone_indices])
-                self.active_y_tones.update(y_tones[action.y_tone_indices])
+                self.active_x_tones.update(x_tone_array[action.x_tone_indices])
+                self.active_y_tones.update(y_tone_array[action.y_tone_indices])
 
             elif isinstance(action, taskgen.TurnOffAction):
-                self.active_x_tones.difference_update(x_tones[action.x_tone_indices])
-                self.active_y_tones.difference_update(y_tones[action.y_tone_indices])
+                self.active_x_tones.difference_update(
+                    x_tone_array[action.x_tone_indices]
+                )
+                self.active_y_tones.difference_update(
+                    y_tone_array[action.y_tone_indices]
+                )
 
     def set_title(self, title: str) -> None:
         self.ax.set_title(title)
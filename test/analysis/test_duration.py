@@ -0,0 +1,141 @@
+import math
+
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle import action, gate, init, measure, schedule, spec
+from bloqade.shuttle.analysis.duration import Duration, DurationAnalysis
+from bloqade.shuttle.codegen.timing import ConstantJerkProfile, TimingModel
+from bloqade.shuttle.dialects import path
+from bloqade.shuttle.prelude import move, tweezer
+from bloqade.shuttle.rewrite.auto_scheduler import TravelDistanceCost
+
+
+@tweezer
+def hop(start: grid.Grid, end: grid.Grid):
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+zone = grid.Grid.from_positions([0.0, 8.0], [0.0, 20.0])
+arch_spec = spec.ArchSpec(layout=spec.Layout({"zone": zone}, set(), set(), set()))
+# 8 takes 8, 20 takes 14 and every ramp takes 1, see `ConstantJerkProfile`
+timing = TimingModel(ConstantJerkProfile(2.0, 1.0), ramp_time=1.0)
+costs = {gate.TopHatCZ: 2.0, measure.Measure: 100.0, init.Fill: 50.0}
+
+
+def analysis():
+    return DurationAnalysis(move, timing=timing, costs=costs)
+
+
+def site(x: float, y: float):
+    return grid.Grid.from_positions([x], [y])
+
+
+a_start, a_end = site(0.0, 0.0), site(8.0, 0.0)
+b_start, b_end = site(0.0, 20.0), site(0.0, 40.0)
+
+
+def test_straight_line():
+    @move(arch_spec=arch_spec)
+    def main():
+        init.fill([spec.get_static_trap(zone_id="zone")])
+        first = schedule.device_fn(hop, [0], [0])
+        second = schedule.device_fn(hop, [1], [1])
+        with schedule.parallel():
+            first(a_start, a_end)
+            second(b_start, b_end)
+        gate.top_hat_cz(spec.get_static_trap(zone_id="zone"))
+        first(a_end, a_start)
+        return measure.measure((spec.get_static_trap(zone_id="zone"),))
+
+    duration = analysis().estimate(main)
+
+    assert duration == Duration.exact(50.0 + 16.0 + 2.0 + 10.0 + 100.0)
+    plays = [
+        stmt for stmt in main.callable_region.walk() if isinstance(stmt, path.Play)
+    ]
+    assert [type(stmt) for stmt in duration.critical_path] == [
+        init.Fill,
+        path.Play,
+        gate.TopHatCZ,
+        path.Play,
+        measure.Measure,
+    ]
+    assert list(duration.critical_path[1::2][:2]) == plays
+
+
+def test_branches_and_loops():
+    @move
+    def main(cond: bool, n: int):
+        trap = spec.get_static_trap(zone_id="zone")
+        for _ in range(3):
+            gate.top_hat_cz(trap)
+        if cond:
+            measure.measure((trap,))
+        for _ in range(n):
+            gate.top_hat_cz(trap)
+
+    duration = analysis().estimate(main)
+
+    assert duration.minimum == 6.0
+    assert duration.maximum == math.inf
+    # the loop over `range(n)` is expected to run once
+    assert duration.expected == 6.0 + 50.0 + 2.0
+    assert [type(stmt) for stmt in duration.critical_path] == [
+        gate.TopHatCZ,
+        measure.Measure,
+        gate.TopHatCZ,
+    ]
+
+    @move
+    def bounded(cond: bool):
+        trap = spec.get_static_trap(zone_id="zone")
+        if cond:
+            measure.measure((trap,))
+        else:
+            gate.top_hat_cz(trap)
+
+    assert analysis().estimate(bounded) == Duration(2.0, 100.0, 51.0)
+
+    counted = DurationAnalysis(move, costs=costs, expected_trip_count=10.0)
+    assert counted.estimate(main) == Duration(6.0, math.inf, 6.0 + 50.0 + 20.0)
+
+
+def test_subroutines_and_unknown_paths():
+    @move
+    def subroutine():
+        gate.top_hat_cz(spec.get_static_trap(zone_id="zone"))
+
+    @move
+    def main(start: grid.Grid, end: grid.Grid):
+        subroutine()
+        subroutine()
+        task = schedule.device_fn(hop, [0], [0])
+        task(start, end)
+
+    assert analysis().estimate(main) == Duration(4.0, math.inf, math.inf)
+
+    known = DurationAnalysis(move, costs=costs, unknown=Duration.exact(10.0))
+    assert known.estimate(main) == Duration.exact(14.0)
+    assert known.summaries[subroutine] == Duration.exact(2.0)
+
+
+def test_auto():
+    @move(arch_spec=arch_spec)
+    def main():
+        first = schedule.device_fn(hop, [0], [0])
+        second = schedule.device_fn(hop, [1], [1])
+        with schedule.auto():
+            first(a_start, a_end)
+            second(b_start, b_end)
+
+    # the paths are disjoint and can be played in parallel
+    assert analysis().estimate(main) == Duration(16.0, 26.0, 16.0)
+
+    # with a margin the bounding boxes overlap and the paths are played in order
+    spaced = DurationAnalysis(
+        move, timing=timing, cost_model=TravelDistanceCost(), margin=20.0
+    )
+    assert spaced.estimate(main) == Duration(16.0, 26.0, 26.0)
@@ -0,0 +1,238 @@
+import bloqade.squin as squin
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+
+import bloqade.shuttle as qourier
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.dialects.atom import (
+    Atom,
+    AtomInterpreter,
+    AtomStateError,
+    AtomTable,
+)
+from bloqade.shuttle.dialects.filled import FilledGrid
+
+storage = grid.Grid.from_positions([0.0, 4.0, 8.0, 12.0], [0.0, 4.0])
+gate_zone = grid.Grid.from_positions([0.0, 2.0, 10.0, 12.0], [20.0])
+
+
+def run(kernel, *args):
+    interp = AtomInterpreter(ArchSpec())
+    return interp.run(kernel, args), interp.atoms
+
+
+def test_move_next_to_and_reset():
+    @qourier.kernel
+    def main():
+        qubits = squin.qubit.new(4)
+        atoms = qourier.atom.new(storage, qubits)
+        ctrls, qargs = qourier.atom.move_next_to(gate_zone, atoms[0::2], atoms[1::2])
+        qourier.gate.top_hat_cz(gate_zone)
+        results = qourier.atom.measure(ctrls, qubits[0::2])
+        qourier.atom.reset_position(qargs, qubits[1::2])
+        return results
+
+    results, table = run(main)
+
+    assert list(results) == [0, 0]
+    assert table.site_of(Atom(0)) is None
+    assert table.site_of(Atom(1)) == (storage, 0, 1)
+    assert table.site_of(Atom(3)) == (storage, 1, 1)
+    assert table.position_of(Atom(3)) == (4.0, 4.0)
+    np.testing.assert_array_equal(
+        table.occupied(storage),
+        [[False, True], [False, True], [False, False], [False, False]],
+    )
+    assert not table.occupied(gate_zone).any()
+
+
+def test_pairs():
+    @qourier.kernel
+    def main():
+        qubits = squin.qubit.new(4)
+        atoms = qourier.atom.new(storage, qubits)
+        ctrls, qargs = qourier.atom.move_next_to(gate_zone, atoms[0::2], atoms[1::2])
+        return qargs
+
+    qargs, table = run(main)
+
+    assert list(qargs) == [Atom(1), Atom(3)]
+    assert [table.site_of(Atom(i))[1:] for i in range(4)] == [
+        (0, 0),
+        (1, 0),
+        (2, 0),
+        (3, 0),
+    ]
+
+
+def test_move_keeps_atoms_in_zone():
+    @qourier.kernel
+    def main():
+        qubits = squin.qubit.new(3)
+        atoms = qourier.atom.new(storage, qubits)
+        first = qourier.atom.move(gate_zone, atoms[0:2])
+        return qourier.atom.move(gate_zone, [first[1], atoms[2]])
+
+    _, table = run(main)
+
+    assert table.site_of(Atom(0)) == (gate_zone, 0, 0)
+    assert table.site_of(Atom(1)) == (gate_zone, 1, 0)
+    assert table.site_of(Atom(2)) == (gate_zone, 2, 0)
+
+
+def test_new_in_filled_grid():
+    loaded = FilledGrid.vacate(storage, [(0, 0), (1, 0)])
+
+    @qourier.kernel
+    def main():
+        return qourier.atom.new(loaded, squin.qubit.new(3))
+
+    _, table = run(main)
+
+    assert [table.site_of(Atom(i))[1:] for i in range(3)] == [(0, 1), (1, 1), (2, 0)]
+
+
+def test_double_occupancy():
+    @qourier.kernel
+    def main():
+        qubits = squin.qubit.new(2)
+        atoms = qourier.atom.new(storage, qubits)
+        moved = qourier.atom.move(gate_zone, atoms)
+        qourier.atom.new(storage, qubits)
+        qourier.atom.reset_position(moved, qubits)
+
+    with pytest.raises(AtomStateError):
+        run(main)
+
+
+def test_errors():
+    @qourier.kernel
+    def duplicate():
+        atoms = qourier.atom.new(storage, squin.qubit.new(2))
+        return qourier.atom.move(gate_zone, [atoms[0], atoms[0]])
+
+    @qourier.kernel
+    def measured():
+        qubits = squin.qubit.new(2)
+        atoms = qourier.atom.new(storage, qubits)
+        qourier.atom.measure(atoms, qubits)
+        return qourier.atom.move(gate_zone, atoms)
+
+    @qourier.kernel
+    def full():
+        atoms = qourier.atom.new(storage, squin.qubit.new(5))
+        return qourier.atom.move(gate_zone, atoms)
+
+    for kernel in (duplicate, measured, full):
+        with pytest.raises(AtomStateError):
+            run(kernel)
+
+
+def test_table_place():
+    table = AtomTable()
+    zone = table.zone_index(storage)
+    table.create(zone, np.array([0, 1]), np.array([0, 0]))
+
+    ids = np.array([0, 1])
+    table.pick_up(ids)
+    with pytest.raises(AtomStateError):
+        table.place(ids, zone, np.array([2, 2]), np.array([1, 1]))
+
+    assert not table.occupied(storage).any()
+    assert table.zone_index(FilledGrid(storage)) == zone
+
+
+def test_failed_move_rolls_back():
+    interp = AtomInterpreter(ArchSpec())
+
+    @qourier.kernel
+    def full():
+        atoms = qourier.atom.new(storage, squin.qubit.new(5))
+        return qourier.atom.move(gate_zone, atoms)
+
+    with pytest.raises(AtomStateError):
+        interp.run(full, ())
+
+    table = interp.atoms
+    assert [table.site_of(Atom(i)) for i in range(5)] == [
+        (storage, 0, 0),
+        (storage, 0, 1),
+        (storage, 1, 0),
+        (storage, 1, 1),
+        (storage, 2, 0),
+    ]
+    assert not table.occupied(gate_zone).any()
+
+
+def test_table_relocating():
+    table = AtomTable()
+    zone = table.zone_index(storage)
+    table.create(zone, np.array([0, 1, 2]), np.array([0, 0, 0]))
+
+    ids = np.array([0, 1])
+    with pytest.raises(AtomStateError):
+        with table.relocating(ids):
+            table.place(ids[:1], zone, np.array([3]), np.array([1]))
+            table.place(ids[1:], zone, np.array([2]), np.array([0]))
+
+    assert [table.site_of(Atom(i)) for i in range(3)] == [
+        (storage, 0, 0),
+        (storage, 1, 0),
+        (storage, 2, 0),
+    ]
+    assert table.occupied(storage).sum() == 3
+
+
+def test_table_free_sites():
+    zone_grid = grid.Grid.from_positions(list(range(50)), [0.0, 1.0, 2.0])
+    table = AtomTable()
+    zone = table.zone_index(zone_grid)
+    rng = np.random.default_rng(0)
+
+    # compare the incremental search against a scan of the whole zone
+    for _ in range(20):
+        occupied = table.occupied(zone_grid)
+        available = rng.random(zone_grid.shape) < 0.7
+        count = int(rng.integers(1, 8))
+        expected = np.flatnonzero(~occupied & available)[:count]
+        if len(expected) < count:
+            break
+        xs, ys = table.free_sites(zone, count, available)
+        np.testing.assert_array_equal(
+            np.ravel_multi_index((xs, ys), zone_grid.shape), expected
+        )
+        table.create(zone, xs, ys)
+        picked = rng.choice(table.size, size=table.size // 4, replace=False)
+        table.pick_up(picked[table.zone[picked] >= 0])
+        np.testing.assert_array_equal(
+            table.allocators[zone].free, ~table.occupied(zone_grid)
+        )
+
+
+def test_shared_sites():
+    # every other column of storage, the sites are shared with storage
+    columns = grid.Grid.from_positions([0.0, 8.0], [0.0, 4.0])
+    table = AtomTable()
+    zone = table.zone_index(storage)
+    table.create(zone, np.array([0, 2]), np.array([0, 0]))
+
+    sub_zone = table.zone_index(columns)
+    np.testing.assert_array_equal(
+        table.occupied(columns), [[True, False], [True, False]]
+    )
+    with pytest.raises(AtomStateError):
+        table.create(sub_zone, np.array([1]), np.array([0]))
+    assert table.occupied(storage).sum() == 2
+
+    xs, ys = table.free_sites(sub_zone, 2)
+    table.create(sub_zone, xs, ys)
+    assert table.occupied(storage).sum() == 4
+    np.testing.assert_array_equal(table.allocators[zone].free, ~table.occupied(storage))
+    # every pair of storage has a site occupied through the columns
+    with pytest.raises(AtomStateError):
+        table.free_pairs(zone, 1)
+
+    table.pick_up(np.array([0]))
+    assert not table.occupied(columns)[0, 0]
+    assert table.allocators[zone].free[0, 0]
@@ -0,0 +1,128 @@
+import numpy as np
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import Layout
+from bloqade.shuttle.codegen.collision import CollisionChecker
+from bloqade.shuttle.codegen.taskgen import (
+    TurnOffXYAction,
+    TurnOffXYSliceAction,
+    TurnOnXYAction,
+    TurnOnXYSliceAction,
+    WayPointsAction,
+)
+from bloqade.shuttle.dialects.filled import FilledGrid
+from bloqade.shuttle.dialects.path import Path
+from bloqade.shuttle.spatial import Site
+
+traps = grid.Grid.from_positions([0.0, 10.0, 20.0, 30.0], [0.0, 10.0, 20.0])
+checker = CollisionChecker(2.0, {"traps": traps})
+
+
+def make_path(*way_points, x_tones=None, y_tones=None):
+    start = way_points[0]
+    num_x, num_y = start.shape
+    return Path(
+        ilist.IList(x_tones or list(range(num_x))),
+        ilist.IList(y_tones or list(range(num_y))),
+        [
+            WayPointsAction([start]),
+            TurnOnXYSliceAction(slice(None), slice(None)),
+            WayPointsAction(list(way_points)),
+            TurnOffXYSliceAction(slice(None), slice(None)),
+            WayPointsAction([way_points[-1]]),
+        ],
+    )
+
+
+def site(x: float, y: float):
+    return grid.Grid.from_positions([x], [y])
+
+
+def test_trap_sites():
+    across = make_path(site(0.0, 0.0), site(30.0, 0.0))
+    street = make_path(site(0.0, 0.0), site(0.0, 5.0), site(30.0, 5.0), site(30.0, 0.0))
+
+    violations = checker.check_path(across)
+
+    assert [(v.kind, v.segment, v.other) for v in violations] == [
+        ("trap", 1, Site("traps", 1, 0)),
+        ("trap", 1, Site("traps", 2, 0)),
+    ]
+    assert violations[0].distance == 0.0
+    assert checker.check_path(street) == []
+
+    # only filled sites are checked
+    filled = FilledGrid.fill(traps, [(2, 0)])
+    layout = Layout({"traps": traps}, set(), set(), set())
+    violations = CollisionChecker.from_layout(
+        layout, 2.0, {"traps": filled}
+    ).check_path(across)
+    assert [v.other for v in violations] == [Site("traps", 2, 0)]
+
+
+def test_passing_close():
+    # passes (10, 10) at a distance of sqrt(2) / 2 * 2.5
+    path = make_path(site(7.5, 10.0), site(12.5, 15.0))
+
+    (violation,) = checker.check_path(path)
+
+    assert violation.other == Site("traps", 1, 1)
+    np.testing.assert_allclose(violation.distance, 2.5 / np.sqrt(2))
+    assert CollisionChecker(1.5, {"traps": traps}).check_path(path) == []
+
+
+def test_tones():
+    path = make_path(
+        grid.Grid.from_positions([0.0, 10.0], [0.0, 10.0]),
+        grid.Grid.from_positions([5.0, 6.0], [5.0, 15.0]),
+        x_tones=[3, 4],
+        y_tones=[1, 2],
+    )
+
+    (violation,) = CollisionChecker(2.0).check_path(path)
+
+    assert violation.kind == "tones"
+    assert violation.x_tones == (3, 4)
+    assert violation.y_tones == ()
+    assert violation.distance == 1.0
+
+
+def test_tones_turned_on():
+    # the tones are only on while the second y tone is far away
+    start = grid.Grid.from_positions([0.0], [0.0, 1.0])
+    end = grid.Grid.from_positions([0.0], [0.0, 5.0])
+    path = Path(
+        ilist.IList([0]),
+        ilist.IList([0, 1]),
+        [
+            WayPointsAction([start]),
+            TurnOnXYAction(ilist.IList([0]), ilist.IList([0])),
+            WayPointsAction([start, end]),
+            TurnOnXYAction(ilist.IList([0]), ilist.IList([1])),
+            TurnOffXYAction(ilist.IList([0]), ilist.IList([0, 1])),
+        ],
+    )
+
+    assert CollisionChecker(2.0).check_path(path) == []
+
+    path.path[1] = TurnOnXYAction(ilist.IList([0]), ilist.IList([0, 1]))
+    violations = CollisionChecker(2.0).check_path(path)
+    # where the tones are turned on and while they move apart
+    assert [(v.segment, v.y_tones, v.distance) for v in violations] == [
+        (0, (0, 1), 1.0),
+        (1, (0, 1), 1.0),
+    ]
+
+
+def test_parallel_paths():
+    lhs = make_path(site(0.0, 5.0), site(20.0, 5.0))
+    rhs = make_path(site(20.0, 5.0), site(0.0, 5.0), x_tones=[1], y_tones=[1])
+    far = make_path(site(0.0, 50.0), site(20.0, 50.0), x_tones=[2], y_tones=[2])
+
+    (violation,) = CollisionChecker(2.0).check_parallel([lhs, rhs, far])
+
+    assert violation.kind == "paths"
+    assert (violation.path, violation.x_tones, violation.y_tones) == (0, (0,), (0,))
+    assert violation.other == (1, 1, 1)
+    assert violation.distance == 0.0
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec, Layout
+from bloqade.shuttle.codegen.taskgen import (
+    TurnOffXYSliceAction,
+    TurnOnXYSliceAction,
+    WayPointsAction,
+)
+from bloqade.shuttle.codegen.timing import (
+    MAX_ACCELERATION,
+    MAX_VELOCITY,
+    RAMP_TIME,
+    ConstantJerkProfile,
+    MinimumJerkProfile,
+    TimingModel,
+)
+from bloqade.shuttle.dialects.path import Path
+
+
+@pytest.mark.parametrize(
+    "profile", [MinimumJerkProfile(2.0, 1.0), ConstantJerkProfile(2.0, 1.0)]
+)
+def test_profile_limits(profile):
+    distances = np.array([0.0, 0.5, 4.0, 50.0])
+    durations = profile.duration(distances)
+
+    assert durations[0] == 0.0
+    assert np.all(np.diff(durations) > 0)
+    for distance, duration in zip(distances[1:], durations[1:]):
+        times = np.linspace(0.0, duration, 20001)
+        travelled = profile.travelled(times, np.full_like(times, distance))
+        velocity = np.gradient(travelled, times)
+        acceleration = np.gradient(velocity, times)
+
+        np.testing.assert_allclose(travelled[[0, -1]], [0.0, distance], atol=1e-12)
+        assert np.all(np.diff(travelled) >= 0.0)
+        assert velocity.max() <= 2.0 + 1e-6
+        assert np.abs(acceleration).max() <= 1.0 + 1e-2
+
+
+def test_constant_jerk_duration():
+    profile = ConstantJerkProfile(2.0, 1.0)
+
+    # the velocity limit is reached after 4 over a distance of 8
+    np.testing.assert_allclose(
+        profile.duration(np.array([2.0, 8.0, 20.0])), [4.0, 8.0, 14.0]
+    )
+
+
+def make_path():
+    start = grid.Grid.from_positions([0.0, 5.0], [0.0])
+    middle = grid.Grid.from_positions([0.0, 5.0], [8.0])
+    end = grid.Grid.from_positions([6.0, 11.0], [16.0])
+    return Path(
+        ilist.IList([0, 1]),
+        ilist.IList([0]),
+        [
+            WayPointsAction([start]),
+            TurnOnXYSliceAction(slice(None), slice(None)),
+            WayPointsAction([start, middle, end]),
+            TurnOffXYSliceAction(slice(None), slice(None)),
+            WayPointsAction([end]),
+        ],
+    )
+
+
+def test_annotate():
+    profile = ConstantJerkProfile(2.0, 1.0)
+    timing = TimingModel(profile, ramp_time=1.5)
+    path = make_path()
+
+    timed = timing.annotate(path)
+
+    np.testing.assert_allclose(timed.segment_distances, [0.0, 8.0, 10.0, 0.0, 0.0])
+    np.testing.assert_allclose(timed.segment_durations, [0.0, 8.0, 9.0, 0.0, 0.0])
+    np.testing.assert_allclose(timed.waypoint_times, [0.0, 1.5, 9.5, 18.5, 20.0])
+    np.testing.assert_allclose(timed.event_times, [0.0, 18.5])
+    assert timed.duration == pytest.approx(20.0)
+    assert timing.duration(path.path) == pytest.approx(20.0)
+    assert timed.to_path().path == path.path
+
+    # half way through both moves, which are symmetric
+    x, y = timed.sample([0.0, 1.5, 5.5, 9.5, 14.0, 30.0])
+    np.testing.assert_allclose(x[:, 0], [0.0, 0.0, 0.0, 0.0, 3.0, 6.0])
+    np.testing.assert_allclose(x[:, 1] - x[:, 0], 5.0)
+    np.testing.assert_allclose(y[:, 0], [0.0, 0.0, 4.0, 8.0, 12.0, 16.0])
+
+
+def test_from_arch_spec():
+    layout = Layout({}, set(), set(), set())
+    arch_spec = ArchSpec(
+        layout, float_constants={MAX_VELOCITY: 2.0, MAX_ACCELERATION: 1.0}
+    )
+
+    timing = TimingModel.from_arch_spec(arch_spec, ConstantJerkProfile)
+    assert timing == TimingModel(ConstantJerkProfile(2.0, 1.0), 0.0)
+
+    arch_spec.float_constants[RAMP_TIME] = 3.0
+    assert TimingModel.from_arch_spec(arch_spec).ramp_time == 3.0
+
+    with pytest.raises(ValueError):
+        TimingModel.from_arch_spec(ArchSpec(layout))
@@ -0,0 +1,61 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen.compact import CompactTrace
+from bloqade.shuttle.codegen.taskgen import WayPointsAction
+from bloqade.shuttle.codegen.tone_order import ToneOrderChecker, ToneViolation
+from bloqade.shuttle.dialects.path import Path
+
+
+def test_check_actions():
+    actions = [
+        WayPointsAction(
+            [
+                grid.Grid.from_positions([0.0, 4.0, 8.0], [0.0, 5.0]),
+                grid.Grid.from_positions([0.0, 1.0, 8.0], [0.0, 5.0]),
+                grid.Grid.from_positions([0.0, 4.0, 4.0], [0.0, 5.0]),
+            ]
+        )
+    ]
+
+    assert ToneOrderChecker().check_actions(actions, x_tones=[3, 4, 5]) == [
+        ToneViolation("x", 2, (4, 5), 0.0)
+    ]
+    assert ToneOrderChecker(2.0).check_actions(actions) == [
+        ToneViolation("x", 1, (0, 1), 1.0),
+        ToneViolation("x", 2, (1, 2), 0.0),
+    ]
+
+
+def test_crossing():
+    # tones swap places between the waypoints, which a grid cannot represent
+    trace = CompactTrace.from_actions(
+        [WayPointsAction([grid.Grid.from_positions([0.0, 2.0], [0.0])])]
+    )
+    trace = replace(
+        trace,
+        x_positions=np.array([[0.0, 2.0], [3.0, 1.0]]),
+        y_positions=np.zeros((2, 1)),
+    )
+
+    assert ToneOrderChecker().check_trace(trace) == [
+        ToneViolation("x", 1, (0, 1), -2.0)
+    ]
+
+
+def test_check_path():
+    way_point = grid.Grid.from_positions([0.0, 1.0], [0.0])
+    path = Path(ilist.IList([0]), ilist.IList([0]), [WayPointsAction([way_point])])
+
+    with pytest.raises(ValueError):
+        ToneOrderChecker().check_path(path)
+
+    path = Path(ilist.IList([0, 1]), ilist.IList([0]), [WayPointsAction([way_point])])
+    assert ToneOrderChecker().check_path(path) == []
+    assert ToneOrderChecker(1.5).check_path(path) == [
+        ToneViolation("x", 0, (0, 1), 1.0)
+    ]
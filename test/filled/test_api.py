@@ -1,3 +1,5 @@
+import numpy as np
+import pytest
 from bloqade.geometry.dialects import grid
 from kirin.dialects import ilist
 
@@ -145,3 +147,75 @@ def test_get_view():
     view = filled_1.get_view(ilist.IList([0, 2]), ilist.IList([0, 2]))
 
     assert view.vacancies == frozenset([(0, 0), (0, 1)])
+
+
+def test_vacancy_mask():
+    zone = grid.Grid.from_positions([0, 1, 2], [0, 1])
+    mask = np.array([[True, False], [False, False], [False, True]])
+
+    from_mask = filled.FilledGrid.from_mask(zone, mask)
+    from_vacancies = filled.FilledGrid(zone, [(0, 0), (2, 1)])
+
+    assert from_mask == from_vacancies
+    assert hash(from_mask) == hash(from_vacancies)
+    assert from_mask == filled.FilledGrid.fill(zone, [(0, 1), (1, 0), (1, 1), (2, 0)])
+    assert from_mask.vacancies == frozenset([(0, 0), (2, 1)])
+    np.testing.assert_array_equal(from_vacancies.vacancy_mask, mask)
+    assert not from_mask.vacancy_mask.flags.writeable
+    assert from_mask != filled.FilledGrid(zone, [(0, 0)])
+
+    with pytest.raises(ValueError):
+        filled.FilledGrid.from_mask(zone, mask.T)
+
+
+def test_out_of_range_indices():
+    zone = grid.Grid.from_positions([0, 1, 2], [0, 1])
+
+    # indices outside of the grid address no site and are ignored
+    assert filled.FilledGrid.vacate(zone, [(3, 0), (0, -1)]) == filled.FilledGrid(zone)
+    assert filled.FilledGrid(zone, [(1, 1), (1, 2)]).vacancies == frozenset([(1, 1)])
+    assert filled.FilledGrid.fill(zone, [(0, 0), (5, 5)]) == filled.FilledGrid.fill(
+        zone, [(0, 0)]
+    )
+
+
+def test_large_repeat():
+    cell = filled.FilledGrid.vacate(
+        grid.Grid.from_positions([0.0, 6.0], [0.0]), [(1, 0)]
+    )
+    reservoir = cell.repeat(17, 19, 4.0, 4.0)
+
+    assert reservoir.shape == (34, 19)
+    assert len(reservoir.vacancies) == 17 * 19
+    assert all(ix % 2 == 1 for ix, _ in reservoir.vacancies)
+    assert len(reservoir.positions) == 17 * 19
+
+
+def test_filled_arrays():
+    zone = grid.Grid.from_positions([0.0, 1.0, 3.0], [0.0, 2.0])
+    filled_grid = filled.FilledGrid.vacate(zone, [(0, 0), (2, 0), (1, 1), (2, 1)])
+
+    np.testing.assert_array_equal(filled_grid.filled_indices, [[0, 1], [1, 0]])
+    np.testing.assert_array_equal(
+        filled_grid.filled_positions, [[0.0, 2.0], [1.0, 0.0]]
+    )
+    assert filled_grid.num_filled == 2
+    assert filled_grid.positions == ilist.IList(((0.0, 2.0), (1.0, 0.0)))
+    assert filled_grid.filled_positions is filled_grid.filled_positions
+    assert not filled_grid.filled_indices.flags.writeable
+
+    np.testing.assert_array_equal(filled_grid.row_counts, [1, 1])
+    np.testing.assert_array_equal(filled_grid.column_counts, [1, 1, 0])
+    np.testing.assert_array_equal(filled_grid.first_vacant_in_rows, [0, 1])
+    np.testing.assert_array_equal(filled_grid.last_filled_in_rows, [1, 0])
+    np.testing.assert_array_equal(filled_grid.first_vacant_in_columns, [0, 1, 0])
+    np.testing.assert_array_equal(filled_grid.last_filled_in_columns, [1, 0, -1])
+
+    full = filled.FilledGrid(zone)
+    np.testing.assert_array_equal(full.first_vacant_in_rows, [-1, -1])
+    np.testing.assert_array_equal(full.last_filled_in_columns, [1, 1, 1])
+    assert full.filled_positions.shape == (6, 2)
+
+    empty = filled.FilledGrid.fill(zone, [])
+    assert empty.filled_positions.shape == (0, 2)
+    np.testing.assert_array_equal(empty.last_filled_in_rows, [-1, -1])
@@ -0,0 +1,129 @@
+import json
+import threading
+
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.rewrite import Walk
+
+from bloqade.shuttle import action, schedule
+from bloqade.shuttle.passes.fold import Fold
+from bloqade.shuttle.passes.instrument import (
+    PassProfiler,
+    ProfiledPass,
+    active_profiler,
+    instrument_pass,
+)
+from bloqade.shuttle.prelude import move, tweezer
+
+
+@tweezer
+def move_fn(x: float):
+    action.set_loc(grid.from_positions([x], [1.0 + 2.0]))
+
+
+def compile_kernel():
+    @move
+    def main():
+        schedule.device_fn(move_fn, [0], [0])(1.0)
+
+    return main
+
+
+def compile_tweezer():
+    @tweezer
+    def local_move_fn(x: float):
+        action.set_loc(grid.from_positions([x], [1.0 + 2.0]))
+
+    return local_move_fn
+
+
+def test_records_passes():
+    walk_rewrite = Walk.rewrite
+    with PassProfiler() as profiler:
+        main = compile_kernel()
+        compile_tweezer()
+        # kirin classes are not patched
+        assert Walk.rewrite is walk_rewrite
+
+    summary = profiler.summary()
+    assert {"ScheduleToPath", "Default", "TypeInfer", "Fold"} <= set(summary)
+    assert summary["ScheduleToPath"]["calls"] == 1
+
+    (event,) = [e for e in profiler.events if e.name == "ScheduleToPath"]
+    assert event.method == "main"
+    assert event.rewrites > 0
+    assert event.statements_before > event.statements_after
+
+    walks = [e for e in profiler.events if e.category == "walk"]
+    inner = [e for e in walks if event.start <= e.start < event.start + event.duration]
+    assert inner and all(e.depth > event.depth for e in inner)
+    assert sum(stats.rewrites for stats in profiler.rules.values()) > 0
+
+    # passes are only instrumented while the profiler is active
+    instrument_pass(Fold(main.dialects))(main)
+    assert (
+        len([e for e in profiler.events if e.name == "Fold"])
+        == summary.get("Fold", {"calls": 0})["calls"]
+    )
+
+
+def test_fixpoint_iterations():
+    with PassProfiler() as profiler:
+        main = compile_kernel()
+        instrument_pass(Fold(main.dialects)).fixpoint(main)
+
+    (event,) = [
+        e for e in profiler.events if e.category == "fixpoint" and e.name == "Fold"
+    ]
+    assert event.iterations >= 1
+    assert profiler.summary()["Fold"]["iterations"] == event.iterations
+
+
+def test_export(tmp_path):
+    with PassProfiler(count_statements=False) as profiler:
+        compile_kernel()
+
+    report = json.loads(profiler.to_json())
+    assert set(report) == {"events", "passes", "rules"}
+    assert all(event["statements_before"] is None for event in report["events"])
+
+    profiler.save_chrome_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert len(trace["traceEvents"]) == len(profiler.events)
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+
+def test_single_active():
+    fold = Fold(move)
+    with PassProfiler() as profiler:
+        assert active_profiler() is profiler
+        assert isinstance(instrument_pass(fold), ProfiledPass)
+        with pytest.raises(RuntimeError):
+            PassProfiler().__enter__()
+
+    assert active_profiler() is None
+    assert instrument_pass(fold) is fold
+
+
+def test_profilers_per_thread():
+    entered = threading.Barrier(2)
+    compiling = threading.Lock()
+    profilers: list[PassProfiler] = []
+
+    def worker():
+        with PassProfiler() as profiler:
+            entered.wait()
+            with compiling:
+                compile_kernel()
+        profilers.append(profiler)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    with PassProfiler() as profiler:
+        entered.wait()
+        with compiling:
+            compile_kernel()
+    thread.join()
+
+    assert len(profilers) == 1 and profilers[0] is not profiler
+    assert profiler.events and profilers[0].events
@@ -0,0 +1,81 @@
+from typing import Any, Literal
+
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.ir.exception import ValidationError
+
+from bloqade.shuttle import action, schedule, spec
+from bloqade.shuttle.passes.verify_tones import VerifyToneOrder
+from bloqade.shuttle.prelude import move, tweezer
+
+
+@tweezer
+def hop(start: grid.Grid[Literal[2], Literal[1]], end: grid.Grid[Any, Any]):
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+def test_tweezer_constant_grids():
+    with pytest.raises(ValidationError):
+
+        @tweezer(verify_tones=True)
+        def merged():
+            action.set_loc(grid.from_positions([0.0, 0.0], [0.0]))
+
+    with pytest.raises(ValidationError):
+
+        @tweezer(verify_tones=True)
+        def reshaped():
+            action.set_loc(grid.from_positions([0.0, 1.0], [0.0]))
+            action.move(grid.from_positions([0.0], [0.0]))
+
+    @tweezer
+    def close():
+        action.set_loc(grid.from_positions([0.0, 1.0], [0.0]))
+
+    with pytest.raises(ValidationError):
+        VerifyToneOrder(tweezer, min_spacing=2.0)(close)
+
+
+def test_tweezer_verification_opt_in():
+    # coincident tones compiled before the verification was added
+    @tweezer
+    def coincident():
+        action.set_loc(grid.from_positions([0.0, 0.0], [0.0]))
+        action.move(grid.from_positions([1.0, 1.0], [0.0]))
+
+    with pytest.raises(ValidationError):
+        VerifyToneOrder(tweezer)(coincident)
+
+
+def test_device_function_tones():
+    @move
+    def main():
+        task = schedule.device_fn(hop, [0, 1, 2], [0])
+        task(
+            grid.from_positions([0.0, 1.0], [0.0]),
+            grid.from_positions([0.0, 1.0], [0.0]),
+        )
+
+    with pytest.raises(ValidationError):
+        VerifyToneOrder(move)(main)
+
+
+zone = grid.Grid.from_positions([0.0, 10.0, 20.0], [0.0])
+arch_spec = spec.ArchSpec(layout=spec.Layout({"zone": zone}, set(), set(), set()))
+
+
+def test_traced_paths():
+    @move(arch_spec=arch_spec)
+    def main():
+        task = schedule.device_fn(hop, [0, 1], [0])
+        task(
+            grid.from_positions([0.0, 10.0], [0.0]),
+            grid.from_positions([5.0, 6.0], [0.0]),
+        )
+
+    VerifyToneOrder(move)(main)
+    with pytest.raises(ValidationError):
+        VerifyToneOrder(move, min_spacing=2.0)(main)
@@ -352,3 +352,12 @@ def test_trace(
     assert len(trace) == len(expected_trace)
     for t1, t2 in zip(trace, expected_trace):
         assert t1 == t2, f"Expected {t2}, got {t1}"
+
+
+def test_reservoir_aliases():
+    layout = logical.get_spec().layout
+
+    for zone_id in ("top_reservoir", "bottom_reservoir"):
+        zone = layout.static_traps[zone_id]
+        assert layout.static_traps[f"{zone_id}_sites"] == zone
+        assert layout.get_zone_id(zone) == zone_id
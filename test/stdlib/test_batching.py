@@ -0,0 +1,219 @@
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.arch import ArchSpec, Layout
+from bloqade.shuttle.codegen import TraceInterpreter, taskgen
+from bloqade.shuttle.dialects import path
+from bloqade.shuttle.dialects.filled import FilledGrid
+from bloqade.shuttle.stdlib.batching import (
+    batch_move_impl,
+    execute_batches,
+    plan_batches,
+)
+
+
+def make_zone(num_x: int, num_y: int, y_init: float = 0.0):
+    return grid.Grid.from_positions(
+        np.arange(num_x) * 5.0, y_init + np.arange(num_y) * 4.0
+    )
+
+
+def random_moves(shape, dst_shape, count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    src = rng.choice(shape[0] * shape[1], count, replace=False)
+    dst = rng.choice(dst_shape[0] * dst_shape[1], count, replace=False)
+    return (
+        np.stack(np.unravel_index(src, shape), axis=1),
+        np.stack(np.unravel_index(dst, dst_shape), axis=1),
+    )
+
+
+def simulate(plan, sources, destinations, occupied=None):
+    # the move of the atom at every source site, -1 for atoms that stay and -2
+    # for empty sites
+    atoms = np.full(plan.src_zone.shape, -2)
+    if occupied is not None:
+        atoms[occupied] = -1
+    atoms[tuple(np.asarray(sources).T)] = np.arange(len(sources))
+    arrived = {}
+
+    for batch in plan.batches:
+        for indices in (batch.src_x, batch.src_y, batch.dst_x, batch.dst_y):
+            assert list(indices) == sorted(set(indices))
+        assert len(batch.src_x) == len(batch.dst_x)
+        assert len(batch.src_y) == len(batch.dst_y)
+
+        picked = []
+        for i, x in enumerate(batch.src_x):
+            for j, y in enumerate(batch.src_y):
+                atom = atoms[x, y]
+                if atom == -2:
+                    continue
+                assert atom >= 0, "stationary atom picked up"
+                assert tuple(destinations[atom]) == (batch.dst_x[i], batch.dst_y[j])
+                picked.append(int(atom))
+                atoms[x, y] = -2
+
+        assert sorted(picked) == list(batch.moves)
+        for atom in picked:
+            assert atom not in arrived
+            arrived[atom] = tuple(destinations[atom])
+            if plan.src_zone == plan.dst_zone:
+                atoms[arrived[atom]] = -1
+
+    return arrived
+
+
+def trace_batch(plan, index: int):
+    src_zone, dst_zone, *columns, parking_offset = plan.kernel_args()
+    arch_spec = ArchSpec(
+        Layout({"src": src_zone, "dst": dst_zone}, set(), set(), set())
+        if src_zone != dst_zone
+        else Layout({"zone": src_zone}, set(), set(), set())
+    )
+    args = (src_zone, dst_zone, *(column[index] for column in columns))
+    return TraceInterpreter(arch_spec).run_trace(
+        batch_move_impl, (*args, parking_offset), {}
+    )
+
+
+def positions(zone: grid.Grid) -> np.ndarray:
+    return np.array([(x, y) for x in zone.x_positions for y in zone.y_positions])
+
+
+def test_translation():
+    zone = make_zone(10, 8)
+    sources = [(x, y) for x in range(2, 5) for y in range(1, 4)]
+    destinations = [(x + 3, y + 2) for x, y in sources]
+
+    plan = plan_batches(zone, zone, sources, destinations)
+
+    assert len(plan.batches) == 1
+    assert plan.batches[0][:4] == ((2, 3, 4), (1, 2, 3), (5, 6, 7), (3, 4, 5))
+    assert len(simulate(plan, sources, destinations)) == len(sources)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_moves(seed: int):
+    src_zone, dst_zone = make_zone(12, 10), make_zone(12, 10, 100.0)
+    sources, destinations = random_moves((12, 10), (12, 10), 60, seed)
+
+    plan = plan_batches(src_zone, dst_zone, sources, destinations)
+
+    assert len(simulate(plan, sources, destinations)) == 60
+    # diagonal pairs of atoms share batches
+    assert len(plan.batches) < 45
+
+
+def test_same_zone():
+    zone = make_zone(8, 8)
+    sources = [(x, y) for x in range(4) for y in range(8) if (x + y) % 3]
+    destinations = [(7 - x, 7 - y) for x, y in sources]
+
+    plan = plan_batches(zone, zone, sources, destinations)
+
+    assert len(simulate(plan, sources, destinations)) == len(sources)
+
+
+def test_stationary_atoms():
+    zone = make_zone(4, 3)
+    filled_grid = FilledGrid.vacate(zone, [(1, 0), (2, 0), (3, 0)])
+    sources = [(0, 0), (0, 1), (1, 1)]
+    destinations = [(0, 0), (0, 1), (1, 1)]
+
+    plan = plan_batches(filled_grid, make_zone(2, 2, 50.0), sources, destinations)
+
+    # (1, 0) is vacant but the atoms at (0, 2) and (1, 2) stay
+    assert len(plan.batches) == 1
+    assert plan.batches[0][:2] == ((0, 1), (0, 1))
+
+    occupied = filled_grid.filled_mask.copy()
+    occupied[1, 0] = True
+    plan = plan_batches(zone, make_zone(2, 2, 50.0), sources, destinations, occupied)
+    assert len(plan.batches) == 2
+    assert len(simulate(plan, sources, destinations, occupied)) == 3
+
+
+def test_errors():
+    zone = make_zone(4, 4)
+
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0)], [(0, 4)])
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0), (0, 0)], [(1, 0), (2, 0)])
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0), (1, 0)], [(2, 0)])
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0), (1, 0)], [(1, 0), (2, 0)])
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0)], [(1, 0)], np.zeros((4, 4), dtype=bool))
+
+
+def test_occupied_destinations():
+    zone = make_zone(4, 4)
+    occupied = np.zeros((4, 4), dtype=bool)
+    occupied[[0, 2], 0] = True
+
+    # the atom at (2, 0) stays
+    with pytest.raises(ValueError):
+        plan_batches(zone, zone, [(0, 0)], [(2, 0)], occupied)
+    assert len(plan_batches(zone, zone, [(0, 0)], [(1, 0)], occupied).batches) == 1
+
+    dst_zone = make_zone(4, 4, 100.0)
+    dst_occupied = np.zeros((4, 4), dtype=bool)
+    dst_occupied[3, 3] = True
+    with pytest.raises(ValueError):
+        plan_batches(zone, dst_zone, [(0, 0)], [(3, 3)], dst_occupied=dst_occupied)
+    with pytest.raises(ValueError):
+        plan_batches(zone, FilledGrid.fill(dst_zone, [(3, 3)]), [(0, 0)], [(3, 3)])
+    plan = plan_batches(zone, dst_zone, [(0, 0)], [(2, 3)], dst_occupied=dst_occupied)
+    assert len(plan.batches) == 1
+
+
+def test_batch_move_trace():
+    src_zone, dst_zone = make_zone(6, 4), make_zone(6, 4, 100.0)
+    sources, destinations = random_moves((6, 4), (6, 4), 8, 0)
+    plan = plan_batches(src_zone, dst_zone, sources, destinations)
+    src_zone, dst_zone, *columns, parking_offset = plan.kernel_args()
+    batch = plan.batches[0]
+    assert parking_offset == 2.0
+
+    trace = trace_batch(plan, 0)
+    start = src_zone.get_view(batch.src_x, batch.src_y)
+    end = dst_zone.get_view(batch.dst_x, batch.dst_y)
+    parked_end = end.shift(2.0, 2.0)
+    corner = grid.Grid.from_positions(
+        parked_end.x_positions, start.shift(2.0, 2.0).y_positions
+    )
+    assert trace[0] == taskgen.WayPointsAction([start])
+    assert trace[2] == taskgen.WayPointsAction(
+        [start, start.shift(2.0, 2.0), corner, parked_end, end]
+    )
+
+
+def test_batch_move_avoids_occupied_traps():
+    # the straight path of both atoms crosses the atom that stays at (2, 1)
+    zone = make_zone(5, 3)
+    occupied = np.zeros((5, 3), dtype=bool)
+    occupied[[0, 0, 2], [0, 1, 1]] = True
+    plan = plan_batches(zone, zone, [(0, 0), (0, 1)], [(4, 1), (4, 2)], occupied)
+    assert len(plan.batches) == 1
+
+    trace = trace_batch(plan, 0)
+    way_points = trace[2].way_points
+    trap = np.array([zone.x_positions[2], zone.y_positions[1]])
+    for before, after in zip(way_points, way_points[1:]):
+        for p, q in zip(positions(before), positions(after)):
+            # distance between the trap and the segment of every tweezer
+            t = np.clip(
+                np.dot(trap - p, q - p) / max(np.dot(q - p, q - p), 1e-12), 0, 1
+            )
+            assert np.linalg.norm(p + t * (q - p) - trap) >= plan.parking_offset
+
+
+def test_execute_batches_parallel_regions():
+    stmts = list(execute_batches.callable_region.walk())
+
+    assert sum(isinstance(stmt, path.Parallel) for stmt in stmts) == 1
+    assert sum(isinstance(stmt, path.Gen) for stmt in stmts) == 1
@@ -0,0 +1,56 @@
+import dataclasses
+
+import pytest
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle import spec
+from bloqade.shuttle.stdlib.layouts import single_col_zone, two_col_zone
+from bloqade.shuttle.stdlib.layouts.factory import spec_factory
+from bloqade.shuttle.stdlib.layouts.gemini import logical
+
+
+def test_cached_specs():
+    arch_spec = two_col_zone.get_spec(4, 2)
+
+    assert isinstance(arch_spec, spec.FrozenArchSpec)
+    assert two_col_zone.get_spec(4, 2) is arch_spec
+    assert two_col_zone.get_spec(num_x=4, num_y=2, spacing=10.0) is arch_spec
+    assert two_col_zone.get_spec(4, 2, gate_spacing=3.0) is not arch_spec
+    assert single_col_zone.get_spec(4, 2) is not arch_spec
+    assert logical.get_spec() is logical.get_spec()
+
+    with pytest.raises(TypeError):
+        arch_spec.layout.static_traps["extra"] = grid.Grid.from_positions([0], [0])
+
+
+def test_spec_factory():
+    calls = []
+
+    @spec_factory
+    def get_spec(num_x: int, spacing: float = 1.0):
+        calls.append((num_x, spacing))
+        return spec.ArchSpec(
+            spec.Layout(
+                {"traps": grid.Grid.from_positions(range(num_x), [0.0])},
+                set(),
+                set(),
+                set(),
+            ),
+            {"spacing": spacing},
+        )
+
+    first = get_spec(2)
+    assert get_spec(2, 1.0) is first
+    assert get_spec(num_x=2) is first
+    assert calls == [(2, 1.0)]
+    assert get_spec.cache_info().hits == 2  # type: ignore
+
+    derived = dataclasses.replace(first, float_constants={"spacing": 2.0})
+    assert isinstance(derived, spec.FrozenArchSpec)
+    assert derived.layout is first.layout
+    assert derived != first
+    assert get_spec(2) is first
+
+    get_spec.cache_clear()  # type: ignore
+    assert get_spec(2) is not first
+    assert get_spec(2) == first
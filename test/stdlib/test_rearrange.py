@@ -0,0 +1,171 @@
+from typing import Any
+
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle import action
+from bloqade.shuttle.arch import ArchSpec, Layout
+from bloqade.shuttle.codegen import TraceInterpreter, taskgen
+from bloqade.shuttle.codegen.templates import MoveTemplate, TemplateLibrary
+from bloqade.shuttle.dialects.filled import FilledGrid
+from bloqade.shuttle.prelude import tweezer
+from bloqade.shuttle.stdlib.rearrange import (
+    move_batch_impl,
+    plan_paths,
+    plan_rearrangement,
+    rearrangement_templates,
+)
+
+
+def random_grid(num_x: int, num_y: int, fill_fraction: float, seed: int):
+    zone = grid.Grid.from_positions(np.arange(num_x) * 5.0, np.arange(num_y) * 4.0)
+    rng = np.random.default_rng(seed)
+    return FilledGrid.from_mask(zone, rng.random((num_x, num_y)) >= fill_fraction)
+
+
+def simulate(filled_grid: FilledGrid, batches) -> np.ndarray:
+    mask = filled_grid.filled_mask.copy()
+    for batch in batches:
+        for indices in (batch.src_x, batch.src_y, batch.dst_x, batch.dst_y):
+            assert list(indices) == sorted(set(indices))
+        assert len(batch.src_x) == len(batch.dst_x)
+        assert len(batch.src_y) == len(batch.dst_y)
+        # either a pure row or a pure column move, parked perpendicular to it
+        assert (batch.src_x == batch.dst_x and batch.y_offset == 0.0) or (
+            batch.src_y == batch.dst_y and batch.x_offset == 0.0
+        )
+
+        src = np.ix_(batch.src_x, batch.src_y)
+        dst = np.ix_(batch.dst_x, batch.dst_y)
+        assert mask[src].all()
+        mask[src] = False
+        assert not mask[dst].any()
+        mask[dst] = True
+    return mask
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_plan(seed: int):
+    filled_grid = random_grid(12, 10, 0.5, seed)
+    plan = plan_rearrangement(filled_grid, range(3, 8), range(2, 7))
+
+    mask = simulate(filled_grid, plan.batches)
+
+    assert mask[3:8, 2:7].all()
+    assert mask.sum() == filled_grid.num_filled
+    np.testing.assert_array_equal(plan.result.filled_mask, mask)
+
+
+def test_plan_large():
+    filled_grid = random_grid(100, 100, 0.5, 0)
+    plan = plan_rearrangement(filled_grid, range(20, 80), range(20, 80))
+
+    assert simulate(filled_grid, plan.batches)[20:80, 20:80].all()
+
+
+def test_plan_no_moves():
+    zone = grid.Grid.from_positions(range(4), range(4))
+    filled_grid = FilledGrid.vacate(zone, [(0, 0), (3, 3)])
+
+    plan = plan_rearrangement(filled_grid, range(1, 3), range(1, 3))
+    assert plan.batches == ()
+    assert plan.result == FilledGrid.from_mask(zone, filled_grid.vacancy_mask)
+
+
+def test_plan_errors():
+    filled_grid = random_grid(6, 6, 0.9, 0)
+
+    with pytest.raises(ValueError):
+        plan_rearrangement(filled_grid, range(0, 6), range(0, 6))
+    with pytest.raises(ValueError):
+        plan_rearrangement(filled_grid, [0, 2], range(0, 1))
+    with pytest.raises(ValueError):
+        plan_rearrangement(filled_grid, range(5, 7), range(0, 1))
+
+
+def test_move_batch_trace():
+    filled_grid = random_grid(6, 4, 0.5, 1)
+    plan = plan_rearrangement(filled_grid, range(1, 4), range(1, 2), 1.5)
+    zone, *columns = plan.kernel_args()
+    args = (zone, *(column[0] for column in columns))
+    batch = plan.batches[0]
+
+    arch_spec = ArchSpec(Layout({"traps": zone}, set(), set(), set()))
+    trace = TraceInterpreter(arch_spec).run_trace(move_batch_impl, args, {})
+
+    start = zone.get_view(batch.src_x, batch.src_y)
+    end = zone.get_view(batch.dst_x, batch.dst_y)
+    assert trace[0] == taskgen.WayPointsAction([start])
+    assert trace[2] == taskgen.WayPointsAction(
+        [
+            start,
+            start.shift(batch.x_offset, batch.y_offset),
+            end.shift(batch.x_offset, batch.y_offset),
+            end,
+        ]
+    )
+
+
+def test_plan_paths():
+    filled_grid = random_grid(8, 8, 0.5, 2)
+    plan = plan_rearrangement(filled_grid, range(2, 6), range(2, 6))
+    arch_spec = ArchSpec(Layout({"traps": plan.zone}, set(), set(), set()))
+
+    paths = plan_paths(plan, arch_spec)
+    assert rearrangement_templates(arch_spec) is rearrangement_templates(arch_spec)
+
+    interp = TraceInterpreter(arch_spec)
+    zone, *columns = plan.kernel_args()
+    assert len(paths) == len(plan.batches) > 0
+    for i, (pth, batch) in enumerate(zip(paths, plan.batches)):
+        args = (zone, *(column[i] for column in columns))
+        assert pth.path == interp.run_trace(move_batch_impl, args, {})
+        assert pth.x_tones == ilist.IList(range(len(batch.src_x)))
+        assert pth.y_tones == ilist.IList(range(len(batch.src_y)))
+
+
+def test_template_mismatch():
+    arch_spec = ArchSpec()
+    library = TemplateLibrary(arch_spec)
+    zone = grid.Grid.from_positions([0.0, 1.0], [0.0, 1.0])
+
+    def wrong_actions(*args):
+        return []
+
+    with pytest.raises(ValueError):
+        library.register(
+            "wrong",
+            MoveTemplate(move_batch_impl, wrong_actions),
+            [(zone, (0,), (0,), (1,), (0,), 0.0, 0.5)],
+        )
+    assert "wrong" not in library
+
+
+def test_template_from_kernel():
+    @tweezer
+    def shuttle(zone: grid.Grid, x_indices: ilist.IList[int, Any], shift: float):
+        start = grid.sub_grid(zone, x_indices, [0])
+        action.set_loc(start)
+        action.turn_on([0], action.ALL)
+        action.move(grid.shift(start, shift, 1.0))
+        action.move(start)
+        action.turn_off(action.ALL, [0])
+
+    @tweezer
+    def branch(zone: grid.Grid, shift: float):
+        action.set_loc(zone)
+        if shift > 0:
+            action.move(grid.shift(zone, shift, 0.0))
+
+    zone = grid.Grid.from_positions([0.0, 2.0, 5.0], [0.0, 3.0])
+    template = MoveTemplate.from_kernel(shuttle)
+    interp = TraceInterpreter(ArchSpec())
+    for args in [(zone, ilist.IList([0, 2]), 0.5), (zone, ilist.IList([1]), -1.0)]:
+        assert template.instantiate(*args) == interp.run_trace(shuttle, args, {})
+
+    with pytest.raises(ValueError):
+        template.instantiate(zone)
+    with pytest.raises(ValueError):
+        MoveTemplate.from_kernel(branch)
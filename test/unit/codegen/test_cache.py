@@ -0,0 +1,176 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import (
+    ReversedPath,
+    TraceCache,
+    TraceInterpreter,
+    reverse_path,
+)
+from bloqade.shuttle.codegen.taskgen import WayPointsAction
+from bloqade.shuttle.dialects import action
+from bloqade.shuttle.prelude import tweezer
+
+
+@tweezer
+def move_fn(x: float, y: float):
+    start = grid.from_positions([x], [y])
+    end = grid.from_positions([x + 1], [y + 1])
+
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+@tweezer
+def move_slice(start: grid.Grid, x_tones: slice):
+    action.set_loc(start)
+    action.turn_on(x_tones, [0])
+    action.turn_off(x_tones, [0])
+
+
+def test_hit_miss():
+    cache = TraceCache()
+    arch_spec = ArchSpec()
+
+    trace = cache.trace(arch_spec, move_fn, (1.0, 2.0))
+    assert trace == TraceInterpreter(arch_spec).run_trace(move_fn, (1.0, 2.0), {})
+    assert cache.cache_info() == (0, 1, 1024, 1)
+
+    assert cache.trace(arch_spec, move_fn, (1.0, 2.0)) == trace
+    assert cache.cache_info() == (1, 1, 1024, 1)
+
+    cache.trace(arch_spec, move_fn, (1.0, 3.0))
+    assert cache.cache_info() == (1, 2, 1024, 2)
+
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 1024, 0)
+
+
+def test_returns_copy():
+    cache = TraceCache()
+    trace = cache.trace(ArchSpec(), move_fn, (1.0, 2.0))
+    trace.clear()
+
+    assert len(cache.trace(ArchSpec(), move_fn, (1.0, 2.0))) == 5
+
+
+def test_actions_read_only():
+    cache = TraceCache()
+    arch_spec = ArchSpec()
+    trace = cache.trace(arch_spec, move_fn, (1.0, 2.0))
+    block = trace[2]
+    assert isinstance(block, WayPointsAction)
+
+    with pytest.raises(TypeError):
+        block.add_waypoint(grid.Grid.from_positions([5.0], [5.0]))
+    with pytest.raises(FrozenInstanceError):
+        block.way_points = []
+
+    backward = cache.trace(arch_spec, move_fn, (1.0, 2.0), reverse=True)
+    with pytest.raises(FrozenInstanceError):
+        backward[2].way_points = []  # type: ignore
+
+    assert cache.trace(arch_spec, move_fn, (1.0, 2.0)) == TraceInterpreter(
+        arch_spec
+    ).run_trace(move_fn, (1.0, 2.0), {})
+
+
+def test_frozen_arch_spec_key():
+    cache = TraceCache()
+
+    cache.trace(ArchSpec().freeze(), move_fn, (1.0, 2.0))
+    cache.trace(ArchSpec().freeze(), move_fn, (1.0, 2.0))
+    assert cache.cache_info() == (1, 1, 1024, 1)
+
+
+def test_reverse_from_forward():
+    cache = TraceCache()
+    arch_spec = ArchSpec()
+
+    forward = cache.trace(arch_spec, move_fn, (1.0, 2.0))
+    backward = cache.trace(arch_spec, move_fn, (1.0, 2.0), reverse=True)
+
+    assert isinstance(backward, ReversedPath)
+    assert backward == reverse_path(forward)
+    assert cache.hits == 1 and cache.misses == 1
+
+    cache.trace(arch_spec, move_fn, (1.0, 2.0), reverse=True)
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_lru_eviction():
+    cache = TraceCache(maxsize=2)
+    arch_spec = ArchSpec()
+
+    cache.trace(arch_spec, move_fn, (1.0, 1.0))
+    cache.trace(arch_spec, move_fn, (2.0, 2.0))
+    cache.trace(arch_spec, move_fn, (1.0, 1.0))
+    cache.trace(arch_spec, move_fn, (3.0, 3.0))
+
+    assert cache.cache_info() == (1, 3, 2, 2)
+
+    cache.trace(arch_spec, move_fn, (1.0, 1.0))
+    assert cache.hits == 2
+
+    cache.trace(arch_spec, move_fn, (2.0, 2.0))
+    assert cache.misses == 4
+
+
+def test_threaded_access():
+    cache = TraceCache(maxsize=4)
+    arch_spec = ArchSpec()
+    expected = {
+        x: TraceInterpreter(arch_spec).run_trace(move_fn, (float(x), 0.0), {})
+        for x in range(8)
+    }
+
+    def work(worker: int):
+        for i in range(200):
+            x = (worker + i) % 8
+            assert cache.trace(arch_spec, move_fn, (float(x), 0.0)) == expected[x]
+            cache.contains(arch_spec, move_fn, (float(x), 0.0))
+            if i % 50 == 0:
+                cache.cache_info()
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    hits, misses, _, size = cache.cache_info()
+    assert hits + misses == 8 * 200
+    assert size <= 4
+
+
+def test_normalized_args():
+    cache = TraceCache()
+    arch_spec = ArchSpec()
+    start = grid.Grid.from_positions([1.0, 2.0], [3.0])
+
+    cache.trace(arch_spec, move_slice, (start, slice(None)))
+    cache.trace(arch_spec, move_slice, (start, slice(None)))
+    assert cache.cache_info() == (1, 1, 1024, 1)
+
+    cache.trace(arch_spec, move_slice, (start, ilist.IList([0, 1])))
+    cache.trace(arch_spec, move_slice, (start, ilist.IList([0, 1])))
+    assert cache.cache_info() == (2, 2, 1024, 2)
+
+
+def test_arch_spec_key():
+    cache = TraceCache()
+
+    cache.trace(ArchSpec(), move_fn, (1.0, 2.0))
+    cache.trace(ArchSpec(float_constants={"a": 1.0}), move_fn, (1.0, 2.0))
+
+    assert cache.cache_info() == (0, 2, 1024, 2)
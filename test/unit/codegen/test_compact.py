@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import CompactTrace, TraceInterpreter, taskgen
+from bloqade.shuttle.dialects import action, path
+from bloqade.shuttle.prelude import tweezer
+
+
+def get_actions() -> list[taskgen.AbstractAction]:
+    pos1 = grid.Grid.from_positions([0.1, 0.3, 0.6], [0.2, 0.7])
+    pos2 = pos1.shift(0.1, 0.2)
+    pos3 = pos2.scale(0.3, 0.7)
+    return [
+        taskgen.WayPointsAction([pos1]),
+        taskgen.TurnOnXSliceAction(slice(None, 2), ilist.IList([1])),
+        taskgen.WayPointsAction([pos1, pos2, pos3]),
+        taskgen.TurnOffXYAction(ilist.IList([0, 2]), ilist.IList([0, 1])),
+        taskgen.WayPointsAction([pos3]),
+        taskgen.TurnOnYSliceAction(ilist.IList([1]), slice(1, None, -1)),
+        taskgen.WayPointsAction([]),
+    ]
+
+
+def test_from_actions():
+    compact = CompactTrace.from_actions(get_actions())
+
+    assert compact.shape == (3, 2)
+    assert compact.num_waypoints == 5
+    assert compact.num_events == 3
+    assert compact.x_positions.shape == (5, 3)
+    assert compact.y_positions.shape == (5, 2)
+    assert compact.block_offsets.tolist() == [0, 1, 4, 5, 5]
+    assert compact.event_offsets.tolist() == [1, 4, 5]
+    assert compact.x_masks.tolist() == [[1, 1, 0], [1, 0, 1], [0, 1, 0]]
+    assert compact.y_masks.tolist() == [[0, 1], [1, 1], [1, 1]]
+    assert compact.event_is_on.tolist() == [True, False, True]
+    np.testing.assert_array_equal(
+        compact.x_positions[2], get_actions()[2].way_points[1].x_positions
+    )
+
+
+def test_round_trip():
+    actions = get_actions()
+    assert CompactTrace.from_actions(actions).to_actions() == actions
+
+
+def test_path_round_trip():
+    pth = path.Path(ilist.IList([0, 1, 2]), ilist.IList([0, 1]), get_actions())
+    compact = pth.to_compact()
+    assert path.Path.from_compact(pth.x_tones, pth.y_tones, compact) == pth
+
+
+def test_shape_mismatch():
+    actions = [
+        taskgen.WayPointsAction([grid.Grid.from_positions([1.0], [2.0])]),
+        taskgen.WayPointsAction([grid.Grid.from_positions([1.0, 2.0], [2.0])]),
+    ]
+
+    with pytest.raises(ValueError):
+        CompactTrace.from_actions(actions)
+
+
+def test_run_trace_compact():
+
+    @tweezer
+    def move_fn(x: float, y: float):
+        start = grid.from_positions([x, x + 1], [y])
+        end = grid.from_positions([x + 1, x + 3], [y + 1])
+
+        action.set_loc(start)
+        action.turn_on(action.ALL, [0])
+        action.move(end)
+        action.turn_off(action.ALL, [0])
+
+    interpreter = TraceInterpreter(ArchSpec())
+    compact = interpreter.run_trace_compact(move_fn, (1.0, 2.0), {})
+
+    assert compact.x_positions.tolist() == [
+        [1.0, 2.0],
+        [1.0, 2.0],
+        [2.0, 4.0],
+        [2.0, 4.0],
+    ]
+    assert compact.to_actions() == TraceInterpreter(ArchSpec()).run_trace(
+        move_fn, (1.0, 2.0), {}
+    )
+
+
+def test_round_trip_normalizes_tone_lists():
+    pos = grid.Grid.from_positions([0.1, 0.3, 0.6], [0.2, 0.7])
+    actions = [
+        taskgen.WayPointsAction([pos]),
+        taskgen.TurnOnXYAction(ilist.IList([2, -3, 2]), ilist.IList([-1])),
+        taskgen.WayPointsAction([pos, pos.shift(0.1, 0.0)]),
+        taskgen.TurnOffXSliceAction(slice(-1, None, -2), ilist.IList([1, 0])),
+        taskgen.WayPointsAction([pos]),
+    ]
+
+    restored = CompactTrace.from_actions(actions).to_actions()
+
+    # the waypoints, the actions and the slices are preserved as is, the index
+    # lists address the same tones
+    assert [type(act) for act in restored] == [type(act) for act in actions]
+    assert restored[0::2] == actions[0::2]
+    assert restored[1] == taskgen.TurnOnXYAction(ilist.IList([0, 2]), ilist.IList([1]))
+    assert restored[3] == taskgen.TurnOffXSliceAction(
+        slice(-1, None, -2), ilist.IList([0, 1])
+    )
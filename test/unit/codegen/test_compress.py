@@ -0,0 +1,115 @@
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import (
+    CompactTrace,
+    TraceInterpreter,
+    compress_trace,
+    reverse_path,
+    taskgen,
+)
+from bloqade.shuttle.dialects import action
+from bloqade.shuttle.prelude import tweezer
+
+
+def pos(x: float, y: float = 0.0) -> grid.Grid:
+    return grid.Grid.from_positions([x, x + 1.0], [y])
+
+
+def test_zero_length_and_collinear():
+    actions = [
+        taskgen.WayPointsAction(
+            [pos(0.0), pos(0.0), pos(1.0), pos(2.0), pos(2.0, 1.0)]
+        ),
+    ]
+    result = compress_trace(actions)
+
+    assert result.actions == [
+        taskgen.WayPointsAction([pos(0.0), pos(2.0), pos(2.0, 1.0)])
+    ]
+    assert result.removed_waypoints == 2
+    assert result.removed_events == 0
+
+
+def test_not_constant_velocity():
+    # the middle waypoint is on the line, but the tones move with different speeds
+    mid = grid.Grid.from_positions([1.0, 1.5], [0.0])
+    actions = [taskgen.WayPointsAction([pos(0.0), mid, pos(2.0)])]
+
+    assert compress_trace(actions).removed_waypoints == 0
+
+
+def test_noop_events():
+    on = taskgen.TurnOnXYAction(ilist.IList([0, 1]), ilist.IList([0]))
+    on_again = taskgen.TurnOnXSliceAction(slice(None, 1), ilist.IList([0]))
+    off = taskgen.TurnOffXYAction(ilist.IList([0, 1]), ilist.IList([0]))
+    actions = [
+        taskgen.WayPointsAction([pos(0.0)]),
+        on,
+        taskgen.WayPointsAction([pos(0.0), pos(1.0)]),
+        on_again,
+        taskgen.WayPointsAction([pos(1.0), pos(2.0)]),
+        off,
+        taskgen.WayPointsAction([pos(2.0)]),
+    ]
+    result = compress_trace(actions)
+
+    assert result.actions == [
+        taskgen.WayPointsAction([pos(0.0)]),
+        on,
+        taskgen.WayPointsAction([pos(0.0), pos(2.0)]),
+        off,
+        taskgen.WayPointsAction([pos(2.0)]),
+    ]
+    assert result.removed_waypoints == 2
+    assert result.removed_events == 1
+
+
+def test_keeps_event_order():
+    on = taskgen.TurnOnXYAction(ilist.IList([0]), ilist.IList([0]))
+    off = taskgen.TurnOffXYAction(ilist.IList([0]), ilist.IList([0]))
+    actions = [
+        taskgen.WayPointsAction([pos(0.0), pos(1.0)]),
+        on,
+        taskgen.WayPointsAction([pos(1.0)]),
+        off,
+        taskgen.WayPointsAction([pos(1.0), pos(2.0)]),
+    ]
+    result = compress_trace(actions)
+
+    assert result.actions == [actions[0], on, off, actions[4]]
+    assert result.removed_waypoints == 1
+
+    # the compressed trace can still be reversed and converted
+    reversed_actions = reverse_path(result.actions)
+    assert isinstance(reversed_actions[0], taskgen.WayPointsAction)
+    assert CompactTrace.from_actions(result.actions).to_actions() == result.actions
+
+
+def test_traced_kernel():
+
+    @tweezer
+    def move_fn(x: float):
+        start = grid.from_positions([x, x + 1], [0.0])
+        action.set_loc(start)
+        action.turn_on(action.ALL, action.ALL)
+        action.move(grid.shift(start, 1.0, 0.0))
+        action.move(grid.shift(start, 1.0, 0.0))
+        action.move(grid.shift(start, 2.0, 0.0))
+        action.turn_on(action.ALL, action.ALL)
+        action.move(grid.shift(start, 2.0, 1.0))
+        action.turn_off(action.ALL, action.ALL)
+
+    trace = TraceInterpreter(ArchSpec()).run_trace(move_fn, (0.0,), {})
+    result = compress_trace(trace)
+
+    assert result.actions == [
+        taskgen.WayPointsAction([pos(0.0)]),
+        trace[1],
+        taskgen.WayPointsAction([pos(0.0), pos(2.0), pos(2.0, 1.0)]),
+        trace[-2],
+        taskgen.WayPointsAction([pos(2.0, 1.0)]),
+    ]
+    assert result.removed_events == 1
+    assert result.removed_waypoints == 3
@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+from kirin.interp import InterpreterError
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import (
+    ParallelTracer,
+    ReversedPath,
+    TraceCache,
+    TraceInterpreter,
+    active_parallel_tracer,
+    reverse_path,
+)
+from bloqade.shuttle.codegen.parallel import PendingTrace, kernel_ref
+from bloqade.shuttle.dialects import action
+from bloqade.shuttle.prelude import tweezer
+from bloqade.shuttle.stdlib.layouts import two_col_zone
+
+
+@tweezer
+def move_to(x: float):
+    action.set_loc(grid.from_positions([x], [2.0]))
+
+
+def rearrange_args(offset: int):
+    return (
+        ilist.IList([offset, offset + 1]),
+        ilist.IList([0]),
+        ilist.IList([offset + 1, offset + 2]),
+        ilist.IList([1]),
+    )
+
+
+def test_kernel_ref():
+    assert kernel_ref(two_col_zone.rearrange_impl) == (
+        "bloqade.shuttle.stdlib.layouts.two_col_zone",
+        "rearrange_impl",
+    )
+
+    @tweezer
+    def local_fn():
+        action.set_loc(grid.from_positions([1.0], [2.0]))
+
+    assert kernel_ref(local_fn) is None
+
+
+def test_matches_serial():
+    arch_spec = two_col_zone.get_spec(4, 2)
+    cache = TraceCache()
+    kernel = two_col_zone.rearrange_impl
+
+    with ParallelTracer(max_workers=2, cache=cache) as tracer:
+        traces = [
+            tracer.trace(arch_spec, kernel, rearrange_args(i), reverse=i == 1)
+            for i in range(3)
+        ]
+        assert all(isinstance(trace, PendingTrace) for trace in traces)
+
+        for i, trace in enumerate(traces):
+            expected = TraceInterpreter(arch_spec).run_trace(
+                kernel, rearrange_args(i), {}
+            )
+            assert list(trace) == (reverse_path(expected) if i == 1 else expected)
+
+    assert isinstance(traces[1].resolve(), ReversedPath)
+    assert cache.cache_info() == (0, 3, 1024, 3)
+
+    # resolved traces are served from the cache afterwards
+    assert cache.trace(arch_spec, kernel, rearrange_args(0)) == traces[0]
+    assert cache.hits == 1
+
+
+def test_local_fallback():
+
+    @tweezer
+    def local_fn(x: float):
+        action.set_loc(grid.from_positions([x], [2.0]))
+
+    cache = TraceCache()
+    with ParallelTracer(max_workers=1, cache=cache) as tracer:
+        assert active_parallel_tracer() is tracer
+        trace = tracer.trace(ArchSpec(), local_fn, (1.0,))
+
+    assert active_parallel_tracer() is None
+    assert not isinstance(trace, PendingTrace)
+    assert trace == TraceInterpreter(ArchSpec()).run_trace(local_fn, (1.0,), {})
+    assert cache.misses == 1
+
+
+def test_unpicklable_fallback():
+    # local classes cannot be pickled
+    class Position(float):
+        pass
+
+    args = (Position(1.0),)
+    cache = TraceCache()
+    with ParallelTracer(max_workers=1, cache=cache) as tracer:
+        assert kernel_ref(move_to) is not None
+        trace = tracer.trace(ArchSpec(), move_to, args)
+        reversed_trace = tracer.trace(
+            ArchSpec(), move_to, (Position(2.0),), reverse=True
+        )
+        assert tracer._pool is None
+
+    assert not isinstance(trace, PendingTrace)
+    assert trace == TraceInterpreter(ArchSpec()).run_trace(move_to, (1.0,), {})
+    assert isinstance(reversed_trace, ReversedPath)
+    assert cache.misses == 2
+
+
+def test_shared_pool():
+    specs = [two_col_zone.get_spec(4, 2), two_col_zone.get_spec(6, 2)]
+    kernel = two_col_zone.rearrange_impl
+    cache = TraceCache()
+
+    with ParallelTracer(max_workers=2, cache=cache) as tracer:
+        traces = [tracer.trace(spec, kernel, rearrange_args(0)) for spec in specs]
+        pool = tracer._pool
+        assert pool is not None and len(tracer._specs) == 2
+
+        for spec, trace in zip(specs, traces):
+            expected = TraceInterpreter(spec).run_trace(kernel, rearrange_args(0), {})
+            assert list(trace) == expected
+
+    assert tracer._pool is None
+
+
+def test_broken_pool_fallback(caplog):
+    arch_spec = two_col_zone.get_spec(4, 2)
+    kernel = two_col_zone.rearrange_impl
+    tracer = ParallelTracer(cache=TraceCache())
+
+    broken: Future = Future()
+    broken.set_exception(BrokenProcessPool("worker died"))
+    trace = PendingTrace(tracer, arch_spec, kernel, rearrange_args(0), False, broken)
+
+    with caplog.at_level(logging.WARNING, logger="bloqade.shuttle.codegen.parallel"):
+        expected = TraceInterpreter(arch_spec).run_trace(kernel, rearrange_args(0), {})
+        assert list(trace) == expected
+    assert "tracing it locally" in caplog.text
+
+    failed: Future = Future()
+    failed.set_exception(InterpreterError("bad move"))
+    trace = PendingTrace(tracer, arch_spec, kernel, rearrange_args(0), False, failed)
+    with pytest.raises(InterpreterError):
+        trace.resolve()
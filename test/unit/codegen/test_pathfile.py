@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from bloqade.geometry.dialects import grid
+from kirin.dialects import ilist
+
+from bloqade.shuttle.codegen import PathFile, taskgen, write_paths
+from bloqade.shuttle.codegen.pathfile import ALIGNMENT
+from bloqade.shuttle.dialects import path
+
+
+def get_path(offset: float, num_x: int = 3) -> path.Path:
+    pos1 = grid.Grid.from_positions([offset + i for i in range(num_x)], [0.5, 2.0])
+    pos2 = pos1.shift(1.0, 0.5)
+    return path.Path(
+        ilist.IList(list(range(num_x))),
+        ilist.IList([4, 5]),
+        [
+            taskgen.WayPointsAction([pos1]),
+            taskgen.TurnOnXYSliceAction(slice(None), slice(1, None)),
+            taskgen.WayPointsAction([pos1, pos2]),
+            taskgen.TurnOffXYAction(ilist.IList([0]), ilist.IList([1])),
+            taskgen.WayPointsAction([pos2]),
+        ],
+    )
+
+
+def test_round_trip(tmp_path):
+    filename = tmp_path / "program.paths"
+    paths = [
+        get_path(0.0),
+        get_path(1.0, num_x=1),
+        path.Path(ilist.IList([]), ilist.IList([])),
+    ]
+
+    assert write_paths(filename, paths) == 3
+
+    path_file = PathFile(filename)
+    assert len(path_file) == 3
+    assert path_file.to_paths() == paths
+
+
+def test_zero_copy(tmp_path):
+    filename = tmp_path / "program.paths"
+    write_paths(filename, [get_path(0.0), get_path(2.0)])
+
+    path_file = PathFile(filename)
+    record = path_file[1]
+
+    assert isinstance(record.trace.x_positions.base, np.ndarray)
+    assert np.shares_memory(record.trace.x_positions, path_file.buffer)
+    assert record.x_tones.tolist() == [0, 1, 2]
+    assert record.trace.x_positions[0].tolist() == [2.0, 3.0, 4.0]
+    assert all(offset % ALIGNMENT == 0 for offset in path_file.index["offset"])
+
+
+def test_append(tmp_path):
+    filename = tmp_path / "program.paths"
+    write_paths(filename, [get_path(0.0)])
+    assert write_paths(filename, [get_path(1.0), get_path(2.0)], append=True) == 3
+
+    path_file = PathFile(filename)
+    assert path_file[-1].to_path() == get_path(2.0)
+    assert path_file.to_paths() == [get_path(0.0), get_path(1.0), get_path(2.0)]
+
+
+def test_append_failure_keeps_file(tmp_path):
+    filename = tmp_path / "program.paths"
+    write_paths(filename, [get_path(0.0)])
+    size = filename.stat().st_size
+
+    class UnsupportedAction(taskgen.AbstractAction):
+        def inv(self):
+            return self
+
+    bad = path.Path(ilist.IList([0]), ilist.IList([0]), [UnsupportedAction()])
+    with pytest.raises(ValueError):
+        write_paths(filename, [get_path(1.0), bad], append=True)
+
+    assert filename.stat().st_size == size
+    assert PathFile(filename).to_paths() == [get_path(0.0)]
+
+
+def test_invalid_file(tmp_path):
+    filename = tmp_path / "program.paths"
+    filename.write_bytes(b"\x00" * 64)
+
+    with pytest.raises(ValueError):
+        PathFile(filename)
+
+    with pytest.raises(ValueError):
+        write_paths(filename, [get_path(0.0)], append=True)
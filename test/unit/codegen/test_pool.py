@@ -0,0 +1,72 @@
+import threading
+
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import TraceInterpreter, TraceInterpreterPool
+from bloqade.shuttle.dialects import action
+from bloqade.shuttle.prelude import tweezer
+
+
+@tweezer
+def move_fn(x: float, y: float):
+    start = grid.from_positions([x], [y])
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(grid.shift(start, 1.0, 1.0))
+    action.turn_off(action.ALL, action.ALL)
+
+
+def test_reuse():
+    pool = TraceInterpreterPool()
+    arch_spec = ArchSpec()
+
+    with pool.acquire(arch_spec) as interp:
+        first = interp.run_trace(move_fn, (1.0, 2.0), {})
+
+    with pool.acquire(ArchSpec()) as other:
+        assert other is interp
+        assert other.run_trace(move_fn, (1.0, 2.0), {}) == first
+        assert other.run_trace(move_fn, (1.0, 3.0), {}) == TraceInterpreter(
+            arch_spec
+        ).run_trace(move_fn, (1.0, 3.0), {})
+
+
+def test_nested_and_arch_spec():
+    pool = TraceInterpreterPool()
+
+    with pool.acquire(ArchSpec()) as outer:
+        with pool.acquire(ArchSpec()) as inner:
+            assert inner is not outer
+
+    with pool.acquire(ArchSpec(float_constants={"a": 1.0})) as interp:
+        assert interp is not outer and interp is not inner
+
+
+def test_eviction():
+    pool = TraceInterpreterPool(maxsize=1)
+
+    with pool.acquire(ArchSpec()) as first:
+        pass
+    with pool.acquire(ArchSpec(float_constants={"a": 1.0})):
+        pass
+    with pool.acquire(ArchSpec()) as interp:
+        assert interp is not first
+
+
+def test_thread_local():
+    pool = TraceInterpreterPool()
+    with pool.acquire(ArchSpec()) as main_interp:
+        pass
+
+    acquired = []
+
+    def worker():
+        with pool.acquire(ArchSpec()) as interp:
+            acquired.append(interp)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert acquired[0] is not main_interp
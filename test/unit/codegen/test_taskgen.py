@@ -1,3 +1,6 @@
+from dataclasses import FrozenInstanceError
+from typing import Any
+
 import pytest
 from bloqade.geometry.dialects import grid
 from kirin import interp, ir, prelude
@@ -249,3 +252,168 @@ def test_interpreter_run_trace_error():
 
     with pytest.raises(ValueError):
         interpreter.run_trace(test_bad_method, (), {})
+
+
+@tweezer
+def waypoints_kernel(waypoints: ilist.IList[grid.Grid, Any]):
+    action.set_loc(waypoints[0])
+    action.turn_on(action.ALL, action.ALL)
+    for i in range(1, len(waypoints)):
+        action.move(waypoints[i])
+    action.turn_off(action.ALL, action.ALL)
+
+
+def get_waypoints(num_waypoints: int):
+    return ilist.IList(
+        [
+            grid.Grid.from_positions([float(i), i + 1.0], [2.0 * i])
+            for i in range(num_waypoints)
+        ]
+    )
+
+
+def test_iter_trace():
+    waypoints = get_waypoints(10)
+    expected = taskgen.TraceInterpreter(ArchSpec()).run_trace(
+        waypoints_kernel, (waypoints,), {}
+    )
+
+    interpreter = taskgen.TraceInterpreter(ArchSpec())
+    assert list(interpreter.iter_trace(waypoints_kernel, (waypoints,), {})) == expected
+    assert interpreter.sink is None
+
+
+def test_iter_trace_chunks():
+    waypoints = get_waypoints(10)
+    actions = list(
+        taskgen.TraceInterpreter(ArchSpec()).iter_trace(
+            waypoints_kernel, (waypoints,), {}, chunk_size=4
+        )
+    )
+
+    blocks = [
+        act.way_points for act in actions if isinstance(act, taskgen.WayPointsAction)
+    ]
+    # a chunk is only started when there is a waypoint to move to, so a block
+    # ending on a full chunk is not followed by a single waypoint block
+    assert blocks == [
+        [waypoints[0]],
+        list(waypoints[0:4]),
+        list(waypoints[3:7]),
+        list(waypoints[6:10]),
+        [waypoints[9]],
+    ]
+    assert isinstance(actions[-2], taskgen.TurnOffXYSliceAction)
+
+    actions = list(
+        taskgen.TraceInterpreter(ArchSpec()).iter_trace(
+            waypoints_kernel, (get_waypoints(4),), {}, chunk_size=4
+        )
+    )
+    assert [len(act.way_points) for act in actions[::2]] == [1, 4, 1]
+
+
+def test_iter_trace_close():
+    interpreter = taskgen.TraceInterpreter(ArchSpec())
+    stream = interpreter.iter_trace(
+        waypoints_kernel, (get_waypoints(200),), {}, chunk_size=2, buffer_size=1
+    )
+
+    assert isinstance(next(stream), taskgen.WayPointsAction)
+    stream.close()
+    assert interpreter.sink is None
+
+
+def test_iter_trace_error():
+
+    @tweezer
+    def bad_move(pos: grid.Grid):
+        action.move(pos)
+
+    stream = taskgen.TraceInterpreter(ArchSpec()).iter_trace(
+        bad_move, (grid.Grid.from_positions([1.0], [1.0]),), {}
+    )
+
+    with pytest.raises(interp.InterpreterError):
+        list(stream)
+
+    with pytest.raises(ValueError):
+        taskgen.TraceInterpreter(ArchSpec()).iter_trace(
+            waypoints_kernel, (get_waypoints(2),), {}, chunk_size=1
+        )
+
+
+class TestReversedPath:
+
+    def get_path(self) -> list[taskgen.AbstractAction]:
+        return [
+            taskgen.WayPointsAction([grid.Grid.from_positions([1, 2], [3, 4])]),
+            taskgen.TurnOnXYAction(ilist.IList([1, 2]), ilist.IList([3, 4])),
+            taskgen.WayPointsAction(
+                [
+                    grid.Grid.from_positions([1, 2], [3, 4]),
+                    grid.Grid.from_positions([5, 6], [7, 8]),
+                ]
+            ),
+            taskgen.TurnOffXYAction(ilist.IList([1, 2]), ilist.IList([3, 4])),
+        ]
+
+    def test_view(self):
+        path = self.get_path()
+        view = taskgen.ReversedPath(path)
+
+        assert len(view) == len(path)
+        assert view == taskgen.reverse_path(path)
+        assert taskgen.reverse_path(path) == view
+        assert view[0] == path[-1].inv()
+        assert view[-1] == path[0].inv()
+        assert view[1:3] == [path[2].inv(), path[1].inv()]
+        assert list(reversed(view)) == [act.inv() for act in path]
+        assert view.inv() == tuple(path)
+
+        with pytest.raises(IndexError):
+            view[4]
+
+    def test_shared_waypoints(self):
+        path = self.get_path()
+        view = taskgen.ReversedPath(path)
+
+        reversed_waypoints = view[1]
+        assert isinstance(reversed_waypoints, taskgen.FrozenWayPointsAction)
+        assert reversed_waypoints == path[2].inv()
+        assert reversed_waypoints.inv() == path[2]
+        assert reversed_waypoints.way_points[0] is path[2].way_points[1]
+        assert reversed_waypoints.way_points[:-1] == [path[2].way_points[1]]
+
+        with pytest.raises(TypeError):
+            reversed_waypoints.add_waypoint(grid.Grid.from_positions([1], [1]))
+        with pytest.raises(FrozenInstanceError):
+            reversed_waypoints.way_points = []  # type: ignore
+
+    def test_read_only_inv(self):
+        path = self.get_path()
+        original = taskgen.ReversedPath(path).inv()
+        assert original == tuple(path)
+
+        with pytest.raises(TypeError):
+            original[0] = path[1]  # type: ignore
+        assert original is not taskgen.ReversedPath(path).inv()
+
+    def test_freeze(self):
+        action = taskgen.WayPointsAction([grid.Grid.from_positions([1], [2])])
+        frozen = action.freeze()
+
+        assert frozen == action and action == frozen
+        assert frozen.freeze() is frozen
+        assert frozen.way_points == (action.way_points[0],)
+
+        action.add_waypoint(grid.Grid.from_positions([3], [4]))
+        assert len(frozen.way_points) == 1
+
+    def test_materialize(self):
+        path = self.get_path()
+        materialized = taskgen.ReversedPath(path).materialize()
+
+        assert isinstance(materialized, list)
+        assert materialized == taskgen.reverse_path(path)
+        assert type(materialized[1]) is taskgen.WayPointsAction
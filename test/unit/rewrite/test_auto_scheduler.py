@@ -0,0 +1,145 @@
+import math
+
+from bloqade.geometry.dialects import grid
+from kirin import ir, rewrite
+
+from bloqade.shuttle import action, schedule, spec
+from bloqade.shuttle.codegen import taskgen
+from bloqade.shuttle.codegen.timing import ConstantJerkProfile, TimingModel
+from bloqade.shuttle.dialects import path
+from bloqade.shuttle.passes.auto_schedule import AutoSchedule
+from bloqade.shuttle.prelude import move, tweezer
+from bloqade.shuttle.rewrite.auto_scheduler import (
+    MotionTimeCost,
+    PathSummary,
+    ScheduleAuto,
+    TravelDistanceCost,
+    list_schedule,
+)
+
+from .utils import assert_block_equal, pth
+
+
+def box(x_min: float, x_max: float, y_min: float, y_max: float, **tones):
+    return PathSummary(
+        x_tones=frozenset(tones.get("x", ())),
+        y_tones=frozenset(tones.get("y", ())),
+        bounds=(x_min, x_max, y_min, y_max),
+    )
+
+
+def test_list_schedule():
+    summaries = [
+        box(0, 1, 0, 1, x=[0]),
+        box(5, 6, 0, 1, x=[0]),  # shares a tone with 0
+        box(0.5, 2, 0, 1, x=[1]),  # overlaps 0
+        box(10, 11, 0, 1, x=[2]),
+        PathSummary(),  # unknown bounds, after everything
+    ]
+
+    assert list_schedule(summaries) == [[0, 3], [1, 2], [4]]
+    # paths closer than the margin are ordered
+    assert list_schedule(summaries[:2] + summaries[3:4], margin=5.0) == [
+        [0],
+        [1],
+        [2],
+    ]
+
+
+def test_list_schedule_unknown_tones():
+    summaries = [
+        box(0, 1, 0, 1, x=[0]),
+        PathSummary(bounds=(10, 11, 0, 1)),  # unknown tones, apart from 0 and 2
+        box(20, 21, 0, 1, x=[1]),
+    ]
+
+    assert list_schedule(summaries) == [[0, 2], [1]]
+
+
+def test_list_schedule_priority():
+    summaries = [
+        box(0, 1, 0, 1, x=[0]),
+        box(10, 11, 0, 1, x=[0]),  # shares a tone with 0 and starts a chain
+        box(10, 11, 0, 1, x=[1]),
+        box(10, 11, 0, 1, x=[2]),
+    ]
+
+    assert list_schedule(summaries) == [[1], [0, 2], [3]]
+
+
+def test_travel_distance_cost():
+    start = grid.Grid.from_positions([0.0, 4.0], [0.0])
+    end = grid.Grid.from_positions([3.0, 5.0], [4.0])
+    summary = PathSummary.from_actions(
+        [taskgen.WayPointsAction([start, end])], x_tones=[0, 1], y_tones=[0]
+    )
+
+    assert summary.bounds == (0.0, 5.0, 0.0, 4.0)
+    assert TravelDistanceCost().cost(summary) == 5.0
+    assert TravelDistanceCost(unknown=7.0).cost(PathSummary()) == 7.0
+
+    # no cruise over 5, see `ConstantJerkProfile`
+    timing = TimingModel(ConstantJerkProfile(2.0, 1.0))
+    assert math.isclose(MotionTimeCost(timing).cost(summary), math.sqrt(40.0))
+    assert MotionTimeCost(timing).cost(PathSummary()) == math.inf
+
+
+def test_nested_auto_is_kept():
+    paths = [ir.TestValue(path.PathType) for _ in range(2)]
+    test_block = ir.Block(
+        [
+            auto := pth.auto(*paths),
+            parallel := pth.parallel(auto.result, paths[0]),
+            path.Play(parallel.result),
+        ]
+    )
+    expected_block = ir.Block(
+        [
+            auto := pth.auto(*paths),
+            parallel := pth.parallel(auto.result, paths[0]),
+            path.Play(parallel.result),
+        ]
+    )
+
+    rewrite.Walk(ScheduleAuto()).rewrite(test_block)
+
+    assert_block_equal(test_block, expected_block)
+
+
+@tweezer
+def hop(start: grid.Grid, end: grid.Grid):
+    action.set_loc(start)
+    action.turn_on(action.ALL, action.ALL)
+    action.move(end)
+    action.turn_off(action.ALL, action.ALL)
+
+
+def site(x: float, y: float):
+    return grid.Grid.from_positions([x], [y])
+
+
+zone = grid.Grid.from_positions([0.0, 50.0], [0.0, 10.0])
+arch_spec = spec.ArchSpec(layout=spec.Layout({"zone": zone}, set(), set(), set()))
+a_start, a_end = site(0.0, 0.0), site(0.0, 10.0)
+b_start, b_end = site(50.0, 0.0), site(50.0, 10.0)
+c_start, c_end = site(0.0, 5.0), site(5.0, 5.0)
+
+
+def test_auto_schedule_pass():
+    @move(arch_spec=arch_spec)
+    def main():
+        first = schedule.device_fn(hop, [0], [0])
+        second = schedule.device_fn(hop, [1], [1])
+        with schedule.auto():
+            first(a_start, a_end)
+            first(b_start, b_end)  # same tones as the first path
+            second(c_start, c_end)  # crosses the first path
+
+    AutoSchedule(move)(main)
+
+    stmts = list(main.callable_region.walk())
+    assert not any(isinstance(stmt, path.Auto) for stmt in stmts)
+    plays = [stmt for stmt in stmts if isinstance(stmt, path.Play)]
+    assert len(plays) == 2
+    assert isinstance(plays[1].path.owner, path.Parallel)
+    assert len(plays[1].path.owner.paths) == 2
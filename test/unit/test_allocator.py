@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+from bloqade.geometry.dialects.grid import Grid
+
+from bloqade.shuttle.allocator import SiteAllocator, ZoneAllocator
+from bloqade.shuttle.arch import Layout
+from bloqade.shuttle.dialects.filled import FilledGrid
+from bloqade.shuttle.spatial import Site
+from bloqade.shuttle.stdlib.layouts.gemini import logical
+
+zone = Grid.from_positions(np.arange(20) * 3.0, np.arange(15) * 4.0)
+
+
+def distances(allocator: ZoneAllocator, sites, x: float, y: float):
+    return [
+        np.hypot(allocator.x_positions[i] - x, allocator.y_positions[j] - y)
+        for i, j in sites
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_nearest_free(seed: int):
+    rng = np.random.default_rng(seed)
+    allocator = ZoneAllocator(zone, rng.random(zone.shape) < 0.5)
+
+    for _ in range(20):
+        count = int(rng.integers(1, 6))
+        x, y = rng.uniform(-10.0, 70.0, size=2)
+        sites = allocator.nearest_free(count, x, y)
+
+        free_x, free_y = np.nonzero(allocator.free)
+        expected = np.sort(distances(allocator, zip(free_x, free_y), x, y))[:count]
+        assert len(set(sites)) == count
+        assert all(allocator.is_free(*site) for site in sites)
+        np.testing.assert_allclose(distances(allocator, sites, x, y), expected)
+
+        allocator.occupy(sites)
+
+    assert allocator.num_free == allocator.free.sum()
+
+
+def test_occupy_release():
+    allocator = ZoneAllocator(zone)
+
+    assert allocator.allocate_nearest(2, 0.0, 0.0) == [(0, 0), (1, 0)]
+    with pytest.raises(ValueError):
+        allocator.occupy([(2, 0), (1, 0)])
+    assert allocator.is_free(2, 0)
+    with pytest.raises(ValueError):
+        allocator.release([(0, 0), (0, 0)])
+    with pytest.raises(ValueError):
+        allocator.release([(5, 5)])
+
+    allocator.release([(1, 0)])
+    assert allocator.nearest_free(1, 4.0, 0.0) == [(1, 0)]
+    assert allocator.num_free == zone.shape[0] * zone.shape[1] - 1
+
+    with pytest.raises(ValueError):
+        allocator.nearest_free(allocator.num_free + 1, 0.0, 0.0)
+
+
+def test_first_free():
+    rng = np.random.default_rng(0)
+    allocator = ZoneAllocator(zone, rng.random(zone.shape) < 0.5)
+    available = rng.random(zone.shape) < 0.5
+
+    expected = np.flatnonzero(allocator.free & available)[:10]
+    sites = allocator.first_free(10, available)
+    np.testing.assert_array_equal(
+        np.ravel_multi_index(tuple(zip(*sites)), zone.shape), expected
+    )
+    assert allocator.first_free(3) == [
+        tuple(site) for site in np.argwhere(allocator.free)[:3].tolist()
+    ]
+
+    with pytest.raises(ValueError):
+        allocator.first_free(allocator.num_free + 1)
+
+
+def test_allocate_block():
+    occupied = np.zeros(zone.shape, dtype=bool)
+    occupied[:, :3] = True
+    occupied[10, :] = True
+    allocator = ZoneAllocator(zone, occupied)
+
+    assert allocator.allocate_block(4, 2) == (range(0, 4), range(3, 5))
+    assert allocator.allocate_block(3, 3, x=51.0, y=28.0) == (
+        range(16, 19),
+        range(6, 9),
+    )
+    assert not allocator.free[16:19, 6:9].any()
+    assert allocator.num_free == allocator.free.sum()
+
+    with pytest.raises(ValueError):
+        allocator.allocate_block(11, 1)
+    with pytest.raises(ValueError):
+        allocator.allocate_block(1, 16)
+
+
+def test_site_allocator():
+    gate_zone = Grid.from_positions([0.0, 2.0, 10.0, 12.0], [20.0])
+    layout = Layout({"storage": zone, "gate": gate_zone}, {"gate"}, set(), set())
+    loaded = FilledGrid.fill(zone, [(0, 0), (1, 0)])
+
+    allocator = SiteAllocator.from_layout(layout, {"storage": loaded})
+
+    assert allocator.num_free("storage") == zone.shape[0] * zone.shape[1] - 2
+    assert allocator.num_free("gate") == 4
+    assert allocator.allocate_nearest("storage", 2, 0.0, 0.0) == [
+        Site("storage", 0, 1),
+        Site("storage", 1, 1),
+    ]
+    assert allocator.allocate_nearest("gate", 2, 11.0, 20.0) == [
+        Site("gate", 2, 0),
+        Site("gate", 3, 0),
+    ]
+
+    allocator.release([Site("gate", 2, 0), Site("storage", 0, 0)])
+    assert allocator["gate"].is_free(2, 0)
+    assert allocator["storage"].is_free(0, 0)
+    with pytest.raises(ValueError):
+        allocator.occupy([Site("gate", 0, 0), Site("gate", 3, 0)])
+    assert allocator["gate"].is_free(0, 0)
+
+    with pytest.raises(ValueError):
+        SiteAllocator.from_layout(layout, {"other": loaded})
+
+
+def test_shared_sites():
+    layout = logical.get_spec().layout
+    allocator = SiteAllocator.from_layout(layout)
+
+    def position(site: Site):
+        zone = layout.static_traps[site.zone_id]
+        return zone.x_positions[site.x_index], zone.y_positions[site.y_index]
+
+    # overlapping zones and aliases never hand out the same trap
+    for first, second in [
+        ("gate_zone", "left_gate_zone_sites"),
+        ("top_reservoir", "top_reservoir_sites"),
+    ]:
+        x, y = position(Site(first, 0, 0))
+        (a,) = allocator.allocate_nearest(first, 1, x, y)
+        (b,) = allocator.allocate_nearest(second, 1, x, y)
+        assert position(a) == (x, y)
+        assert position(b) != position(a)
+        assert not allocator[second].is_free(0, 0)
+
+        allocator.release([Site(second, 0, 0)])
+        assert allocator[first].is_free(0, 0)
+
+    with pytest.raises(ValueError):
+        allocator.occupy([Site("gate_zone", 0, 0), Site("left_gate_zone_sites", 0, 0)])
+    assert allocator["gate_zone"].is_free(0, 0)
+
+    loaded = FilledGrid.fill(layout.static_traps["top_reservoir"], [(1, 1)])
+    allocator = SiteAllocator.from_layout(layout, {"top_reservoir": loaded})
+    assert not allocator["top_reservoir_sites"].is_free(1, 1)
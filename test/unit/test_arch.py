@@ -1,7 +1,19 @@
+import pickle
+from dataclasses import FrozenInstanceError
+
+import numpy as np
 import pytest
 from bloqade.geometry.dialects.grid import Grid
 
-from bloqade.shuttle.arch import Layout
+from bloqade.shuttle.arch import (
+    ArchSpec,
+    ArchSpecBuilder,
+    FrozenArchSpec,
+    FrozenLayout,
+    Layout,
+    LayoutBuilder,
+)
+from bloqade.shuttle.spatial import NO_ZONE
 
 
 def test_layout():
@@ -20,6 +32,7 @@ def test_layout():
             frozenset(layout.has_cz),
             frozenset(layout.has_local),
             frozenset(layout.special_grid.items()),
+            frozenset(layout.aliases),
         )
     )
     assert layout == Layout(
@@ -42,3 +55,188 @@ def test_bounding_box_no_positions():
 
     with pytest.raises(ValueError):
         layout.bounding_box()
+
+
+def get_layout() -> Layout:
+    return Layout(
+        {
+            "left": Grid.from_positions([0.0, 10.0, 20.0], [0.0, 5.0]),
+            "right": Grid.from_positions([30.0, 40.0], [0.0, 5.0]),
+        },
+        {"left"},
+        set(),
+        set(),
+        special_grid={"gate": Grid.from_positions([20.0, 22.0], [5.0])},
+    )
+
+
+def test_site_lookup():
+    layout = get_layout()
+
+    assert layout.site_at(10.0, 5.0) == ("left", 1, 1)
+    assert layout.site_at(30.0 + 1e-9, 0.0) == ("right", 0, 0)
+    assert layout.site_at(20.0, 5.0) == ("left", 2, 1)
+    assert layout.site_at(22.0, 5.0) == ("gate", 1, 0)
+    assert layout.site_at(15.0, 5.0) is None
+    assert layout.index.sites_at(20.0, 5.0) == [("left", 2, 1), ("gate", 0, 0)]
+
+
+def test_site_lookup_batched():
+    index = get_layout().index
+
+    zone, ix, iy = index.lookup(np.array([0.0, 40.0, 1.0]), np.array([5.0, 5.0, 5.0]))
+    assert [index.zone_ids[z] if z != NO_ZONE else None for z in zone] == [
+        "left",
+        "right",
+        None,
+    ]
+    assert ix.tolist() == [0, 1, -1]
+    assert iy.tolist() == [1, 1, -1]
+
+    zone, ix, iy, distance = index.nearest(np.array([26.0, -3.0]), np.array([1.0, 9.0]))
+    assert zone.tolist() == [1, 0]
+    assert ix.tolist() == [0, 0]
+    assert iy.tolist() == [0, 1]
+    np.testing.assert_allclose(distance, [np.hypot(4.0, 1.0), 5.0])
+
+
+def test_nearest_and_range():
+    layout = get_layout()
+
+    assert layout.nearest_site(33.0, 4.0) == (("right", 0, 1), np.hypot(3.0, 1.0))
+    assert sorted(layout.sites_within(10.0, 2.5, 5.0)) == [
+        ("left", 1, 0),
+        ("left", 1, 1),
+    ]
+    assert sorted(layout.sites_within(25.0, 5.0, 5.0)) == [
+        ("gate", 0, 0),
+        ("gate", 1, 0),
+        ("left", 2, 1),
+        ("right", 0, 1),
+    ]
+
+
+def test_index_shared_names():
+    layout = get_layout()
+    layout.special_grid["left"] = Grid.from_positions([0.0], [50.0])
+
+    # both zones named "left" are indexed, the static trap first
+    for current in (layout, layout.freeze()):
+        assert current.index.zone_ids == ("left", "right", "gate", "left")
+        assert current.site_at(0.0, 0.0) == ("left", 0, 0)
+        assert current.site_at(0.0, 50.0) == ("left", 0, 0)
+
+
+def test_index_invalidation():
+    layout = get_layout()
+    index = layout.index
+    assert layout.index is index
+
+    layout.static_traps["extra"] = Grid.from_positions([100.0], [100.0])
+    assert layout.index is not index
+    assert layout.site_at(100.0, 100.0) == ("extra", 0, 0)
+
+    layout.special_grid = {}
+    assert layout.site_at(22.0, 5.0) is None
+
+
+def test_frozen_layout():
+    layout = get_layout()
+    frozen = layout.freeze()
+
+    assert isinstance(frozen, FrozenLayout)
+    assert frozen.freeze() is frozen
+    assert hash(frozen) == hash(layout)
+    assert frozen == layout and layout == frozen
+    assert frozen == layout.freeze()
+    assert frozen.get_zone_id(layout.static_traps["right"]) == "right"
+    assert frozen.site_at(22.0, 5.0) == ("gate", 1, 0)
+
+    with pytest.raises(TypeError):
+        frozen.static_traps["extra"] = Grid.from_positions([100.0], [100.0])  # type: ignore
+    with pytest.raises(AttributeError):
+        frozen.fillable.add("right")  # type: ignore
+    with pytest.raises(FrozenInstanceError):
+        frozen.special_grid = {}
+
+    other = LayoutBuilder.from_layout(layout).mark_cz("right").build()
+    assert hash(other) != hash(frozen)
+    assert other != frozen
+
+
+def test_frozen_arch_spec():
+    arch_spec = ArchSpec(get_layout(), {"spacing": 2.0}, {"code_size": 7})
+    frozen = arch_spec.freeze()
+
+    assert isinstance(frozen.layout, FrozenLayout)
+    assert frozen.freeze() is frozen
+    assert hash(frozen) == hash(arch_spec)
+    assert frozen == arch_spec and arch_spec == frozen
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+    with pytest.raises(TypeError):
+        frozen.int_constants["code_size"] = 5  # type: ignore
+    with pytest.raises(FrozenInstanceError):
+        frozen.layout = get_layout()  # type: ignore
+
+
+def test_builder():
+    base = ArchSpec(get_layout(), {"spacing": 2.0})
+    builder = ArchSpecBuilder.from_spec(base)
+    builder.layout.add_static_trap(
+        "extra", Grid.from_positions([100.0], [100.0]), fillable=True
+    ).add_special_grid("aom", Grid.from_positions([50.0], [50.0])).mark_cz("left")
+    builder.set_int_constant("code_size", 7).set_float_constant("spacing", 3.0)
+
+    arch_spec = builder.build()
+
+    assert isinstance(arch_spec, FrozenArchSpec)
+    assert arch_spec.layout.fillable == {"left", "extra"}
+    assert arch_spec.layout.has_cz == {"left"}
+    assert arch_spec.layout.get_zone_id(Grid.from_positions([50.0], [50.0])) == "aom"
+    assert arch_spec.float_constants == {"spacing": 3.0}
+    assert arch_spec.int_constants == {"code_size": 7}
+    assert base.float_constants == {"spacing": 2.0}
+    assert "extra" not in base.layout.static_traps
+
+    with pytest.raises(ValueError):
+        builder.layout.add_static_trap("extra", Grid.from_positions([1.0], [1.0]))
+    with pytest.raises(ValueError):
+        builder.layout.mark_local("missing")
+
+    builder.layout.add_static_trap("copy", Grid.from_positions([100.0], [100.0]))
+    with pytest.raises(ValueError):
+        builder.build()
+
+
+def test_layout_equality():
+    layout = get_layout()
+    frozen = layout.freeze()
+    other = get_layout()
+    other.has_cz.add("right")
+
+    # equality is the same whether the layouts are frozen or not
+    assert layout != other and frozen != other and other != frozen
+    assert (layout == other) == (frozen == other.freeze())
+
+
+def test_builder_alias():
+    builder = LayoutBuilder.from_layout(get_layout()).add_alias("right_sites", "right")
+    layout = builder.build()
+
+    assert layout.static_traps["right_sites"] is layout.static_traps["right"]
+    assert layout.get_zone_id(layout.static_traps["right"]) == "right"
+    assert LayoutBuilder.from_layout(layout).build() == layout
+
+    # the aliases are part of the equality and of the hash
+    zone = Grid.from_positions([0.0, 1.0], [0.0])
+    first = Layout({"a": zone, "b": zone}, set(), set(), set(), aliases={"b"})
+    second = Layout({"a": zone, "b": zone}, set(), set(), set(), aliases={"a"})
+    assert first != second and first.freeze() != second.freeze()
+    assert hash(first.freeze()) != hash(second.freeze())
+    assert pickle.loads(pickle.dumps(layout)).aliases == {"right_sites"}
+
+    with pytest.raises(ValueError):
+        builder.add_alias("left", "right")
+    with pytest.raises(ValueError):
+        builder.add_alias("missing_sites", "missing")
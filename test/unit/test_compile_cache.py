@@ -0,0 +1,174 @@
+import importlib
+import sys
+
+import pytest
+
+from bloqade.shuttle import compile_cache
+from bloqade.shuttle.arch import ArchSpec
+from bloqade.shuttle.codegen import TraceInterpreter
+from bloqade.shuttle.compile_cache import (
+    disable_compilation_cache,
+    enable_compilation_cache,
+    get_compilation_cache,
+)
+
+CALLEE = """
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle import action
+from bloqade.shuttle.prelude import tweezer
+
+
+@tweezer
+def callee(x: float):
+    action.set_loc(grid.from_positions([x], [{y}]))
+"""
+
+CONSTANT_CALLEE = """
+from bloqade.geometry.dialects import grid
+
+from bloqade.shuttle import action
+from bloqade.shuttle.prelude import tweezer
+
+Y = {y}
+
+
+@tweezer
+def callee(x: float):
+    action.set_loc(grid.from_positions([x], [Y]))
+"""
+
+CALLER = """
+from bloqade.shuttle import schedule
+from bloqade.shuttle.prelude import move
+
+from {package}.callee import callee
+
+
+@move
+def caller(x: float):
+    schedule.device_fn(callee, [0], [0])(x)
+"""
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    name = f"compile_cache_{tmp_path.name}"
+    root = tmp_path / name
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "callee.py").write_text(CALLEE.format(y=1.0))
+    (root / "caller.py").write_text(CALLER.format(package=name))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    yield name
+
+    disable_compilation_cache()
+    for module in [m for m in sys.modules if m.startswith(name)]:
+        del sys.modules[module]
+
+
+def import_fresh(package: str):
+    for module in [m for m in sys.modules if m.startswith(package + ".")]:
+        del sys.modules[module]
+    importlib.invalidate_caches()
+    return importlib.import_module(f"{package}.caller")
+
+
+def test_disabled_by_default():
+    assert get_compilation_cache() is None
+
+
+def test_hit(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache")
+
+    cold = import_fresh(package)
+    assert cache.cache_info()[:2] == (0, 2)
+
+    warm = import_fresh(package)
+    assert cache.cache_info()[:2] == (2, 2)
+    assert warm.caller is not cold.caller
+    assert warm.caller.print_str() == cold.caller.print_str()
+    assert warm.callee.print_str() == cold.callee.print_str()
+    assert TraceInterpreter(ArchSpec()).run_trace(
+        warm.callee, (1.0,), {}
+    ) == TraceInterpreter(ArchSpec()).run_trace(cold.callee, (1.0,), {})
+
+
+def test_callee_invalidates_caller(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache")
+    import_fresh(package)
+
+    (tmp_path / package / "callee.py").write_text(CALLEE.format(y=2.0))
+    module = import_fresh(package)
+
+    assert cache.cache_info()[:2] == (0, 4)
+    assert "2.0" in module.callee.print_str()
+
+
+def test_arch_spec_option(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache")
+    module = import_fresh(package)
+
+    cache.compile(
+        module.caller.dialects,
+        "move",
+        lambda mt, **_: None,
+        module.caller.similar(),
+        (),
+        {"arch_spec": ArchSpec(float_constants={"a": 1.0})},
+    )
+    assert cache.misses == 3
+
+
+def test_size_cap(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache", max_bytes=1)
+
+    import_fresh(package)
+    assert cache.cache_info().currbytes == 0
+
+    import_fresh(package)
+    assert cache.hits == 0
+
+
+def test_unrelated_edit_keeps_entries(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache")
+    import_fresh(package)
+
+    callee_file = tmp_path / package / "callee.py"
+    callee_file.write_text(CALLEE.format(y=1.0) + "\n\ndef helper():\n    return 1\n")
+    import_fresh(package)
+
+    assert cache.cache_info()[:2] == (2, 2)
+
+
+def test_global_constant_invalidates(package, tmp_path):
+    cache = enable_compilation_cache(tmp_path / "cache")
+    callee_file = tmp_path / package / "callee.py"
+    callee_file.write_text(CONSTANT_CALLEE.format(y=1.0))
+    import_fresh(package)
+
+    callee_file.write_text(CONSTANT_CALLEE.format(y=2.0))
+    module = import_fresh(package)
+
+    assert cache.cache_info()[:2] == (0, 4)
+    assert "2.0" in module.callee.print_str()
+
+
+def test_key_errors_propagate(package, tmp_path, monkeypatch):
+    cache = enable_compilation_cache(tmp_path / "cache")
+    module = import_fresh(package)
+
+    def broken(*_):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(compile_cache, "_stable_repr", broken)
+    with pytest.raises(TypeError):
+        cache.compile(
+            module.caller.dialects,
+            "move",
+            lambda mt, **_: None,
+            module.caller.similar(),
+            (),
+            {},
+        )